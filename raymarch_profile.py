@@ -0,0 +1,743 @@
+import glob
+import json
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from shader_variants import ASSEMBLER_PATH, CHUNKS_PATH, DEFAULT_TIER, load_chunks, load_key_tables
+
+# CPU reference of the raymarcher for tuning step budgets.
+# Ports map() (SDF_LIB shapes, worldEffects with mirror/rotation/crunch/twist, SDF effects,
+# fractalWorld, limited repetition, displacement, ground and fog modes) and mainImage()'s camera
+# and march loop from src/engine/chunks.js to NumPy, evaluating every pixel of a frame at once
+# (rays still marching are compacted each step). Each preset exported by ExportManager.buildPreset
+# gets per-pixel step counts (map() evaluations, as the 'steps' variant counts them), a
+# hit / miss / out-of-steps mask and a step histogram, marched once to the quality tier's
+# MAX_MARCH_STEPS so the same run answers "what does this preset cost at its u_lod_quality" and
+# "which u_lod_quality would it need". Not ported: the UV feedback field (taken at rest, so
+# camera uv = (fragCoord * 2 - resolution) / resolution.y), the cone prepass, lighting and shadows
+# (their loops aren't what u_lod_quality caps), and the baked noise volume (snoise is procedural).
+
+# Hit / miss / ran-out-of-steps codes in the status mask
+MISS, HIT, EXHAUSTED = 0, 1, 2
+
+# SceneUniforms.create() values of the uniforms map() and mainImage() read, for presets missing them
+DEFAULTS = {
+    "u_box_size": 0.1, "u_distance_scale": 1.0, "u_shape_type": 0, "u_shape_mode": 0,
+    "u_lod_quality": 60, "u_lod_scale": 1.0,
+    "u_camera_theta": 0.0, "u_camera_phi": 1.57, "u_camera_distance": 3.0,
+    "u_twist": 0.0, "u_crunch": 0.0, "u_crunch_type": 0, "u_rot_time_sin": 0.0, "u_rot_time_cos": 1.0,
+    "u_mirror_x": 0.0, "u_mirror_y": 0.0, "u_mirror_z": 0.0,
+    "u_displacement_freq": 20.0, "u_displacement_amp": 0.0, "u_displacement_type": 0,
+    "u_sdf_effect_type": 2, "u_sdf_effect_mix": 0.0,
+    "u_fog_scale": 0.5, "u_turb_num": 12.0, "u_turb_amp": 1.1, "u_turb_freq": 2.1, "u_turb_exp": 1.4, "u_turb_time": 0.0,
+    "u_fractal_drift_offset_x": 0.0, "u_fractal_drift_offset_y": 0.0, "u_fractal_drift_offset_z": 0.1,
+    "u_fractal_rot_time_sin": 0.0, "u_fractal_rot_time_cos": 1.0,
+    "u_fractal_halving_x_base": 2.0, "u_fractal_halving_y_base": 2.0, "u_fractal_halving_z_base": 0.5,
+    "u_fractal_halving_freq_x": 0.0, "u_fractal_halving_freq_y": 0.0, "u_fractal_halving_freq_z": 0.0,
+    "u_fractal_halving_phase_x": 0.0, "u_fractal_halving_phase_y": 0.0, "u_fractal_halving_phase_z": 0.0,
+    "u_feedback_distort": 0.025, "u_feedback_noise_scale": 1.0, "u_feedback_harmonics": 4,
+    "u_feedback_lacunarity": 2.0, "u_feedback_gain": 0.5, "u_feedback_exponent": 1.0,
+    "u_feedback_amplitude": 0.5, "u_feedback_seed": 0.0, "u_feedback_layers": 1,
+}
+
+F = np.float32
+
+
+# ==============================================================================
+# 1. GLSL HELPERS (vectors are (x, y, z) tuples of float32 arrays)
+# ==============================================================================
+def length(*c):
+    return np.sqrt(sum(v * v for v in c))
+
+
+def clamp(x, lo, hi):
+    return np.minimum(np.maximum(x, lo), hi)
+
+
+def mix(a, b, t):
+    return a + (b - a) * t
+
+
+def smoothstep(e0, e1, x):
+    t = clamp((x - e0) / (e1 - e0), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def glsl_mod(x, y):
+    return x - y * np.floor(x / y)
+
+
+def glsl_round(x):
+    return np.floor(x + 0.5)
+
+
+def fract(x):
+    return x - np.floor(x)
+
+
+def rot_row(x, y, s, c):
+    """v *= mat2(c, -s, s, c) (rot2D, rotTimeM); mat2 * v is rot_row(x, y, -s, c)."""
+    return x * c - y * s, x * s + y * c
+
+
+def normalize(x, y, z):
+    n = length(x, y, z)
+    return x / n, y / n, z / n
+
+
+# ==============================================================================
+# 2. SDF LIBRARY (MATH_UTILS + SDF_LIB)
+# ==============================================================================
+def sd_box(x, y, z, bx, by, bz):
+    qx, qy, qz = np.abs(x) - bx, np.abs(y) - by, np.abs(z) - bz
+    return length(np.maximum(qx, 0.0), np.maximum(qy, 0.0), np.maximum(qz, 0.0)) + np.minimum(np.maximum(qx, np.maximum(qy, qz)), 0.0)
+
+
+def sd_sphere(x, y, z, s):
+    return length(x, y, z) - s
+
+
+def op_smooth_union(d1, d2, k):
+    h = clamp(0.5 + 0.5 * (d2 - d1) / k, 0.0, 1.0)
+    return mix(d2, d1, h) - k * h * (1.0 - h)
+
+
+def op_smooth_subtraction(d1, d2, k):
+    h = clamp(0.5 - 0.5 * (d2 + d1) / k, 0.0, 1.0)
+    return mix(d2, -d1, h) + k * h * (1.0 - h)
+
+
+def sd_solid_angle(x, y, z, cx, cy, ra):
+    qx, qy = length(x, z), y
+    l = length(qx, qy) - ra
+    k = clamp(qx * cx + qy * cy, 0.0, ra)
+    m = length(qx - cx * k, qy - cy * k)
+    return np.maximum(l, m * np.sign(cy * qx - cx * qy))
+
+
+def mandelbulb(x, y, z, u, iterations):
+    # Per-pixel early exit of the GLSL loop: lanes past r > 2 keep their last r and dr
+    zx, zy, zz = x, y, z
+    dr = np.ones_like(x)
+    r = np.zeros_like(x)
+    alive = np.ones(x.shape, bool)
+    power = 8.0
+    phase = u["u_time"] * 0.2
+    for _ in range(iterations):
+        r = np.where(alive, length(zx, zy, zz), r)
+        alive &= r <= 2.0
+        if not alive.any():
+            break
+        theta = np.arccos(clamp(zz / r, -1.0, 1.0)) * power
+        phi = np.arctan2(zy, zx) * power
+        zr = r ** power
+        dr = np.where(alive, r ** (power - 1.0) * power * dr + 1.0, dr)
+        st = np.sin(theta - phase)
+        zx = np.where(alive, zr * st * np.cos(phi) + x, zx)
+        zy = np.where(alive, zr * np.sin(phi) * st + y, zy)
+        zz = np.where(alive, zr * np.cos(theta - phase) + z, zz)
+    return 0.5 * np.log(r) * r / dr
+
+
+def sd_shape(key, x, y, z, s, u, mode, iterations):
+    if key == "sphereCyl":
+        sphere = sd_sphere(x, y, z, s * 1.25)
+        cyl1 = length(x, z) - s * 0.5
+        cyl2 = length(y, z) - s * 0.5
+        return op_smooth_union(op_smooth_union(sphere, cyl1, 0.01), cyl2, 0.01)
+    if key == "octahedron":
+        return (np.abs(x) + np.abs(y) + np.abs(z) - s) * 0.57735027
+    if key == "crossBox":
+        bar = s * 0.25
+        c = op_smooth_union(sd_box(x, y, z, np.inf, bar, bar), sd_box(x, y, z, s, s, s), 0.001)
+        c = op_smooth_union(sd_box(x, y, z, bar, np.inf, bar), c, 0.001)
+        return op_smooth_union(sd_box(x, y, z, bar, bar, np.inf), c, 0.001)
+    if key == "boxMinusSphere":
+        return op_smooth_subtraction(sd_sphere(x, y, z, s * 1.25), sd_box(x, y, z, s, s, s), 0.001)
+    if key == "carvedBox":
+        box = sd_box(x, y, z, s, s, s)
+        cx, cy, cz = np.abs(x) - s * 0.3, np.abs(y) - s * 0.3, np.abs(z) - s * 0.3
+        carve = np.minimum(np.minimum(np.maximum(cy, cz), np.maximum(cx, cz)), np.maximum(cx, cy)) - s * 0.1
+        return np.maximum(box, -carve)
+    if key == "doubleCross":
+        box = sd_box(x, y, z, s, s, s)
+        box2 = sd_box(x, y, z, s * 5.0, s * 0.25, s * 0.25)
+        box3 = sd_box(x, y, z, s * 0.25, s * 5.0, s * 0.25)
+        return op_smooth_union(box3, op_smooth_union(box2, box, 0.001), 0.001)
+    if key == "sphereGrid":
+        g = s * 1.1
+        q = [v - g * clamp(glsl_round(v / g), -1.0, 1.0) for v in (x, y, z)]
+        return sd_sphere(*q, s * 0.8)
+    if key == "cone":
+        return sd_solid_angle(x, y, z, 0.6, 0.8, s)
+    if key == "flower":
+        # sdFlower sizes itself from u_box_size, not s
+        b = u["u_box_size"]
+        petal = np.abs(np.cos(np.arctan2(z, x) * 3.0))
+        dx = length(x, z) - b * (0.4 + petal * 0.4)
+        dy = np.abs(y) - b * 0.2
+        return np.minimum(np.maximum(dx, dy), 0.0) + length(np.maximum(dx, 0.0), np.maximum(dy, 0.0)) - 0.05
+    if key == "sphere":
+        return sd_sphere(x, y, z, s * 1.25)
+    if key == "doubleCone":
+        cone = sd_solid_angle(x, -y, z, 0.6, 0.8, s * 2.0)
+        flipped = sd_solid_angle(x, y, z, 0.6, 0.8, s * 2.0)
+        return op_smooth_union(cone, flipped, 0.04)
+    if key == "mandelbulb":
+        if mode == 2:
+            return mandelbulb(x / s, y / s, z / s, u, iterations) * s
+        k = mix(0.9, 0.7, s * 2.0)
+        return mandelbulb(x * k, y * k, z * k, u, iterations)
+    return sd_box(x, y, z, s, s, s)
+
+
+# Bounding radii (SDF_BOUNDS) in s = abs(u_box_size); missing shapes are unbounded
+def _mandelbulb_bound(s):
+    k = 0.9 + (0.7 - 0.9) * s * 2.0
+    return 2.0 / k if k > 0.05 else -1.0
+
+
+SDF_BOUNDS = {
+    "box": lambda s: 1.7321 * s,
+    "octahedron": lambda s: s,
+    "boxMinusSphere": lambda s: 1.7321 * s,
+    "carvedBox": lambda s: 1.7321 * s,
+    "doubleCross": lambda s: 5.02 * s,
+    "sphereGrid": lambda s: 2.71 * s,
+    "cone": lambda s: s,
+    "flower": lambda s: 0.83 * s + 0.05,
+    "sphere": lambda s: 1.25 * s,
+    "doubleCone": lambda s: 2.0 * s + 0.01,
+    "mandelbulb": _mandelbulb_bound,
+}
+
+
+# ==============================================================================
+# 3. DOMAIN OPS (CRUNCH_LIB, SDF_EFFECT_LIB, DISPLACE_LIB, DOMAIN_FX)
+# ==============================================================================
+def apply_crunch(key, x, y, z, t, u):
+    c, ut = u["u_crunch"], u["u_time"]
+    if key == "basic":
+        return x + np.sin(t * c + ut * 0.25) * c, y + np.cos(t * c + ut * 0.25) * c, z
+    if key == "timeOscillation":
+        return x, y + np.sin(t * 5.0 + ut * 0.25) * (c * 0.5), z
+    if key == "smoothstepPos":
+        return (x + c + c * smoothstep(0.0, 0.7, np.sin(x + ut * 0.1)),
+                y + c + c * smoothstep(0.0, 0.7, np.cos(y + ut * 0.1)), z)
+    if key == "quantized":
+        e = (smoothstep(-1.0, 1.0, np.sin(t * 5.0 + ut * 0.25)) - 0.5) * (-c * 0.2)
+        return x - e, y + e, z
+    if key == "modulated":
+        amount = c * smoothstep(0.0, 1.0, abs(c)) * 0.3
+        return x + np.sin((t + ut * 0.25) * 3.0) * amount, y + np.cos((t + ut * 0.25) * 3.0) * amount, z
+    if key == "freqMod":
+        return x + np.sin(t * 5.0 + ut * 0.25) * (c * 0.2), y, z
+    if key == "sawtooth":
+        return x + (fract(t * 0.1 + ut * 0.25) - 0.5) * c * 2.0, y, z
+    if key == "triangle":
+        return x + (np.abs(fract(t * 0.1 + ut * 0.25) * 2.0 - 1.0) - 0.5) * c * 2.0, y, z
+    if key == "square":
+        return (x + smoothstep(-1.0, 1.0, np.sin(t * 0.5 + ut * 0.25)) * c,
+                y + smoothstep(-1.0, 1.0, np.cos(t * 0.5 + ut * 0.25)) * c, z)
+    if key == "expDecay":
+        return x + np.sin(t * (c * 1.5) + ut * 0.25) * (c * 0.7), y, z
+    if key == "smoothPulse":
+        return (x + smoothstep(0.0, 1.0, np.sin(t + ut * 0.25) * 0.5 + 0.5) * c,
+                y + smoothstep(0.0, 1.0, np.cos(t + ut * 0.25) * 0.5 + 0.5) * c, z)
+    if key == "highFreq":
+        return x + np.sin(t * (c * 5.0) + ut * 0.25) * (c * 0.25), y + np.cos(t * (c * 5.0) + ut * 0.25) * (c * 0.25), z
+    mx, my = np.cos(ut * 0.2), np.sin(ut * 0.2)
+    if key == "timeModY":
+        return x, y + np.sin(t * (my + 1.0) * 0.5) * c, z
+    if key == "timeModXY":
+        return x + np.cos(t * (my + 1.0) * 0.5) * c, y + np.sin(t * (mx + 1.0) * 0.5) * c, z
+    if key == "timeModScale":
+        return x * mix(1.0, np.cos(t * (my + 1.0) * 0.5) * c, c), y * mix(1.0, np.sin(t * (mx + 1.0) * 0.5) * c, c), z
+    return x, y, z
+
+
+def apply_sdf_effect(key, x, y, z, l, ld, u):
+    ut = u["u_time"]
+    if key == "sineWave":
+        return np.sin(x * 2.0) * 0.5, np.sin(y * 2.0) * 0.5, np.sin(z * 2.0) * 0.5
+    if key == "zLengthMod":
+        return x, y, z * np.sin(l * 0.25) * 0.2
+    if key == "xyWaveInterference":
+        k = (np.sin(l * 0.5) * np.cos(ld * 0.5) - 0.4) * 0.75
+        return x * k, y * k, z
+    if key == "absLengthSine":
+        return np.abs(l + 0.125 * np.sin(l - 0.25)), y, z
+    if key == "yModuloSine":
+        return x, np.abs(glsl_mod(np.sin(y) * 4.0 - 0.5, 2.0)), z
+    if key == "xCosWarp":
+        return 0.75 * np.cos(x), y, z
+    if key == "distanceField":
+        return ld, y, z
+    if key == "minDistBox":
+        return length(*(np.minimum(np.abs(v) - 5.0, 0.0) for v in (x, y, z))), y, z
+    if key == "xTimeSine":
+        return x * np.sin(l + ut * 0.1) * 0.4, y, z
+    if key == "yExpDecay":
+        return x, y * np.sin(l * 5.0 + ut * 0.1) * np.exp(-np.abs(y) * 0.2), z
+    if key == "zTimeMod":
+        pulse = 0.8 + 0.2 * np.sin(l * 2.0 - ut * 0.5)
+        a = np.sin(l - ut * 0.3) * 0.5
+        px, py = rot_row(x * pulse, y * pulse, np.sin(a), np.cos(a))
+        return px, py, z * pulse
+    return x, y, z
+
+
+def apply_displace(key, x, y, z, u):
+    f, amp, ut = u["u_displacement_freq"], u["u_displacement_amp"], u["u_time"]
+    if key == "cellNoise":
+        cell = [np.floor(v * f) for v in (x, y, z)]
+        n = fract(np.sin(cell[0] * 127.1 + cell[1] * 311.7 + cell[2] * 74.7) * 43758.5453)
+        return np.floor(n * 3.0) / 3.0 * (amp * 0.2)
+    if key == "radialRipple":
+        return np.sin(length(x, z) * f - ut * 0.5) * amp
+    if key == "xyWave":
+        return np.sin(y * f + ut) * np.cos(x * f * 0.5) * amp
+    if key == "voronoiCell":
+        scaled = [v * f for v in (x, y, z)]
+        cell = [np.floor(v) for v in scaled]
+        n = fract(np.sin(cell[0] * 12.9898 + cell[1] * 78.233 + cell[2] * 37.719) * 43758.5453)
+        dist = sum(np.abs(s - c - 0.5) for s, c in zip(scaled, cell))
+        return (n - 0.5) * dist * amp * 0.25
+    if key == "angularSpiral":
+        return np.abs(np.sin((np.arctan2(z, x) + ut * 0.2) * 3.0 + length(x, z) * f)) * (amp * 0.2)
+    if key == "sineGrid":
+        return np.abs(np.sin(x * f + ut * 0.2) * np.sin(y * f * 0.7 + ut * 0.26) * np.sin(z * f * 1.1 + ut * 0.16)) * amp
+    if key == "expDecayWave":
+        dist = length(x, y, z)
+        return np.sin(dist * (f * 0.5) - ut * 0.5) * np.exp(-dist * 0.5) * amp * u["u_distance_scale"]
+    offset = (ut * 0.15) * 0.05  # timeOffset
+    return np.sin(y * f + offset + ut * 0.2) * np.cos(z * f + offset + ut * 0.2) * amp
+
+
+def world_effects(x, y, z, t, u, keys):
+    ds = u["u_distance_scale"]
+    x, y, z = x * ds, y * ds, z * ds
+    if u["u_mirror_x"] > 0.5:
+        x = np.abs(x)
+    if u["u_mirror_y"] > 0.5:
+        y = np.abs(y)
+    if u["u_mirror_z"] > 0.5:
+        z = np.abs(z)
+    x, y = rot_row(x, y, -u["u_fractal_rot_time_sin"], u["u_fractal_rot_time_cos"])
+    if abs(u["u_crunch"]) > 0.001:
+        x, y, z = apply_crunch(keys["crunch"], x, y, z, t, u)
+    if u["u_twist"] != 0.0:
+        a = t * u["u_twist"]
+        x, y = rot_row(x, y, np.sin(a), np.cos(a))
+    return x, y, z
+
+
+def scene_warp(x, y, z, u, keys):
+    l = length(x, y, z)
+    ld = length(np.abs(x) - 2.0, np.abs(y) - 2.0, np.abs(z) - 2.0)
+    e = apply_sdf_effect(keys["sdf_effect"], x, y, z, l, ld, u)
+    m = u["u_sdf_effect_mix"]
+    return mix(x, e[0], m), mix(y, e[1], m), mix(z, e[2], m)
+
+
+def fractal_world(x, y, z, u):
+    out = []
+    for axis, v in zip("xyz", (x, y, z)):
+        v = v - u[f"u_fractal_drift_offset_{axis}"]
+        freq = u[f"u_fractal_halving_freq_{axis}"]
+        h = u[f"u_fractal_halving_{axis}_base"] * mix(1.0, np.sin(freq + u[f"u_fractal_halving_phase_{axis}"]), freq)
+        out.append(glsl_mod(v, h * 0.5) - h * 0.25)
+    return tuple(out)
+
+
+# ==============================================================================
+# 4. NOISE, GROUND AND FOG (NOISE_SOURCE.procedural, NOISE_LIB, GROUND_FX, FOG_FX)
+# ==============================================================================
+def _permute(v):
+    return glsl_mod((v * 34.0 + 1.0) * v, 289.0)
+
+
+def snoise(x, y, z):
+    """Simplex noise, component-wise as in NOISE_SOURCE.procedural; x, y, z are (N,) arrays."""
+    v = np.stack([x, y, z], -1)
+    i = np.floor(v + v.sum(-1, keepdims=True) / 3.0)
+    x0 = v - i + i.sum(-1, keepdims=True) / 6.0
+    g = (x0[:, [1, 2, 0]] <= x0).astype(v.dtype)  # step(x0.yzx, x0.xyz)
+    l = 1.0 - g
+    i1 = np.minimum(g, l[:, [2, 0, 1]])
+    i2 = np.maximum(g, l[:, [2, 0, 1]])
+    x1 = x0 - i1 + 1.0 / 6.0
+    x2 = x0 - i2 + 1.0 / 3.0
+    x3 = x0 - 0.5
+    i = glsl_mod(i, 289.0)
+    zero, one = np.zeros_like(x), np.ones_like(x)
+    corner = lambda k: np.stack([zero, i1[:, k], i2[:, k], one], -1)
+    p = _permute(_permute(_permute(i[:, 2:3] + corner(2)) + i[:, 1:2] + corner(1)) + i[:, 0:1] + corner(0))
+
+    n_ = 1.0 / 7.0
+    ns = np.array([n_ * 2.0, n_ * 0.5 - 1.0, n_], v.dtype)  # n_ * D.wyz - D.xzx
+    j = p - 49.0 * np.floor(p * ns[2] * ns[2])
+    x_ = np.floor(j * ns[2])
+    y_ = np.floor(j - 7.0 * x_)
+    gx = x_ * ns[0] + ns[1]
+    gy = y_ * ns[0] + ns[1]
+    h = 1.0 - np.abs(gx) - np.abs(gy)
+    b0 = np.stack([gx[:, 0], gx[:, 1], gy[:, 0], gy[:, 1]], -1)
+    b1 = np.stack([gx[:, 2], gx[:, 3], gy[:, 2], gy[:, 3]], -1)
+    s0 = np.floor(b0) * 2.0 + 1.0
+    s1 = np.floor(b1) * 2.0 + 1.0
+    sh = -(h <= 0.0).astype(v.dtype)
+    a0 = b0[:, [0, 2, 1, 3]] + s0[:, [0, 2, 1, 3]] * sh[:, [0, 0, 1, 1]]
+    a1 = b1[:, [0, 2, 1, 3]] + s1[:, [0, 2, 1, 3]] * sh[:, [2, 2, 3, 3]]
+    grads = [np.stack([a0[:, 0], a0[:, 1], h[:, 0]], -1), np.stack([a0[:, 2], a0[:, 3], h[:, 1]], -1),
+             np.stack([a1[:, 0], a1[:, 1], h[:, 2]], -1), np.stack([a1[:, 2], a1[:, 3], h[:, 3]], -1)]
+    grads = [gr * (1.79284291400159 - 0.85373472095314 * (gr * gr).sum(-1, keepdims=True)) for gr in grads]
+
+    offsets = [x0, x1, x2, x3]
+    m = np.maximum(0.6 - np.stack([(o * o).sum(-1) for o in offsets], -1), 0.0)
+    m = m * m
+    dots = np.stack([(gr * o).sum(-1) for gr, o in zip(grads, offsets)], -1)
+    return 42.0 * (m * m * dots).sum(-1)
+
+
+def fbm_noise_feedback(x, y, z, gain, harmonics, lacunarity, amp, max_octaves):
+    iterations = int(min(max(float(harmonics), 1.0), min(5.0, float(max_octaves))))
+    freq, a, t = 1.0, 1.0, 0.0
+    for _ in range(iterations):
+        t = t + a * snoise(x * freq, y * freq, z * freq)
+        freq *= lacunarity
+        a *= gain
+    return t * amp
+
+
+def sd_ground(x, y, z, u, caps):
+    gz = z - u["u_fractal_drift_offset_z"] * 10.0
+    f = max(0.1, u["u_feedback_distort"] * 2.0)
+    amp = u["u_feedback_amplitude"] * 2.0
+    scale = 1.0 / u["u_feedback_noise_scale"] * 0.2
+    h = np.zeros_like(x)
+    for i in range(min(int(u["u_feedback_layers"]), caps["MAX_FEEDBACK_LAYERS"])):
+        h = h + np.sin(x * f) * np.cos(gz * f) * amp
+        seed = u["u_feedback_seed"] + i * 10.0
+        h = h + fbm_noise_feedback(x * scale + seed, gz * scale, np.zeros_like(x), u["u_feedback_gain"],
+                                   u["u_feedback_harmonics"], u["u_feedback_lacunarity"], u["u_feedback_amplitude"],
+                                   caps["MAX_NOISE_OCTAVES"])
+        h = np.sign(h) * np.abs(h) ** u["u_feedback_exponent"]
+    return y - (h - 2.0)
+
+
+def fog(x, y, z, t, u, caps):
+    px, py, pz = x * 0.75, y * 1.25, z * 1.25  # p * 1.25, then pos.x *= 0.6
+    freq, amp, scale = u["u_turb_freq"], u["u_turb_amp"], u["u_fog_scale"]
+    step = np.array([[0.6, 0.8], [-0.8, 0.6]])  # mat2(0.6, -0.8, 0.8, 0.6), rows x columns
+    rot = step.copy()
+    for n in range(caps["MAX_TURB_OCTAVES"]):
+        if n >= u["u_turb_num"]:
+            break
+        ry = pz * rot[0, 1] + py * rot[1, 1]  # (pos.zy * rot).y
+        phase = freq * ry + u["u_turb_time"] + n
+        wave = amp * np.sin(phase * scale) / freq
+        k = min(n, 1)  # rot[int(i)] is out of range past i = 1; WebGL (ANGLE) clamps the index
+        px, py = px + rot[0, k] * wave, py + rot[1, k] * wave
+        pz = pz + amp * np.sin(freq * px + u["u_turb_time"] * 0.7 + n * scale) / freq
+        rot = rot @ step
+        freq *= u["u_turb_exp"]
+    clamped = np.minimum(py, -(py * y) * 0.05)
+    adjusted = 3.0 - 0.2 * t + clamped
+    return 0.02 + 0.2 * np.maximum(adjusted * 2.0, -adjusted * 0.6)
+
+
+# ==============================================================================
+# 5. MAP + MARCH (MAP_FX, SHAPE_MODE_FX, CAMERA_FX, MAIN_FX, BOUNDS_FX)
+# ==============================================================================
+class Profiler:
+    def __init__(self, root=".", quality=DEFAULT_TIER):
+        chunks = load_chunks(os.path.join(root, CHUNKS_PATH))
+        tiers = chunks["QUALITY_TIERS"]
+        self.quality = quality if quality in tiers else DEFAULT_TIER
+        self.caps = {k: int(v) for k, v in (line.split()[1:] for line in tiers[self.quality].strip().splitlines())}
+        self.tables = load_key_tables(os.path.join(root, ASSEMBLER_PATH))
+
+    def key(self, getter, index):
+        table = self.tables[getter]
+        index = int(index)
+        return table[index] if 0 <= index < len(table) else table[0]
+
+    def map(self, x, y, z, t, u, keys):
+        mode = keys["mode"]
+        x, y, z = world_effects(x, y, z, t, u, keys)
+        if u["u_sdf_effect_mix"] > 0.01:
+            x, y, z = scene_warp(x, y, z, u, keys)
+        if mode == "fog":
+            return fog(x, y, z, t, u, self.caps)
+        if mode == "fractal":
+            x, y, z = fractal_world(x, y, z, u)
+        x, y = rot_row(x, y, u["u_rot_time_sin"], u["u_rot_time_cos"])
+
+        s, shape, iterations = u["u_box_size"], keys["shape"], self.caps["MAX_FRACTAL_ITERATIONS"]
+        mode_id = int(u["u_shape_mode"])
+        if mode == "single":
+            d = sd_shape(shape, x * 0.65, y * 0.65, z * 0.65, s, u, mode_id, iterations) / 0.65
+        elif mode == "repeat":
+            q = [v * 0.65 - 0.25 * clamp(glsl_round(v * 0.65 / 0.25), -1.0, 1.0) for v in (x, y, z)]
+            d = sd_shape(shape, *q, s, u, mode_id, iterations) / 0.65
+        elif mode == "fractal":
+            d = sd_shape(shape, x, y, z, s, u, mode_id, iterations)
+        elif mode == "ground":
+            d = sd_ground(x, y, z, u, self.caps)
+        else:  # image
+            d = np.zeros_like(x)
+
+        if u["u_displacement_amp"] > 0.001:
+            d = d + apply_displace(keys["displacement"], x, y, z, u)
+        return d
+
+    def bound_radius(self, u, keys):
+        if keys["mode"] not in ("single", "repeat") or keys["shape"] not in SDF_BOUNDS:
+            return -1.0
+        if abs(u["u_crunch"]) > 0.001 or u["u_sdf_effect_mix"] > 0.01:
+            return -1.0
+        r = SDF_BOUNDS[keys["shape"]](abs(u["u_box_size"]))
+        if r < 0.0:
+            return -1.0
+        r = r / 0.65 if keys["mode"] == "single" else (r + 0.4331) / 0.65
+        r += abs(u["u_displacement_amp"]) * max(1.0, u["u_distance_scale"])
+        return r * 1.02 / u["u_distance_scale"] + 0.01
+
+    def camera(self, u, width, height):
+        theta, dist = u["u_camera_theta"], u["u_camera_distance"]
+        phi = min(max(u["u_camera_phi"], 0.01), 3.04159)
+        ro = np.array([dist * np.sin(phi) * np.sin(-theta), dist * np.cos(phi), dist * np.sin(phi) * np.cos(-theta)], F)
+        forward = -ro / np.linalg.norm(ro)
+        right = np.cross(forward, [0.0, 1.0, 0.0])
+        right /= np.linalg.norm(right)
+        up = np.cross(right, forward)
+
+        fx, fy = np.meshgrid(np.arange(width, dtype=F) + 0.5, np.arange(height, dtype=F) + 0.5)
+        ux = (fx * 2.0 - width) / height
+        uy = (fy * 2.0 - height) / height
+        rd = normalize(*(ux * right[k] + uy * up[k] + 1.5 * forward[k] for k in range(3)))
+        return ro, [c.ravel().astype(F) for c in rd]
+
+    def march(self, u, width, height, bounds=False):
+        """Steps, status and final t per pixel (row 0 at the bottom, as fragCoord), capped at MAX_MARCH_STEPS."""
+        keys = {
+            "shape": self.key("getShapeKey", u["u_shape_type"]),
+            "mode": self.key("getShapeModeKey", u["u_shape_mode"]),
+            "crunch": self.key("getCrunchKey", u["u_crunch_type"]),
+            "displacement": self.key("getDisplaceKey", u["u_displacement_type"]),
+            "sdf_effect": self.key("getSdfEffectKey", u["u_sdf_effect_type"]),
+        }
+        ro, rd = self.camera(u, width, height)
+        n = width * height
+        ds = u["u_distance_scale"]
+        eps = max(0.001, 0.001 / ds)
+        t_far = 100.0 / ds
+        t = np.zeros(n, F)
+        t_end = np.full(n, t_far, F)
+
+        r = self.bound_radius(u, keys) if bounds else -1.0
+        if r >= 0.0:
+            b = sum(ro[k] * rd[k] for k in range(3))
+            h = b * b - float(ro @ ro) + r * r
+            inside = h >= 0.0
+            h = np.sqrt(np.maximum(h, 0.0))
+            t = np.where(inside, np.maximum(-b - h, 0.0), t_far).astype(F)
+            t_end = np.where(inside, np.minimum(-b + h, t_far), 0.0).astype(F)
+
+        steps = np.zeros(n, np.uint16)
+        status = np.full(n, EXHAUSTED, np.uint8)
+        status[t > t_end] = MISS
+        active = np.flatnonzero(t <= t_end)
+        for _ in range(self.caps["MAX_MARCH_STEPS"]):
+            if active.size == 0:
+                break
+            ta = t[active]
+            d = self.map(*(ro[k] + rd[k][active] * ta for k in range(3)), ta, u, keys).astype(F)
+            steps[active] += 1
+            ta = ta + d
+            t[active] = ta
+            hit = d < eps
+            miss = ~hit & (ta > t_end[active])
+            status[active[hit]] = HIT
+            status[active[miss]] = MISS
+            active = active[~(hit | miss)]
+
+        shape = (height, width)
+        return steps.reshape(shape), status.reshape(shape), t.reshape(shape), keys
+
+
+# ==============================================================================
+# 6. REPORTING
+# ==============================================================================
+def summarize(steps, status, lod, coverage, bins, cap):
+    """Frame stats at the preset's u_lod_quality, plus the step cap its hits need."""
+    needed = steps[status == HIT]
+    # A ray that needs more than lod evaluations stops at lod without finishing
+    capped = np.minimum(steps, lod)
+    out_of_steps = (status == EXHAUSTED) | ((status != EXHAUSTED) & (steps > lod))
+    hist, edges = np.histogram(capped, bins=bins, range=(0, max(lod, 1)))
+    n = steps.size
+    return {
+        "mean_steps": round(float(capped.mean()), 2),
+        "p50_steps": int(np.percentile(capped, 50)),
+        "p95_steps": int(np.percentile(capped, 95)),
+        "max_steps": int(capped.max()),
+        "hit": round(float(((status == HIT) & (steps <= lod)).sum()) / n, 4),
+        "miss": round(float(((status == MISS) & (steps <= lod)).sum()) / n, 4),
+        "exhausted": round(float(out_of_steps.sum()) / n, 4),
+        "exhausted_at_cap": round(float((status == EXHAUSTED).sum()) / n, 4),
+        "suggested_lod": int(min(cap, max(1, np.ceil(np.quantile(needed, coverage))))) if needed.size else None,
+        "histogram": {"edges": [round(float(e), 1) for e in edges], "counts": hist.tolist()},
+    }
+
+
+def heatmap(steps, status, cap):
+    """RGB image of step counts (black -> blue -> yellow -> red), out-of-steps rays in magenta, top row first."""
+    v = np.clip(steps.astype(np.float32) / cap, 0.0, 1.0)[::-1]
+    rgb = np.stack([np.clip(v * 3.0 - 1.0, 0, 1), np.clip(v * 3.0 - 0.5, 0, 1) * np.clip(2.5 - v * 2.5, 0, 1), np.clip(v * 4.0, 0, 1) * np.clip(1.6 - v * 2.0, 0, 1)], -1)
+    rgb[status[::-1] == EXHAUSTED] = (1.0, 0.0, 1.0)
+    return (rgb * 255.0 + 0.5).astype(np.uint8)
+
+
+def write_png(path, rgb):
+    height, width, _ = rgb.shape
+    raw = b"".join(b"\x00" + rgb[y].tobytes() for y in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+# --- POOL WORKERS ---
+_worker = {}
+
+
+def _init_worker(root, options):
+    _worker["profiler"] = Profiler(root, options["quality"])
+    _worker["options"] = options
+
+
+def _profile_one(path):
+    profiler, o = _worker["profiler"], _worker["options"]
+    try:
+        with open(path, encoding="utf-8") as f:
+            preset = json.load(f)
+        u = {**DEFAULTS, **{k: v for k, v in preset.get("uniforms", {}).items() if isinstance(v, (int, float))}, "u_time": o["time"]}
+        # The fractal rotation angle is saved as a phase; ExportManager.applyPreset derives sin/cos from it
+        if "u_fractal_rot_phase" in u:
+            u["u_fractal_rot_time_sin"] = float(np.sin(u["u_fractal_rot_phase"]))
+            u["u_fractal_rot_time_cos"] = float(np.cos(u["u_fractal_rot_phase"]))
+        t0 = time.perf_counter()
+        with np.errstate(all="ignore"):
+            steps, status, _, keys = profiler.march(u, o["width"], o["height"], o["bounds"])
+        cap = profiler.caps["MAX_MARCH_STEPS"]
+        lod = min(cap, max(1, int(u["u_lod_quality"] * u["u_lod_scale"])))
+        record = {
+            "preset": preset.get("name") or os.path.splitext(os.path.basename(path))[0],
+            "path": path,
+            "shape": keys["shape"],
+            "mode": keys["mode"],
+            "lod_quality": lod,
+            "quality": profiler.quality,
+            "resolution": [o["width"], o["height"]],
+            **summarize(steps, status, lod, o["coverage"], o["bins"], cap),
+            "march_ms": round((time.perf_counter() - t0) * 1000, 1),
+        }
+        record["over_budget"] = record["mean_steps"] > o["max_mean_steps"] or record["exhausted"] > o["max_exhausted"]
+        if o["maps"]:
+            base = os.path.join(o["maps"], record["preset"])
+            np.savez_compressed(f"{base}.steps.npz", steps=steps, status=status)
+            write_png(f"{base}.steps.png", heatmap(steps, status, cap))
+        return record
+    except (OSError, ValueError) as err:
+        return {"path": path, "error": str(err)}
+
+
+# ==============================================================================
+# 7. CLI
+# ==============================================================================
+def find_presets(paths):
+    files = []
+    for p in paths:
+        files.extend(sorted(glob.glob(os.path.join(p, "**", "*.json"), recursive=True)) if os.path.isdir(p) else [p])
+    return files
+
+
+def run(args):
+    root = os.getcwd()
+    presets = find_presets(args.presets)
+    if not presets:
+        print("❌ No preset files found")
+        return 1
+    if args.maps:
+        os.makedirs(args.maps, exist_ok=True)
+    options = {
+        "quality": args.quality, "width": args.width, "height": args.height, "time": args.time,
+        "bounds": args.bounds, "coverage": args.coverage, "bins": args.bins, "maps": args.maps,
+        "max_mean_steps": args.max_mean_steps, "max_exhausted": args.max_exhausted,
+    }
+    print(f"🔦 Marching {len(presets)} presets at {args.width}x{args.height}, '{args.quality}' tier ({args.jobs or os.cpu_count()} workers)")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs or None, initializer=_init_worker, initargs=(root, options)) as pool:
+        records = list(pool.map(_profile_one, presets, chunksize=4))
+
+    failed = [r for r in records if "error" in r]
+    records = [r for r in records if "error" not in r]
+    with open(args.out, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    print("-" * 30)
+    print(f"📄 Manifest: {args.out} ({len(records)} presets, {time.perf_counter() - t0:.1f}s)")
+
+    # Per-shape u_lod_quality default: the median of what each preset's hits need
+    by_shape = {}
+    for r in records:
+        by_shape.setdefault(r["shape"], []).append(r)
+    for shape, rows in sorted(by_shape.items()):
+        lods = [r["suggested_lod"] for r in rows if r["suggested_lod"] is not None]
+        lod = int(np.median(lods)) if lods else None
+        over = sum(r["over_budget"] for r in rows)
+        print(f"📐 {shape:<15} u_lod_quality ~{lod if lod is not None else '-':>4} "
+              f"(p{args.coverage * 100:g} of hits, {len(rows)} presets), mean steps {np.mean([r['mean_steps'] for r in rows]):.1f}"
+              f"{f', {over} over budget' if over else ''}")
+
+    for r in failed:
+        print(f"❌ {r['path']}: {r['error']}")
+    over = [r for r in records if r["over_budget"]]
+    for r in over:
+        print(f"🔴 {r['preset']}: mean {r['mean_steps']} steps, {r['exhausted'] * 100:.1f}% out of steps at u_lod_quality {r['lod_quality']}")
+    return 1 if failed or (over and args.strict) else 0
+
+
+def add_arguments(parser):
+    parser.add_argument("presets", nargs="+", help="preset JSON files (ExportManager.buildPreset) or directories of them")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--quality", default=DEFAULT_TIER, help="quality tier whose loop caps apply")
+    parser.add_argument("--time", type=float, default=0.0, help="u_time of the marched frame")
+    parser.add_argument("--bounds", action="store_true", help="start and stop rays at the bounding sphere (?bounds=1)")
+    parser.add_argument("--coverage", type=float, default=0.99,
+                        help="fraction of hits the suggested u_lod_quality has to finish")
+    parser.add_argument("--bins", type=int, default=32, help="step histogram bins")
+    parser.add_argument("--max-mean-steps", type=float, default=64.0,
+                        help="flag presets averaging more map() evaluations per pixel")
+    parser.add_argument("--max-exhausted", type=float, default=0.05,
+                        help="flag presets with more of their rays running out of steps")
+    parser.add_argument("--maps", help="directory for per-preset step heatmaps (.steps.png) and steps/status arrays (.steps.npz)")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: all cores)")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero on over-budget presets")
+    parser.add_argument("--out", default="raymarch_profile.jsonl")
+    return parser
@@ -0,0 +1,477 @@
+import { spawn, execSync } from 'node:child_process';
+import { once } from 'node:events';
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { parseArgs } from 'node:util';
+import { performance } from 'node:perf_hooks';
+import WebSocket from 'ws';
+import { SyncProtocol } from '../src/managers/SyncProtocol.js';
+
+// Load generator / latency benchmark for the sync relay (server/server.js). Starts the relay as a
+// child process, connects simulated controllers and displays that speak SyncManager's protocol, and
+// writes machine-readable results for comparing commits.
+//
+//   node server/bench.js --scenario all --rooms 20 --displays 20 --out bench/HEAD.json
+//   node server/bench.js --scenario steady --protocol binary --workers 4 --compare bench/main.json
+//
+// Scenarios
+//   steady     MIDI-like bursts from one controller per room, every display reading promptly
+//   slow       as steady, but a fraction of displays stop reading for seconds at a time
+//   reconnect  every client drops at once and comes back after exactly 3 s (SyncManager.onclose);
+//              --reconnect-policy jitter spreads the reconnects for comparison
+//
+// Latency is measured end to end (controller send -> display receive) on one clock: JSON messages
+// carry a `t` field, binary frames carry (controller, frame) in an extra vec2 slot, u_bench_frame.
+// (The relay's per-room sequence number follows arrival order, which with several controllers per
+// room isn't any one controller's send order.)
+const { values: args } = parseArgs({
+    options: {
+        scenario: { type: 'string', default: 'all' },          // steady | slow | reconnect | all
+        rooms: { type: 'string', default: '20' },
+        controllers: { type: 'string', default: '1' },          // per room
+        displays: { type: 'string', default: '20' },            // per room
+        duration: { type: 'string', default: '20' },            // seconds per scenario
+        rate: { type: 'string', default: '250' },               // peak CC messages/s per controller during a burst
+        protocol: { type: 'string', default: 'json' },          // json | binary
+        'slow-fraction': { type: 'string', default: '0.1' },
+        'slow-pause': { type: 'string', default: '5000' },      // ms a slow display stops reading
+        'reconnect-policy': { type: 'string', default: 'fixed' }, // fixed (3 s, like SyncManager) | jitter
+        workers: { type: 'string', default: '1' },
+        port: { type: 'string', default: '8181' },
+        'metrics-port': { type: 'string', default: '9191' },
+        out: { type: 'string' },
+        compare: { type: 'string' }
+    }
+});
+
+const config = {
+    rooms: Number(args.rooms),
+    controllers: Number(args.controllers),
+    displays: Number(args.displays),
+    durationS: Number(args.duration),
+    rate: Number(args.rate),
+    protocol: args.protocol,
+    slowFraction: Number(args['slow-fraction']),
+    slowPauseMs: Number(args['slow-pause']),
+    reconnectPolicy: args['reconnect-policy'],
+    workers: Number(args.workers)
+};
+const URL_BASE = `ws://127.0.0.1:${args.port}`;
+const METRICS_URL = `http://127.0.0.1:${args['metrics-port']}/metrics.json`;
+const RECONNECT_MS = 3000; // SyncManager.onclose
+const SEQ_WINDOW = 8192;   // binary send times kept per controller
+
+// A table shaped like SceneUniforms.create: ~150 scalars and a few vectors
+const UNIFORMS = [
+    ...Array.from({ length: 140 }, (_, i) => [`u_bench_${i}`, 1]),
+    ...Array.from({ length: 8 }, (_, i) => [`u_bench_vec${i}`, 3])
+];
+// Bench-only slot on every binary frame: x = controller index in its room, y = its frame number
+const FRAME_UNIFORM = 'u_bench_frame';
+const TABLE = SyncProtocol.tableFrom([...UNIFORMS, [FRAME_UNIFORM, 2]]);
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+const expRandom = (mean) => -Math.log(1 - Math.random()) * mean;
+const pick = (list) => list[Math.floor(Math.random() * list.length)];
+
+// --- STATS ---
+class Reservoir {
+    constructor(size = 200000) {
+        this.values = new Float64Array(size);
+        this.count = 0;
+    }
+
+    add(v) {
+        if (this.count < this.values.length) this.values[this.count] = v;
+        else {
+            const j = Math.floor(Math.random() * (this.count + 1));
+            if (j < this.values.length) this.values[j] = v;
+        }
+        this.count++;
+    }
+
+    summary() {
+        const n = Math.min(this.count, this.values.length);
+        if (n === 0) return { samples: 0 };
+        const sorted = this.values.slice(0, n).sort();
+        const at = (p) => +sorted[Math.min(n - 1, Math.floor(p * n))].toFixed(3);
+        return { samples: this.count, p50: at(0.5), p90: at(0.9), p99: at(0.99), max: +sorted[n - 1].toFixed(3) };
+    }
+}
+
+function newStats() {
+    return {
+        sent: 0, expected: 0, delivered: 0,
+        latency: new Reservoir(), latencySlow: new Reservoir(),
+        resync: new Reservoir(), snapshots: 0, coalescedFrames: 0,
+        dropAt: null, lastResyncAt: null,
+        connectFailures: 0, disconnects: 0, maxBacklogged: 0
+    };
+}
+
+// --- RELAY ---
+async function startRelay() {
+    const child = spawn(process.execPath, [
+        new URL('./server.js', import.meta.url).pathname,
+        '--port', args.port, '--workers', args.workers, '--metrics-port', args['metrics-port']
+    ], { stdio: ['ignore', 'pipe', 'inherit'] });
+    let output = '';
+    child.stdout.on('data', chunk => { output += chunk; });
+    while (!output.includes('WebSocket server running')) {
+        if (child.exitCode !== null) throw new Error(`Relay exited early:\n${output}`);
+        await sleep(50);
+    }
+    await sleep(config.workers > 1 ? 1000 : 100); // workers fork after the primary logs
+    return child;
+}
+
+async function stopRelay(child) {
+    child.kill('SIGTERM');
+    if (child.exitCode === null) await once(child, 'exit');
+}
+
+async function relayMetrics() {
+    try {
+        const res = await fetch(METRICS_URL);
+        return await res.json();
+    } catch {
+        return null;
+    }
+}
+
+// CPU (all workers) as percent of one core between two snapshots
+function cpuPercent(a, b, wallMs) {
+    const total = (m) => m.workers.reduce((s, w) => s + w.cpu.user + w.cpu.system, 0);
+    return +(((total(b) - total(a)) / 1000 / wallMs) * 100).toFixed(1);
+}
+
+// --- CLIENTS ---
+class Room {
+    constructor(id) {
+        this.id = id;
+        this.sendTimes = new Float64Array(SEQ_WINDOW * config.controllers); // binary: (controller, frame) -> send time
+        this.lastSent = 0;
+        this.displays = [];
+        this.controllers = [];
+    }
+}
+
+function connect(room, mode, onOpen, onMessage, client) {
+    const ws = new WebSocket(`${URL_BASE}/?room=${room.id}&mode=${mode}`);
+    client.ws = ws;
+    ws.on('open', () => {
+        client.connected = true;
+        client.connectedAt = performance.now();
+        ws.send(JSON.stringify({ type: 'hello', binary: config.protocol === 'binary', schema: TABLE.hash }));
+        onOpen(ws);
+    });
+    ws.on('message', onMessage);
+    ws.on('error', () => {
+        if (!client.connected) client.stats.connectFailures++;
+    });
+    ws.on('close', () => {
+        const wasConnected = client.connected;
+        client.connected = false;
+        if (wasConnected) client.stats.disconnects++;
+        if (!client.closing) setTimeout(() => connect(room, mode, onOpen, onMessage, client), client.reconnectDelay());
+    });
+    return client;
+}
+
+function reconnectDelay() {
+    return config.reconnectPolicy === 'jitter' ? RECONNECT_MS * (0.5 + Math.random()) : RECONNECT_MS;
+}
+
+function createDisplay(room, stats, slow) {
+    const client = { room, stats, slow, connected: false, synced: false, lastReceive: performance.now(), lastLatency: 0, reconnectDelay };
+    const latency = slow ? stats.latencySlow : stats.latency;
+
+    const onOpen = (ws) => {
+        client.synced = false;
+        ws.send(JSON.stringify({ type: 'request_state' }));
+    };
+    const onMessage = (data, isBinary) => {
+        const now = performance.now();
+        client.lastReceive = now;
+        if (isBinary) {
+            const header = SyncProtocol.readHeader(data);
+            let sendSlot = -1;
+            // Decode cost, as a display pays it
+            SyncProtocol.forEachUpdate(TABLE, data, (name, size, values, o) => {
+                if (name === FRAME_UNIFORM) sendSlot = values[o] * SEQ_WINDOW + values[o + 1];
+            });
+            if (header.flags & SyncProtocol.FLAG_COALESCED || sendSlot < 0) {
+                stats.coalescedFrames++;
+                return;
+            }
+            stats.delivered++;
+            client.lastLatency = now - room.sendTimes[sendSlot];
+            latency.add(client.lastLatency);
+            return;
+        }
+        const message = JSON.parse(data);
+        if (message.type === 'full_state') {
+            stats.snapshots++;
+            if (!client.synced && client.connectedAt) stats.resync.add(now - client.connectedAt);
+            if (!client.synced && stats.dropAt) stats.lastResyncAt = now;
+            client.synced = true;
+        }
+        if (message.t !== undefined) {
+            stats.delivered++;
+            client.lastLatency = now - message.t;
+            latency.add(client.lastLatency);
+        } else if (message.type === 'uniform_batch') {
+            stats.coalescedFrames++; // relay catch-up batch (no send time)
+        }
+    };
+    connect(room, 'display', onOpen, onMessage, client);
+
+    if (slow) {
+        // Stop reading for slowPauseMs, read for a while, repeat
+        client.slowTimer = setInterval(() => {
+            const socket = client.ws?._socket;
+            if (!socket || !client.connected) return;
+            socket.pause();
+            setTimeout(() => socket.resume(), config.slowPauseMs);
+        }, config.slowPauseMs * 2);
+    }
+    return client;
+}
+
+function fullState() {
+    const uniforms = {};
+    UNIFORMS.forEach(([name, size]) => {
+        uniforms[name] = size === 1 ? Math.random() : { x: Math.random(), y: Math.random(), z: Math.random() };
+    });
+    return { uniforms, speed: 1, resolutionScale: 1 };
+}
+
+function createController(room, stats, index) {
+    const client = { stats, index, frames: 0, connected: false, reconnectDelay };
+    const onOpen = (ws) => {
+        if (config.protocol === 'binary') {
+            ws.send(JSON.stringify({ type: 'schema', hash: TABLE.hash, entries: TABLE.entries }));
+        }
+    };
+    const onMessage = (data, isBinary) => {
+        if (isBinary) return;
+        if (JSON.parse(data).type === 'request_state') {
+            client.ws.send(JSON.stringify({ type: 'full_state', data: fullState() }));
+        }
+    };
+    return connect(room, 'controller', onOpen, onMessage, client);
+}
+
+function send(room, client, message, updates) {
+    if (!client.connected) return;
+    const displays = room.displays.filter(d => d.connected).length;
+    if (config.protocol === 'binary' && updates) {
+        client.frames = (client.frames + 1) % SEQ_WINDOW;
+        room.sendTimes[client.index * SEQ_WINDOW + client.frames] = performance.now();
+        client.ws.send(SyncProtocol.encode(TABLE, [...updates, [FRAME_UNIFORM, { x: client.index, y: client.frames }]]));
+    } else {
+        message.t = performance.now();
+        client.ws.send(JSON.stringify(message));
+    }
+    room.lastSent = performance.now();
+    client.stats.sent++;
+    client.stats.expected += displays;
+}
+
+// MIDI-like traffic: idle gaps, then a burst of CC steps on one to three knobs at `rate`/s; now and
+// then a preset morph (uniform_batch) and, rarely, a full_state push
+async function drive(room, client, running) {
+    const stepMs = 1000 / config.rate;
+    let nextFullState = performance.now() + 5000 + Math.random() * 10000;
+    while (running()) {
+        await sleep(expRandom(400));
+        const knobs = Array.from({ length: 1 + Math.floor(Math.random() * 3) }, () => pick(UNIFORMS.slice(0, 140))[0]);
+        const steps = 20 + Math.floor(Math.random() * 60);
+        for (let i = 0; i < steps && running(); i++) {
+            const name = knobs[i % knobs.length];
+            const value = i / steps;
+            send(room, client, { type: 'uniform_update', data: { name, value } }, [[name, value]]);
+            await sleep(stepMs);
+        }
+        if (Math.random() < 0.1) {
+            const data = Array.from({ length: 8 + Math.floor(Math.random() * 22) }, () => ({ name: pick(UNIFORMS.slice(0, 140))[0], value: Math.random() }));
+            send(room, client, { type: 'uniform_batch', data }, data.map(u => [u.name, u.value]));
+        }
+        if (performance.now() > nextFullState) {
+            nextFullState += 10000;
+            send(room, client, { type: 'full_state', data: fullState() }, null);
+        }
+    }
+}
+
+// --- SCENARIOS ---
+async function runScenario(name) {
+    console.error(`\n▶ ${name}: ${config.rooms} rooms × (${config.controllers} controller + ${config.displays} displays), ${config.protocol}, ${config.durationS}s`);
+    const relay = await startRelay();
+    const stats = newStats();
+    const rooms = Array.from({ length: config.rooms }, (_, i) => new Room(`bench-${name}-${i}`));
+    let running = true;
+
+    rooms.forEach(room => {
+        room.controllers = Array.from({ length: config.controllers }, (_, i) => createController(room, stats, i));
+    });
+    await sleep(500); // controllers first, so rooms are seeded
+    rooms.forEach(room => {
+        room.displays = Array.from({ length: config.displays }, () => {
+            const slow = name === 'slow' && Math.random() < config.slowFraction;
+            return createDisplay(room, stats, slow);
+        });
+    });
+    await sleep(2000);
+
+    const drivers = rooms.flatMap(room => room.controllers.map(c => drive(room, c, () => running)));
+    const clients = rooms.flatMap(room => [...room.controllers, ...room.displays]);
+
+    // A display is backlogged when it is more than a second behind its room's traffic
+    const displays = rooms.flatMap(room => room.displays);
+    const isBacklogged = (d, now) => d.connected && (d.lastLatency > 1000 ||
+        (d.lastReceive < d.room.lastSent && now - d.room.lastSent > 1000));
+
+    // Samples once a second: relay CPU / memory, backlogged displays
+    const before = await relayMetrics();
+    const elu = performance.eventLoopUtilization();
+    const startedAt = performance.now();
+    let last = before;
+    let lastTime = startedAt;
+    let peakCpu = 0;
+    let rssMax = 0;
+    const sampler = setInterval(async () => {
+        const now = performance.now();
+        const backlogged = displays.filter(d => !d.slow && isBacklogged(d, now)).length;
+        stats.maxBacklogged = Math.max(stats.maxBacklogged, backlogged);
+        const m = await relayMetrics();
+        if (m && last) {
+            peakCpu = Math.max(peakCpu, cpuPercent(last, m, now - lastTime));
+            rssMax = Math.max(rssMax, m.workers.reduce((s, w) => s + w.memory, 0));
+        }
+        last = m;
+        lastTime = now;
+    }, 1000);
+
+    if (name === 'reconnect') {
+        await sleep(config.durationS * 1000 / 3);
+        console.error(`  dropping ${clients.length} clients at once (${config.reconnectPolicy} reconnect)`);
+        stats.dropAt = performance.now();
+        clients.forEach(c => c.ws.terminate());
+        await sleep(config.durationS * 2000 / 3);
+    } else {
+        await sleep(config.durationS * 1000);
+    }
+
+    running = false;
+    await Promise.all(drivers);
+    await sleep(500); // let in-flight messages land
+    clearInterval(sampler);
+    const wallMs = performance.now() - startedAt;
+    const after = await relayMetrics();
+
+    clients.forEach(c => {
+        c.closing = true;
+        clearInterval(c.slowTimer);
+        c.ws.terminate();
+    });
+    await stopRelay(relay);
+
+    const relayCounters = (key) => after ? after.workers.reduce((s, w) => s + w.counters[key], 0) : null;
+    const result = {
+        durationS: +(wallMs / 1000).toFixed(1),
+        sent: { messages: stats.sent, perSecond: +(stats.sent / wallMs * 1000).toFixed(1) },
+        delivered: {
+            messages: stats.delivered,
+            perSecond: +(stats.delivered / wallMs * 1000).toFixed(1),
+            expected: stats.expected,
+            // Coalesced catch-ups replace several deliveries with one, so loss is an upper bound
+            lossPct: stats.expected ? +((1 - stats.delivered / stats.expected) * 100).toFixed(2) : 0,
+            coalescedFrames: stats.coalescedFrames
+        },
+        latencyMs: stats.latency.summary(),
+        relay: {
+            cpuPct: before && after ? cpuPercent(before, after, wallMs) : null,
+            peakCpuPct: peakCpu,
+            rssMaxMB: +(rssMax / 1048576).toFixed(1),
+            coalesced: relayCounters('coalesced'),
+            resyncs: relayCounters('resyncs'),
+            droppedClients: relayCounters('dropped'),
+            busMessages: relayCounters('busOut')
+        },
+        clients: {
+            maxBacklogged: stats.maxBacklogged,
+            disconnects: stats.disconnects,
+            connectFailures: stats.connectFailures
+        },
+        loadgen: { eventLoopUtilization: +performance.eventLoopUtilization(elu).utilization.toFixed(2) }
+    };
+    if (name === 'slow') result.latencySlowMs = stats.latencySlow.summary();
+    if (name === 'reconnect') {
+        result.resyncMs = stats.resync.summary(); // connect -> full_state, per display
+        result.allResyncedAfterMs = displays.every(d => d.synced) ? +(stats.lastResyncAt - stats.dropAt).toFixed(0) : null;
+    }
+    if (result.loadgen.eventLoopUtilization > 0.9) {
+        console.error('  ⚠️ load generator saturated: latencies include its own queueing');
+    }
+    console.error(`  latency p50 ${result.latencyMs.p50}ms p99 ${result.latencyMs.p99}ms · ${result.delivered.perSecond} msg/s delivered · relay ${result.relay.cpuPct}% CPU, ${result.relay.rssMaxMB}MB`);
+    return result;
+}
+
+// --- REPORT ---
+function gitCommit() {
+    try {
+        return execSync('git rev-parse --short HEAD', { stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+    } catch {
+        return null;
+    }
+}
+
+function compare(baseline, current) {
+    const rows = [
+        ['latency p50', r => r.latencyMs.p50],
+        ['latency p99', r => r.latencyMs.p99],
+        ['delivered/s', r => r.delivered.perSecond],
+        ['relay CPU %', r => r.relay.cpuPct],
+        ['relay RSS MB', r => r.relay.rssMaxMB],
+        ['backlogged', r => r.clients.maxBacklogged]
+    ];
+    Object.entries(current.scenarios).forEach(([name, result]) => {
+        const base = baseline.scenarios?.[name];
+        if (!base) return;
+        console.error(`\n${name}: ${baseline.commit ?? 'baseline'} → ${current.commit ?? 'current'}`);
+        rows.forEach(([label, get]) => {
+            const a = get(base);
+            const b = get(result);
+            const delta = a ? `${(((b - a) / a) * 100).toFixed(1)}%` : '';
+            console.error(`  ${label.padEnd(14)} ${String(a).padStart(10)} → ${String(b).padStart(10)}  ${delta}`);
+        });
+    });
+}
+
+const scenarios = args.scenario === 'all' ? ['steady', 'slow', 'reconnect'] : args.scenario.split(',');
+const report = {
+    tool: 'relay-bench',
+    version: 1,
+    commit: gitCommit(),
+    date: new Date().toISOString(),
+    node: process.version,
+    host: { cpu: os.cpus()[0]?.model, cores: os.cpus().length, memoryGB: +(os.totalmem() / 2 ** 30).toFixed(1) },
+    config,
+    scenarios: {}
+};
+for (const name of scenarios) {
+    report.scenarios[name] = await runScenario(name);
+}
+
+const json = JSON.stringify(report, null, 2);
+if (args.out) {
+    fs.mkdirSync(path.dirname(args.out), { recursive: true });
+    fs.writeFileSync(args.out, json);
+    console.error(`\n📄 ${args.out}`);
+} else {
+    console.log(json);
+}
+if (args.compare) compare(JSON.parse(fs.readFileSync(args.compare, 'utf8')), report);
+process.exit(0);
@@ -0,0 +1,31 @@
+import puppeteer from 'puppeteer';
+
+// Headless Chromium for the scripts that drive the app (server/render.js, server/startup.js).
+// three.js needs WebGL2, which no Node-native GL provides, so the browser does the rendering;
+// gl picks its backend:
+//   llvmpipe     ANGLE on desktop GL, which Mesa serves from its CPU rasterizer (nodes without a GPU)
+//   swiftshader  ANGLE's own CPU backend
+//   gpu          whatever the machine has
+const GL_FLAGS = {
+    llvmpipe: ['--use-gl=angle', '--use-angle=gl'],
+    swiftshader: ['--use-angle=swiftshader', '--enable-unsafe-swiftshader'],
+    gpu: ['--use-angle=default']
+};
+
+// args: extra Chromium flags; other options go to puppeteer.launch as they are
+export function launchBrowser({ gl = 'llvmpipe', args = [], ...options } = {}) {
+    if (!GL_FLAGS[gl]) throw new Error(`Unknown --gl ${gl} (${Object.keys(GL_FLAGS).join(', ')})`);
+    return puppeteer.launch({
+        headless: 'new',
+        args: [
+            ...GL_FLAGS[gl],
+            '--ignore-gpu-blocklist',
+            '--disable-gpu-watchdog', // slow CPU draws aren't hangs
+            ...args
+        ],
+        env: gl === 'llvmpipe'
+            ? { ...process.env, LIBGL_ALWAYS_SOFTWARE: '1', GALLIUM_DRIVER: 'llvmpipe' }
+            : process.env,
+        ...options
+    });
+}
@@ -0,0 +1,141 @@
+// Cross-worker pub/sub for the relay (server/relay.js), one topic per room. A bus implements
+//
+//   subscribe(room, onMessage)   start receiving the room's messages published by other workers
+//   unsubscribe(room)
+//   publish(room, payload)       returns true if the payload left this worker
+//   close()
+//
+// where payload is { raw, isBinary, hash? } (raw: the client's message bytes) or a relay control
+// message such as { schemaRequest }. Payloads never loop
+// back to the publisher. An external broker (Redis, NATS...) slots in behind the same four methods.
+
+// In-process bus. Relays that share a hub see each other's messages, so several relays in one
+// process (or tests) behave like a cluster; a lone relay publishes into the void.
+export class LocalBus {
+    constructor(hub = new Map()) {
+        this.hub = hub;           // room -> Map(bus -> handler)
+        this.rooms = new Set();
+    }
+
+    subscribe(room, onMessage) {
+        if (!this.hub.has(room)) this.hub.set(room, new Map());
+        this.hub.get(room).set(this, onMessage);
+        this.rooms.add(room);
+    }
+
+    unsubscribe(room) {
+        const subscribers = this.hub.get(room);
+        if (!subscribers) return;
+        subscribers.delete(this);
+        if (subscribers.size === 0) this.hub.delete(room);
+        this.rooms.delete(room);
+    }
+
+    publish(room, payload) {
+        const subscribers = this.hub.get(room);
+        if (!subscribers || subscribers.size < 2) return false;
+        subscribers.forEach((handler, bus) => {
+            if (bus !== this) handler(payload);
+        });
+        return true;
+    }
+
+    close() {
+        [...this.rooms].forEach(room => this.unsubscribe(room));
+    }
+}
+
+// Worker side of the IPC bus: the cluster primary (IpcBroker) routes publishes to the other workers
+// subscribed to the room. The broker tells each worker when a room is shared, so a room whose clients
+// all sit on one worker (the normal case with room-hashed routing) costs no IPC at all.
+export class IpcBus {
+    constructor(proc = process) {
+        this.proc = proc;
+        this.handlers = new Map(); // room -> handler
+        this.shared = new Set();   // rooms with subscribers on other workers
+        this.onMessage = (msg) => {
+            if (msg?.type === 'bus:message') {
+                this.handlers.get(msg.room)?.(msg.payload);
+            } else if (msg?.type === 'bus:shared') {
+                if (msg.shared) this.shared.add(msg.room);
+                else this.shared.delete(msg.room);
+            }
+        };
+        proc.on('message', this.onMessage);
+    }
+
+    subscribe(room, onMessage) {
+        this.handlers.set(room, onMessage);
+        this.proc.send({ type: 'bus:subscribe', room });
+    }
+
+    unsubscribe(room) {
+        this.handlers.delete(room);
+        this.shared.delete(room);
+        this.proc.send({ type: 'bus:unsubscribe', room });
+    }
+
+    publish(room, payload) {
+        if (!this.shared.has(room)) return false;
+        this.proc.send({ type: 'bus:publish', room, payload });
+        return true;
+    }
+
+    close() {
+        this.proc.off('message', this.onMessage);
+        this.handlers.clear();
+    }
+}
+
+// Primary side of the IPC bus
+export class IpcBroker {
+    constructor() {
+        this.subscribers = new Map(); // room -> Set(worker)
+    }
+
+    // Call for every message from a worker; returns true if it was a bus message
+    handle(worker, msg) {
+        switch (msg?.type) {
+            case 'bus:subscribe': {
+                if (!this.subscribers.has(msg.room)) this.subscribers.set(msg.room, new Set());
+                this.subscribers.get(msg.room).add(worker);
+                this.announce(msg.room);
+                return true;
+            }
+            case 'bus:unsubscribe':
+                this.remove(worker, msg.room);
+                return true;
+            case 'bus:publish':
+                this.subscribers.get(msg.room)?.forEach(w => {
+                    if (w !== worker && w.isConnected()) w.send({ type: 'bus:message', room: msg.room, payload: msg.payload });
+                });
+                return true;
+        }
+        return false;
+    }
+
+    removeWorker(worker) {
+        [...this.subscribers.keys()].forEach(room => this.remove(worker, room));
+    }
+
+    remove(worker, room) {
+        const set = this.subscribers.get(room);
+        if (!set?.delete(worker)) return;
+        if (set.size === 0) this.subscribers.delete(room);
+        else this.announce(room);
+    }
+
+    announce(room) {
+        const set = this.subscribers.get(room);
+        const shared = set.size > 1;
+        set.forEach(w => {
+            if (w.isConnected()) w.send({ type: 'bus:shared', room, shared });
+        });
+    }
+
+    getStats() {
+        let shared = 0;
+        this.subscribers.forEach(set => { if (set.size > 1) shared++; });
+        return { rooms: this.subscribers.size, sharedRooms: shared };
+    }
+}
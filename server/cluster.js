@@ -0,0 +1,221 @@
+import cluster from 'node:cluster';
+import http from 'node:http';
+import net from 'node:net';
+import { WebSocketServer } from 'ws';
+import { createRelay } from './relay.js';
+import { IpcBus, IpcBroker } from './bus.js';
+
+// Clustered relay: the primary accepts every TCP connection, reads the HTTP request line, and hands
+// the socket to the worker that owns the room (consistent hashing over worker slots), so a room's
+// clients normally meet on one worker. Clients of a room that end up on different workers (e.g.
+// while a crashed worker restarts) are bridged by the IPC bus the primary brokers.
+
+// Consistent hash ring over worker slots with virtual nodes; a dead slot's rooms fall to the next
+// live slot on the ring and come back when it respawns.
+export class HashRing {
+    constructor(slots, vnodes = 64) {
+        this.points = [];
+        for (let slot = 0; slot < slots; slot++) {
+            for (let v = 0; v < vnodes; v++) {
+                this.points.push({ hash: HashRing.hash(`${slot}#${v}`), slot });
+            }
+        }
+        this.points.sort((a, b) => a.hash - b.hash);
+    }
+
+    // FNV-1a, then murmur3's finalizer: plain FNV clusters short, similar keys like "room12"
+    static hash(key) {
+        let h = 0x811c9dc5;
+        for (let i = 0; i < key.length; i++) {
+            h ^= key.charCodeAt(i);
+            h = Math.imul(h, 0x01000193);
+        }
+        h ^= h >>> 16;
+        h = Math.imul(h, 0x85ebca6b);
+        h ^= h >>> 13;
+        h = Math.imul(h, 0xc2b2ae35);
+        h ^= h >>> 16;
+        return h >>> 0;
+    }
+
+    lookup(key, isAlive = () => true) {
+        const h = HashRing.hash(key);
+        let lo = 0;
+        let hi = this.points.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (this.points[mid].hash < h) lo = mid + 1;
+            else hi = mid;
+        }
+        for (let i = 0; i < this.points.length; i++) {
+            const { slot } = this.points[(lo + i) % this.points.length];
+            if (isAlive(slot)) return slot;
+        }
+        return -1;
+    }
+}
+
+// Room id from "GET /?room=x&mode=display HTTP/1.1"
+function roomFromRequestLine(line) {
+    const target = line.split(' ')[1] ?? '/';
+    return new URL(target, 'http://localhost').searchParams.get('room') || 'default';
+}
+
+// --- PRIMARY ---
+export function startPrimary({ workers, port, metricsPort, maxBuffered, dropBuffered }) {
+    cluster.setupPrimary({ serialization: 'advanced' }); // Buffers cross IPC without JSON boxing
+
+    const slots = new Array(workers).fill(null);
+    const broker = new IpcBroker();
+    const ring = new HashRing(workers);
+    const pendingMetrics = new Map(); // request id -> { results, remaining, resolve }
+    let metricsId = 0;
+
+    const fork = (slot) => {
+        const worker = cluster.fork({
+            RELAY_WORKER_SLOT: String(slot + 1),
+            RELAY_MAX_BUFFERED: String(maxBuffered),
+            RELAY_DROP_BUFFERED: String(dropBuffered)
+        });
+        slots[slot] = worker;
+        worker.on('message', (msg) => {
+            if (broker.handle(worker, msg)) return;
+            if (msg?.type === 'metrics:response') {
+                const pending = pendingMetrics.get(msg.id);
+                if (!pending) return;
+                pending.results.push(msg.metrics);
+                if (--pending.remaining === 0) pending.resolve();
+            }
+        });
+        worker.on('exit', (code) => {
+            broker.removeWorker(worker);
+            if (slots[slot] === worker) slots[slot] = null;
+            console.warn(`Relay worker ${slot + 1} exited (${code}), restarting`);
+            setTimeout(() => fork(slot), 1000);
+        });
+    };
+    for (let slot = 0; slot < workers; slot++) fork(slot);
+
+    const isAlive = (slot) => slots[slot]?.isConnected() ?? false;
+
+    net.createServer((socket) => {
+        let head = Buffer.alloc(0);
+        const onData = (chunk) => {
+            head = Buffer.concat([head, chunk]);
+            const end = head.indexOf('\r\n');
+            if (end < 0) {
+                if (head.length > 8192) socket.destroy(); // not HTTP
+                return;
+            }
+            socket.off('data', onData);
+            socket.pause();
+
+            const slot = ring.lookup(roomFromRequestLine(head.subarray(0, end).toString('latin1')), isAlive);
+            if (slot < 0) {
+                socket.destroy();
+                return;
+            }
+            // The bytes read here are replayed on the worker side
+            slots[slot].send({ type: 'relay:connection', head: head.toString('base64') }, socket);
+        };
+        socket.on('data', onData);
+        socket.on('error', () => socket.destroy());
+    }).listen(port);
+
+    const collect = () => new Promise((resolve) => {
+        const live = slots.filter(w => w?.isConnected());
+        const id = ++metricsId;
+        const pending = { results: [], remaining: live.length, resolve: null };
+        const finish = () => {
+            pendingMetrics.delete(id);
+            resolve({ workers: pending.results.sort((a, b) => a.worker - b.worker), bus: broker.getStats() });
+        };
+        pending.resolve = finish;
+        pendingMetrics.set(id, pending);
+        if (live.length === 0) return finish();
+        live.forEach(w => w.send({ type: 'metrics:request', id }));
+        setTimeout(finish, 500); // a busy worker shouldn't hang the scrape
+    });
+    startMetricsServer(metricsPort, collect);
+
+    console.log(`WebSocket server running on ws://localhost:${port} (${workers} workers)`);
+}
+
+// --- WORKER ---
+export function startWorker() {
+    const workerId = Number(process.env.RELAY_WORKER_SLOT);
+    const relay = createRelay({
+        bus: new IpcBus(),
+        workerId,
+        maxBuffered: Number(process.env.RELAY_MAX_BUFFERED),
+        dropBuffered: Number(process.env.RELAY_DROP_BUFFERED)
+    });
+
+    // Never listens itself: sockets arrive from the primary
+    const server = http.createServer((req, res) => res.writeHead(426).end());
+    const wss = new WebSocketServer({ server });
+    wss.on('connection', relay.handleConnection);
+
+    process.on('message', (msg, socket) => {
+        if (msg?.type === 'relay:connection' && socket) {
+            socket.unshift(Buffer.from(msg.head, 'base64'));
+            server.emit('connection', socket);
+            socket.resume();
+        } else if (msg?.type === 'metrics:request') {
+            process.send({ type: 'metrics:response', id: msg.id, metrics: relay.getMetrics() });
+        }
+    });
+}
+
+// --- METRICS ---
+// Local-only HTTP endpoint: /metrics (Prometheus text) and /metrics.json
+export function startMetricsServer(port, collect) {
+    if (!port) return null;
+    const server = http.createServer(async (req, res) => {
+        const url = new URL(req.url, 'http://localhost');
+        if (url.pathname !== '/metrics' && url.pathname !== '/metrics.json') return res.writeHead(404).end();
+
+        const snapshot = await collect();
+        if (url.pathname === '/metrics.json') {
+            res.writeHead(200, { 'Content-Type': 'application/json' });
+            return res.end(JSON.stringify(snapshot, null, 2));
+        }
+        res.writeHead(200, { 'Content-Type': 'text/plain; version=0.0.4' });
+        res.end(formatPrometheus(snapshot));
+    });
+    server.listen(port, '127.0.0.1');
+    console.log(`📈 Relay metrics on http://127.0.0.1:${port}/metrics`);
+    return server;
+}
+
+function formatPrometheus({ workers, bus }) {
+    const lines = [];
+    const gauge = (name, help, pick) => {
+        lines.push(`# HELP relay_${name} ${help}`, `# TYPE relay_${name} gauge`);
+        workers.forEach(m => lines.push(`relay_${name}{worker="${m.worker}"} ${pick(m)}`));
+    };
+    const counter = (name, key, help) => {
+        lines.push(`# HELP relay_${name}_total ${help}`, `# TYPE relay_${name}_total counter`);
+        workers.forEach(m => lines.push(`relay_${name}_total{worker="${m.worker}"} ${m.counters[key]}`));
+    };
+
+    gauge('rooms', 'Rooms held (including empty rooms kept for reconnects)', m => m.rooms);
+    gauge('active_rooms', 'Rooms with connected clients', m => m.activeRooms);
+    gauge('clients', 'Connected clients', m => m.clients);
+    gauge('messages_in_per_second', 'Client messages received per second', m => (m.rates.messagesIn ?? 0).toFixed(1));
+    gauge('messages_out_per_second', 'Messages sent to clients per second', m => (m.rates.messagesOut ?? 0).toFixed(1));
+    gauge('rss_bytes', 'Worker resident memory', m => m.memory);
+    counter('messages_in', 'messagesIn', 'Client messages received');
+    counter('messages_out', 'messagesOut', 'Messages sent to clients');
+    counter('bytes_in', 'bytesIn', 'Bytes received from clients');
+    counter('bytes_out', 'bytesOut', 'Bytes sent to clients');
+    counter('coalesced', 'coalesced', 'Messages held back from backed-up clients');
+    counter('resyncs', 'resyncs', 'Full state resends to clients that fell behind');
+    counter('dropped_clients', 'dropped', 'Clients disconnected for not draining');
+    counter('bus_in', 'busIn', 'Messages received from other workers');
+    counter('bus_out', 'busOut', 'Messages published to other workers');
+    if (bus) {
+        lines.push('# TYPE relay_bus_shared_rooms gauge', `relay_bus_shared_rooms ${bus.sharedRooms}`);
+    }
+    return lines.join('\n') + '\n';
+}
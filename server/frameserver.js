@@ -0,0 +1,87 @@
+import http from 'node:http';
+import fs from 'node:fs';
+import path from 'node:path';
+import { pathToFileURL } from 'node:url';
+
+// Receives frames from the offline renderer (src/managers/OfflineRenderer.js) and writes them to disk.
+//   PUT  /frames/<name>  frame bytes (png / exr)
+//   PUT  /recordings/<name>?offset=N[&truncate=1]  a chunk of a streamed recording (src/workers/RecorderWorker.js)
+//   GET  /preset         preset JSON for the page to apply before rendering (404 if none)
+//   POST /done           summary JSON; resolves `done`
+export function startFrameServer({ port = 8090, outDir = 'frames', preset = null } = {}) {
+    fs.mkdirSync(outDir, { recursive: true });
+
+    let resolveDone;
+    const done = new Promise(resolve => { resolveDone = resolve; });
+    let received = 0;
+    let bytes = 0;
+
+    const server = http.createServer((req, res) => {
+        // The page is served from the Vite origin, so every response needs CORS
+        res.setHeader('Access-Control-Allow-Origin', '*');
+        res.setHeader('Access-Control-Allow-Methods', 'GET, PUT, POST, OPTIONS');
+        res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+        if (req.method === 'OPTIONS') return res.writeHead(204).end();
+
+        const url = new URL(req.url, 'http://localhost');
+
+        if (req.method === 'PUT' && url.pathname.startsWith('/frames/')) {
+            const name = path.basename(decodeURIComponent(url.pathname.slice('/frames/'.length)));
+            const file = path.join(outDir, name);
+            const tmp = `${file}.part`;
+            const out = fs.createWriteStream(tmp);
+            req.pipe(out);
+            out.on('finish', () => {
+                fs.renameSync(tmp, file); // never leave a half-written frame under its final name
+                received++;
+                bytes += out.bytesWritten;
+                res.writeHead(204).end();
+            });
+            out.on('error', err => res.writeHead(500).end(err.message));
+            return;
+        }
+
+        if (req.method === 'PUT' && url.pathname.startsWith('/recordings/')) {
+            const name = path.basename(decodeURIComponent(url.pathname.slice('/recordings/'.length)));
+            const file = path.join(outDir, name);
+            const offset = Number(url.searchParams.get('offset') ?? 0);
+            if (url.searchParams.get('truncate') === '1') fs.writeFileSync(file, '');
+            // Chunks arrive in order but carry their offset so the muxer may seek back and patch
+            const out = fs.createWriteStream(file, { flags: fs.existsSync(file) ? 'r+' : 'w', start: offset });
+            req.pipe(out);
+            out.on('finish', () => res.writeHead(204).end());
+            out.on('error', err => res.writeHead(500).end(err.message));
+            return;
+        }
+
+        if (req.method === 'GET' && url.pathname === '/preset') {
+            if (!preset) return res.writeHead(404).end();
+            res.writeHead(200, { 'Content-Type': 'application/json' });
+            return res.end(JSON.stringify(preset));
+        }
+
+        if (req.method === 'POST' && url.pathname === '/done') {
+            let body = '';
+            req.on('data', chunk => { body += chunk; });
+            req.on('end', () => {
+                res.writeHead(204).end();
+                const summary = body ? JSON.parse(body) : {};
+                resolveDone({ ...summary, received, bytes });
+            });
+            return;
+        }
+
+        res.writeHead(404).end();
+    });
+
+    server.listen(port);
+    console.log(`🎞️ Frame server on http://localhost:${port} → ${path.resolve(outDir)}`);
+    return { server, done, close: () => server.close() };
+}
+
+// node server/frameserver.js [port] [outDir]
+if (import.meta.url === pathToFileURL(process.argv[1]).href) {
+    const [port = '8090', outDir = 'frames'] = process.argv.slice(2);
+    const { done } = startFrameServer({ port: Number(port), outDir });
+    done.then(summary => console.log('🎞️ Render finished:', summary));
+}
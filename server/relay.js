@@ -0,0 +1,401 @@
+import { SyncProtocol } from '../src/managers/SyncProtocol.js';
+import { LocalBus } from './bus.js';
+
+// Sync relay: one controller drives many displays (src/managers/SyncManager.js).
+// - Each message is parsed once (for its type and the room state) and its raw bytes are forwarded
+//   to every recipient; nothing is re-serialized per client.
+// - A recipient whose socket buffer is over maxBuffered is skipped. Uniform updates it misses are
+//   coalesced to the latest value per uniform and flushed as one batch once it drains; a client
+//   stuck over dropBuffered for longer than DROP_AFTER_MS is disconnected (it reconnects and resyncs).
+// - The room keeps the last known state, so late joiners get `full_state` straight from the server.
+// - Binary uniform frames (src/managers/SyncProtocol.js) get a per-room sequence number stamped in
+//   place and go out as is to displays that negotiated the same slot table; others get the JSON
+//   equivalent, serialized once per frame.
+// - In cluster mode (server/cluster.js) a room's clients normally share one worker; any that land
+//   elsewhere are reached through the bus, which carries the raw payloads between workers.
+const DROP_AFTER_MS = 5000;
+const FLUSH_MS = 16;
+const ROOM_TTL_MS = 10 * 60 * 1000; // state of an empty room is kept this long for reconnects
+
+export function createRelay({
+    bus = new LocalBus(),
+    workerId = 0,
+    maxBuffered = 256 * 1024,
+    dropBuffered = 8 * 1024 * 1024
+} = {}) {
+    const rooms = new Map();
+    const tables = new Map(); // slot table hash -> table, from controllers' `schema` messages
+    const schemaRequests = new Set(); // table hashes already asked for over the bus
+
+    // Counters since start; rates are derived once a second
+    const counters = { messagesIn: 0, messagesOut: 0, bytesIn: 0, bytesOut: 0, coalesced: 0, resyncs: 0, dropped: 0, busIn: 0, busOut: 0 };
+    let rates = {};
+    let lastCounters = { ...counters };
+    let lastRateTime = Date.now();
+
+    function getRoom(roomId) {
+        if (!rooms.has(roomId)) {
+            rooms.set(roomId, {
+                id: roomId,
+                clients: new Set(),
+                // Last known state, in the shape of SyncManager.sendFullState()
+                state: { uniforms: {}, speed: undefined, resolutionScale: undefined },
+                complete: false,   // true once a full_state has been seen; partial state isn't served
+                paused: undefined,
+                quality: {},       // display name ('*' for all) -> last quality tier sent
+                seq: 0,            // last sequence number stamped on a binary frame
+                emptySince: null
+            });
+            bus.subscribe(roomId, payload => onRemote(rooms.get(roomId), payload));
+        }
+        return rooms.get(roomId);
+    }
+
+    const receivesUpdates = (c) => c.mode === 'display' || c.mode === 'both';
+    const isController = (c) => c.mode === 'controller' || c.mode === 'both';
+    const speaksTable = (c, table) => c.binary && table && c.schema === table.hash;
+
+    function send(c, data, options) {
+        c.ws.send(data, options);
+        counters.messagesOut++;
+        counters.bytesOut += typeof data === 'string' ? data.length : data.byteLength;
+    }
+
+    // --- ROOM STATE ---
+    // Whether a parsed message has the fields updateState(), forward() and registerTable() read.
+    // Anything else is dropped like unparseable JSON instead of throwing in the socket handler.
+    function isWellFormed(message) {
+        const isObject = v => v !== null && typeof v === 'object' && !Array.isArray(v);
+        const isUpdate = u => isObject(u) && typeof u.name === 'string';
+        if (!isObject(message)) return false;
+        const { type, data } = message;
+        switch (type) {
+            case 'uniform_update':
+                return isUpdate(data);
+            case 'uniform_batch':
+                return Array.isArray(data) && data.every(isUpdate);
+            case 'full_state':
+                return isObject(data) && isObject(data.uniforms);
+            case 'action':
+                return isObject(data);
+            case 'schema':
+                return Array.isArray(message.entries) && message.entries.every(e => Array.isArray(e) && typeof e[0] === 'string');
+            default:
+                return typeof type === 'string';
+        }
+    }
+
+    function updateState(room, message) {
+        switch (message.type) {
+            case 'uniform_update':
+                room.state.uniforms[message.data.name] = message.data.value;
+                break;
+            case 'uniform_batch':
+                message.data.forEach(({ name, value }) => { room.state.uniforms[name] = value; });
+                break;
+            case 'full_state':
+                room.state = {
+                    ...message.data,
+                    uniforms: { ...message.data.uniforms }
+                };
+                room.complete = true;
+                break;
+            case 'action':
+                if (message.action === 'pause') room.paused = message.data.paused;
+                if (message.action === 'quality') {
+                    const display = message.data.display ?? null;
+                    // A room-wide tier replaces the per-display ones; a per-display tier overrides it
+                    if (display === null) room.quality = { '*': message.data.tier };
+                    else room.quality[display] = message.data.tier;
+                }
+                break;
+        }
+    }
+
+    function sendState(room, client) {
+        send(client, JSON.stringify({ type: 'full_state', data: room.state, seq: room.seq }));
+        if (room.paused !== undefined) {
+            send(client, JSON.stringify({ type: 'action', action: 'pause', data: { paused: room.paused } }));
+        }
+        // Room-wide first, so a late-joining display ends on its own tier
+        Object.entries(room.quality).sort(([a], [b]) => (a === '*' ? -1 : b === '*' ? 1 : 0)).forEach(([display, tier]) => {
+            send(client, JSON.stringify({ type: 'action', action: 'quality', data: { tier, display: display === '*' ? null : display } }));
+        });
+    }
+
+    // --- FAN-OUT ---
+    // message: the parsed JSON message, or for a binary frame its JSON equivalent (uniform_batch)
+    // table: the sender's slot table (binary frames only)
+    function forward(room, sender, message, raw, isBinary, table = null) {
+        let json = null;
+        room.clients.forEach((c) => {
+            if (c === sender || c.ws.readyState !== 1 || !receivesUpdates(c)) return;
+
+            if (c.ws.bufferedAmount <= maxBuffered && !c.resync && c.pending.size === 0) {
+                if (!isBinary || speaksTable(c, table)) {
+                    send(c, raw, { binary: isBinary });
+                } else {
+                    json ??= JSON.stringify(message);
+                    send(c, json);
+                }
+                return;
+            }
+
+            // Backed up: keep only what a later flush needs to catch up
+            counters.coalesced++;
+            if (message.type === 'uniform_update') {
+                c.pending.set(message.data.name, message.data.value);
+            } else if (message.type === 'uniform_batch') {
+                message.data.forEach(({ name, value }) => c.pending.set(name, value));
+            } else {
+                c.resync = true; // full_state / actions: resend the whole room state instead
+            }
+        });
+    }
+
+    function flush() {
+        const now = Date.now();
+        rooms.forEach((room) => {
+            room.clients.forEach((c) => {
+                if (c.ws.readyState !== 1) return;
+
+                if (c.ws.bufferedAmount > dropBuffered) {
+                    c.stuckSince ??= now;
+                    if (now - c.stuckSince > DROP_AFTER_MS) {
+                        console.warn(`Dropping slow client in room ${room.id} (${(c.ws.bufferedAmount / 1048576).toFixed(1)}MB buffered)`);
+                        counters.dropped++;
+                        c.ws.terminate();
+                    }
+                    return;
+                }
+                c.stuckSince = null;
+
+                if (c.ws.bufferedAmount > maxBuffered) return;
+                if (c.resync) {
+                    c.resync = false;
+                    c.pending.clear();
+                    counters.resyncs++;
+                    sendState(room, c);
+                } else if (c.pending.size > 0) {
+                    flushPending(room, c);
+                }
+            });
+
+            if (room.clients.size === 0 && now - room.emptySince > ROOM_TTL_MS) {
+                bus.unsubscribe(room.id);
+                rooms.delete(room.id);
+            }
+        });
+    }
+
+    // One catch-up message with the latest value of everything the client missed
+    function flushPending(room, c) {
+        const table = c.binary ? tables.get(c.schema) : null;
+        let entries = [...c.pending];
+        c.pending.clear();
+
+        if (table) {
+            const inTable = entries.filter(([name]) => table.index.has(name));
+            if (inTable.length > 0) {
+                send(c, SyncProtocol.encode(table, inTable, { seq: room.seq, flags: SyncProtocol.FLAG_COALESCED }));
+            }
+            entries = entries.filter(([name]) => !table.index.has(name));
+        }
+        if (entries.length > 0) {
+            send(c, JSON.stringify({ type: 'uniform_batch', data: entries.map(([name, value]) => ({ name, value })) }));
+        }
+    }
+
+    // --- MESSAGES ---
+    function handleFrame(room, client, raw) {
+        const updates = client.table ? SyncProtocol.decode(client.table, raw) : null;
+        if (!updates) return; // no schema from this sender, or a frame that doesn't match it
+
+        room.seq = (room.seq + 1) >>> 0;
+        SyncProtocol.stampSeq(raw, room.seq);
+        const message = { type: 'uniform_batch', data: updates };
+        updateState(room, message);
+        forward(room, client, message, raw, true, client.table);
+        publish(room, { raw, isBinary: true, hash: client.table.hash });
+    }
+
+    function handleMessage(room, client, raw, message) {
+        if (message.type === 'hello') {
+            client.binary = !!message.binary;
+            client.schema = message.schema;
+            return;
+        }
+
+        if (message.type === 'schema') {
+            const table = registerTable(message);
+            if (!table) return;
+            client.table = table;
+            publish(room, { raw, isBinary: false });
+            return;
+        }
+
+        if (message.type === 'request_state') {
+            if (room.complete) {
+                sendState(room, client);
+            } else {
+                // No state yet: ask the controllers, as before (including those on other workers)
+                room.clients.forEach((c) => {
+                    if (c !== client && c.ws.readyState === 1 && isController(c)) send(c, raw, { binary: false });
+                });
+                publish(room, { raw, isBinary: false });
+            }
+            return;
+        }
+
+        updateState(room, message);
+        forward(room, client, message, raw, false);
+        publish(room, { raw, isBinary: false });
+    }
+
+    function registerTable(message) {
+        const table = SyncProtocol.tableFrom(message.entries);
+        if (table.hash !== message.hash) return null; // corrupted or mismatched
+        tables.set(table.hash, table);
+        return table;
+    }
+
+    // --- BUS ---
+    function publish(room, payload) {
+        if (bus.publish(room.id, payload)) counters.busOut++;
+    }
+
+    // A message from a client of this room connected to another worker
+    function onRemote(room, { raw, isBinary, hash, schemaRequest }) {
+        if (!room) return;
+        counters.busIn++;
+
+        // A worker that joined the room after the controller's `schema` went out
+        if (schemaRequest !== undefined) {
+            const table = tables.get(schemaRequest);
+            if (table) publish(room, { raw: JSON.stringify({ type: 'schema', hash: table.hash, entries: table.entries }), isBinary: false });
+            return;
+        }
+
+        if (isBinary) {
+            const table = tables.get(hash);
+            if (!table) {
+                if (!schemaRequests.has(hash)) {
+                    schemaRequests.add(hash);
+                    publish(room, { schemaRequest: hash });
+                }
+                return; // frames until the schema arrives are lost; displays see the gap and resync
+            }
+            const updates = SyncProtocol.decode(table, raw);
+            if (!updates) return;
+            room.seq = Math.max(room.seq, SyncProtocol.readHeader(raw).seq); // stamped by the origin worker
+            const message = { type: 'uniform_batch', data: updates };
+            updateState(room, message);
+            forward(room, null, message, raw, true, table);
+            return;
+        }
+
+        const message = JSON.parse(typeof raw === 'string' ? raw : Buffer.from(raw).toString());
+        if (message.type === 'schema') {
+            if (registerTable(message)) schemaRequests.delete(message.hash);
+        } else if (message.type === 'request_state') {
+            room.clients.forEach((c) => {
+                if (c.ws.readyState === 1 && isController(c)) send(c, raw, { binary: false });
+            });
+        } else {
+            updateState(room, message);
+            forward(room, null, message, raw, false);
+        }
+    }
+
+    // --- CONNECTIONS ---
+    function handleConnection(ws, req) {
+        const url = new URL(req.url, 'http://localhost');
+        const roomId = url.searchParams.get('room') || 'default';
+        const mode = url.searchParams.get('mode') || 'both'; // 'controller', 'display', 'both'
+
+        const room = getRoom(roomId);
+        room.emptySince = null;
+        const client = {
+            ws, mode,
+            pending: new Map(), resync: false, stuckSince: null,
+            binary: false, schema: null, // negotiated in `hello`
+            table: null                  // this client's slot table, if it sends frames
+        };
+        room.clients.add(client);
+
+        console.log(`Client joined room: ${roomId} as ${mode}${workerId ? ` (worker ${workerId})` : ''}`);
+
+        // Seed the room state from the first controller, so later displays don't have to ask one
+        if (!room.complete && isController(client)) {
+            send(client, JSON.stringify({ type: 'request_state' }));
+        }
+
+        ws.on('message', (raw, isBinary) => {
+            counters.messagesIn++;
+            counters.bytesIn += raw.length;
+            if (isBinary) {
+                handleFrame(room, client, raw);
+                return;
+            }
+
+            let message;
+            try {
+                message = JSON.parse(raw);
+            } catch {
+                return; // not ours
+            }
+            if (!isWellFormed(message)) return;
+            handleMessage(room, client, raw, message);
+        });
+
+        ws.on('close', () => {
+            room.clients.delete(client);
+            if (room.clients.size === 0) {
+                room.emptySince = Date.now();
+            }
+        });
+    }
+
+    // --- METRICS ---
+    function updateRates() {
+        const now = Date.now();
+        const seconds = (now - lastRateTime) / 1000;
+        rates = {};
+        Object.keys(counters).forEach(k => { rates[k] = (counters[k] - lastCounters[k]) / seconds; });
+        lastCounters = { ...counters };
+        lastRateTime = now;
+    }
+
+    function getMetrics() {
+        let clients = 0;
+        let displays = 0;
+        rooms.forEach(room => room.clients.forEach(c => {
+            clients++;
+            if (receivesUpdates(c)) displays++;
+        }));
+        return {
+            worker: workerId,
+            pid: process.pid,
+            rooms: rooms.size,
+            activeRooms: [...rooms.values()].filter(r => r.clients.size > 0).length,
+            clients,
+            displays,
+            counters: { ...counters },
+            rates,
+            cpu: process.cpuUsage(), // µs user / system since start
+            memory: process.memoryUsage().rss
+        };
+    }
+
+    const timers = [setInterval(flush, FLUSH_MS), setInterval(updateRates, 1000)];
+
+    return {
+        rooms,
+        handleConnection,
+        getMetrics,
+        close() {
+            timers.forEach(clearInterval);
+            bus.close();
+        }
+    };
+}
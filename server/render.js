@@ -0,0 +1,73 @@
+import fs from 'node:fs';
+import { parseArgs } from 'node:util';
+import { launchBrowser } from './browser.js';
+import { startFrameServer } from './frameserver.js';
+
+// Headless batch render: drives the app's OfflineRenderer in headless Chromium and collects the
+// frames through the frame server. --gl picks the browser's GL backend (see server/browser.js);
+// the default, llvmpipe, is Mesa's CPU rasterizer for nodes without a GPU.
+//
+//   npm run dev &
+//   node server/render.js --width 3840 --height 2160 --frames 600 --preset loop.json --out frames/
+const { values: args } = parseArgs({
+    options: {
+        url: { type: 'string', default: 'http://localhost:3000' },
+        width: { type: 'string', default: '3840' },
+        height: { type: 'string', default: '2160' },
+        fps: { type: 'string', default: '60' },
+        frames: { type: 'string', default: '600' },
+        preroll: { type: 'string', default: '0' },
+        format: { type: 'string', default: 'png' },
+        tile: { type: 'string' },                      // force tiling (keeps each draw short on CPU GL)
+        preset: { type: 'string' },
+        out: { type: 'string', default: 'frames' },
+        port: { type: 'string', default: '8090' },
+        gl: { type: 'string', default: 'llvmpipe' }    // llvmpipe | swiftshader | gpu
+    }
+});
+
+const preset = args.preset ? JSON.parse(fs.readFileSync(args.preset, 'utf8')) : null;
+const browser = await launchBrowser({
+    gl: args.gl,
+    protocolTimeout: 0, // a single software-rendered 4K frame can take minutes
+    args: ['--disable-background-timer-throttling', '--disable-renderer-backgrounding']
+});
+const frameServer = startFrameServer({ port: Number(args.port), outDir: args.out, preset });
+
+let exitCode = 0;
+try {
+    const page = await browser.newPage();
+    page.on('console', msg => console.log(`[page] ${msg.text()}`));
+    page.on('pageerror', err => console.error(`[page] ${err.message}`));
+
+    const params = new URLSearchParams({
+        render: 'offline',
+        width: args.width, height: args.height, fps: args.fps, frames: args.frames,
+        preroll: args.preroll, format: args.format,
+        frameServer: `http://localhost:${args.port}`,
+        governor: 'off'
+    });
+    if (args.tile) params.set('tile', args.tile);
+
+    await page.goto(`${args.url}/?${params}`, { waitUntil: 'load', timeout: 0 });
+    const renderer = await page.evaluate(() => {
+        const gl = document.getElementById('canvas').getContext('webgl2');
+        const info = gl.getExtension('WEBGL_debug_renderer_info');
+        return info ? gl.getParameter(info.UNMASKED_RENDERER_WEBGL) : gl.getParameter(gl.RENDERER);
+    });
+    console.log(`🖥️ GL renderer: ${renderer}`);
+
+    // Finished (or failed) renders report through the frame server; a crashed page never would
+    const crashed = new Promise(resolve => page.on('error', err => resolve({ error: `page crashed: ${err.message}` })));
+    const summary = await Promise.race([frameServer.done, crashed]);
+    if (summary.error) {
+        console.error(`❌ Render failed: ${summary.error}`);
+        exitCode = 1;
+    } else {
+        console.log(`✅ ${summary.received} frames (${(summary.bytes / 1048576).toFixed(1)}MB) in ${summary.seconds?.toFixed(1)}s → ${args.out}`);
+    }
+} finally {
+    await browser.close();
+    frameServer.close();
+}
+process.exit(exitCode);
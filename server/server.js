@@ -1,44 +1,39 @@
+import cluster from 'node:cluster';
+import { parseArgs } from 'node:util';
 import { WebSocketServer } from 'ws';
+import { createRelay } from './relay.js';
+import { startPrimary, startWorker, startMetricsServer } from './cluster.js';
 
-const wss = new WebSocketServer({ port: 8080 });
-
-const rooms = new Map();
-
-wss.on('connection', (ws, req) => {
-    const url = new URL(req.url, 'http://localhost');
-    const roomId = url.searchParams.get('room') || 'default';
-    const mode = url.searchParams.get('mode') || 'both'; // 'controller', 'display', 'both'
-    
-    if (!rooms.has(roomId)) {
-        rooms.set(roomId, new Set());
+// Sync relay entry point (relay logic in server/relay.js).
+//
+//   node server/server.js                        single process on :8080
+//   node server/server.js --workers 8            8 worker processes, rooms sharded by id (server/cluster.js)
+//
+// Metrics for each worker on http://127.0.0.1:9091/metrics (Prometheus) and /metrics.json.
+const { values: args } = parseArgs({
+    options: {
+        port: { type: 'string', default: process.env.PORT || '8080' },
+        workers: { type: 'string', default: process.env.RELAY_WORKERS || '1' },
+        'metrics-port': { type: 'string', default: process.env.RELAY_METRICS_PORT || '9091' }
     }
-    
-    const room = rooms.get(roomId);
-    const client = { ws, mode };
-    room.add(client);
-    
-    console.log(`Client joined room: ${roomId} as ${mode}`);
-    
-    ws.on('message', (data) => {
-        const message = JSON.parse(data);
-        
-        // Broadcast to all other clients in the room
-        room.forEach((c) => {
-            if (c.ws !== ws && c.ws.readyState === 1) {
-                // Only send control messages to displays
-                if (c.mode === 'display' || c.mode === 'both') {
-                    c.ws.send(JSON.stringify(message));
-                }
-            }
-        });
-    });
-    
-    ws.on('close', () => {
-        room.delete(client);
-        if (room.size === 0) {
-            rooms.delete(roomId);
-        }
-    });
 });
 
-console.log('WebSocket server running on ws://localhost:8080');
\ No newline at end of file
+const options = {
+    port: Number(args.port),
+    workers: Number(args.workers),
+    metricsPort: Number(args['metrics-port']),
+    maxBuffered: Number(process.env.RELAY_MAX_BUFFERED) || 256 * 1024,
+    dropBuffered: Number(process.env.RELAY_DROP_BUFFERED) || 8 * 1024 * 1024
+};
+
+if (cluster.isWorker) {
+    startWorker();
+} else if (options.workers > 1) {
+    startPrimary(options);
+} else {
+    const relay = createRelay({ maxBuffered: options.maxBuffered, dropBuffered: options.dropBuffered });
+    const wss = new WebSocketServer({ port: options.port });
+    wss.on('connection', relay.handleConnection);
+    startMetricsServer(options.metricsPort, async () => ({ workers: [relay.getMetrics()] }));
+    console.log(`WebSocket server running on ws://localhost:${options.port}`);
+}
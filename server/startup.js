@@ -0,0 +1,168 @@
+import { spawn, execSync } from 'node:child_process';
+import fs from 'node:fs';
+import path from 'node:path';
+import { parseArgs } from 'node:util';
+import { launchBrowser } from './browser.js';
+
+// Startup benchmark: cold-loads the built app in headless Chromium a few times and reads the
+// milestones the scene records in window.startupTiming (ShaderScene.markStartup), in ms since
+// navigation start:
+//   firstFrame    the placeholder frame is drawn
+//   firstVariant  the initial shader variant is drawn through the post chain
+//   interactive   UI and input are bound
+// Fails (exit 1) when a median is over its budget or regressed against a baseline, so it can run
+// after the build:
+//
+//   npm run check:startup                                   (vite build, then this against vite preview)
+//   node server/startup.js --out bench/startup-HEAD.json
+//   node server/startup.js --compare bench/startup-main.json --worker
+const { values: args } = parseArgs({
+    options: {
+        url: { type: 'string' },                        // default: serve dist/ with vite preview
+        runs: { type: 'string', default: '5' },
+        worker: { type: 'boolean', default: false },    // also measure render-worker mode (?worker=1)
+        gl: { type: 'string', default: 'llvmpipe' },    // llvmpipe | swiftshader | gpu
+        'max-first-frame': { type: 'string' },          // budgets in ms, checked against the medians
+        'max-interactive': { type: 'string' },
+        tolerance: { type: 'string', default: '0.2' },  // allowed regression against --compare, as a fraction
+        slack: { type: 'string', default: '50' },       // plus this many ms (timer and scheduling noise)
+        timeout: { type: 'string', default: '120000' }, // per load; software GL links slowly
+        port: { type: 'string', default: '4173' },
+        out: { type: 'string' },
+        compare: { type: 'string' }
+    }
+});
+
+const MILESTONES = ['firstFrame', 'firstVariant', 'interactive'];
+
+function gitCommit() {
+    try {
+        return execSync('git rev-parse --short HEAD', { stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+    } catch {
+        return null;
+    }
+}
+
+// vite preview of dist/, resolved once it's listening
+async function startPreview(port) {
+    const child = spawn('npx', ['vite', 'preview', '--port', port, '--strictPort'], { stdio: ['ignore', 'pipe', 'pipe'] });
+    let output = '';
+    await new Promise((resolve, reject) => {
+        const onData = (chunk) => {
+            output += chunk;
+            if (output.includes(`:${port}`)) resolve();
+        };
+        child.stdout.on('data', onData);
+        child.stderr.on('data', onData);
+        child.on('exit', () => reject(new Error(`vite preview exited early:\n${output}`)));
+    });
+    return child;
+}
+
+async function measure(browser, url) {
+    const context = await browser.createBrowserContext(); // cold: no HTTP cache, no compiled code cache
+    try {
+        const page = await context.newPage();
+        page.on('pageerror', err => console.error(`[page] ${err.message}`));
+        await page.goto(url, { waitUntil: 'load', timeout: Number(args.timeout) });
+        await page.waitForFunction(() => globalThis.startupTiming?.interactive != null, { timeout: Number(args.timeout) });
+        return await page.evaluate(() => {
+            const scripts = performance.getEntriesByType('resource').filter(e => e.initiatorType === 'script' || e.name.endsWith('.js'));
+            return {
+                ...globalThis.startupTiming,
+                domContentLoaded: performance.getEntriesByType('navigation')[0]?.domContentLoadedEventEnd ?? null,
+                scriptKB: scripts.reduce((n, e) => n + (e.encodedBodySize || 0), 0) / 1024
+            };
+        });
+    } finally {
+        await context.close();
+    }
+}
+
+function median(values) {
+    const sorted = values.filter(v => v != null).sort((a, b) => a - b);
+    return sorted.length ? sorted[Math.floor(sorted.length / 2)] : null;
+}
+
+async function runMode(browser, baseUrl, mode) {
+    const url = mode === 'worker' ? `${baseUrl}/?worker=1` : `${baseUrl}/`;
+    const runs = [];
+    for (let i = 0; i < Number(args.runs); i++) {
+        const run = await measure(browser, url);
+        runs.push(run);
+        console.error(`  ${mode} #${i + 1}: ${MILESTONES.map(m => `${m} ${run[m]?.toFixed(0)}ms`).join(', ')}, ${run.scriptKB.toFixed(0)}KB JS`);
+    }
+    const result = { runs };
+    [...MILESTONES, 'domContentLoaded', 'scriptKB'].forEach((key) => {
+        result[key] = median(runs.map(r => r[key]));
+    });
+    return result;
+}
+
+// Budget and baseline checks on the medians; returns the failures
+function check(report, baseline) {
+    const failures = [];
+    const budgets = { firstFrame: args['max-first-frame'], interactive: args['max-interactive'] };
+    Object.entries(report.modes).forEach(([mode, result]) => {
+        Object.entries(budgets).forEach(([key, budget]) => {
+            if (budget !== undefined && result[key] > Number(budget)) {
+                failures.push(`${mode} ${key} ${result[key].toFixed(0)}ms over its ${budget}ms budget`);
+            }
+        });
+
+        const base = baseline?.modes?.[mode];
+        if (!base) return;
+        console.error(`\n${mode}: ${baseline.commit ?? 'baseline'} → ${report.commit ?? 'current'}`);
+        MILESTONES.forEach((key) => {
+            const a = base[key];
+            const b = result[key];
+            if (a == null || b == null) return;
+            const delta = `${(((b - a) / a) * 100).toFixed(1)}%`;
+            console.error(`  ${key.padEnd(13)} ${a.toFixed(0).padStart(7)}ms → ${b.toFixed(0).padStart(7)}ms  ${delta}`);
+            if (b > a * (1 + Number(args.tolerance)) + Number(args.slack)) {
+                failures.push(`${mode} ${key} regressed ${a.toFixed(0)}ms → ${b.toFixed(0)}ms`);
+            }
+        });
+    });
+    return failures;
+}
+
+const browser = await launchBrowser({ gl: args.gl });
+const preview = args.url ? null : await startPreview(args.port);
+const baseUrl = (args.url ?? `http://localhost:${args.port}`).replace(/\/$/, '');
+
+let exitCode = 0;
+try {
+    const report = {
+        tool: 'startup-bench',
+        version: 1,
+        commit: gitCommit(),
+        date: new Date().toISOString(),
+        gl: args.gl,
+        modes: {}
+    };
+    for (const mode of args.worker ? ['main', 'worker'] : ['main']) {
+        report.modes[mode] = await runMode(browser, baseUrl, mode);
+    }
+
+    const json = JSON.stringify(report, null, 2);
+    if (args.out) {
+        fs.mkdirSync(path.dirname(args.out), { recursive: true });
+        fs.writeFileSync(args.out, json);
+        console.error(`\n📄 ${args.out}`);
+    } else {
+        console.log(json);
+    }
+
+    const failures = check(report, args.compare ? JSON.parse(fs.readFileSync(args.compare, 'utf8')) : null);
+    failures.forEach(f => console.error(`❌ ${f}`));
+    if (failures.length) exitCode = 1;
+    else console.error('✅ Startup within budget');
+} catch (err) {
+    console.error(`❌ Startup benchmark failed: ${err.message}`);
+    exitCode = 1;
+} finally {
+    await browser.close();
+    preview?.kill();
+}
+process.exit(exitCode);
@@ -0,0 +1,530 @@
+import difflib
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+# Offline sweep over the ShaderAssembler variant space.
+# Mirrors ShaderAssembler.specialize() + GlslSymbols.prune() on top of the chunk strings in
+# src/engine/chunks.js, dedupes identical sources by hash and validates each unique one with
+# glslangValidator (as a stand-in for the browser's GLSL ES 3.00 front end). --parity first checks
+# every variant against ShaderAssembler.specialize() run under node, so the two can't drift apart.
+
+CHUNKS_PATH = "src/engine/chunks.js"
+ASSEMBLER_PATH = "src/engine/ShaderAssembler.js"
+
+# Axis name -> (key getter in ShaderAssembler.js, chunk library in chunks.js)
+AXES = {
+    "shape": ("getShapeKey", "SDF_LIB"),
+    "mode": ("getShapeModeKey", None),
+    "displacement": ("getDisplaceKey", "DISPLACE_LIB"),
+    "sdf_effect": ("getSdfEffectKey", "SDF_EFFECT_LIB"),
+    "color": ("getColorKey", "COLOR_LIB"),
+    "crunch": ("getCrunchKey", "CRUNCH_LIB"),
+}
+
+# Quality tier of variants without one (ShaderAssembler.DEFAULT_TIER)
+DEFAULT_TIER = "high"
+
+IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+MARKER = re.compile(r"/\*@(\w+)@\*/")
+
+
+# ==============================================================================
+# 1. CHUNK LOADING
+# ==============================================================================
+def load_chunks(path=CHUNKS_PATH):
+    """Read every `export const NAME = `...`` string and `{ key: `...` }` table from chunks.js."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    chunks = {}
+    for m in re.finditer(r"export const (\w+) = (`|\{)", text):
+        name, opener = m.group(1), m.group(2)
+        if opener == "`":
+            end = text.index("`", m.end())
+            chunks[name] = text[m.end():end]
+        else:
+            end = text.index("\n};", m.end())
+            body = text[m.end():end]
+            # Entries commented out with // are skipped, as they are for the JS module
+            entries = re.findall(r"^[ \t]*(//[ \t]*)?['\"]?(\w+)['\"]?\s*:\s*`(.*?)`", body, re.S | re.M)
+            chunks[name] = {k: v for commented, k, v in entries if not commented}
+    return chunks
+
+
+def load_key_tables(path=ASSEMBLER_PATH):
+    """Read the id -> key arrays from the static getXKey() helpers in ShaderAssembler.js."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    tables = {}
+    for m in re.finditer(r"static (get\w+Key)\(id\)\s*\{\s*(?://[^\n]*\s*)*const keys = \[(.*?)\];", text, re.S):
+        body = re.sub(r"//[^\n]*", "", m.group(2))
+        tables[m.group(1)] = re.findall(r"'(\w+)'", body)
+    return tables
+
+
+# ==============================================================================
+# 2. SYMBOL GRAPH (same rules as src/engine/GlslSymbols.js)
+# ==============================================================================
+_parse_cache = {}
+
+
+def strip_comments(source):
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    return re.sub(r"//[^\n]*", "", source)
+
+
+def describe(text):
+    kind, name = "global", None
+    if text.startswith("#"):
+        kind = "directive"
+        m = re.match(r"#\s*define\s+([A-Za-z_]\w*)", text)
+        name = m.group(1) if m else None
+    elif re.match(r"(layout\s*\([^)]*\)\s*)?uniform\s+[A-Za-z_]\w*\s*\{", text):
+        kind = "block"
+        name = re.search(r"uniform\s+([A-Za-z_]\w*)", text).group(1)
+    elif re.match(r"struct\b", text):
+        kind = "struct"
+        m = re.match(r"struct\s+([A-Za-z_]\w*)", text)
+        name = m.group(1) if m else None
+    elif re.match(r"precision\b", text):
+        kind = "directive"
+    elif text.endswith("}"):
+        kind = "function"
+        idents = IDENT.findall(text[:text.index("(")])
+        name = idents[-1] if idents else None
+    else:
+        kind = "uniform" if re.match(r"uniform\b", text) else "global"
+        idents = IDENT.findall(re.split(r"[=\[;]", text)[0])
+        name = idents[-1] if idents else None
+
+    refs = {m.group(0) for m in IDENT.finditer(text)
+            if not (m.start() > 0 and text[m.start() - 1] == ".") and m.group(0) != name}
+    return {"kind": kind, "name": name, "text": text, "refs": refs}
+
+
+def parse_declarations(source):
+    cached = _parse_cache.get(source)
+    if cached is not None:
+        return cached
+
+    decls = []
+    stripped = strip_comments(source)
+    start = depth = i = 0
+
+    def push(end):
+        text = stripped[start:end].strip()
+        if text:
+            decls.append(describe(text))
+        return end
+
+    while i < len(stripped):
+        ch = stripped[i]
+        if depth == 0 and ch == "#" and stripped[start:i].strip() == "":
+            end = stripped.find("\n", i)
+            end = len(stripped) if end == -1 else end
+            start = push(end)
+            i = end
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            # Function bodies end at the brace, structs and uniform blocks continue to their ';'
+            if depth == 0 and not re.match(r"\s*(struct|layout|uniform)\b", stripped[start:i]):
+                start = push(i + 1)
+        elif ch == ";" and depth == 0:
+            start = push(i + 1)
+        i += 1
+    push(len(stripped))
+
+    _parse_cache[source] = decls
+    return decls
+
+
+def prune(decls, roots=("main",)):
+    """Keeps what the roots reach, plus directives and uniform blocks (shared std140 layouts)."""
+    by_name = {}
+    for d in decls:
+        if d["name"] and d["kind"] not in ("directive", "block"):
+            by_name.setdefault(d["name"], []).append(d)
+
+    reachable = set()
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name in reachable or name not in by_name:
+            continue
+        reachable.add(name)
+        for d in by_name[name]:
+            stack.extend(r for r in d["refs"] if r not in reachable and r in by_name)
+
+    kept = [d for d in decls if d["kind"] in ("directive", "block") or (d["name"] and d["name"] in reachable)]
+    return kept, reachable
+
+
+# ==============================================================================
+# 3. ASSEMBLY (same rules as ShaderAssembler.specialize)
+# ==============================================================================
+class Assembler:
+    def __init__(self, root="."):
+        self.chunks = load_chunks(os.path.join(root, CHUNKS_PATH))
+        self.keys = load_key_tables(os.path.join(root, ASSEMBLER_PATH))
+
+    def axis_size(self, axis):
+        return len(self.keys[AXES[axis][0]])
+
+    def pick(self, axis, index):
+        getter, lib = AXES[axis]
+        table = self.keys[getter]
+        key = table[index] if 0 <= index < len(table) else table[0]
+        return self.chunks[lib].get(key) or next(iter(self.chunks[lib].values()))
+
+    @staticmethod
+    def variant_key(v):
+        key = ":".join(str(x) for x in (v["shape"], v["mode"], v["displacement"], v["sdf_effect"], v["color"], v["crunch"],
+                                        v.get("quality", DEFAULT_TIER), 1 if v.get("noise") else 0))
+        return f"{key}:{v['pass']}" if v.get("pass") else key
+
+    def defines(self, v):
+        tiers = self.chunks["QUALITY_TIERS"]
+        return "\n".join([
+            tiers.get(v.get("quality"), tiers[DEFAULT_TIER]).strip(),
+            f"#define SHAPE_TYPE {v['shape']}",
+            f"#define SHAPE_MODE {v['mode']}",
+            f"#define DISPLACEMENT_ENABLED {1 if v['displacement'] >= 0 else 0}",
+            f"#define DISPLACEMENT_TYPE {v['displacement']}",
+            f"#define SDF_EFFECT_TYPE {v['sdf_effect']}",
+            f"#define COLOR_TYPE {v['color']}",
+            f"#define CRUNCH_TYPE {v['crunch']}",
+        ])
+
+    def chunk_list(self, v):
+        c = self.chunks
+        mode = v["mode"]
+        mode_key = self.keys["getShapeModeKey"][mode] if 0 <= mode < 6 else "single"
+        shape_table = self.keys["getShapeKey"]
+        shape_key = shape_table[v["shape"]] if 0 <= v["shape"] < len(shape_table) else shape_table[0]
+        bound = c["SDF_BOUNDS"].get(shape_key) if mode <= 1 else None
+        counting = v.get("pass") == "steps"
+        hooks = {
+            "FRACTAL_WORLD": c["VARIANT_HOOKS"]["fractalWorld"] if mode == 2 else "",
+            "SHAPE": c["SHAPE_MODE_FX"].get(mode_key, c["SHAPE_MODE_FX"]["single"]),
+            "DISPLACE": c["VARIANT_HOOKS"]["displace"] if v["displacement"] >= 0 else "",
+            "FOG_COLOR": c["VARIANT_HOOKS"]["fogColor"] if mode == 4 else "",
+            "IMAGE_MODE": c["VARIANT_HOOKS"]["imageMode"] if mode == 5 else "",
+            "SHAPE_BOUND": bound or "",
+            "MODE_BOUND": c["SHAPE_MODE_BOUNDS"][mode_key] if bound else "",
+            "RAY_BOUND": c["VARIANT_HOOKS"]["rayBound"] if bound else "",
+            "SHADOW_BOUND": c["VARIANT_HOOKS"]["shadowBound"] if bound else "",
+            "RAY_SEED": c["VARIANT_HOOKS"]["raySeed"] if mode <= 2 else "",
+            "COUNT_STEP": c["VARIANT_HOOKS"]["countStep"] if counting else "",
+            "STEP_OUTPUT": c["VARIANT_HOOKS"]["stepOutput"] if counting else "",
+        }
+
+        def fill(template):
+            return MARKER.sub(lambda m: hooks.get(m.group(1), ""), template)
+
+        return [
+            c["COMMON_UNIFORMS"], c["STRUCTS"], c["GLOBAL_VARS"], c["MATH_COMMON"], c["MATH_UTILS"],
+            c["NOISE_SOURCE"]["volume" if v.get("noise") else "procedural"], c["NOISE_LIB"], c["BLUR_FX"],
+            self.pick("crunch", v["crunch"]),
+            self.pick("displacement", max(v["displacement"], 0)),
+            self.pick("sdf_effect", v["sdf_effect"]),
+            c["DOMAIN_FX"], c["FOG_FX"], c["GROUND_FX"],
+            self.pick("shape", v["shape"]),
+            c["LIMITED_REPEAT_FX"],
+            fill(c["MAP_FX"]["fog"] if mode == 4 else c["MAP_FX"]["surface"]),
+            fill(c["BOUNDS_FX"]) if bound else "",
+            self.pick("color", v["color"]),
+            fill(c["LIGHTING_FX"]), c["FEEDBACK_FX"], c["IMAGE_FX"],
+            c["CAMERA_FX"],
+            *([fill(c["CONE_PREPASS_FX"])] if v.get("pass") == "cone" else [c["CHECKERBOARD_FX"], fill(c["MAIN_FX"])]),
+        ]
+
+    def specialize(self, v):
+        """Returns (defines, pruned body, reachable symbol set) for a variant dict."""
+        decls = [d for chunk in self.chunk_list(v) for d in parse_declarations(chunk)]
+        kept, reachable = prune(decls)
+        body = "\n".join(d["text"] for d in kept)
+        return self.defines(v), body, reachable, kept
+
+    def live_axes(self, mode, displacement_on):
+        """Axes whose chunk still has a reachable declaration for this mode/displacement combo."""
+        base = {"shape": 0, "mode": mode, "displacement": 0 if displacement_on else -1,
+                "sdf_effect": 0, "color": 0, "crunch": 0}
+        _, _, reachable, _ = self.specialize(base)
+        live = set()
+        for axis, (_, lib) in AXES.items():
+            if lib is None:
+                continue
+            names = {d["name"] for chunk in self.chunks[lib].values() for d in parse_declarations(chunk) if d["name"]}
+            if names & reachable:
+                live.add(axis)
+        return live
+
+
+# ==============================================================================
+# 4. METRICS & VALIDATION
+# ==============================================================================
+def metrics(kept, source):
+    code = "\n".join(d["text"] for d in kept if d["kind"] == "function")
+    # Loop caps are mostly quality-tier constants; resolve them through the variant's #defines
+    constants = dict(re.findall(r"#define\s+(\w+)\s+(\d+)", source))
+    bounds = [int(constants.get(b, b)) for b in re.findall(r"for\s*\([^;]*;\s*\w+\s*<=?\s*(\w+)", code)
+              if constants.get(b, b).isdigit()]
+    return {
+        "chars": len(source),
+        "functions": sum(1 for d in kept if d["kind"] == "function"),
+        # Loose uniforms (samplers) plus the members of the std140 blocks
+        "uniforms": sum(1 for d in kept if d["kind"] == "uniform")
+                    + sum(d["text"][d["text"].index("{"):].count(";") - 1 for d in kept if d["kind"] == "block"),
+        "loops": len(re.findall(r"\b(?:for|while)\s*\(", code)),
+        "max_loop_bound": max(bounds, default=0),
+    }
+
+
+def validate(source, validator):
+    with tempfile.NamedTemporaryFile("w", suffix=".frag", delete=False, encoding="utf-8") as f:
+        f.write("#version 300 es\n" + source)
+        path = f.name
+    try:
+        result = subprocess.run([validator, path], capture_output=True, text=True, timeout=120)
+        log = (result.stdout + result.stderr).replace(path, "<variant>").strip()
+        return result.returncode == 0, log
+    finally:
+        os.unlink(path)
+
+
+# ShaderAssembler.specialize() itself, run under Node over stdin's variant states; prints one
+# sha1 of the source per state so thousands of variants don't go through the pipe in full
+PARITY_SCRIPT = """
+import { createHash } from 'node:crypto';
+import { pathToFileURL } from 'node:url';
+const { ShaderAssembler } = await import(pathToFileURL(process.argv[1]).href);
+let input = '';
+for await (const chunk of process.stdin) input += chunk;
+const sources = JSON.parse(input).map(state => ShaderAssembler.specialize(state).source);
+const full = process.argv[2] === 'full';
+console.log(JSON.stringify(sources.map(s => full ? s : createHash('sha1').update(s).digest('hex'))));
+"""
+
+
+def js_state(v):
+    """Variant dict -> the ShaderScene state ShaderAssembler.specialize() takes."""
+    return {"shapeType": v["shape"], "shapeMode": v["mode"],
+            "displacementAmp": 1.0 if v["displacement"] >= 0 else 0.0, "displacementType": max(v["displacement"], 0),
+            "sdfEffectType": v["sdf_effect"], "colorType": v["color"], "crunchType": v["crunch"],
+            "quality": v.get("quality", DEFAULT_TIER), "noiseVolume": bool(v.get("noise")), "pass": v.get("pass")}
+
+
+def js_specialize(variants, root, node, full=False):
+    result = subprocess.run([node, "--input-type=module", "-e", PARITY_SCRIPT, os.path.join(root, ASSEMBLER_PATH),
+                             "full" if full else "hash"],
+                            input=json.dumps([js_state(v) for v in variants]), capture_output=True, text=True,
+                            cwd=root, timeout=600)
+    if result.returncode != 0:
+        raise RuntimeError(f"ShaderAssembler under node failed:\n{result.stderr.strip()[-2000:]}")
+    return json.loads(result.stdout)
+
+
+def check_parity(asm, variants, root, node):
+    """Keys of the variants whose source differs from ShaderAssembler.specialize(), plus a diff of the first."""
+    sources = [f"{defines}\n{body}\n" for defines, body, _, _ in (asm.specialize(v) for v in variants)]
+    expected = js_specialize(variants, root, node)
+    mismatched = [i for i, (s, h) in enumerate(zip(sources, expected)) if hashlib.sha1(s.encode()).hexdigest() != h]
+    if not mismatched:
+        return [], ""
+    first = mismatched[0]
+    js_source = js_specialize([variants[first]], root, node, full=True)[0]
+    diff = difflib.unified_diff(js_source.splitlines(), sources[first].splitlines(), "ShaderAssembler.js", "shader_variants.py", lineterm="")
+    return [asm.variant_key(variants[i]) for i in mismatched], "\n".join(list(diff)[:60])
+
+
+# --- POOL WORKERS ---
+_worker = {}
+
+
+def _init_worker(root, validator):
+    _worker["assembler"] = Assembler(root)
+    _worker["validator"] = validator
+
+
+def _hash_batch(variants):
+    asm = _worker["assembler"]
+    out = []
+    for v in variants:
+        _, body, _, _ = asm.specialize(v)
+        # Defines of dead axes don't change the program, so the hash covers the pruned body only
+        out.append((asm.variant_key(v), hashlib.sha1(body.encode()).hexdigest()))
+    return out
+
+
+def _validate_one(v):
+    asm = _worker["assembler"]
+    defines, body, _, kept = asm.specialize(v)
+    source = f"{defines}\n{body}\n"
+    record = metrics(kept, source)
+    if _worker["validator"]:
+        t0 = time.perf_counter()
+        record["valid"], log = validate(source, _worker["validator"])
+        record["validate_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        if not record["valid"]:
+            record["log"] = log[-2000:]
+    else:
+        record["valid"] = None
+    return record
+
+
+# ==============================================================================
+# 5. ENUMERATION
+# ==============================================================================
+def parse_range(spec, size):
+    """'0,3,5-7' -> [0, 3, 5, 6, 7]; None -> every value."""
+    if not spec:
+        return list(range(size))
+    values = []
+    for part in spec.split(","):
+        if "-" in part.strip("-"):
+            lo, hi = part.split("-", 1)
+            values.extend(range(int(lo), int(hi) + 1))
+        else:
+            values.append(int(part))
+    return [v for v in values if -1 <= v < size]
+
+
+def enumerate_variants(asm, filters, sweep="axes"):
+    """
+    full: cartesian product over every live axis (axes a mode can't reach are pinned to 0).
+    axes: vary one axis at a time around the first selected value of every other axis,
+          which covers every chunk in every mode in a few hundred variants.
+    """
+    ranges = {axis: parse_range(filters.get(axis), asm.axis_size(axis)) for axis in AXES}
+    # Displacement -1 means amplitude 0 (opDisplace not emitted)
+    if not filters.get("displacement"):
+        ranges["displacement"] = [-1] + ranges["displacement"]
+
+    for mode in ranges["mode"]:
+        for displacement_on in (False, True):
+            disp_values = [d for d in ranges["displacement"] if (d >= 0) == displacement_on]
+            if not disp_values:
+                continue
+            live = asm.live_axes(mode, displacement_on)
+            axis_values = {
+                axis: (values if axis in live else values[:1])
+                for axis, values in ranges.items() if axis not in ("mode", "displacement")
+            }
+            axis_values["displacement"] = disp_values if "displacement" in live else disp_values[:1]
+
+            names = ["shape", "displacement", "sdf_effect", "color", "crunch"]
+            if sweep == "full":
+                for combo in product(*(axis_values[n] for n in names)):
+                    yield dict(zip(names, combo), mode=mode)
+            else:
+                base = {n: axis_values[n][0] for n in names}
+                yield dict(base, mode=mode)
+                for n in names:
+                    for value in axis_values[n][1:]:
+                        yield dict(base, mode=mode, **{n: value})
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(args):
+    root = os.getcwd()
+    validator = None if args.no_validate else shutil.which(args.validator)
+    if not args.no_validate and not validator:
+        print(f"⚠️ '{args.validator}' not found on PATH, writing the manifest without validation")
+
+    asm = Assembler(root)
+    filters = {axis: getattr(args, axis) for axis in AXES}
+    tiers = list(asm.chunks["QUALITY_TIERS"]) if args.quality == "all" else args.quality.split(",")
+    noise = {"procedural": [0], "volume": [1], "both": [0, 1]}[args.noise]
+    variants = [dict(v, quality=tier, noise=n) for tier in tiers for n in noise for v in enumerate_variants(asm, filters, args.sweep)]
+    by_key = {asm.variant_key(v): v for v in variants}
+    if args.parity:
+        node = shutil.which("node")
+        if not node:
+            print("❌ --parity needs node on PATH")
+            return 1
+        mismatched, diff = check_parity(asm, variants, root, node)
+        if mismatched:
+            print(f"❌ {len(mismatched)} of {len(variants)} variant(s) differ from ShaderAssembler.specialize(), e.g. {', '.join(mismatched[:5])}")
+            print(diff)
+            return 1
+        print(f"🤝 {len(variants)} variants match ShaderAssembler.specialize()")
+    print(f"🔎 {len(variants)} variants to assemble ({args.sweep} sweep, {args.jobs or os.cpu_count()} workers)")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs or None, initializer=_init_worker, initargs=(root, validator)) as pool:
+        # Stage 1: assemble + hash everything, keep one representative per unique source
+        groups = {}
+        for batch in pool.map(_hash_batch, _batches(variants, 256)):
+            for key, digest in batch:
+                groups.setdefault(digest, []).append(key)
+        print(f"🧬 {len(groups)} unique sources ({len(variants) - len(groups)} duplicates) in {time.perf_counter() - t0:.1f}s")
+
+        # Stage 2: metrics + validation for the unique ones only
+        digests = list(groups)
+        representatives = [by_key[groups[d][0]] for d in digests]
+        records = list(pool.map(_validate_one, representatives, chunksize=4))
+
+    failed = oversized = 0
+    with open(args.out, "w", encoding="utf-8") as f:
+        for digest, record in zip(digests, records):
+            record = {"hash": digest, "keys": groups[digest], **record}
+            record["oversized"] = record["chars"] > args.max_chars
+            failed += record["valid"] is False
+            oversized += record["oversized"]
+            f.write(json.dumps(record) + "\n")
+
+    print("-" * 30)
+    print(f"📄 Manifest: {args.out} ({len(records)} unique variants, {time.perf_counter() - t0:.1f}s)")
+    if records:
+        largest = max(records, key=lambda r: r["chars"])
+        print(f"📏 Largest source: {largest['chars']} chars, {largest['uniforms']} uniforms, {largest['loops']} loops")
+    if failed:
+        print(f"❌ {failed} variant(s) failed validation")
+    if oversized:
+        print(f"⚠️ {oversized} variant(s) over {args.max_chars} chars")
+    return 1 if failed or (oversized and args.strict) else 0
+
+
+def add_arguments(parser):
+    parser.add_argument("--sweep", choices=["axes", "full"], default="axes",
+                        help="'axes' varies one axis at a time (fast), 'full' is the cartesian product")
+    parser.add_argument("--shape", help="shape ids, e.g. '0,3,10-12'")
+    parser.add_argument("--mode", help="shape mode ids (0-5)")
+    parser.add_argument("--displacement", help="displacement ids, -1 = amplitude 0")
+    parser.add_argument("--sdf-effect", dest="sdf_effect", help="SDF effect ids")
+    parser.add_argument("--color", help="color mode ids")
+    parser.add_argument("--crunch", help="crunch ids")
+    parser.add_argument("--quality", default=DEFAULT_TIER, help="quality tiers, e.g. 'low,high', or 'all'")
+    parser.add_argument("--noise", choices=["procedural", "volume", "both"], default="procedural",
+                        help="snoise() source: computed, or sampled from the baked noise volume")
+    parser.add_argument("--jobs", type=int, default=0, help="worker processes (default: all cores)")
+    parser.add_argument("--validator", default="glslangValidator")
+    parser.add_argument("--no-validate", action="store_true")
+    parser.add_argument("--max-chars", type=int, default=32000, help="flag sources larger than this")
+    parser.add_argument("--parity", action="store_true",
+                        help="first check every variant against ShaderAssembler.specialize() run under node")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero on oversized variants too")
+    parser.add_argument("--out", default="shader_variants.jsonl")
+    return parser
@@ -0,0 +1,74 @@
+// Non-blocking pixel readback through pixel-pack buffers (WebGL2).
+// readPixels into a PBO only queues a copy; a fence says when it has landed, and only then is the
+// buffer read with getBufferSubData, so the CPU never stalls on the GPU pipeline.
+export class AsyncReadback {
+    constructor(gl, options = {}) {
+        this.gl = gl;
+        this.pollMs = options.pollMs ?? 2;
+        this.free = new Map(); // byte size -> [PBOs], reused across frames of the same size
+    }
+
+    // Reads a rectangle of the currently bound framebuffer.
+    // type: gl.UNSIGNED_BYTE (Uint8Array) or gl.FLOAT (Float32Array), always RGBA
+    read(x, y, width, height, type = this.gl.UNSIGNED_BYTE) {
+        const gl = this.gl;
+        const ArrayType = type === gl.FLOAT ? Float32Array : Uint8Array;
+        const bytes = width * height * 4 * ArrayType.BYTES_PER_ELEMENT;
+        const pbo = this.acquire(bytes);
+
+        gl.bindBuffer(gl.PIXEL_PACK_BUFFER, pbo);
+        gl.readPixels(x, y, width, height, gl.RGBA, type, 0);
+        gl.bindBuffer(gl.PIXEL_PACK_BUFFER, null);
+
+        const sync = gl.fenceSync(gl.SYNC_GPU_COMMANDS_COMPLETE, 0);
+        gl.flush(); // make sure the fence is submitted, or it may never signal
+
+        return this.wait(sync).then(() => {
+            const out = new ArrayType(width * height * 4);
+            gl.bindBuffer(gl.PIXEL_PACK_BUFFER, pbo);
+            gl.getBufferSubData(gl.PIXEL_PACK_BUFFER, 0, out);
+            gl.bindBuffer(gl.PIXEL_PACK_BUFFER, null);
+            this.release(pbo, bytes);
+            return out;
+        });
+    }
+
+    wait(sync) {
+        const gl = this.gl;
+        return new Promise((resolve, reject) => {
+            const check = () => {
+                const status = gl.clientWaitSync(sync, 0, 0);
+                if (status === gl.TIMEOUT_EXPIRED) {
+                    setTimeout(check, this.pollMs);
+                    return;
+                }
+                gl.deleteSync(sync);
+                if (status === gl.WAIT_FAILED) reject(new Error('Readback fence failed'));
+                else resolve();
+            };
+            check();
+        });
+    }
+
+    acquire(bytes) {
+        const gl = this.gl;
+        const pbo = this.free.get(bytes)?.pop();
+        if (pbo) return pbo;
+
+        const buffer = gl.createBuffer();
+        gl.bindBuffer(gl.PIXEL_PACK_BUFFER, buffer);
+        gl.bufferData(gl.PIXEL_PACK_BUFFER, bytes, gl.STREAM_READ);
+        gl.bindBuffer(gl.PIXEL_PACK_BUFFER, null);
+        return buffer;
+    }
+
+    release(pbo, bytes) {
+        if (!this.free.has(bytes)) this.free.set(bytes, []);
+        this.free.get(bytes).push(pbo);
+    }
+
+    dispose() {
+        this.free.forEach(list => list.forEach(pbo => this.gl.deleteBuffer(pbo)));
+        this.free.clear();
+    }
+}
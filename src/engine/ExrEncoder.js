@@ -0,0 +1,77 @@
+import { DataUtils } from 'three';
+
+// Minimal OpenEXR writer: single-part scanline image, no compression, HALF RGBA channels.
+// Enough for compositing tools to read the linear output of the HalfFloat post chain unclamped.
+export class ExrEncoder {
+    // pixels: RGBA Float32Array, rows bottom-up (as read back from GL)
+    static encode(pixels, width, height) {
+        const channels = ['A', 'B', 'G', 'R']; // EXR requires channels sorted by name
+        const offsetOf = { R: 0, G: 1, B: 2, A: 3 };
+
+        // --- header ---
+        const header = [];
+        const attr = (name, type, bytes) => header.push(...ExrEncoder.str(name), ...ExrEncoder.str(type), ...ExrEncoder.i32(bytes.length), ...bytes);
+        const chlist = [];
+        channels.forEach(c => chlist.push(...ExrEncoder.str(c), ...ExrEncoder.i32(1), 0, 0, 0, 0, ...ExrEncoder.i32(1), ...ExrEncoder.i32(1)));
+        chlist.push(0);
+        const box = [...ExrEncoder.i32(0), ...ExrEncoder.i32(0), ...ExrEncoder.i32(width - 1), ...ExrEncoder.i32(height - 1)];
+
+        attr('channels', 'chlist', chlist);
+        attr('compression', 'compression', [0]);
+        attr('dataWindow', 'box2i', box);
+        attr('displayWindow', 'box2i', box);
+        attr('lineOrder', 'lineOrder', [0]);
+        attr('pixelAspectRatio', 'float', ExrEncoder.f32(1));
+        attr('screenWindowCenter', 'v2f', [...ExrEncoder.f32(0), ...ExrEncoder.f32(0)]);
+        attr('screenWindowWidth', 'float', ExrEncoder.f32(1));
+        header.push(0);
+
+        // --- layout: magic + version, header, line offset table, one block per scanline ---
+        const lineBytes = width * channels.length * 2;
+        const blockBytes = 8 + lineBytes;
+        const tableStart = 8 + header.length;
+        const dataStart = tableStart + height * 8;
+        const buffer = new ArrayBuffer(dataStart + height * blockBytes);
+        const view = new DataView(buffer);
+        const bytes = new Uint8Array(buffer);
+
+        view.setUint32(0, 20000630, true);
+        view.setUint32(4, 2, true);
+        bytes.set(header, 8);
+
+        for (let y = 0; y < height; y++) {
+            const block = dataStart + y * blockBytes;
+            view.setBigUint64(tableStart + y * 8, BigInt(block), true);
+            view.setInt32(block, y, true);
+            view.setInt32(block + 4, lineBytes, true);
+
+            // EXR scanlines run top-down
+            const row = (height - 1 - y) * width * 4;
+            let o = block + 8;
+            channels.forEach(c => {
+                const ch = offsetOf[c];
+                for (let x = 0; x < width; x++) {
+                    view.setUint16(o, DataUtils.toHalfFloat(pixels[row + x * 4 + ch]), true);
+                    o += 2;
+                }
+            });
+        }
+        return buffer;
+    }
+
+    static str(s) {
+        return [...s].map(c => c.charCodeAt(0)).concat(0);
+    }
+
+    static i32(v) {
+        const b = new Uint8Array(4);
+        new DataView(b.buffer).setInt32(0, v, true);
+        return [...b];
+    }
+
+    static f32(v) {
+        const b = new Uint8Array(4);
+        new DataView(b.buffer).setFloat32(0, v, true);
+        return [...b];
+    }
+}
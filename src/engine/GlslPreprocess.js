@@ -0,0 +1,81 @@
+import { GlslSymbols } from './GlslSymbols.js';
+
+// Build-time GLSL transforms, run by vite-plugin-glsl.js on chunks.js and the .glsl?raw imports.
+// Plain functions over strings, so the same code runs in Node at build time and in the browser.
+
+// Block comments except the /*@NAME@*/ hook markers ShaderAssembler fills, then line comments
+const COMMENTS = /\/\*(?!@\w+@\*\/)[\s\S]*?\*\/|\/\/[^\n]*/g;
+const INCLUDE = /^[ \t]*#include\s+<(\w+)(?:\.(\w+))?>[ \t]*$/gm;
+const WORD = /[\w.]/;
+const OPERATOR = /[-+*/%<>=!&|^]/;
+
+export class GlslPreprocess {
+    // Comment-free, one line per run of code between preprocessor directives (which have to keep
+    // their own lines), whitespace only where two tokens would otherwise merge
+    static minify(source) {
+        const lines = [];
+        let code = '';
+        source.replace(COMMENTS, '').split('\n').forEach((line) => {
+            line = line.trim();
+            if (!line) return;
+            if (line.startsWith('#')) {
+                if (code) lines.push(this.compact(code));
+                lines.push(line.replace(/\s+/g, ' '));
+                code = '';
+            } else {
+                code += `${line} `;
+            }
+        });
+        if (code) lines.push(this.compact(code));
+        return lines.join('\n');
+    }
+
+    static compact(code) {
+        const text = code.replace(/\s+/g, ' ').trim();
+        let out = '';
+        for (let i = 0; i < text.length; i++) {
+            if (text[i] === ' ') {
+                const a = out[out.length - 1];
+                const b = text[i + 1];
+                // a b, 1.0 x, and - - / + = (which would lex as -- and +=). Hook markers keep theirs:
+                // they may be filled with nothing.
+                const hook = out.endsWith('@*/') || text.startsWith('/*@', i + 1);
+                if (!hook && !((WORD.test(a) && WORD.test(b)) || (OPERATOR.test(a) && OPERATOR.test(b)))) continue;
+            }
+            out += text[i];
+        }
+        return out;
+    }
+
+    // Replaces `#include <NAME>` / `#include <NAME.key>` lines with chunks.js exports, so .glsl
+    // files share helpers with the raymarcher instead of keeping copies
+    static resolveIncludes(source, chunks, file = 'shader') {
+        return source.replace(INCLUDE, (line, name, key) => {
+            const chunk = key ? chunks[name]?.[key] : chunks[name];
+            if (typeof chunk !== 'string') throw new Error(`${file}: unknown chunk in '${line.trim()}'`);
+            return chunk;
+        });
+    }
+
+    // Drops whatever main() can't reach, as ShaderAssembler does per variant, for shaders that
+    // aren't assembled at runtime
+    static prune(source) {
+        return GlslSymbols.prune(GlslSymbols.parse(source), ['main']).source;
+    }
+
+    // GlslSymbols.parse() of each source, for GlslSymbols.seed(): declarations as
+    // [kind, name, start, end, refs] with text = source.slice(start, end). Sources are minified,
+    // so the parser's comment-free text is the source itself. Refs are narrowed to `names` (every
+    // symbol the library declares); the others can't be pruning edges anyway.
+    static encodeSymbols(sources, names) {
+        return sources.map((source) => {
+            let cursor = 0;
+            return [source, GlslSymbols.parse(source).map((d) => {
+                const start = source.indexOf(d.text, cursor);
+                if (start === -1) throw new Error(`Declaration ${d.name ?? d.kind} not found in its minified chunk`);
+                cursor = start + d.text.length;
+                return [d.kind, d.name, start, cursor, [...d.refs].filter(r => names.has(r))];
+            })];
+        });
+    }
+}
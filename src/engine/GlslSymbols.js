@@ -0,0 +1,150 @@
+// Top-level symbol table for GLSL chunks.
+// Splits a chunk into declarations (functions, structs, globals, uniforms, uniform blocks,
+// preprocessor lines),
+// records which other symbols each one references, and prunes anything unreachable from main().
+
+const IDENT = /[A-Za-z_][A-Za-z0-9_]*/g;
+
+export class GlslSymbols {
+    static cache = new Map();
+
+    // Parse a chunk into ordered declarations. Results are memoized per source string since
+    // the library chunks are static and get re-assembled on every variant build.
+    static parse(source) {
+        const cached = this.cache.get(source);
+        if (cached) return cached;
+
+        const decls = [];
+        const stripped = this.stripComments(source);
+        let start = 0;
+        let depth = 0;
+        let i = 0;
+
+        const push = (end) => {
+            const text = stripped.slice(start, end).trim();
+            if (text) decls.push(this.describe(text));
+            start = end;
+        };
+
+        while (i < stripped.length) {
+            const ch = stripped[i];
+
+            if (depth === 0 && ch === '#' && stripped.slice(start, i).trim() === '') {
+                // Preprocessor directive: runs to end of line
+                let end = stripped.indexOf('\n', i);
+                if (end === -1) end = stripped.length;
+                push(end);
+                i = end;
+                continue;
+            }
+
+            if (ch === '{') depth++;
+            else if (ch === '}') {
+                depth--;
+                if (depth === 0) {
+                    // Function bodies end at the brace, structs and uniform blocks continue to their ';'
+                    const head = stripped.slice(start, i);
+                    if (!/^\s*(struct|layout|uniform)\b/.test(head)) {
+                        push(i + 1);
+                    }
+                }
+            } else if (ch === ';' && depth === 0) {
+                push(i + 1);
+            }
+            i++;
+        }
+        push(stripped.length);
+
+        this.cache.set(source, decls);
+        return decls;
+    }
+
+    // Pre-fills the cache with tables computed at build time (GlslPreprocess.encodeSymbols), so
+    // the library chunks are never scanned in the browser
+    static seed(table) {
+        table?.forEach(([source, decls]) => {
+            this.cache.set(source, decls.map(([kind, name, start, end, refs]) => ({
+                kind, name, text: source.slice(start, end), refs: new Set(refs)
+            })));
+        });
+    }
+
+    static stripComments(source) {
+        return source
+            .replace(/\/\*[\s\S]*?\*\//g, '')
+            .replace(/\/\/[^\n]*/g, '');
+    }
+
+    static describe(text) {
+        let kind = 'global';
+        let name = null;
+
+        if (text.startsWith('#')) {
+            kind = 'directive';
+            const m = /^#\s*define\s+([A-Za-z_][A-Za-z0-9_]*)/.exec(text);
+            if (m) name = m[1];
+        } else if (/^(layout\s*\([^)]*\)\s*)?uniform\s+[A-Za-z_]\w*\s*\{/.test(text)) {
+            kind = 'block';
+            name = /uniform\s+([A-Za-z_][A-Za-z0-9_]*)/.exec(text)[1];
+        } else if (/^struct\b/.test(text)) {
+            kind = 'struct';
+            name = /^struct\s+([A-Za-z_][A-Za-z0-9_]*)/.exec(text)?.[1] || null;
+        } else if (/^precision\b/.test(text)) {
+            kind = 'directive';
+        } else if (text.endsWith('}')) {
+            kind = 'function';
+            const header = text.slice(0, text.indexOf('('));
+            name = header.match(IDENT)?.pop() || null;
+        } else {
+            // uniform/in/out/global variable: last identifier before any initializer or array size
+            kind = /^uniform\b/.test(text) ? 'uniform' : 'global';
+            const head = text.split(/[=[;]/)[0];
+            name = head.match(IDENT)?.pop() || null;
+        }
+
+        return { kind, name, text, refs: this.references(text, name) };
+    }
+
+    static references(text, ownName) {
+        const refs = new Set();
+        let m;
+        IDENT.lastIndex = 0;
+        while ((m = IDENT.exec(text)) !== null) {
+            // Skip struct member accesses like col.value
+            if (m.index > 0 && text[m.index - 1] === '.') continue;
+            if (m[0] !== ownName) refs.add(m[0]);
+        }
+        return refs;
+    }
+
+    // Keep only declarations reachable from the roots. Directives are always kept so macros
+    // referenced from inside bodies stay defined, and so are uniform blocks: every program has to
+    // declare the same members for the shared std140 buffers to line up.
+    static prune(decls, roots = ['main']) {
+        const byName = new Map();
+        decls.forEach(d => {
+            if (!d.name || d.kind === 'directive' || d.kind === 'block') return;
+            if (!byName.has(d.name)) byName.set(d.name, []);
+            byName.get(d.name).push(d); // overloads share a name
+        });
+
+        const reachable = new Set();
+        const stack = [...roots];
+        while (stack.length) {
+            const name = stack.pop();
+            if (reachable.has(name) || !byName.has(name)) continue;
+            reachable.add(name);
+            byName.get(name).forEach(d => d.refs.forEach(r => {
+                if (!reachable.has(r) && byName.has(r)) stack.push(r);
+            }));
+        }
+
+        const kept = decls.filter(d => d.kind === 'directive' || d.kind === 'block' || (d.name && reachable.has(d.name)));
+        return {
+            source: kept.map(d => d.text).join('\n'),
+            kept: kept.length,
+            total: decls.length,
+            symbols: reachable
+        };
+    }
+}
@@ -0,0 +1,71 @@
+// GPU frame timing via EXT_disjoint_timer_query_webgl2.
+// Queries resolve a few frames late, so results are collected with poll() rather than awaited.
+// Only one query can be open at a time, so scopes are sequential, never nested.
+export class GpuTimer {
+    constructor(gl, options = {}) {
+        this.gl = gl;
+        this.ext = gl.getExtension('EXT_disjoint_timer_query_webgl2');
+        this.maxPending = options.maxPending ?? 4;
+
+        this.pending = [];
+        this.active = null;
+        this.disjoint = false; // set by the last poll if it had to drop in-flight queries
+    }
+
+    get supported() {
+        return !!this.ext;
+    }
+
+    // tag: anything the caller wants back with the result (see pollTagged)
+    begin(tag = null) {
+        // Skip the frame rather than stacking up queries if the GPU is falling behind
+        if (!this.ext || this.active || this.pending.length >= this.maxPending) return false;
+        const query = this.gl.createQuery();
+        this.gl.beginQuery(this.ext.TIME_ELAPSED_EXT, query);
+        this.active = { query, tag };
+        return true;
+    }
+
+    end() {
+        if (!this.active) return;
+        this.gl.endQuery(this.ext.TIME_ELAPSED_EXT);
+        this.pending.push(this.active);
+        this.active = null;
+    }
+
+    // Returns the GPU times (ms) of every query that finished since the last poll, oldest first
+    poll() {
+        return this.pollTagged().map(r => r.ms);
+    }
+
+    // Same as poll(), with each result's begin() tag: [{ ms, tag }]
+    pollTagged() {
+        this.disjoint = false;
+        if (!this.ext || this.pending.length === 0) return [];
+        const gl = this.gl;
+
+        // A disjoint event (power state change, context switch...) invalidates everything in flight
+        if (gl.getParameter(this.ext.GPU_DISJOINT_EXT)) {
+            this.pending.forEach(p => gl.deleteQuery(p.query));
+            this.pending = [];
+            this.disjoint = true;
+            return [];
+        }
+
+        const results = [];
+        while (this.pending.length) {
+            const { query, tag } = this.pending[0];
+            if (!gl.getQueryParameter(query, gl.QUERY_RESULT_AVAILABLE)) break;
+            this.pending.shift();
+            results.push({ ms: gl.getQueryParameter(query, gl.QUERY_RESULT) / 1e6, tag });
+            gl.deleteQuery(query);
+        }
+        return results;
+    }
+
+    dispose() {
+        if (this.active) this.end();
+        this.pending.forEach(p => this.gl.deleteQuery(p.query));
+        this.pending = [];
+    }
+}
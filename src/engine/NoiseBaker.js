@@ -0,0 +1,220 @@
+import * as THREE from 'three';
+
+// Tileable noise volume for NOISE_SOURCE.volume (chunks.js) and the UV feedback pass:
+//   r: gradient noise, g/b: Manhattan Worley F1/F2
+// over PERIOD lattice cells per repeat, so RepeatWrapping tiles it seamlessly. Baked in
+// src/workers/NoiseWorker.js where workers exist (inline otherwise) and kept per (seed, size),
+// so only a new seed bakes again. The shaders still sum the fbm octaves themselves: gain and
+// lacunarity are live uniforms, so each octave becomes one texture fetch instead of a simplex
+// evaluation.
+export class NoiseBaker {
+    static PERIOD = 8;                  // NOISE_VOLUME_PERIOD in chunks.js and uvfeedback.glsl
+    static SIZES = [32, 64, 96, 128];   // texels per side
+    static BYTES_PER_TEXEL = 8;         // RGBA half float
+
+    constructor(options = {}) {
+        // --- CONFIG ---
+        // Every cached volume together, in MiB. A 128³ volume is 16 MiB (16.8 MB), so the default
+        // leaves the default size clear of the limit and keeps the last two seeds
+        this.budgetMB = options.budgetMB ?? 32;
+        this.size = NoiseBaker.fitSize(options.size ?? 128, this.budgetMB);
+
+        // --- STATE ---
+        this.volumes = new Map();   // `${seed}:${size}` -> Promise<Data3DTexture>, least recently used first
+        this.worker = null;
+        this.requests = new Map();  // request id -> { resolve, reject }
+        this.nextRequest = 0;
+    }
+
+    // Largest size at or below the request whose volume fits the budget
+    static fitSize(size, budgetMB) {
+        const fits = NoiseBaker.SIZES.filter(s => s <= size && NoiseBaker.volumeBytes(s) <= budgetMB * 1048576);
+        return fits.length ? fits[fits.length - 1] : NoiseBaker.SIZES[0];
+    }
+
+    static volumeBytes(size) {
+        return size * size * size * NoiseBaker.BYTES_PER_TEXEL;
+    }
+
+    get bytes() {
+        return this.volumes.size * NoiseBaker.volumeBytes(this.size);
+    }
+
+    // Resolves to the volume for a seed, baking it only if it isn't cached
+    bake(seed = 0) {
+        const key = `${seed}:${this.size}`;
+        let volume = this.volumes.get(key);
+        if (volume) {
+            this.volumes.delete(key); // most recently used goes last
+        } else {
+            const t0 = performance.now();
+            const size = this.size;
+            volume = this.bakeData(seed, size).then((data) => {
+                console.log(`🧊 Baked noise volume ${size}³ (seed ${seed}, ${(NoiseBaker.volumeBytes(size) / 1048576).toFixed(1)}MB) in ${(performance.now() - t0).toFixed(0)}ms`);
+                return NoiseBaker.createTexture(data, size);
+            });
+            volume.catch(() => this.volumes.delete(key));
+        }
+        this.volumes.set(key, volume);
+        this.evict();
+        return volume;
+    }
+
+    // Drops the least recently used volumes beyond the budget (the newest always stays)
+    evict() {
+        const keep = Math.max(1, Math.floor(this.budgetMB * 1048576 / NoiseBaker.volumeBytes(this.size)));
+        for (const [key, volume] of this.volumes) {
+            if (this.volumes.size <= keep) break;
+            this.volumes.delete(key);
+            volume.then(texture => texture.dispose(), () => {});
+        }
+    }
+
+    bakeData(seed, size) {
+        if (typeof Worker === 'undefined') return Promise.resolve(NoiseBaker.bakeVolume(seed, size));
+        if (!this.worker) {
+            this.worker = new Worker(new URL('../workers/NoiseWorker.js', import.meta.url), { type: 'module' });
+            this.worker.onmessage = (e) => {
+                const request = this.requests.get(e.data.id);
+                this.requests.delete(e.data.id);
+                if (e.data.error) request?.reject(new Error(e.data.error));
+                else request?.resolve(e.data.data);
+            };
+            // A worker that failed to load or died answers nothing: fail what it holds, and let the
+            // next bake start a fresh one
+            this.worker.onerror = this.worker.onmessageerror = (e) => {
+                e.preventDefault?.();
+                this.failWorker(new Error(`Noise worker failed: ${e.message || e.type}`));
+            };
+        }
+        const id = ++this.nextRequest;
+        return new Promise((resolve, reject) => {
+            this.requests.set(id, { resolve, reject });
+            this.worker.postMessage({ id, seed, size });
+        });
+    }
+
+    failWorker(err) {
+        this.worker?.terminate();
+        this.worker = null;
+        this.requests.forEach(request => request.reject(err));
+        this.requests.clear();
+    }
+
+    static createTexture(data, size) {
+        const texture = new THREE.Data3DTexture(data, size, size, size);
+        texture.format = THREE.RGBAFormat;
+        texture.type = THREE.HalfFloatType;
+        texture.minFilter = THREE.LinearFilter;
+        texture.magFilter = THREE.LinearFilter;
+        texture.wrapS = texture.wrapT = texture.wrapR = THREE.RepeatWrapping;
+        texture.unpackAlignment = 1;
+        texture.needsUpdate = true;
+        return texture;
+    }
+
+    dispose() {
+        this.volumes.forEach(volume => volume.then(texture => texture.dispose(), () => {}));
+        this.volumes.clear();
+        this.worker?.terminate();
+        this.worker = null;
+    }
+
+    // --- BAKING (also what NoiseWorker runs) ---
+    // RGBA half floats, x fastest. Texel i samples lattice position (i + 0.5) / size * period, which
+    // is where texture(u_noise_volume, p / period) puts the texel centres.
+    static bakeVolume(seed, size, period = NoiseBaker.PERIOD) {
+        const random = NoiseBaker.random(seed);
+        const perm = new Uint8Array(512);
+        for (let i = 0; i < 256; i++) perm[i] = i;
+        for (let i = 255; i > 0; i--) {
+            const j = Math.floor(random() * (i + 1));
+            [perm[i], perm[j]] = [perm[j], perm[i]];
+        }
+        for (let i = 0; i < 256; i++) perm[i + 256] = perm[i];
+
+        // One Worley feature point per lattice cell of the period
+        const points = new Float32Array(period * period * period * 3);
+        for (let i = 0; i < points.length; i++) points[i] = random();
+
+        const data = new Uint16Array(size * size * size * 4);
+        const toHalf = THREE.DataUtils.toHalfFloat;
+        const step = period / size;
+        let o = 0;
+        for (let z = 0; z < size; z++) {
+            const pz = (z + 0.5) * step;
+            for (let y = 0; y < size; y++) {
+                const py = (y + 0.5) * step;
+                for (let x = 0; x < size; x++) {
+                    const px = (x + 0.5) * step;
+                    const [f1, f2] = NoiseBaker.worley(points, period, px, py, pz);
+                    data[o++] = toHalf(NoiseBaker.gradient(perm, period, px, py, pz));
+                    data[o++] = toHalf(f1);
+                    data[o++] = toHalf(f2);
+                    data[o++] = toHalf(1.0);
+                }
+            }
+        }
+        return data;
+    }
+
+    // Improved Perlin noise with the lattice wrapped at the period, in about [-1, 1] like snoise()
+    static gradient(perm, period, x, y, z) {
+        const xi = Math.floor(x), yi = Math.floor(y), zi = Math.floor(z);
+        const xf = x - xi, yf = y - yi, zf = z - zi;
+        const fade = (t) => t * t * t * (t * (t * 6 - 15) + 10);
+        const u = fade(xf), v = fade(yf), w = fade(zf);
+        const wrap = (i) => ((i % period) + period) % period;
+        const hash = (i, j, k) => perm[perm[perm[wrap(i)] + wrap(j)] + wrap(k)];
+        const grad = (h, dx, dy, dz) => {
+            const g = h & 15;
+            const a = g < 8 ? dx : dy;
+            const b = g < 4 ? dy : (g === 12 || g === 14 ? dx : dz);
+            return ((g & 1) ? -a : a) + ((g & 2) ? -b : b);
+        };
+        const lerp = (a, b, t) => a + t * (b - a);
+
+        const x0 = lerp(grad(hash(xi, yi, zi), xf, yf, zf), grad(hash(xi + 1, yi, zi), xf - 1, yf, zf), u);
+        const x1 = lerp(grad(hash(xi, yi + 1, zi), xf, yf - 1, zf), grad(hash(xi + 1, yi + 1, zi), xf - 1, yf - 1, zf), u);
+        const x2 = lerp(grad(hash(xi, yi, zi + 1), xf, yf, zf - 1), grad(hash(xi + 1, yi, zi + 1), xf - 1, yf, zf - 1), u);
+        const x3 = lerp(grad(hash(xi, yi + 1, zi + 1), xf, yf - 1, zf - 1), grad(hash(xi + 1, yi + 1, zi + 1), xf - 1, yf - 1, zf - 1), u);
+        return lerp(lerp(x0, x1, v), lerp(x2, x3, v), w);
+    }
+
+    // Manhattan F1/F2 over the 3x3x3 neighbourhood, as getWorleyDataManhattanF2 in uvfeedback.glsl
+    static worley(points, period, x, y, z) {
+        const cx = Math.floor(x), cy = Math.floor(y), cz = Math.floor(z);
+        let f1 = 1e30;
+        let f2 = 1e30;
+        for (let k = -1; k <= 1; k++) {
+            for (let j = -1; j <= 1; j++) {
+                for (let i = -1; i <= 1; i++) {
+                    const wx = ((cx + i) % period + period) % period;
+                    const wy = ((cy + j) % period + period) % period;
+                    const wz = ((cz + k) % period + period) % period;
+                    const p = ((wz * period + wy) * period + wx) * 3;
+                    const d = Math.abs(cx + i + points[p] - x) + Math.abs(cy + j + points[p + 1] - y) + Math.abs(cz + k + points[p + 2] - z);
+                    if (d < f1) {
+                        f2 = f1;
+                        f1 = d;
+                    } else if (d < f2) {
+                        f2 = d;
+                    }
+                }
+            }
+        }
+        return [f1, f2];
+    }
+
+    // mulberry32
+    static random(seed) {
+        let a = (seed * 0x9e3779b9) >>> 0;
+        return () => {
+            a = (a + 0x6d2b79f5) >>> 0;
+            let t = a;
+            t = Math.imul(t ^ (t >>> 15), t | 1);
+            t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+            return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+        };
+    }
+}
@@ -0,0 +1,512 @@
+import * as THREE from 'three';
+import { EffectComposer } from 'three/examples/jsm/postprocessing/EffectComposer.js';
+import { RenderPass } from 'three/examples/jsm/postprocessing/RenderPass.js';
+import { UnrealBloomPass } from 'three/examples/jsm/postprocessing/UnrealBloomPass.js';
+import { ShaderPass } from 'three/examples/jsm/postprocessing/ShaderPass.js';
+import { PostFrameGraph } from './PostFrameGraph.js';
+
+// The scene's post chain: the composer, its passes, the frame graph that plans them and the
+// parameter objects the UI binds to. Split out of ShaderScene so it loads as its own chunk while
+// the initial variant links (ShaderScene.start); until it's attached the scene draws its
+// placeholder frame instead.
+export class PostChain {
+    static attach(s) {
+        // Screen-Space Normals Shader
+        const ScreenSpaceNormalsShader = {
+            uniforms: {
+                'tDiffuse': { value: null },
+                'u_resolution': { value: new THREE.Vector2() },
+                'u_normal_strength': { value: 0.0 },
+                'u_normal_blend': { value: 0.6 },
+                'u_roughness': { value: 0.2 },
+                'u_F0': { value: 0.16 },
+                'u_diffuse_scale': { value: 0.2 },
+                'u_specular_scale': { value: 0.8 }
+            },
+            vertexShader: `
+                varying vec2 vUv;
+                void main() {
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position, 1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tDiffuse;
+                uniform vec2 u_resolution;
+                uniform float u_normal_strength;
+                uniform float u_normal_blend;
+                uniform float u_roughness;
+                uniform float u_F0;
+                uniform float u_diffuse_scale;
+                uniform float u_specular_scale;
+                varying vec2 vUv;
+
+                const float PI = 3.14159265;
+
+                float square(float x){return x*x;}
+                float saturate(float x){return clamp(x,0.0,1.0);}
+                float fresnel(float F0, float lDotH){ float f = pow(1.0 - lDotH, 5.0); return (1.0 - F0)*f + F0; }
+                float GGX(float a, float nDotH){ float a2 = square(a); return a2 / (PI * square(square(nDotH)*(a2-1.0) + 1.0)); }
+                float GGGX(float a, float nDotL, float nDotV){
+                    float a2 = square(a);
+                    float gl = nDotL + sqrt(a2 + (1.0 - a2) * square(nDotL));
+                    float gv = nDotV + sqrt(a2 + (1.0 - a2) * square(nDotV));
+                    return 1.0 / (gl * gv);
+                }
+                float specularBRDF(vec3 L, vec3 V, vec3 N, float r, float F0){
+                    vec3 H = normalize(L + V);
+                    float nDotH = saturate(dot(N,H));
+                    float nDotL = saturate(dot(N,L));
+                    float nDotV = saturate(dot(N,V));
+                    float lDotH = saturate(dot(L,H));
+                    float D = GGX(r, nDotH);
+                    float G = GGGX(r, nDotL, nDotV);
+                    float F = fresnel(F0, lDotH);
+                    return D * G * F;
+                }
+
+                float getHeight(vec2 uv){ return dot(texture2D(tDiffuse, uv).rgb, vec3(0.299,0.587,0.114)); }
+                vec2 computeGradient(vec2 uv){
+                    vec2 d = 1.0 / u_resolution;
+                    float tl = getHeight(uv + vec2(-d.x,  d.y));
+                    float t  = getHeight(uv + vec2( 0.0,  d.y));
+                    float tr = getHeight(uv + vec2( d.x,  d.y));
+                    float l  = getHeight(uv + vec2(-d.x,  0.0));
+                    float r  = getHeight(uv + vec2( d.x,  0.0));
+                    float bl = getHeight(uv + vec2(-d.x, -d.y));
+                    float b  = getHeight(uv + vec2( 0.0, -d.y));
+                    float br = getHeight(uv + vec2( d.x, -d.y));
+                    return vec2(
+                        1.0*tl - 1.0*tr + 2.0*l - 2.0*r + 1.0*bl - 1.0*br,
+                        -1.0*tl + 1.0*bl - 2.0*t + 2.0*b - 1.0*tr + 1.0*br
+                    );
+                }
+
+                void main(){
+                    vec3 col = texture2D(tDiffuse, vUv).rgb;
+                    vec2 g = computeGradient(vUv);
+                    vec3 N = normalize(vec3(g * u_normal_strength, 1.0));
+                    vec3 L = normalize(vec3(0.5, 0.5, 1.0));
+                    vec3 V = vec3(0.0, 0.0, 1.0);
+                    float diff = saturate(dot(L,N));
+                    diff = diff * u_diffuse_scale + (1.0 - u_diffuse_scale);
+                    float spec = specularBRDF(L, V, N, u_roughness, u_F0);
+                    vec3 lit = col * diff + spec * u_specular_scale;
+                    col = mix(col, lit, u_normal_blend);
+                    gl_FragColor = vec4(col, 1.0);
+                }
+            `
+        };
+
+        // Color Grading Shader
+        const ColorGradingShader = {
+            uniforms: {
+                'tDiffuse': { value: null },
+                'u_resolution': { value: new THREE.Vector2() },
+                'contrast': { value: 1.0 },
+                'saturation': { value: 1.0 },
+                'brightness': { value: 0.0 },
+                'gamma': { value: 1.0 },
+                'hueShift': { value: 0.0 },
+                'solarizeMix': { value: 0.0 },
+                'solarizeLightThresh': { value: 0.7 },
+                'solarizeLightSoft': { value: 0.3 },
+                'solarizeDarkThresh': { value: 0.3 },
+                'solarizeDarkSoft': { value: 0.3 },
+                'u_border_thickness': { value: 0.0 },
+                'u_border_color': { value: new THREE.Vector3(0.0, 1.0, 0.0) }
+            },
+            vertexShader: `
+                varying vec2 vUv;
+                void main(){
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tDiffuse;
+                uniform vec2 u_resolution;
+                uniform float contrast;
+                uniform float saturation;
+                uniform float brightness;
+                uniform float gamma;
+                uniform float hueShift;
+                uniform float solarizeMix;
+                uniform float solarizeLightThresh;
+                uniform float solarizeLightSoft;
+                uniform float solarizeDarkThresh;
+                uniform float solarizeDarkSoft; 
+                uniform float u_border_thickness;
+                uniform vec3 u_border_color;   
+                varying vec2 vUv;
+                
+                float thresholdSoft(float value, float thresh, float softness) {        
+                    float edgeLow  = thresh - softness * 0.5;
+                    float edgeHigh = thresh + softness * 0.5;
+                    return smoothstep(edgeLow, edgeHigh, value);
+                }
+                
+                vec3 rgb2hsv(vec3 c) {
+                    vec4 K = vec4(0.0, -1.0 / 3.0, 2.0 / 3.0, -1.0);
+                    vec4 p = mix(vec4(c.bg, K.wz), vec4(c.gb, K.xy), step(c.b, c.g));
+                    vec4 q = mix(vec4(p.xyw, c.r), vec4(c.r, p.yzx), step(p.x, c.r));
+                    float d = q.x - min(q.w, q.y);
+                    float e = 1.0e-10;
+                    return vec3(abs(q.z + (q.w - q.y) / (6.0 * d + e)), d / (q.x + e), q.x);
+                }
+                
+                vec3 hsv2rgb(vec3 c) {
+                    vec4 K = vec4(1.0, 2.0 / 3.0, 1.0 / 3.0, 3.0);
+                    vec3 p = abs(fract(c.xxx + K.xyz) * 6.0 - K.www);
+                    return c.z * mix(K.xxx, clamp(p - K.xxx, 0.0, 1.0), c.y);
+                }
+
+                void main(){
+                    vec3 color = texture2D(tDiffuse, vUv).rgb;
+
+                    // Base color grading
+                    color = (color - 0.5) * contrast + 0.5;
+                    color += brightness;
+                    float gray = dot(color, vec3(0.299, 0.587, 0.114));
+                    color = mix(vec3(gray), color, saturation);
+                    color = pow(max(color, vec3(0.0)), vec3(1.0 / gamma));
+                    
+                    // Hue shift
+                    if (abs(hueShift) > 0.001) {
+                        vec3 hsv = rgb2hsv(color);
+                        hsv.x = fract(hsv.x + hueShift / 360.0);
+                        color = hsv2rgb(hsv);
+                    }
+
+                    // Solarize
+                    vec3 inverted = 1.0 - color;
+                    float lightMask = thresholdSoft(gray, solarizeLightThresh, solarizeLightSoft);
+                    vec3 branchLight = mix(color, inverted, lightMask);
+                    float darkMask = 1.0 - thresholdSoft(gray, solarizeDarkThresh, solarizeDarkSoft);
+                    vec3 branchDark = mix(inverted, color, darkMask);
+                    vec3 solarized = max(branchLight, branchDark);
+                    color = mix(color, solarized, clamp(solarizeMix, 0.0, 1.0));
+
+                    // Border
+                    vec2 borderThickness = vec2(u_border_thickness);
+                    float aspect = u_resolution.x / u_resolution.y;
+                    if (aspect > 1.0) {
+                        borderThickness.x /= aspect;
+                    } else {
+                        borderThickness.y *= aspect;
+                    }
+                    vec2 bl = step(borderThickness, vUv);
+                    float pct = bl.x * bl.y;
+                    vec2 tr = step(borderThickness, 1.0 - vUv);
+                    pct *= tr.x * tr.y;
+                    pct = 1. - pct;
+                    color = mix(color, u_border_color, vec3(pct));
+
+                    gl_FragColor = vec4(color, 1.0);
+                }
+            `
+        };
+
+        // Edge Detection Shader
+        const EdgeDetectionShader = {
+            uniforms: {
+                'tDiffuse': { value: null },
+                'u_resolution': { value: new THREE.Vector2() },
+                'u_edge_strength': { value: 0.0 },
+                'u_edge_threshold': { value: 0.1 },
+                'u_edge_color': { value: new THREE.Vector3(1.0, 1.0, 1.0) },
+                'u_sharpen_strength': { value: 0.0 }
+            },
+            vertexShader: `
+                varying vec2 vUv;
+                void main(){
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tDiffuse;
+                uniform vec2 u_resolution;
+                uniform float u_edge_strength;
+                uniform float u_edge_threshold;
+                uniform vec3 u_edge_color;
+                uniform float u_sharpen_strength;
+                varying vec2 vUv;
+                
+                float edgeDetection(vec2 uv, vec2 stepSize) {
+                    mat3 Gx = mat3(-1, 0, 1, -2, 0, 2, -1, 0, 1);
+                    mat3 Gy = mat3(-1, -2, -1, 0, 0, 0, 1, 2, 1);
+
+                    vec3 gradientX = vec3(0.0);
+                    vec3 gradientY = vec3(0.0);
+
+                    for (int i = -1; i <= 1; i++) {
+                        for (int j = -1; j <= 1; j++) {
+                            vec2 offset = vec2(float(i), float(j)) * stepSize;
+                            vec3 s = texture2D(tDiffuse, uv + offset).rgb;
+                            
+                            gradientX += s * Gx[i+1][j+1];
+                            gradientY += s * Gy[i+1][j+1];
+                        }
+                    }
+
+                    float edge = length(vec2(length(gradientX), length(gradientY)));
+                    return edge;
+                }
+                
+                vec4 sharpen(vec2 uv, vec2 stepSize, float strength) {
+                    float kernel[9];
+                    kernel[0] = -1.0 * strength;
+                    kernel[1] = -1.0 * strength;
+                    kernel[2] = -1.0 * strength;
+                    kernel[3] = -1.0 * strength;
+                    kernel[4] = 8.0 * strength + 1.0;
+                    kernel[5] = -1.0 * strength;
+                    kernel[6] = -1.0 * strength;
+                    kernel[7] = -1.0 * strength;
+                    kernel[8] = -1.0 * strength;
+                    
+                    vec4 sum = vec4(0.0);
+                    int idx = 0;
+
+                    for (int i = -1; i <= 1; i++) {
+                        for (int j = -1; j <= 1; j++) {
+                            vec2 offset = vec2(float(i), float(j)) * stepSize;
+                            sum += texture2D(tDiffuse, uv + offset) * kernel[idx];
+                            idx++;
+                        }
+                    }
+                    return sum;
+                }
+                
+                void main(){
+                    vec3 color = texture2D(tDiffuse, vUv).rgb;
+                    vec2 stepSize = 1.0 / u_resolution;
+                    
+                    if (u_sharpen_strength > 0.0) {
+                        color = sharpen(vUv, stepSize, u_sharpen_strength).rgb;
+                    }
+                    
+                    if (u_edge_strength > 0.0) {
+                        float edges = edgeDetection(vUv, stepSize);
+                        edges = smoothstep(u_edge_threshold, u_edge_threshold + 0.1, edges);
+                        color = mix(color, u_edge_color * edges, u_edge_strength * edges);
+                    }
+                    
+                    gl_FragColor = vec4(color, 1.0);
+                }
+            `
+        };
+
+        // Initialize composer
+        s.composer = new EffectComposer(s.renderer);
+        const renderW = Math.floor(s.viewport.width * s.resolutionScale);
+        const renderH = Math.floor(s.viewport.height * s.resolutionScale);
+
+        // Composer ping-pong buffers come from the pool (sized in resizeComposer below)
+        s.composer.renderTarget1.dispose();
+        s.composer.renderTarget2.dispose();
+        s.composer.renderTarget1 = null;
+        s.composer.renderTarget2 = null;
+
+        // Add passes
+        s.renderPass = new RenderPass(s.scene, s.camera);
+        s.renderPass.label = 'raymarch.composer';
+        s.composer.addPass(s.renderPass);
+
+        // Checkerboard mode feeds the chain from the reconstructed frame instead of re-rendering.
+        // Alpha carries ray depth there, so force it back to 1 for the rest of the chain.
+        const HistoryCopyShader = {
+            uniforms: { 'tHistory': { value: null } },
+            vertexShader: `
+                varying vec2 vUv;
+                void main() {
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position, 1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tHistory;
+                varying vec2 vUv;
+                void main() {
+                    gl_FragColor = vec4(texture2D(tHistory, vUv).rgb, 1.0);
+                }
+            `
+        };
+        s.historyPass = new ShaderPass(HistoryCopyShader, 'tHistoryInput'); // input set per frame, not from the chain
+        s.historyPass.enabled = false;
+        s.historyPass.label = 'history';
+        s.composer.addPass(s.historyPass);
+
+        // Setlist crossfades: the outgoing variant's frame (drawn by SetlistManager) under the incoming one
+        const CrossfadeShader = {
+            uniforms: {
+                'tDiffuse': { value: null },
+                'tFrom': { value: null },
+                'u_mix': { value: 1.0 }
+            },
+            vertexShader: `
+                varying vec2 vUv;
+                void main() {
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position, 1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tDiffuse;
+                uniform sampler2D tFrom;
+                uniform float u_mix;
+                varying vec2 vUv;
+                void main() {
+                    gl_FragColor = mix(texture2D(tFrom, vUv), texture2D(tDiffuse, vUv), u_mix);
+                }
+            `
+        };
+        s.crossfadePass = new ShaderPass(CrossfadeShader);
+
+        s.normalsPass = new ShaderPass(ScreenSpaceNormalsShader);
+        s.normalsPass.uniforms.u_resolution.value.set(renderW, renderH);
+
+
+
+
+        // Post Effects Shader (Dithering + RGB Split)
+        const PostEffectsShader = {
+            uniforms: {
+                'tDiffuse': { value: null },
+                'u_resolution': { value: new THREE.Vector2() },
+                'u_dither_strength': { value: 0.0 },
+                'u_dither_scale': { value: 1.0 },
+                'u_rgb_split': { value: 0.0 }
+            },
+            vertexShader: `
+                varying vec2 vUv;
+                void main(){
+                    vUv = uv;
+                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
+                }
+            `,
+            fragmentShader: `
+                uniform sampler2D tDiffuse;
+                uniform vec2 u_resolution;
+                uniform float u_dither_strength;
+                uniform float u_dither_scale;
+                uniform float u_rgb_split;
+                varying vec2 vUv;
+                
+                // Bayer matrix 8x8 for ordered dithering
+                float bayer8(vec2 pos) {
+                    int x = int(mod(pos.x, 8.0));
+                    int y = int(mod(pos.y, 8.0));
+                    int index = x + y * 8;
+                    float bayerMatrix[64];
+                    bayerMatrix[0] = 0.0/64.0; bayerMatrix[1] = 32.0/64.0; bayerMatrix[2] = 8.0/64.0; bayerMatrix[3] = 40.0/64.0;
+                    bayerMatrix[4] = 2.0/64.0; bayerMatrix[5] = 34.0/64.0; bayerMatrix[6] = 10.0/64.0; bayerMatrix[7] = 42.0/64.0;
+                    bayerMatrix[8] = 48.0/64.0; bayerMatrix[9] = 16.0/64.0; bayerMatrix[10] = 56.0/64.0; bayerMatrix[11] = 24.0/64.0;
+                    bayerMatrix[12] = 50.0/64.0; bayerMatrix[13] = 18.0/64.0; bayerMatrix[14] = 58.0/64.0; bayerMatrix[15] = 26.0/64.0;
+                    bayerMatrix[16] = 12.0/64.0; bayerMatrix[17] = 44.0/64.0; bayerMatrix[18] = 4.0/64.0; bayerMatrix[19] = 36.0/64.0;
+                    bayerMatrix[20] = 14.0/64.0; bayerMatrix[21] = 46.0/64.0; bayerMatrix[22] = 6.0/64.0; bayerMatrix[23] = 38.0/64.0;
+                    bayerMatrix[24] = 60.0/64.0; bayerMatrix[25] = 28.0/64.0; bayerMatrix[26] = 52.0/64.0; bayerMatrix[27] = 20.0/64.0;
+                    bayerMatrix[28] = 62.0/64.0; bayerMatrix[29] = 30.0/64.0; bayerMatrix[30] = 54.0/64.0; bayerMatrix[31] = 22.0/64.0;
+                    bayerMatrix[32] = 3.0/64.0; bayerMatrix[33] = 35.0/64.0; bayerMatrix[34] = 11.0/64.0; bayerMatrix[35] = 43.0/64.0;
+                    bayerMatrix[36] = 1.0/64.0; bayerMatrix[37] = 33.0/64.0; bayerMatrix[38] = 9.0/64.0; bayerMatrix[39] = 41.0/64.0;
+                    bayerMatrix[40] = 51.0/64.0; bayerMatrix[41] = 19.0/64.0; bayerMatrix[42] = 59.0/64.0; bayerMatrix[43] = 27.0/64.0;
+                    bayerMatrix[44] = 49.0/64.0; bayerMatrix[45] = 17.0/64.0; bayerMatrix[46] = 57.0/64.0; bayerMatrix[47] = 25.0/64.0;
+                    bayerMatrix[48] = 15.0/64.0; bayerMatrix[49] = 47.0/64.0; bayerMatrix[50] = 7.0/64.0; bayerMatrix[51] = 39.0/64.0;
+                    bayerMatrix[52] = 13.0/64.0; bayerMatrix[53] = 45.0/64.0; bayerMatrix[54] = 5.0/64.0; bayerMatrix[55] = 37.0/64.0;
+                    bayerMatrix[56] = 63.0/64.0; bayerMatrix[57] = 31.0/64.0; bayerMatrix[58] = 55.0/64.0; bayerMatrix[59] = 23.0/64.0;
+                    bayerMatrix[60] = 61.0/64.0; bayerMatrix[61] = 29.0/64.0; bayerMatrix[62] = 53.0/64.0; bayerMatrix[63] = 21.0/64.0;
+                    return bayerMatrix[index];
+                }
+                
+                vec3 dither(vec3 color, vec2 screenPos) {
+                    float threshold = bayer8(screenPos * u_dither_scale);
+                    return color + (threshold - 0.5) * u_dither_strength;
+                    // return mix(color, color * color * (threshold - 0.5) * u_dither_strength, u_dither_strength);
+                }
+                
+                vec3 rgbSplit(sampler2D tex, vec2 uv, float amount) {
+                    float r = texture2D(tex, uv + vec2(amount, 0.0)).r;
+                    float g = texture2D(tex, uv).g;
+                    float b = texture2D(tex, uv - vec2(amount, 0.0)).b;
+                    return vec3(r, g, b);
+                }
+                
+                void main(){
+                    vec2 screenPos = vUv * u_resolution;
+                    
+                    // Apply RGB split
+                    vec3 color = rgbSplit(tDiffuse, vUv, u_rgb_split);
+                    
+                    // Apply dithering
+                    if (u_dither_strength > 0.0) {
+                        color = dither(color, screenPos);
+                    }
+                    
+                    gl_FragColor = vec4(color, 1.0);
+                }
+            `
+        };
+
+        
+        s.postEffectsPass = new ShaderPass(PostEffectsShader);
+        s.postEffectsPass.uniforms.u_resolution.value.set(renderW, renderH);
+
+        s.colorGradingPass = new ShaderPass(ColorGradingShader);
+        s.colorGradingPass.uniforms.u_resolution.value.set(renderW, renderH);
+
+        s.edgePass = new ShaderPass(EdgeDetectionShader);
+        s.edgePass.uniforms.u_resolution.value.set(renderW, renderH);
+
+        s.bloomPass = new UnrealBloomPass(new THREE.Vector2(renderW, renderH), 0.0, 0.4, 0.85);
+
+        // The post chain is planned per frame: identity stages are dropped and pointwise stages are
+        // fused into the stage before them. Identity tests mirror the shaders' own branches exactly,
+        // so the output doesn't change. Color grading is never culled: pow()/max() at neutral settings
+        // still clamp and round, and it's what resets alpha to 1 for everything downstream.
+        s.postGraph = new PostFrameGraph(s.composer, [s.renderPass, s.historyPass]);
+        // First, so it always heads its group (it samples tFrom itself, which fusion can't redirect)
+        s.postGraph.addStage('crossfade', s.crossfadePass, {
+            identity: p => p.uniforms.u_mix.value >= 1.0 || !p.uniforms.tFrom.value
+        });
+        s.postGraph.addStage('normals', s.normalsPass, {
+            identity: p => p.uniforms.u_normal_blend.value === 0
+        });
+        s.postGraph.addStage('postEffects', s.postEffectsPass, {
+            identity: p => p.uniforms.u_dither_strength.value <= 0 && p.uniforms.u_rgb_split.value === 0,
+            pointwise: p => p.uniforms.u_rgb_split.value === 0
+        });
+        s.postGraph.addStage('colorGrading', s.colorGradingPass, {
+            pointwise: () => true
+        });
+        s.postGraph.addStage('edge', s.edgePass, {
+            identity: p => p.uniforms.u_sharpen_strength.value <= 0 && p.uniforms.u_edge_strength.value <= 0
+        });
+        s.postGraph.addStage('bloom', s.bloomPass, {
+            identity: p => p.strength <= 0,
+            fusable: false
+        });
+        s.postGraph.update();
+
+        s.renderWidth = renderW;
+        s.renderHeight = renderH;
+        s.resizeComposer(renderW, renderH);
+        s.targets.trackExternal('bloom', () => [
+            s.bloomPass.renderTargetBright,
+            ...s.bloomPass.renderTargetsHorizontal,
+            ...s.bloomPass.renderTargetsVertical
+        ]);
+
+        // Store params for UI binding
+        s.bloomParams = { strength: 0.0, radius: 0.4, threshold: 0.85 };
+        s.normalsParams = { strength: 0.0, blend: 0.3, roughness: 0.3, F0: 0.04, diffuseScale: 0.8, specularScale: 0.2 };
+        s.edgeParams = { strength: 0.0, threshold: 0.1, colorR: 1.0, colorG: 1.0, colorB: 1.0, sharpenStrength: 0.0 };
+        s.postEffectsParams = { ditherStrength: 0.25, ditherScale: 1.0, rgbSplit: 0.0 };
+        s.colorParams = { 
+            contrast: 1.0, saturation: 1.0, brightness: 0.0, gamma: 1.0, hueShift: 0.0,
+            solarizeMix: 0.0, solarizeLightThresh: 0.5, solarizeLightSoft: 0.0, 
+            solarizeDarkThresh: 0.5, solarizeDarkSoft: 0.0, 
+            borderThickness: 0.0, borderColor: new THREE.Vector3(1.0, 1.0, 1.0) 
+        };
+    }
+}
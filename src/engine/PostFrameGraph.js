@@ -0,0 +1,174 @@
+import * as THREE from 'three';
+import { ShaderPass } from 'three/examples/jsm/postprocessing/ShaderPass.js';
+import { GlslSymbols } from './GlslSymbols.js';
+
+const IDENT = /[A-Za-z_][A-Za-z0-9_]*/g;
+
+// Plans the post-processing chain each frame from the passes' own parameters.
+// Every stage reads the previous stage's output (tDiffuse) and writes one full-screen target, so:
+// - stages whose parameters make them an exact no-op are left out of the composer entirely
+// - a stage that only reads its input at its own pixel ("pointwise") is folded into the stage
+//   before it; the generated uber-shader runs both bodies back to back in one draw
+// The plan is re-made only when the active set changes, and uber-shaders are cached per plan.
+export class PostFrameGraph {
+    constructor(composer, sources = []) {
+        this.composer = composer;
+        this.sources = sources; // passes that produce the frame (raymarch / history copy), always kept
+
+        this.stages = [];
+        this.fused = new Map(); // group key -> generated ShaderPass
+        this.planKey = null;
+        this.groups = [];
+        this.quad = new THREE.PlaneGeometry(2, 2); // for compiling passes off screen
+    }
+
+    // identity(pass): true when the pass would copy its input unchanged
+    // pointwise(pass): true when it only samples its input at vUv (fusable into the stage before)
+    // fusable: false for passes that aren't single-draw ShaderPasses (bloom)
+    addStage(name, pass, { identity = () => false, pointwise = () => false, fusable = true } = {}) {
+        pass.label = name; // profiler scope name
+        this.stages.push({ name, pass, identity, pointwise, fusable });
+        this.planKey = null;
+    }
+
+    update() {
+        const groups = this.plan();
+        const key = PostFrameGraph.planKeyOf(groups);
+        if (key === this.planKey) return;
+        this.planKey = key;
+        this.groups = groups;
+
+        this.composer.passes = [
+            ...this.sources,
+            ...groups.map(group => this.passFor(group))
+        ];
+        console.log(`🧩 Post chain: ${key || '(copy)'}`);
+    }
+
+    // Drops identities and starts a new group at every stage that samples neighbours
+    plan() {
+        const groups = [];
+        let current = null;
+        this.stages.forEach(stage => {
+            if (stage.identity(stage.pass)) return;
+            const joins = current && stage.fusable && current[0].fusable && stage.pointwise(stage.pass);
+            if (joins) {
+                current.push(stage);
+            } else {
+                current = [stage];
+                groups.push(current);
+            }
+        });
+        return groups;
+    }
+
+    static planKeyOf(groups) {
+        return groups.map(g => g.map(s => s.name).join('+')).join(' | ');
+    }
+
+    passFor(group) {
+        return group.length === 1 ? group[0].pass : this.getFusedPass(group);
+    }
+
+    // Builds and links the passes the current parameters would plan, without switching to them, so
+    // a later update() into that plan doesn't stall on a compile. Returns the number of programs.
+    prewarm(renderer, camera) {
+        const scene = new THREE.Scene();
+        this.plan()
+            .filter(group => group[0].fusable) // bloom's materials are its own business
+            .forEach(group => scene.add(new THREE.Mesh(this.quad, this.passFor(group).material)));
+        if (scene.children.length) renderer.compile(scene, camera);
+        return scene.children.length;
+    }
+
+    getFusedPass(group) {
+        const key = group.map(s => s.name).join('+');
+        let pass = this.fused.get(key);
+        if (!pass) {
+            pass = new ShaderPass(PostFrameGraph.fuse(group));
+            pass.label = key;
+            this.fused.set(key, pass);
+        }
+        return pass;
+    }
+
+    // Builds one material that runs each stage's main() in order. Stage sources are used verbatim
+    // with their top-level symbols prefixed; uniforms are shared by reference with the original
+    // passes, so UI bindings keep driving the fused draw.
+    static fuse(group) {
+        const uniforms = { tDiffuse: { value: null } };
+        const blocks = group.map((stage, i) => {
+            const prefix = `s${i}_`;
+            const material = stage.pass.material;
+            const decls = GlslSymbols.parse(material.fragmentShader)
+                .filter(d => d.name !== 'tDiffuse' && d.name !== 'vUv');
+
+            const renames = new Map([['gl_FragColor', 'g_fusedOutput']]);
+            decls.forEach(d => { if (d.name) renames.set(d.name, prefix + d.name); });
+            // Later stages read the previous stage's result instead of the input texture
+            if (i > 0) renames.set('texture2D', 'fusedInput');
+
+            decls.filter(d => d.kind === 'uniform').forEach(d => {
+                uniforms[prefix + d.name] = stage.pass.uniforms[d.name];
+            });
+
+            const body = decls.map(d => PostFrameGraph.rename(d.text, renames)).join('\n');
+            return `// --- ${stage.name} ---\n${body}`;
+        });
+
+        const calls = group.map((_, i) => i === 0
+            ? `    s0_main();`
+            : `    g_fusedInput = quantizeHalf(g_fusedOutput);\n    s${i}_main();`
+        ).join('\n');
+
+        const fragmentShader = `
+uniform sampler2D tDiffuse;
+varying vec2 vUv;
+
+vec4 g_fusedInput;
+vec4 g_fusedOutput;
+
+vec4 fusedInput(sampler2D tex, vec2 uv) { return g_fusedInput; }
+
+// The unfused chain stores every intermediate in a HalfFloat target (see resizeComposer)
+vec4 quantizeHalf(vec4 c) {
+    return vec4(unpackHalf2x16(packHalf2x16(c.rg)), unpackHalf2x16(packHalf2x16(c.ba)));
+}
+
+${blocks.join('\n\n')}
+
+void main() {
+${calls}
+    gl_FragColor = g_fusedOutput;
+}
+`;
+
+        return new THREE.ShaderMaterial({
+            name: `PostFrameGraph.${group.map(s => s.name).join('+')}`,
+            uniforms,
+            vertexShader: group[0].pass.material.vertexShader,
+            fragmentShader
+        });
+    }
+
+    static rename(text, renames) {
+        return text.replace(IDENT, (name, offset) => {
+            if (offset > 0 && text[offset - 1] === '.') return name; // member / swizzle
+            return renames.get(name) ?? name;
+        });
+    }
+
+    getStats() {
+        return {
+            plan: this.planKey,
+            draws: this.groups.length,
+            culled: this.stages.filter(s => !this.groups.some(g => g.includes(s))).map(s => s.name)
+        };
+    }
+
+    dispose() {
+        this.quad.dispose();
+        this.fused.forEach(pass => pass.dispose());
+        this.fused.clear();
+    }
+}
@@ -0,0 +1,302 @@
+import { SceneUniforms } from './SceneUniforms.js';
+import { RenderState } from './RenderState.js';
+import { SyncProtocol } from '../managers/SyncProtocol.js';
+import { ParameterScheduler } from '../managers/ParameterScheduler.js';
+import { InputManager } from '../managers/InputManager.js';
+import { UIManager } from '../managers/UIManager.js';
+import { LazyManagers } from '../managers/LazyManagers.js';
+
+// Main-thread side of render-worker mode (?worker=1). The canvas is transferred to
+// src/workers/RenderWorker.js, where ShaderScene and its render loop run; this class stands in for
+// the scene towards the DOM managers (UI, keyboard/MIDI, touch, gallery, export, sync), so slider
+// drags, layout and WebSocket traffic on this thread never hold up a frame.
+//   - Uniforms: the host's own SceneUniforms are the source of truth. Once per animation frame the
+//     parameter scheduler is flushed and whatever changed since the last post goes over as one
+//     SyncProtocol delta frame (transferred, not copied); the worker queues it into its own
+//     scheduler, which debounces variant rebuilds.
+//   - Other scene fields (speed, integrators, post passes; see RenderState): a mirror whose writes
+//     are posted as { path, value }. The worker refreshes the fields it moves itself once a second.
+//   - Methods (resize, redraw, screenshot, recording, profiler, governor, setlist, empty-space
+//     skipping, step counts, quality tiers, the noise volume and their benchmark) are posted as
+//     calls and answered with their result. A setlist fades on the worker's uniforms, so the
+//     page's sliders don't follow it there.
+//   - Startup: the worker draws its placeholder frame on its own and answers 'ready' once its
+//     variant and post chain are up (ShaderScene.start); UI and input come up then, the other
+//     managers on first use as on the main thread.
+export class RenderHost {
+    static get supported() {
+        return typeof OffscreenCanvas !== 'undefined' && 'transferControlToOffscreen' in HTMLCanvasElement.prototype;
+    }
+
+    constructor() {
+        this.canvas = document.getElementById('canvas');
+        this.search = window.location.search;
+        this.isReady = false;
+        this.ready = new Promise(resolve => (this.resolveReady = resolve));
+        this.startup = { firstFrame: null, firstVariant: null, interactive: null };
+        globalThis.startupTiming = this.startup; // read by server/startup.js
+
+        // --- STATE ---
+        this.uniforms = SceneUniforms.create();
+        // SceneActions writes the UV pass's aliases; here they are simply the same uniforms
+        this.uvFeedbackUniforms = this.uniforms;
+        this.table = SyncProtocol.buildTable(this.uniforms);
+        this.sent = new Float32Array(this.table.entries.reduce((n, [, size]) => n + size, 0)).fill(NaN);
+        this.state = {};            // RenderState mirror
+        this.stats = null;          // last stats message from the worker
+        this.requests = new Map();  // call id -> { resolve, reject }
+        this.nextRequest = 0;
+        this.onRecordingError = null;
+
+        RenderState.FIELDS.forEach(key => Object.defineProperty(this, key, {
+            get: () => this.mirror(this.state[key], [key]),
+            set: (value) => {
+                this.state[key] = value;
+                this.post({ type: 'assign', path: [key], value: RenderState.plain(value) });
+            }
+        }));
+        this.profiler = this.remote(['profiler']);
+        this.governor = this.remote(['governor']);
+        this.setlist = this.remote(['setlist']);
+        this.qualityBench = this.remote(['qualityBench']);
+        this.params = new ParameterScheduler(this);
+        this.managers = new LazyManagers(this);
+
+        // --- WORKER ---
+        this.worker = new Worker(new URL('../workers/RenderWorker.js', import.meta.url), { type: 'module' });
+        this.worker.onmessage = (e) => this.onMessage(e.data);
+        this.worker.onerror = (e) => console.error('❌ Render worker failed:', e.message);
+        const offscreen = this.canvas.transferControlToOffscreen();
+        this.post({ type: 'init', canvas: offscreen, search: this.search, viewport: RenderHost.viewport(), timeOrigin: performance.timeOrigin }, [offscreen]);
+        this.setCanvasStyle(window.innerWidth, window.innerHeight);
+
+        this.animate();
+    }
+
+    static viewport() {
+        return { width: window.innerWidth, height: window.innerHeight, pixelRatio: window.devicePixelRatio };
+    }
+
+    // Managers read scene fields as they bind, so they wait for the worker's first snapshot
+    onReady(state, startup) {
+        this.state = RenderState.revive(state);
+        Object.assign(this.startup, startup);
+
+        this.ui = new UIManager(this);
+        this.input = new InputManager(this, this.ui);
+
+        this.isReady = true;
+        this.startup.interactive = performance.now();
+        this.managers.loadDeferred();
+        window.addEventListener('resize', () => this.onResize());
+        console.log('🧵 Rendering in a worker (OffscreenCanvas)');
+        this.resolveReady();
+    }
+
+    // Resolves to a lazily loaded manager ('exporter', 'gallery', 'touch', 'sync'; see LazyManagers)
+    load(name) {
+        return this.managers.load(name);
+    }
+
+    onMessage(msg) {
+        switch (msg.type) {
+            case 'ready':
+                this.onReady(msg.state, msg.startup);
+                break;
+            case 'layout':
+                if (this.isReady) this.onResize();
+                break;
+            case 'stats':
+                this.stats = msg.stats;
+                Object.assign(this.state, RenderState.revive(msg.live));
+                this.ui?.showStats(msg.stats);
+                break;
+            case 'result': {
+                const request = this.requests.get(msg.id);
+                this.requests.delete(msg.id);
+                if (msg.error) request?.reject(new Error(msg.error));
+                else request?.resolve(msg.value);
+                break;
+            }
+            case 'recordingError':
+                this.onRecordingError?.();
+                break;
+        }
+    }
+
+    post(msg, transfer = []) {
+        this.worker.postMessage(msg, transfer);
+    }
+
+    // Runs scene.<path>(...args) in the worker
+    call(path, args = []) {
+        const id = ++this.nextRequest;
+        return new Promise((resolve, reject) => {
+            this.requests.set(id, { resolve, reject });
+            this.post({ type: 'call', id, path, args });
+        });
+    }
+
+    remote(path) {
+        // Not a thenable, so load() can resolve to one
+        return new Proxy({}, { get: (target, key) => (key === 'then' ? undefined : (...args) => this.call([...path, key], args)) });
+    }
+
+    // Write-through view of a mirrored object: nested writes (pass.uniforms.u_edge_color.value.x = v)
+    // update the mirror and are posted by path. Methods run on the mirror with the proxy as `this`,
+    // so Vector3.set() posts its component writes the same way.
+    mirror(value, path) {
+        if (value === null || typeof value !== 'object') return value;
+        return new Proxy(value, {
+            get: (target, key) => (typeof key === 'symbol' ? target[key] : this.mirror(target[key], [...path, key])),
+            set: (target, key, v) => {
+                target[key] = v;
+                this.post({ type: 'assign', path: [...path, key], value: RenderState.plain(v) });
+                return true;
+            }
+        });
+    }
+
+    // --- FRAME ---
+    animate() {
+        requestAnimationFrame(() => this.animate());
+        this.params.flush();
+        this.sendUniforms();
+    }
+
+    // Posts every uniform whose components changed since the last post (SceneActions and presets
+    // write uniforms directly, so this diffs rather than relying on the scheduler alone)
+    sendUniforms() {
+        const updates = [];
+        let o = 0;
+        this.table.entries.forEach(([name, size]) => {
+            const value = this.uniforms[name].value;
+            const components = SyncProtocol.components(value, size);
+            let changed = false;
+            for (let c = 0; c < size; c++, o++) {
+                const f = Math.fround(components[c]);
+                if (this.sent[o] !== f) {
+                    this.sent[o] = f;
+                    changed = true;
+                }
+            }
+            if (changed) updates.push([name, value]);
+        });
+        if (updates.length === 0) return;
+
+        const frame = SyncProtocol.encode(this.table, updates);
+        this.post({ type: 'uniforms', frame }, [frame]);
+    }
+
+    // --- SCENE API (what the managers call on ShaderScene) ---
+    // The worker's scheduler rebuilds once the variant uniforms arrive
+    rebuildMaterial() {}
+
+    getRenderScale() {
+        return this.resolutionScale * (this.stats?.governorScale ?? 1.0);
+    }
+
+    onResize() {
+        if (this.gallery?.galleryMode.enabled) {
+            this.gallery.applyGalleryMode();
+            return;
+        }
+        this.setCanvasStyle(window.innerWidth, window.innerHeight);
+        this.post({ type: 'resize', viewport: RenderHost.viewport() });
+    }
+
+    // What three.js' setSize() does to an on-page canvas; the worker's renderer can't reach it
+    setCanvasStyle(width, height) {
+        this.canvas.style.width = `${width}px`;
+        this.canvas.style.height = `${height}px`;
+    }
+
+    setCanvasSize(width, height) {
+        this.call(['setCanvasSize'], [width, height]);
+    }
+
+    setRenderSize(width, height, options) {
+        this.call(['setRenderSize'], [width, height, options]);
+    }
+
+    redraw() {
+        this.sendUniforms(); // so a preset applied just now is in the redrawn frame
+        this.call(['redraw']);
+    }
+
+    captureScreenshot() {
+        this.sendUniforms();
+        return this.call(['captureScreenshot']);
+    }
+
+    createRecorder(options = {}) {
+        return new RemoteRecorder(this, options);
+    }
+
+    togglePause() { this.isPaused = !this.isPaused; }
+
+    toggleCheckerboard() {
+        this.state.checkerboard = !this.state.checkerboard;
+        this.call(['toggleCheckerboard']);
+    }
+
+    toggleBounds() {
+        this.call(['toggleBounds']);
+    }
+
+    cycleConePrepass() {
+        this.call(['cycleConePrepass']);
+    }
+
+    measureSteps() {
+        return this.call(['measureSteps']);
+    }
+
+    toggleNoiseVolume() {
+        return this.call(['toggleNoiseVolume']);
+    }
+
+    setQuality(tier) {
+        this.state.quality = tier;
+        this.ui?.showQuality(tier);
+        return this.call(['setQuality'], [tier]);
+    }
+
+    toggleGalleryMode() { this.load('gallery').then(gallery => gallery.toggleGalleryMode()); }
+
+    // Decoded here and transferred; the worker only uploads it. Flipped at decode because WebGL
+    // ignores UNPACK_FLIP_Y for ImageBitmaps.
+    async loadImageFile(file) {
+        const bitmap = await createImageBitmap(file, { imageOrientation: 'flipY' });
+        const { width, height } = bitmap;
+        this.post({ type: 'image', bitmap }, [bitmap]);
+
+        this.uniforms.u_image_texture.value = bitmap; // detached now, but marks an image as loaded
+        this.uniforms.u_image_aspect.value = width / height;
+        this.uniforms.u_image_opacity.value = 1.0;
+        this.params.set('u_shape_mode', 5, { source: 'image' });
+        this.ui.showImageMode();
+
+        console.log(`✅ Image loaded: ${width}x${height}, aspect: ${(width / height).toFixed(2)}`);
+    }
+}
+
+// VideoRecorder's interface for ExportManager; the recorder itself runs in the worker next to the
+// canvas, and the worker's render loop captures the frames
+class RemoteRecorder {
+    constructor(host, options) {
+        this.host = host;
+        host.onRecordingError = options.onError ?? null;
+    }
+
+    start() {
+        return this.host.call(['exporter', 'startRecording']);
+    }
+
+    capture() {}
+
+    // Resolves to the finished File (or null for uploads), as VideoRecorder.stop() does
+    stop() {
+        return this.host.call(['exporter', 'stopRecording']);
+    }
+}
@@ -0,0 +1,67 @@
+import * as THREE from 'three';
+
+// Scene fields that live in the render worker but are read and written by main-thread code (UI
+// sliders, SceneActions, presets, MIDI, sync). RenderHost keeps a mirror of them seeded from
+// snapshot(); writes to the mirror are posted as { path, value } and applied here with assign().
+// Uniforms don't go through this: they travel as SyncProtocol delta frames.
+export class RenderState {
+    static FIELDS = [
+        // Loop
+        'speed', 'resolutionScale', 'isPaused', 'debugUvFeedback', 'checkerboard', 'quality', 'renderWidth', 'renderHeight',
+        // Integrators (see ShaderScene.getPhysicsState)
+        'time', 'rotAngle', 'rotAngularVel', 'fractalRotAngle', 'fractalRotAngularVel',
+        'driftOffset', 'driftVel', 'halvingPhase', 'halvingVel', 'fogTime', 'fogVel',
+        // Post chain
+        'bloomPass', 'normalsPass', 'postEffectsPass', 'colorGradingPass', 'edgePass',
+        'bloomParams', 'normalsParams', 'edgeParams', 'postEffectsParams', 'colorParams'
+    ];
+
+    // Fields the worker changes on its own; sent again with every stats message
+    static LIVE = [
+        'renderWidth', 'renderHeight',
+        'time', 'rotAngle', 'rotAngularVel', 'fractalRotAngle', 'fractalRotAngularVel',
+        'driftOffset', 'driftVel', 'halvingPhase', 'halvingVel', 'fogTime', 'fogVel'
+    ];
+
+    // Of a pass, only what the controls touch (not its materials, quad or render targets)
+    static PASS_FIELDS = ['uniforms', 'strength', 'radius', 'threshold'];
+
+    static snapshot(scene, fields = RenderState.FIELDS) {
+        return Object.fromEntries(fields.map(key => [key, RenderState.plain(scene[key], key.endsWith('Pass'))]));
+    }
+
+    // Structured-cloneable form: vectors as { x, y, z, w }, textures dropped
+    static plain(value, pass = false) {
+        if (value === null || typeof value !== 'object') return value;
+        if (value.isTexture) return null;
+        if (value.isVector2 || value.isVector3 || value.isVector4) return { ...value };
+        const keys = pass ? RenderState.PASS_FIELDS.filter(k => k in value) : Object.keys(value);
+        return Object.fromEntries(keys.map(k => [k, RenderState.plain(value[k])]));
+    }
+
+    // Back to THREE vectors on the host, so mirrored uniforms keep set()/isVector3 and friends
+    static revive(value) {
+        if (value === null || typeof value !== 'object') return value;
+        const keys = Object.keys(value);
+        if (keys.length >= 2 && keys.length <= 4 && keys.every((k, i) => k === 'xyzw'[i])) {
+            return new [THREE.Vector2, THREE.Vector3, THREE.Vector4][keys.length - 2](...keys.map(k => value[k]));
+        }
+        return Object.fromEntries(keys.map(k => [k, RenderState.revive(value[k])]));
+    }
+
+    // Worker side of a mirror write; paths outside FIELDS are ignored
+    static assign(scene, path, value) {
+        if (!RenderState.FIELDS.includes(path[0])) return false;
+        const key = path[path.length - 1];
+        const owner = path.slice(0, -1).reduce((o, k) => o?.[k], scene);
+        if (!owner || typeof owner !== 'object') return false;
+
+        const current = owner[key];
+        if ((current?.isVector2 || current?.isVector3 || current?.isVector4) && value && typeof value === 'object') {
+            Object.assign(current, value);
+        } else {
+            owner[key] = value;
+        }
+        return true;
+    }
+}
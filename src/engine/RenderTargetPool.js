@@ -0,0 +1,144 @@
+import * as THREE from 'three';
+
+// Central owner of the full-screen render targets.
+// Targets are bucketed by exact size + format; released targets stay in their bucket for a while
+// so flipping between sizes (screenshots, gallery mode, governor steps) reuses textures instead
+// of reallocating them. Each target is tagged with a label so a resize back restores the same
+// texture (and its feedback history) to the same role.
+export class RenderTargetPool {
+    constructor(renderer, options = {}) {
+        this.renderer = renderer;
+
+        // --- LIMITS ---
+        this.maxFreeBytes = options.maxFreeBytes ?? 128 * 1024 * 1024;
+        this.freeTtlMs = options.freeTtlMs ?? 10000; // idle targets are disposed after this
+
+        // --- STATE ---
+        this.buckets = new Map(); // bucket key -> [free targets], most recently released last
+        this.leased = new Map();  // target -> label
+        this.external = new Map(); // label -> () => [targets] owned by three passes
+        this.stats = { allocations: 0, reuses: 0, disposals: 0 };
+    }
+
+    static bucketKey(width, height, options = {}) {
+        return [
+            width, height,
+            options.type ?? THREE.UnsignedByteType,
+            options.format ?? THREE.RGBAFormat,
+            options.minFilter ?? THREE.LinearFilter,
+            options.magFilter ?? THREE.LinearFilter,
+            options.depthBuffer ?? true
+        ].join(':');
+    }
+
+    static bytesFor(target) {
+        const texture = target.texture;
+        const channels = texture.format === THREE.RedFormat ? 1 : texture.format === THREE.RGFormat ? 2 : 4;
+        const bytesPerChannel = texture.type === THREE.FloatType ? 4
+            : (texture.type === THREE.HalfFloatType ? 2 : 1);
+        const depth = target.depthBuffer ? 4 : 0;
+        return target.width * target.height * (channels * bytesPerChannel + depth);
+    }
+
+    acquire(label, width, height, options = {}) {
+        width = Math.max(1, Math.floor(width));
+        height = Math.max(1, Math.floor(height));
+        const key = RenderTargetPool.bucketKey(width, height, options);
+        const bucket = this.buckets.get(key);
+
+        let target = null;
+        if (bucket?.length) {
+            // Prefer the texture this role had before, so history survives a round trip
+            let index = bucket.findIndex(t => t.userData.poolLabel === label);
+            if (index === -1) index = bucket.length - 1;
+            target = bucket.splice(index, 1)[0];
+            this.stats.reuses++;
+        } else {
+            target = new THREE.WebGLRenderTarget(width, height, options);
+            target.texture.name = `pool.${label}`;
+            target.userData.poolKey = key;
+            this.stats.allocations++;
+        }
+
+        target.userData.poolLabel = label;
+        this.leased.set(target, label);
+        return target;
+    }
+
+    // label: the role the target is leaving (ping-pong pairs swap roles every frame)
+    release(target, label) {
+        if (!target || !this.leased.has(target)) return;
+        this.leased.delete(target);
+        if (label) target.userData.poolLabel = label;
+
+        const key = target.userData.poolKey;
+        if (!this.buckets.has(key)) this.buckets.set(key, []);
+        target.userData.releasedAt = performance.now();
+        this.buckets.get(key).push(target);
+        this.trim();
+    }
+
+    // Returns a target of the requested size for this role: the same one if it already fits,
+    // otherwise a pooled/new one (the old target goes back to the pool)
+    resize(target, label, width, height, options = {}) {
+        if (target && target.width === Math.floor(width) && target.height === Math.floor(height)) {
+            return target;
+        }
+        if (target) this.release(target, label);
+        return this.acquire(label, width, height, options);
+    }
+
+    // Read-only accounting for targets three.js passes allocate themselves (composer, bloom mips)
+    trackExternal(label, getTargets) {
+        this.external.set(label, getTargets);
+    }
+
+    trim(now = performance.now()) {
+        const free = [];
+        this.buckets.forEach(bucket => bucket.forEach(t => free.push(t)));
+        free.sort((a, b) => a.userData.releasedAt - b.userData.releasedAt);
+
+        let freeBytes = free.reduce((n, t) => n + RenderTargetPool.bytesFor(t), 0);
+        free.forEach(t => {
+            if (freeBytes <= this.maxFreeBytes && now - t.userData.releasedAt < this.freeTtlMs) return;
+            const bucket = this.buckets.get(t.userData.poolKey);
+            bucket.splice(bucket.indexOf(t), 1);
+            if (bucket.length === 0) this.buckets.delete(t.userData.poolKey);
+            freeBytes -= RenderTargetPool.bytesFor(t);
+            t.dispose();
+            this.stats.disposals++;
+        });
+    }
+
+    getStats() {
+        const targets = [];
+        this.leased.forEach((label, t) => targets.push({
+            label, width: t.width, height: t.height, bytes: RenderTargetPool.bytesFor(t), pooled: true
+        }));
+        this.external.forEach((getTargets, label) => getTargets().forEach((t, i) => {
+            if (t) targets.push({ label: `${label}.${i}`, width: t.width, height: t.height, bytes: RenderTargetPool.bytesFor(t), pooled: false });
+        }));
+
+        let freeBytes = 0;
+        let freeCount = 0;
+        this.buckets.forEach(bucket => bucket.forEach(t => {
+            freeBytes += RenderTargetPool.bytesFor(t);
+            freeCount++;
+        }));
+
+        return {
+            ...this.stats,
+            targets,
+            liveBytes: targets.reduce((n, t) => n + t.bytes, 0),
+            freeBytes,
+            freeCount
+        };
+    }
+
+    dispose() {
+        this.leased.forEach((_, t) => t.dispose());
+        this.buckets.forEach(bucket => bucket.forEach(t => t.dispose()));
+        this.leased.clear();
+        this.buckets.clear();
+    }
+}
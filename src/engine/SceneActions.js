@@ -95,10 +95,10 @@ export class SceneActions {
         scene.uniforms.u_pattern_type.value = 0.0;
         
         // Reset UV feedback material uniforms too
-        scene.uvFeedbackMaterial.uniforms.u_warp_amplitude.value = 0.0;
-        scene.uvFeedbackMaterial.uniforms.u_lens_distort.value = 0.0;
-        scene.uvFeedbackMaterial.uniforms.u_polarize.value = 0.0;
-        scene.uvFeedbackMaterial.uniforms.u_bloat_strength.value = 0.0;
+        scene.uvFeedbackUniforms.u_warp_amplitude.value = 0.0;
+        scene.uvFeedbackUniforms.u_lens_distort.value = 0.0;
+        scene.uvFeedbackUniforms.u_polarize.value = 0.0;
+        scene.uvFeedbackUniforms.u_bloat_strength.value = 0.0;
     }
 
     static resetAll(scene) {
@@ -264,6 +264,13 @@ export class SceneActions {
         if (button) button.click();
     }
 
+    // Next quality tier, through the Tier buttons so the panel follows
+    static cycleQuality(scene) {
+        const buttons = [...document.querySelectorAll('.mirror-tab[data-quality]')];
+        const i = buttons.findIndex(b => b.dataset.quality === scene.quality);
+        buttons[(i + 1) % buttons.length]?.click();
+    }
+
     static toggleColorMode(scene) {
         const colorIndex = Math.floor(Math.random() * 13);
         scene.uniforms.u_color_type.value = colorIndex;
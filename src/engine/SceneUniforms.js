@@ -0,0 +1,214 @@
+import * as THREE from 'three';
+
+// The scene's { value } uniform objects, in the order SyncProtocol builds its slot table from.
+// Shared by the renderer and, in render-worker mode, by the main thread's mirror of them.
+export class SceneUniforms {
+    // Plain uniforms a preset carries (palettes, UV mirrors and physics state are handled separately)
+    static PRESET_UNIFORMS = [
+        'u_twist', 'u_crunch', 'u_crunch_type', 'u_spin', 'u_box_size', 'u_distance_scale',
+        'u_displacement_type', 'u_displacement_amp', 'u_displacement_freq',
+        'u_camera_theta', 'u_camera_phi', 'u_camera_distance',
+        'u_shape_type', 'u_shape_mode', 'u_color_intensity', 'u_lod_quality',
+        'u_mirror_x', 'u_mirror_y', 'u_mirror_z',
+        'u_sdf_effect_type', 'u_sdf_effect_mix',
+        'u_feedback_opacity', 'u_feedback_blur', 'u_feedback_distort', 'u_feedback_noise_scale',
+        'u_feedback_harmonics', 'u_feedback_lacunarity', 'u_feedback_gain', 'u_feedback_amplitude', 'u_feedback_exponent',
+        'u_feedback_noise_mix', 'u_feedback_blend_mode', 'u_feedback_seed', 'u_feedback_layers',
+        'u_pixel_size', 'u_color_type',
+        'u_surface_normals_enabled', 'u_diffuse_strength', 'u_specular_strength',
+        'u_specular_power', 'u_ambient_strength', 'u_shadow_strength', 'u_background_brightness',
+        'u_fog_enabled', 'u_fog_scale', 'u_turb_num', 'u_turb_amp',
+        'u_turb_speed', 'u_turb_freq', 'u_turb_exp',
+        'u_uv_scale', 'u_uv_rotate', 'u_uv_distort', 'u_uv_grid_size',
+        'u_warp_gain', 'u_warp_harmonics', 'u_warp_lacunarity', 'u_warp_amplitude', 'u_warp_layers',
+        'u_lens_distort', 'u_polarize',
+        'u_light_pos_x', 'u_light_pos_y', 'u_light_pos_z',
+        'u_fractal_rotation_speed',
+        'u_fractal_drift_x', 'u_fractal_drift_y', 'u_fractal_drift_z',
+        'u_fractal_halving_x_base', 'u_fractal_halving_y_base', 'u_fractal_halving_z_base',
+        'u_fractal_halving_freq_x', 'u_fractal_halving_freq_y', 'u_fractal_halving_freq_z',
+        'u_fractal_halving_time_x', 'u_fractal_halving_time_y', 'u_fractal_halving_time_z',
+        'u_bloat_strength', 'u_pattern_type',
+        'u_uv_feedback_opacity', 'u_uv_pixel_size', 'u_uv_feedback_blur', 'u_uv_feedback_distort',
+        'u_uv_feedback_noise_scale', 'u_uv_feedback_harmonics', 'u_uv_feedback_lacunarity', 'u_uv_feedback_gain',
+        'u_uv_feedback_amplitude', 'u_uv_feedback_exponent', 'u_uv_feedback_noise_mix', 'u_uv_feedback_blend_mode',
+        'u_uv_feedback_layers', 'u_uv_feedback_seed'
+    ];
+
+    static create() {
+        // Randomize palette on load
+        const colorPalettes = [
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.00, 0.33, 0.67] },
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.00, 0.10, 0.20] },
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.30, 0.20, 0.20] },
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 0.5], d: [0.80, 0.90, 0.30] },
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 0.7, 0.4], d: [0.00, 0.15, 0.20] },
+            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [2.0, 1.0, 0.0], d: [0.50, 0.20, 0.25] },
+            { a: [0.8, 0.5, 0.4], b: [0.2, 0.4, 0.2], c: [2.0, 1.0, 1.0], d: [0.00, 0.25, 0.25] }
+        ];
+    
+        const generateRandomPalette = () => ({
+            a: [Math.random(), Math.random(), Math.random()],
+            b: [Math.random(), Math.random(), Math.random()],
+            c: [Math.random(), Math.random(), Math.random()],
+            d: [Math.random(), Math.random(), Math.random()]
+        });
+    
+        const selectedPalette = Math.random() < 0.25
+            ? colorPalettes[Math.floor(Math.random() * colorPalettes.length)]
+            : generateRandomPalette();
+
+        return {
+            u_time: { value: 0.0 },
+            u_resolution: { value: new THREE.Vector2() },
+            u_tile: { value: new THREE.Vector4(0, 0, 0, 0) },
+            u_box_size: { value: 0.1 },
+            u_distance_scale: { value: 1.0 },
+            u_shape_type: { value: 0 },
+            u_shape_mode: { value: 0 },
+            u_lod_quality: { value: 60 },
+            u_lod_scale: { value: 1.0 },
+        
+            // Camera
+            u_camera_theta: { value: 0.0 },
+            u_camera_phi: { value: 1.57 },
+            u_camera_distance: { value: 3.0 },
+        
+            // Domain
+            u_twist: { value: 0.0 },
+            u_crunch: { value: 0.0 },
+            u_crunch_type: { value: 0 },
+            u_spin: { value: 0.0 },
+            u_rot_time_sin: { value: 0.0 },
+            u_rot_time_cos: { value: 1.0 },
+
+            // Mirror
+            u_mirror_x: { value: 0.0 },
+            u_mirror_y: { value: 0.0 },
+            u_mirror_z: { value: 0.0 },
+
+            // Displacement
+            u_displacement_freq: { value: 20.0 },
+            u_displacement_amp: { value: 0.0 },
+            u_displacement_type: { value: 0 },
+            u_sdf_effect_type: { value: 2 },
+            u_sdf_effect_mix: { value: 0.0 },
+
+            // Colors
+            u_color_intensity: { value: 0.005 },
+            u_background_brightness: { value: 1.0 },
+            u_color_type: { value: 0 },
+            u_palette_a: { value: new THREE.Vector3(...selectedPalette.a) },
+            u_palette_b: { value: new THREE.Vector3(...selectedPalette.b) },
+            u_palette_c: { value: new THREE.Vector3(...selectedPalette.c) },
+            u_palette_d: { value: new THREE.Vector3(...selectedPalette.d) },
+
+            // Lighting & Fog
+            u_surface_normals_enabled: { value: 0.0 }, // Default off per your code
+            u_diffuse_strength: { value: 0.7 },
+            u_specular_strength: { value: 0.7 },
+            u_specular_power: { value: 32.0 },
+            u_ambient_strength: { value: 1.0 },
+            u_shadow_strength: { value: 0.0 },
+            u_light_pos_x: { value: 0.5 },
+            u_light_pos_y: { value: 0.6 },
+            u_light_pos_z: { value: 0.65 },
+            u_fog_enabled: { value: 0.0 },
+            u_fog_scale: { value: 0.5 },
+            u_turb_num: { value: 12.0 },
+            u_turb_amp: { value: 1.1 },
+            u_turb_speed: { value: 0.3 },
+            u_turb_freq: { value: 2.1 },
+            u_turb_exp: { value: 1.4 },
+            u_turb_time: { value: 0.0 },
+
+            // Fractal Physics
+            u_fractal_drift_x: { value: 0.0 },
+            u_fractal_drift_y: { value: 0.0 },
+            u_fractal_drift_z: { value: 0.1 },
+            u_fractal_drift_offset_x: { value: 0.0 },
+            u_fractal_drift_offset_y: { value: 0.0 },
+            u_fractal_drift_offset_z: { value: 0.1 },
+            u_fractal_rotation_speed: { value: 0.0 },
+            u_fractal_rot_time_sin: { value: 0.0 },
+            u_fractal_rot_time_cos: { value: 1.0 },
+            u_fractal_halving_x_base: { value: 2.0 },
+            u_fractal_halving_y_base: { value: 2.0 },
+            u_fractal_halving_z_base: { value: 0.5 },
+            u_fractal_halving_freq_x: { value: 0.0 },
+            u_fractal_halving_freq_y: { value: 0.0 },
+            u_fractal_halving_freq_z: { value: 0.0 },
+            u_fractal_halving_time_x: { value: 0.0 },
+            u_fractal_halving_time_y: { value: 0.0 },
+            u_fractal_halving_time_z: { value: 0.0 },
+            u_fractal_halving_phase_x: { value: 0.0 },
+            u_fractal_halving_phase_y: { value: 0.0 },
+            u_fractal_halving_phase_z: { value: 0.0 },
+
+            // UV Feedback
+            u_uv_feedback: { value: null }, // texture
+            u_uv_scale: { value: 1.0 },
+            u_uv_rotate: { value: 0.0 },
+            u_uv_distort: { value: new THREE.Vector2(0.0, 0.0) },
+            u_uv_grid_size: { value: new THREE.Vector3(10.0, 20.0, 0.0) },
+            u_warp_gain: { value: 0.5 },
+            u_warp_harmonics: { value: 3 },
+            u_warp_lacunarity: { value: 2.0 },
+            u_warp_amplitude: { value: 0.0 },
+            u_warp_layers: { value: 1 },
+            u_lens_distort: { value: 0.0 },
+            u_polarize: { value: 0.0 },
+            u_uv_pixel_size: { value: 0.0 },
+            u_uv_feedback_opacity: { value: 0.0 },
+            u_uv_feedback_blur: { value: 0.0 },
+            u_uv_feedback_distort: { value: 0.025 },
+            u_uv_feedback_noise_scale: { value: 1.0 },
+            u_uv_feedback_harmonics: { value: 4 },
+            u_uv_feedback_lacunarity: { value: 2.0 },
+            u_uv_feedback_gain: { value: 0.5 },
+            u_uv_feedback_amplitude: { value: 0.5 },
+            u_uv_feedback_exponent: { value: 1.0 },
+            u_uv_feedback_noise_mix: { value: 0.98 },
+            u_uv_feedback_blend_mode: { value: 0 },
+            u_uv_feedback_seed: { value: 0.0 },
+            u_uv_feedback_layers: { value: 1 },
+            u_bloat_strength: { value: 0.0 },
+            u_pattern_type: { value: 0 },
+        
+            // Standard Raymarch Feedback (if used)
+            u_feedback_texture: { value: null },
+            // Checkerboard reconstruction (see toggleCheckerboard)
+            u_checkerboard: { value: 0 },
+            u_frame_parity: { value: 0 },
+            u_history_valid: { value: 0 },
+            u_prev_uv_feedback: { value: null },
+            u_prev_camera: { value: new THREE.Vector3(0.0, 1.57, 3.0) },            
+            // Empty-space skipping (see toggleBounds, cycleConePrepass)
+            u_bounds: { value: 0 },
+            u_cone_texel: { value: new THREE.Vector2(0, 0) },
+            u_cone_depth: { value: null },
+            u_noise_volume: { value: null }, // NoiseBaker volume (see setNoiseVolume)
+            u_feedback_opacity: { value: 0.0 },
+            u_feedback_blur: { value: 0.0 },
+            u_feedback_distort: { value: 0.025 },
+            u_feedback_noise_scale: { value: 1.0 },
+            u_feedback_harmonics: { value: 4 },
+            u_feedback_lacunarity: { value: 2.0 },
+            u_feedback_gain: { value: 0.5 },
+            u_feedback_exponent: { value: 1.0 },
+            u_feedback_amplitude: { value: 0.5 },
+            u_feedback_noise_mix: { value: 0.98 },
+            u_feedback_blend_mode: { value: 0 },
+            u_feedback_seed: { value: 0.0 },
+            u_feedback_layers: { value: 1 },
+            u_pixel_size: { value: 0.0 },
+        
+            // Image texture overlay
+            u_image_texture: { value: null },
+            u_image_opacity: { value: 0.0 },
+            u_image_aspect: { value: 1.0 },
+            u_uv_mirror_x: { value: 0.0 },
+            u_uv_mirror_y: { value: 0.0 },            
+        };
+    }
+}
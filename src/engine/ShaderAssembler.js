@@ -1,7 +1,14 @@
 
-import { COMMON_UNIFORMS, STRUCTS, MATH_UTILS, NOISE_LIB, SDF_EFFECT_LIB, DISPLACE_LIB, DOMAIN_FX, FOG_FX, SDF_LIB, CRUNCH_LIB, COLOR_LIB, LIGHTING_FX, FEEDBACK_FX, LIMITED_REPEAT_FX, GROUND_FX, GLOBAL_VARS, IMAGE_FX } from './chunks.js';
+import { QUALITY_TIERS, COMMON_UNIFORMS, STRUCTS, MATH_COMMON, MATH_UTILS, NOISE_SOURCE, NOISE_LIB, BLUR_FX, SDF_EFFECT_LIB, DISPLACE_LIB, DOMAIN_FX, FOG_FX, SDF_LIB, CRUNCH_LIB, COLOR_LIB, LIGHTING_FX, FEEDBACK_FX, LIMITED_REPEAT_FX, GROUND_FX, GLOBAL_VARS, IMAGE_FX, SHAPE_MODE_FX, VARIANT_HOOKS, MAP_FX, CAMERA_FX, CHECKERBOARD_FX, MAIN_FX, SDF_BOUNDS, SHAPE_MODE_BOUNDS, BOUNDS_FX, CONE_PREPASS_FX, CHUNK_SYMBOLS } from './chunks.js';
+import { GlslSymbols } from './GlslSymbols.js';
+
+// Built bundles carry the library's symbol tables (vite-plugin-glsl.js); dev parses on first use
+GlslSymbols.seed(CHUNK_SYMBOLS);
 
 export class ShaderAssembler {
+    // Quality tiers (chunks.js QUALITY_TIERS), cheapest first
+    static TIERS = Object.keys(QUALITY_TIERS);
+    static DEFAULT_TIER = 'high';
 
     static getShapeKey(id) {
         // Map UI Slider IDs to keys in SDF_LIB
@@ -98,9 +105,79 @@ export class ShaderAssembler {
         return keys[id] || 'paletteShape';
     }
 
+    static getShapeModeKey(id) {
+        const keys = [
+            'single',   // 0
+            'repeat',   // 1
+            'fractal',  // 2
+            'ground',   // 3
+            'fog',      // 4
+            'image'     // 5
+        ];
+        return keys[id] || 'single';
+    }
+
+    // Cache key for a rebuild state: only the fields that change the generated source
+    static getVariantKey(state) {
+        const key = [
+            state.shapeType || 0,
+            state.shapeMode || 0,
+            state.displacementAmp > 0.001 ? (state.displacementType || 0) : -1,
+            state.sdfEffectType || 0,
+            state.colorType || 0,
+            state.crunchType || 0,
+            this.getTier(state),
+            state.noiseVolume ? 1 : 0
+        ].join(':');
+        // Auxiliary programs of the same variant ('cone' prepass, 'steps' counter)
+        return state.pass ? `${key}:${state.pass}` : key;
+    }
+
+    // Single and repeat modes of a finite shape have a bounding sphere (SDF_BOUNDS)
+    static hasBounds(state) {
+        return (state.shapeMode || 0) <= 1 && this.getShapeKey(state.shapeType) in SDF_BOUNDS;
+    }
+
+    // The cone prepass marches the surface modes only (fog and image mode have no surface to skip
+    // to, and ground-mode heightfields aren't distance bounds)
+    static supportsConePrepass(state) {
+        return (state.shapeMode || 0) <= 2;
+    }
+
+    static getTier(state) {
+        return state.quality in QUALITY_TIERS ? state.quality : this.DEFAULT_TIER;
+    }
+
+    // Loop caps of a tier, also prepended to the UV feedback pass
+    static getQualityDefines(tier) {
+        return (QUALITY_TIERS[tier] ?? QUALITY_TIERS[this.DEFAULT_TIER]).trim();
+    }
+
+    // Rebuild-key fields as preprocessor constants, so the driver folds them like literals
+    static getDefines(state) {
+        const displacementOn = state.displacementAmp > 0.001;
+        return [
+            this.getQualityDefines(this.getTier(state)),
+            `#define SHAPE_TYPE ${state.shapeType || 0}`,
+            `#define SHAPE_MODE ${state.shapeMode || 0}`,
+            `#define DISPLACEMENT_ENABLED ${displacementOn ? 1 : 0}`,
+            `#define DISPLACEMENT_TYPE ${displacementOn ? (state.displacementType || 0) : -1}`,
+            `#define SDF_EFFECT_TYPE ${state.sdfEffectType || 0}`,
+            `#define COLOR_TYPE ${state.colorType || 0}`,
+            `#define CRUNCH_TYPE ${state.crunchType || 0}`
+        ].join('\n');
+    }
+
     static build(state) {
-        console.time('ShaderAssembly');
-        
+        return this.specialize(state).source;
+    }
+
+    // Assembles the variant and strips every function, global and uniform that main() can't reach.
+    // Returns the source plus size/timing stats for the variant.
+    static specialize(state) {
+        const t0 = performance.now();
+        const shapeMode = state.shapeMode || 0;
+
         const shapeKey = this.getShapeKey(state.shapeType);
         const activeSDF = SDF_LIB[shapeKey] || SDF_LIB.box;
         
@@ -116,190 +193,73 @@ export class ShaderAssembler {
         const colorKey = this.getColorKey(state.colorType || 0);
         const activeColor = COLOR_LIB[colorKey] || COLOR_LIB.paletteShape;
 
-        // Include displacement only if needed (Performance)
-        const displacementLogic = state.displacementAmp > 0.001
-            ? `d = opDisplace(d, p, 0.0);` 
-            : ``;
-
-        // The Heart of the Shader
-        const mapFunction = `
-        float map(vec3 p, int i, float t) {
-            // 1. Domain Warping
-            p = worldEffects(p, t);
-            p = u_sdf_effect_mix > 0.01 ? sceneWarp(p) : p;
-            vec3 ogP = p;
-
-            if (u_shape_mode == 2) { 
-                p = fractalWorld(p); 
-            }
-            
-            p.xy *= rotTimeM();
-
-            // 2. Shape SDF
-            // float d = sdShape(p, u_box_size);
-            // float d = sdShape(p * .65, u_box_size) / 0.65;
-            float d;
-
-            if (u_shape_mode == 0) { // Single mode
-                d = sdShape(p * .65, u_box_size) / 0.65;
-            } else if (u_shape_mode == 1) { // Repeat mode
-                d = opLimitedRepetition(p * 0.65, 0.25, vec3(1.), i) / 0.65;
-            } else if (u_shape_mode == 2) { // Fractal mode
-                d = sdShape(p, u_box_size);
-            } else if (u_shape_mode == 3) { // Ground mode
-                d = sdGround(p);
-            } else if (u_shape_mode == 4) { 
-                return fog(ogP, t);
-            } else if (u_shape_mode == 5) {
-                d = 0.0; 
-            }
-
-            // 3. Displacement
-            ${displacementLogic}
-            
-            // 4. Global Fog Integration
-            // if (u_fog_enabled == 2.0) return fog(ogP, t);
-            // if (u_fog_enabled == 1.0) return min(fog(ogP, t), d);
-            
-            return d;
-        }`;
-
-        const shader = `            
-            precision highp float;
-            out vec4 FragColor;
-            in vec2 vUv;
-
-            ${COMMON_UNIFORMS}
-            ${STRUCTS}
-            ${GLOBAL_VARS}     // <--- Global variables
-            ${MATH_UTILS}
-            ${NOISE_LIB}
-            ${activeCrunch}    // <--- Injected Crunch Effect
-            ${activeDisplace}  // <--- Injected Displacement Effect
-            ${activeSdfEffect} // <--- Injected SDF Effect
-            ${DOMAIN_FX}
-            ${FOG_FX}
-            ${GROUND_FX}
-            ${activeSDF}       // <--- Injected Shape
-            ${LIMITED_REPEAT_FX}
-            ${mapFunction}     // <--- Injected Map logic
-            ${activeColor}     // <--- Injected Color Mode
-            ${LIGHTING_FX}
-            ${FEEDBACK_FX}
-            ${IMAGE_FX}        // <--- Image overlay mode
-
-            // === MAIN LOOP RECONSTRUCTED ===
-            Camera ReadCamera(in vec2 uv) {
-                Camera cam;
-                cam.theta = u_camera_theta;
-                cam.phi = clamp(u_camera_phi, 0.01, 3.04159);
-                cam.distance = u_camera_distance;
-                cam.ro = vec3(
-                    cam.distance * sin(cam.phi) * sin(-cam.theta),
-                    cam.distance * cos(cam.phi),
-                    cam.distance * sin(cam.phi) * cos(-cam.theta)
-                );
-                cam.target = vec3(0.0);
-                cam.forward = normalize(cam.target - cam.ro);
-                cam.right = normalize(cross(cam.forward, vec3(0.0, 1.0, 0.0)));
-                cam.up = cross(cam.right, cam.forward);
-                cam.rd = normalize(uv.x * 1. * cam.right + uv.y * 1. * cam.up + 1.5 * cam.forward);
-                return cam;
-            }
-
-            Light ReadLight() {
-                Light light;
-                light.position = vec3(u_light_pos_x * 2.0 - 1.0, u_light_pos_y * 2.0 - 1.0, u_light_pos_z * 2.0 - 1.0) * 10.0;
-                light.color = vec3(1.0);
-                light.intensity = 1.0;
-                return light;
-            }
-
-            void UpdateColor(float t, float d, int i, vec3 p, inout Color col) {
-                col.value = setBackgroundColorInLoop(t, d, i, p, col);
-
-                if (u_shape_mode == 4) {
-                    col.value = setFogColor(p, t, col);
-                }
-            }
-
-            void SetGlobalVars(Camera cam, float t) {
-                g_worldPos = cam.ro + cam.rd * t;
-                g_rayTotal = t;
-                g_rayDirection = cam.rd;                
-            }                        
-
-            void mainImage(out vec4 fragColor, in vec2 fragCoord) {
-                vec2 uv = fragCoord / u_resolution.xy;
-                vec2 feedbackUv = texture(u_uv_feedback, uv).rg;
-                
-                Camera cam = ReadCamera(feedbackUv);
-                Light light = ReadLight();
-                Color col; 
-                col.value = vec3(0.0);
-                col.intensity = 1.0;
-                col.fogDensity = vec3(0.0);
-
-                // Set ray direction globally before raymarch for color calculations
-                g_rayDirection = cam.rd;
-
-                float eps = max(0.001, 0.001 / u_distance_scale);
-                float t = 0.0;
-                vec3 p = vec3(0.0);
-
-                for (int i = 0; i < 256; ++i) {
-                    if (i >= u_lod_quality) break;
-                    p = cam.ro + cam.rd * t;
-                    float d = map(p, i, t);                    
-                    g_rayDistance = d;
-                    t += d;
-                    
-                    // Volumetric Accumulation
-                    UpdateColor(t, d, i, p, col);
-                    
-                    if (d < eps || t > 100.0 / u_distance_scale) break;
-                }
-
-                SetGlobalVars(cam, t);
-
-                // Surface Lighting
-                CalculateNormals(t, p, light, col);
-                
-                col.value = Tonemap_tanh(col.value);
-                fragColor = vec4(col.value, 1.0);
-            }
-
-            void main(){
-                vec2 fragCoord = vUv * u_resolution;
-                vec4 fragColor;
-
-                // float pixelSize = u_pixel_size * 10. + 1.; // Adjust for larger/smaller pixels
-                // vec2 fragCoord = floor(vUv * u_resolution / pixelSize) * pixelSize;
-                // vec4 fragColor;
-                mainImage(fragColor, fragCoord);    
-                
-                // Image mode (u_shape_mode == 5)
-                if (u_shape_mode == 5 && u_image_opacity > 0.0) {
-                    fragColor = applyImageMode(fragColor, fragCoord);
-                }
-                    
-                fragColor = (u_feedback_opacity > 0.0) ? calculateFeedback(fragColor, fragCoord) : fragColor;    
-
-                // Triangle wave (mirrored/zig-zag modulo): 0→1→0 instead of 0→1→0 (harsh jump)
-                // fragColor = abs(fract(fragColor / .125) * 4.0 - 2.0);
-
-                // fragColor = vec4(floor(fragColor.rgb * 5.0 + 0.5) / 5.0, 1.0);
-
-                // float pixelSize = 8.0; // Adjust for larger/smaller pixels
-                // vec2 pixelatedUV = floor(fragCoord / pixelSize) * pixelSize / u_resolution;
-                // fragColor = texture(u_feedback_texture, pixelatedUV);
-                
-                FragColor = fragColor; // WebGL2 output
-            }
-
-        `;
+        // Mode-specific lines are spliced into the map/main templates at their /*@NAME@*/ markers
+        const modeKey = this.getShapeModeKey(shapeMode);
+        const bounded = this.hasBounds(state);
+        const counting = state.pass === 'steps';
+        const hooks = {
+            FRACTAL_WORLD: shapeMode === 2 ? VARIANT_HOOKS.fractalWorld : '',
+            SHAPE: SHAPE_MODE_FX[modeKey] || SHAPE_MODE_FX.single,
+            // Include displacement only if needed (Performance)
+            DISPLACE: state.displacementAmp > 0.001 ? VARIANT_HOOKS.displace : '',
+            FOG_COLOR: shapeMode === 4 ? VARIANT_HOOKS.fogColor : '',
+            IMAGE_MODE: shapeMode === 5 ? VARIANT_HOOKS.imageMode : '',
+            // Empty-space skipping (u_bounds, u_cone_texel pick them at runtime)
+            SHAPE_BOUND: bounded ? SDF_BOUNDS[shapeKey] : '',
+            MODE_BOUND: bounded ? SHAPE_MODE_BOUNDS[modeKey] : '',
+            RAY_BOUND: bounded ? VARIANT_HOOKS.rayBound : '',
+            SHADOW_BOUND: bounded ? VARIANT_HOOKS.shadowBound : '',
+            RAY_SEED: this.supportsConePrepass(state) ? VARIANT_HOOKS.raySeed : '',
+            COUNT_STEP: counting ? VARIANT_HOOKS.countStep : '',
+            STEP_OUTPUT: counting ? VARIANT_HOOKS.stepOutput : ''
+        };
+        const fill = (template) => template.replace(/\/\*@(\w+)@\*\//g, (_, name) => hooks[name] ?? '');
+
+        // Shape mode is part of the rebuild key, so map() only carries the active branch
+        const mapFunction = fill(shapeMode === 4 ? MAP_FX.fog : MAP_FX.surface);
+        // The cone prepass shares everything up to map() and swaps in its own main()
+        const mainLoop = state.pass === 'cone' ? [fill(CONE_PREPASS_FX)] : [CHECKERBOARD_FX, fill(MAIN_FX)];
+
+        const chunks = [
+            COMMON_UNIFORMS,
+            STRUCTS,
+            GLOBAL_VARS,
+            MATH_COMMON,
+            MATH_UTILS,
+            state.noiseVolume ? NOISE_SOURCE.volume : NOISE_SOURCE.procedural,
+            NOISE_LIB,
+            BLUR_FX,
+            activeCrunch,      // <--- Injected Crunch Effect
+            activeDisplace,    // <--- Injected Displacement Effect
+            activeSdfEffect,   // <--- Injected SDF Effect
+            DOMAIN_FX,
+            FOG_FX,
+            GROUND_FX,
+            activeSDF,         // <--- Injected Shape
+            LIMITED_REPEAT_FX,
+            mapFunction,       // <--- Injected Map logic
+            bounded ? fill(BOUNDS_FX) : '',
+            activeColor,       // <--- Injected Color Mode
+            fill(LIGHTING_FX),
+            FEEDBACK_FX,
+            IMAGE_FX,          // <--- Image overlay mode
+            CAMERA_FX,
+            ...mainLoop
+        ];
 
-        console.timeEnd('ShaderAssembly');
-        return shader;
+        // Dead-chunk elimination: walk the call graph from main() and keep only what it reaches
+        const decls = chunks.flatMap(chunk => GlslSymbols.parse(chunk));
+        const pruned = GlslSymbols.prune(decls, ['main']);
+        const shader = `${this.getDefines(state)}\n${pruned.source}\n`;
+
+        const stats = {
+            key: this.getVariantKey(state),
+            chars: shader.length,
+            fullChars: decls.reduce((n, d) => n + d.text.length + 1, 0), // unpruned, same comment-free form
+            declarations: pruned.kept,
+            totalDeclarations: pruned.total,
+            assemblyMs: performance.now() - t0
+        };
+        return { source: shader, stats };
     }
 }
@@ -0,0 +1,232 @@
+import * as THREE from 'three';
+import { ShaderAssembler } from './ShaderAssembler.js';
+
+// Bounded cache of compiled raymarch programs, keyed by the assembler variant key.
+// Materials share the scene's uniforms (samplers directly, the rest through its std140 blocks), so
+// swapping variants is just a material swap on the fullscreen mesh once the program has finished linking.
+export class ShaderCache {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+        this.vertexShader = options.vertexShader;
+
+        // --- LIMITS ---
+        this.maxEntries = options.maxEntries ?? 24;
+        this.maxBytes = options.maxBytes ?? 48 * 1024 * 1024;
+        // Drivers don't expose program sizes, so memory is estimated from the GLSL source length
+        this.bytesPerSourceChar = options.bytesPerSourceChar ?? 64;
+
+        // --- STATE ---
+        this.entries = new Map(); // key -> entry, insertion order doubles as LRU order
+        this.totalBytes = 0;
+        this.prewarmQueue = [];
+        this.isPrewarming = false;
+        this.pinned = new Set(); // keys never evicted (a loaded setlist's variants)
+        this.stats = { hits: 0, misses: 0, evictions: 0, compiles: 0, prewarmed: 0 };
+        // Assembly and link times, { name, start, dur, args } in ms, for GpuProfiler's trace. Kept
+        // here from startup on: the profiler is only imported once someone asks for it.
+        this.spans = [];
+        this.maxSpans = options.maxSpans ?? 500;
+
+        const gl = scene.renderer.getContext();
+        this.parallelCompile = !!gl.getExtension('KHR_parallel_shader_compile');
+
+        // Geometry for the private scenes used to compile without touching the visible one
+        this.compileGeometry = new THREE.PlaneGeometry(2, 2);
+    }
+
+    has(state) {
+        return this.entries.has(ShaderAssembler.getVariantKey(state));
+    }
+
+    // Returns the entry for a state, creating the material if needed (program is NOT compiled yet)
+    acquire(state) {
+        const key = ShaderAssembler.getVariantKey(state);
+        let entry = this.entries.get(key);
+
+        if (entry) {
+            this.stats.hits++;
+            this.touch(key, entry);
+            return entry;
+        }
+
+        this.stats.misses++;
+        const { source: fragmentShader, stats: buildStats } = ShaderAssembler.specialize(state);
+        this.traceSpan(`assemble ${key}`, performance.now() - buildStats.assemblyMs, buildStats.assemblyMs, {
+            chars: buildStats.chars, declarations: buildStats.declarations
+        });
+        entry = {
+            key,
+            state: { ...state },
+            material: new THREE.RawShaderMaterial({
+                uniforms: this.scene.materialUniforms,
+                vertexShader: this.vertexShader,
+                fragmentShader,
+                glslVersion: THREE.GLSL3
+            }),
+            bytes: fragmentShader.length * this.bytesPerSourceChar,
+            ready: false,
+            compileMs: 0,
+            buildStats,
+            promise: null,
+            lastUsed: performance.now()
+        };
+
+        this.entries.set(key, entry);
+        this.totalBytes += entry.bytes;
+        // The new entry isn't in flight yet, so it has to be kept explicitly; if everything else is
+        // pinned or compiling the cache runs over its limits until the next eviction pass
+        this.evict(key);
+        return entry;
+    }
+
+    // Resolves once the variant's program is linked and safe to draw without a stall
+    request(state) {
+        const entry = this.acquire(state);
+        if (entry.ready) return Promise.resolve(entry);
+        if (!entry.promise) entry.promise = this.compile(entry);
+        return entry.promise;
+    }
+
+    async compile(entry) {
+        const renderer = this.scene.renderer;
+        const t0 = performance.now();
+
+        const compileScene = new THREE.Scene();
+        compileScene.add(new THREE.Mesh(this.compileGeometry, entry.material));
+
+        if (renderer.compileAsync) {
+            await renderer.compileAsync(compileScene, this.scene.camera);
+        } else {
+            renderer.compile(compileScene, this.scene.camera);
+        }
+
+        this.scene.uniformBlocks.bindPrograms(entry.material);
+        entry.compileMs = performance.now() - t0;
+        entry.ready = true;
+        this.traceSpan(`link ${entry.key}`, t0, entry.compileMs, { parallel: this.parallelCompile });
+        this.stats.compiles++;
+        const b = entry.buildStats;
+        console.log(`⚙️ Compiled variant ${entry.key} in ${entry.compileMs.toFixed(1)}ms — ${(b.chars / 1024).toFixed(1)}KB of ${(b.fullChars / 1024).toFixed(1)}KB, ${b.declarations}/${b.totalDeclarations} decls, assembled in ${b.assemblyMs.toFixed(1)}ms (${this.entries.size} cached, ${(this.totalBytes / 1048576).toFixed(1)}MB est.)`);
+        return entry;
+    }
+
+    traceSpan(name, start, dur, args = {}) {
+        this.spans.push({ name, start, dur, args });
+        if (this.spans.length > this.maxSpans) this.spans.shift();
+    }
+
+    touch(key, entry) {
+        // Re-insert to move to the most-recently-used end of the Map
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+        entry.lastUsed = performance.now();
+    }
+
+    // keep: a key to spare besides the protected ones (the entry acquire() is handing out)
+    evict(keep = null) {
+        const active = this.scene.material;
+
+        for (const [key, entry] of this.entries) {
+            if (this.entries.size <= this.maxEntries && this.totalBytes <= this.maxBytes) break;
+            // Never drop the material on screen, a pinned one or one that is still compiling
+            if (key === keep || entry.material === active || this.pinned.has(key) || (entry.promise && !entry.ready)) continue;
+
+            this.entries.delete(key);
+            this.totalBytes -= entry.bytes;
+            entry.material.dispose();
+            this.stats.evictions++;
+        }
+    }
+
+    // Replaces the set of variants eviction must keep; unpinned ones age out as usual
+    pin(states) {
+        this.pinned = new Set(states.map(s => ShaderAssembler.getVariantKey(s)));
+        this.evict();
+    }
+
+    // --- BACKGROUND PRE-WARM ---
+    // Queue variants one step away from the current one (next/previous shape, color, crunch...)
+    prewarmNeighbours(state) {
+        if (!this.parallelCompile) return; // without the extension a background link would still block
+
+        const steps = [
+            ['shapeType', 13], ['colorType', 17], ['crunchType', 15],
+            ['sdfEffectType', 11], ['displacementType', 8]
+        ];
+
+        const neighbours = [];
+        steps.forEach(([field, count]) => {
+            [1, -1].forEach(dir => {
+                const value = ((state[field] || 0) + dir + count) % count;
+                neighbours.push({ ...state, [field]: value });
+            });
+        });
+        // Shape mode tabs are the other common live switch
+        for (let mode = 0; mode < 6; mode++) {
+            if (mode !== state.shapeMode) neighbours.push({ ...state, shapeMode: mode });
+        }
+
+        this.prewarm(neighbours);
+    }
+
+    prewarm(states) {
+        // Keep headroom so pre-warming never evicts the variants we actually switched through
+        const budget = Math.max(0, Math.min(
+            Math.floor(this.maxEntries / 2) - this.prewarmQueue.length,
+            this.maxEntries - this.entries.size - this.prewarmQueue.length
+        ));
+        states
+            .filter(s => !this.has(s))
+            .slice(0, budget)
+            .forEach(s => this.prewarmQueue.push(s));
+        this.drainPrewarm();
+    }
+
+    drainPrewarm() {
+        if (this.isPrewarming || this.prewarmQueue.length === 0) return;
+        this.isPrewarming = true;
+
+        const idle = globalThis.requestIdleCallback || ((cb) => setTimeout(cb, 16));
+        idle(() => {
+            const state = this.prewarmQueue.shift();
+            if (!state || this.has(state)) {
+                this.isPrewarming = false;
+                this.drainPrewarm();
+                return;
+            }
+            this.request(state)
+                .then(() => this.stats.prewarmed++)
+                .catch(err => console.warn('Variant pre-warm failed:', err))
+                .finally(() => {
+                    this.isPrewarming = false;
+                    this.drainPrewarm();
+                });
+        });
+    }
+
+    clear() {
+        this.prewarmQueue = [];
+        this.entries.forEach(entry => {
+            if (entry.material !== this.scene.material) entry.material.dispose();
+        });
+        this.entries.clear();
+        this.totalBytes = 0;
+    }
+
+    // Per-variant fragment size and timings, most recently used last
+    getVariantReport() {
+        return [...this.entries.values()].map(entry => ({
+            ...entry.buildStats,
+            compileMs: entry.ready ? entry.compileMs : null
+        }));
+    }
+
+    getStats() {
+        return {
+            ...this.stats,
+            entries: this.entries.size,
+            estimatedBytes: this.totalBytes,
+            parallelCompile: this.parallelCompile
+        };
+    }
+}
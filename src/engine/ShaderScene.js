@@ -1,24 +1,39 @@
 
 import * as THREE from 'three';
-import { EffectComposer } from 'three/examples/jsm/postprocessing/EffectComposer.js';
-import { RenderPass } from 'three/examples/jsm/postprocessing/RenderPass.js';
-import { UnrealBloomPass } from 'three/examples/jsm/postprocessing/UnrealBloomPass.js';
-import { ShaderPass } from 'three/examples/jsm/postprocessing/ShaderPass.js';
 import { ShaderAssembler } from './ShaderAssembler.js';
+import { ShaderCache } from './ShaderCache.js';
+import { RenderTargetPool } from './RenderTargetPool.js';
+import { UniformBlocks } from './UniformBlocks.js';
+import { SceneUniforms } from './SceneUniforms.js';
+import { AsyncReadback } from './AsyncReadback.js';
+import { COMMON_UNIFORMS } from './chunks.js';
+import { PerformanceGovernor } from '../managers/PerformanceGovernor.js';
 import { InputManager } from '../managers/InputManager.js';
 import { UIManager } from '../managers/UIManager.js';
-import { ExportManager } from '../managers/ExportManager.js';
-import { GalleryManager } from '../managers/GalleryManager.js';
-import { TouchManager } from '../managers/TouchManager.js';
+import { LazyManagers } from '../managers/LazyManagers.js';
+import { ParameterScheduler } from '../managers/ParameterScheduler.js';
 
 // Native Vite Raw Imports
 import vertexShader from '../shaders/vert.glsl?raw';
 import uvFeedbackVert from '../shaders/uvfeedbackvert.glsl?raw';
 import uvFeedbackFrag from '../shaders/uvfeedback.glsl?raw';
+import bootFrag from '../shaders/boot.glsl?raw';
 
 export class ShaderScene {
-    constructor() {
-        this.canvas = document.getElementById('canvas');
+    // Options are for render-worker mode (src/workers/RenderWorker.js); the page build passes none.
+    //   worker:   no DOM, input or sync managers, the main thread's RenderHost runs those
+    //   canvas:   the OffscreenCanvas transferred from the page
+    //   search:   the page's query string (a worker has no window.location)
+    //   viewport: { width, height, pixelRatio } of the page, updated by the host on resize
+    //   onStats:  receives the once-a-second info panel stats
+    //   onLayout: asks the host to resize (governor level changes; the host knows about gallery mode)
+    constructor(options = {}) {
+        this.worker = options.worker ?? false;
+        this.canvas = options.canvas ?? document.getElementById('canvas');
+        this.search = options.search ?? window.location.search;
+        this.viewport = options.viewport ?? ShaderScene.windowViewport();
+        this.onStats = options.onStats ?? null;
+        this.onLayout = options.onLayout ?? null;
         this.isReady = false;
 
         // --- STATE & INTEGRATORS ---
@@ -51,33 +66,115 @@ export class ShaderScene {
 
         // Debug Mode
         this.debugUvFeedback = false;
+        this.offline = false; // set while OfflineRenderer owns the frame loop
+
+        // Checkerboard raymarching (half the pixels per frame, rest reprojected)
+        this.checkerboard = new URLSearchParams(this.search).get('checkerboard') === '1';
+
+        // Empty-space skipping: rays clipped to the shape's bounding sphere (?bounds=1), and a
+        // cone-marched start distance traced at 1/4 or 1/8 resolution (?conePrepass=4|8)
+        this.bounds = new URLSearchParams(this.search).get('bounds') === '1';
+        const coneTile = parseInt(new URLSearchParams(this.search).get('conePrepass'), 10);
+        this.conePrepass = ShaderScene.CONE_PREPASS_TILES.includes(coneTile) ? coneTile : 0;
+
+        // Quality tier: loop caps compiled into both programs (?quality=low|med|high|ultra)
+        this.quality = ShaderAssembler.getTier({ quality: new URLSearchParams(this.search).get('quality') });
+
+        // Baked noise volume in place of procedural snoise(), off until its first bake has landed
+        // (?noiseVolume=1, plus noiseSize / noiseBudget in MB / noiseSeed; see setNoiseVolume)
+        const noiseParams = new URLSearchParams(this.search);
+        this.noiseVolume = false;
+        this.noiseSeed = parseInt(noiseParams.get('noiseSeed'), 10) || 0;
+        this.noiseOptions = { // NoiseBaker's, loaded with the first bake
+            size: parseInt(noiseParams.get('noiseSize'), 10) || undefined,
+            budgetMB: parseFloat(noiseParams.get('noiseBudget')) || undefined
+        };
+        this.noiseRequest = 0;
 
         // --- INITIALIZATION ---
+        // Staged: only what the placeholder frame needs is set up here, and that frame is drawn
+        // before the constructor returns. start() links the initial variant in the background and
+        // brings up the post chain and the UI; this.ready resolves once it has.
+        this.timeOrigin = options.timeOrigin ?? performance.timeOrigin;
+        this.startup = { firstFrame: null, firstVariant: null, interactive: null };
+        if (!this.worker) globalThis.startupTiming = this.startup; // read by server/startup.js
         this.initThree();
-        this.uniforms = this.createUniforms();
+        this.targets = new RenderTargetPool(this.renderer);
+        this.uniforms = SceneUniforms.create();
+        // Everything but the samplers reaches the raymarcher through std140 blocks (UniformBlocks.js)
+        this.uniformBlocks = new UniformBlocks(this.renderer);
+        this.sceneBlocks = this.uniformBlocks.register(COMMON_UNIFORMS, this.uniforms);
+        this.materialUniforms = this.uniformBlocks.looseUniforms(this.uniforms, this.sceneBlocks);
+        this.params = new ParameterScheduler(this); // input writes land here, applied once per frame
         this.initFeedbackSystem();
-        this.initPostProcessing();
-        
-        // Initial Compile
-        this.rebuildMaterial(true);
-
-        // Initialize Managers
-        this.exporter = new ExportManager(this);
-        this.ui = new UIManager(this);
-        this.input = new InputManager(this, this.ui, this.exporter);
-        this.gallery = new GalleryManager(this);
-        this.touch = new TouchManager(this);
-
-        this.isReady = true;
-        this.onResize(); // Set initial size
+        this.initBootFrame();
+        this.shaderCache = new ShaderCache(this, { vertexShader });
+        this.governor = new PerformanceGovernor(this);
+        // Export, gallery, touch and sync are imported on first use (in a render worker they live
+        // on the main thread, see RenderHost), as are the opt-in profiler, setlist, quality
+        // benchmark, offline renderer and noise baker; the frame loop skips them until then
+        this.managers = new LazyManagers(this);
+
+        this.resizeToViewport(); // Set initial size (and draw the placeholder frame)
+        this.markStartup('firstFrame');
         
         // Add resize listener
-        window.addEventListener('resize', () => this.onResize());
-        
-        // Setup drag and drop for images
-        this.setupImageDragDrop();
+        if (!this.worker) window.addEventListener('resize', () => this.onResize());
         
         this.animate();
+        this.ready = this.start();
+    }
+
+    // Second stage of startup: the initial variant and the UV pass link (in parallel, and without
+    // stalling the page where KHR_parallel_shader_compile is available) while the post chain's
+    // chunk loads. Until then the loop keeps drawing the placeholder frame.
+    async start() {
+        const [{ PostChain }] = await Promise.all([
+            import('./PostChain.js'),
+            this.rebuildMaterial(true),
+            this.compileScene(this.uvFeedbackScene, `uvFeedback ${this.quality}`).then(() => this.uniformBlocks.bindPrograms(this.uvFeedbackMaterial))
+        ]);
+        PostChain.attach(this);
+
+        // Initialize Managers (in a render worker these live on the main thread, see RenderHost)
+        if (!this.worker) {
+            this.ui = new UIManager(this);
+            this.input = new InputManager(this, this.ui);
+        }
+
+        this.isReady = true;
+        this.resizeToViewport(); // the first frame of the variant, through the post chain
+        this.markStartup('firstVariant');
+        if (!this.worker) {
+            this.markStartup('interactive');
+            this.managers.loadDeferred();
+        }
+
+        const params = new URLSearchParams(this.search);
+        if (params.get('profile') === '1') this.load('profiler').catch(() => {});
+        // Headless batch renders (server/render.js)
+        if (!this.worker && params.get('render') === 'offline') this.load('offlineRenderer').then(r => r.startFromURL(), () => {});
+        if (params.get('noiseVolume') === '1') this.setNoiseVolume(true);
+        if (params.has('bench')) this.load('qualityBench').then(b => b.startFromURL(), () => {});
+    }
+
+    // Resolves to a lazily loaded manager ('exporter', 'setlist', 'profiler'...; see LazyManagers)
+    load(name) {
+        return this.managers.load(name);
+    }
+
+    // Startup milestones, in ms since the page's navigation start (the host page's, in a worker)
+    markStartup(name) {
+        if (this.startup[name] !== null) return;
+        this.startup[name] = performance.timeOrigin + performance.now() - this.timeOrigin;
+        console.log(`%c[STARTUP] %c${name} at ${this.startup[name].toFixed(0)}ms`, 'color:#00ffff; font-weight:bold;', 'color:white;');
+    }
+
+    // Cone prepass texel sizes, in pixels, cycled by cycleConePrepass (0: off)
+    static CONE_PREPASS_TILES = [0, 4, 8];
+
+    static windowViewport() {
+        return { width: window.innerWidth, height: window.innerHeight, pixelRatio: window.devicePixelRatio };
     }
 
     initThree() {
@@ -88,794 +185,527 @@ export class ShaderScene {
             context: this.canvas.getContext('webgl2', { antialias: true }),
             powerPreference: 'high-performance'
         });
-        this.renderer.setPixelRatio(Math.min(window.devicePixelRatio, 2));
+        this.renderer.setPixelRatio(Math.min(this.viewport.pixelRatio, 2));
         
         // Disable tone mapping and color space conversion for raw output
         this.renderer.toneMapping = THREE.NoToneMapping;
         this.renderer.outputColorSpace = THREE.LinearSRGBColorSpace;
     }
 
-    // TODO: WS sync
-    // initSyncFromURL() {
-    //     const params = new URLSearchParams(window.location.search);
-    //     const room = params.get('room');
-    //     const mode = params.get('mode') || 'both';
-    //     const server = params.get('server') || 'ws://localhost:8080';
-        
-    //     if (room) {
-    //         this.sync.connect(server, room, mode);
-            
-    //         // Hide controls if display-only mode
-    //         if (mode === 'display') {
-    //             const panel = document.getElementById('controlPanel');
-    //             if (panel) panel.style.display = 'none';
-    //         }
-    //     }
-    // }
-
-    createUniforms() {
-        // Randomize palette on load
-        const colorPalettes = [
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.00, 0.33, 0.67] },
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.00, 0.10, 0.20] },
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 1.0], d: [0.30, 0.20, 0.20] },
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 1.0, 0.5], d: [0.80, 0.90, 0.30] },
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [1.0, 0.7, 0.4], d: [0.00, 0.15, 0.20] },
-            { a: [0.5, 0.5, 0.5], b: [0.5, 0.5, 0.5], c: [2.0, 1.0, 0.0], d: [0.50, 0.20, 0.25] },
-            { a: [0.8, 0.5, 0.4], b: [0.2, 0.4, 0.2], c: [2.0, 1.0, 1.0], d: [0.00, 0.25, 0.25] }
-        ];
-        
-        const generateRandomPalette = () => ({
-            a: [Math.random(), Math.random(), Math.random()],
-            b: [Math.random(), Math.random(), Math.random()],
-            c: [Math.random(), Math.random(), Math.random()],
-            d: [Math.random(), Math.random(), Math.random()]
-        });
-        
-        const selectedPalette = Math.random() < 0.25
-            ? colorPalettes[Math.floor(Math.random() * colorPalettes.length)]
-            : generateRandomPalette();
-
-        return {
-            u_time: { value: 0.0 },
-            u_resolution: { value: new THREE.Vector2() },
-            u_box_size: { value: 0.1 },
-            u_distance_scale: { value: 1.0 },
-            u_shape_type: { value: 0 },
-            u_shape_mode: { value: 0 },
-            u_lod_quality: { value: 60 },
-            
-            // Camera
-            u_camera_theta: { value: 0.0 },
-            u_camera_phi: { value: 1.57 },
-            u_camera_distance: { value: 3.0 },
-            
-            // Domain
-            u_twist: { value: 0.0 },
-            u_crunch: { value: 0.0 },
-            u_crunch_type: { value: 0 },
-            u_spin: { value: 0.0 },
-            u_rot_time_sin: { value: 0.0 },
-            u_rot_time_cos: { value: 1.0 },
-
-            // Mirror
-            u_mirror_x: { value: 0.0 },
-            u_mirror_y: { value: 0.0 },
-            u_mirror_z: { value: 0.0 },
-
-            // Displacement
-            u_displacement_freq: { value: 20.0 },
-            u_displacement_amp: { value: 0.0 },
-            u_displacement_type: { value: 0 },
-            u_sdf_effect_type: { value: 2 },
-            u_sdf_effect_mix: { value: 0.0 },
-
-            // Colors
-            u_color_intensity: { value: 0.005 },
-            u_background_brightness: { value: 1.0 },
-            u_color_type: { value: 0 },
-            u_palette_a: { value: new THREE.Vector3(...selectedPalette.a) },
-            u_palette_b: { value: new THREE.Vector3(...selectedPalette.b) },
-            u_palette_c: { value: new THREE.Vector3(...selectedPalette.c) },
-            u_palette_d: { value: new THREE.Vector3(...selectedPalette.d) },
-
-            // Lighting & Fog
-            u_surface_normals_enabled: { value: 0.0 }, // Default off per your code
-            u_diffuse_strength: { value: 0.7 },
-            u_specular_strength: { value: 0.7 },
-            u_specular_power: { value: 32.0 },
-            u_ambient_strength: { value: 1.0 },
-            u_shadow_strength: { value: 0.0 },
-            u_light_pos_x: { value: 0.5 },
-            u_light_pos_y: { value: 0.6 },
-            u_light_pos_z: { value: 0.65 },
-            u_fog_enabled: { value: 0.0 },
-            u_fog_scale: { value: 0.5 },
-            u_turb_num: { value: 12.0 },
-            u_turb_amp: { value: 1.1 },
-            u_turb_speed: { value: 0.3 },
-            u_turb_freq: { value: 2.1 },
-            u_turb_exp: { value: 1.4 },
-            u_turb_time: { value: 0.0 },
-
-            // Fractal Physics
-            u_fractal_drift_x: { value: 0.0 },
-            u_fractal_drift_y: { value: 0.0 },
-            u_fractal_drift_z: { value: 0.1 },
-            u_fractal_drift_offset_x: { value: 0.0 },
-            u_fractal_drift_offset_y: { value: 0.0 },
-            u_fractal_drift_offset_z: { value: 0.1 },
-            u_fractal_rotation_speed: { value: 0.0 },
-            u_fractal_rot_time_sin: { value: 0.0 },
-            u_fractal_rot_time_cos: { value: 1.0 },
-            u_fractal_halving_x_base: { value: 2.0 },
-            u_fractal_halving_y_base: { value: 2.0 },
-            u_fractal_halving_z_base: { value: 0.5 },
-            u_fractal_halving_freq_x: { value: 0.0 },
-            u_fractal_halving_freq_y: { value: 0.0 },
-            u_fractal_halving_freq_z: { value: 0.0 },
-            u_fractal_halving_time_x: { value: 0.0 },
-            u_fractal_halving_time_y: { value: 0.0 },
-            u_fractal_halving_time_z: { value: 0.0 },
-            u_fractal_halving_phase_x: { value: 0.0 },
-            u_fractal_halving_phase_y: { value: 0.0 },
-            u_fractal_halving_phase_z: { value: 0.0 },
-
-            // UV Feedback
-            u_uv_feedback: { value: null }, // texture
-            u_uv_scale: { value: 1.0 },
-            u_uv_rotate: { value: 0.0 },
-            u_uv_distort: { value: new THREE.Vector2(0.0, 0.0) },
-            u_uv_grid_size: { value: new THREE.Vector3(10.0, 20.0, 0.0) },
-            u_warp_gain: { value: 0.5 },
-            u_warp_harmonics: { value: 3 },
-            u_warp_lacunarity: { value: 2.0 },
-            u_warp_amplitude: { value: 0.0 },
-            u_warp_layers: { value: 1 },
-            u_lens_distort: { value: 0.0 },
-            u_polarize: { value: 0.0 },
-            u_uv_pixel_size: { value: 0.0 },
-            u_uv_feedback_opacity: { value: 0.0 },
-            u_uv_feedback_blur: { value: 0.0 },
-            u_uv_feedback_distort: { value: 0.025 },
-            u_uv_feedback_noise_scale: { value: 1.0 },
-            u_uv_feedback_harmonics: { value: 4 },
-            u_uv_feedback_lacunarity: { value: 2.0 },
-            u_uv_feedback_gain: { value: 0.5 },
-            u_uv_feedback_amplitude: { value: 0.5 },
-            u_uv_feedback_exponent: { value: 1.0 },
-            u_uv_feedback_noise_mix: { value: 0.98 },
-            u_uv_feedback_blend_mode: { value: 0 },
-            u_uv_feedback_seed: { value: 0.0 },
-            u_uv_feedback_layers: { value: 1 },
-            u_bloat_strength: { value: 0.0 },
-            u_pattern_type: { value: 0 },
-            
-            // Standard Raymarch Feedback (if used)
-            u_feedback_texture: { value: null },            
-            u_feedback_opacity: { value: 0.0 },
-            u_feedback_blur: { value: 0.0 },
-            u_feedback_distort: { value: 0.025 },
-            u_feedback_noise_scale: { value: 1.0 },
-            u_feedback_harmonics: { value: 4 },
-            u_feedback_lacunarity: { value: 2.0 },
-            u_feedback_gain: { value: 0.5 },
-            u_feedback_exponent: { value: 1.0 },
-            u_feedback_amplitude: { value: 0.5 },
-            u_feedback_noise_mix: { value: 0.98 },
-            u_feedback_blend_mode: { value: 0 },
-            u_feedback_seed: { value: 0.0 },
-            u_feedback_layers: { value: 1 },
-            u_pixel_size: { value: 0.0 },
-            
-            // Image texture overlay
-            u_image_texture: { value: null },
-            u_image_opacity: { value: 0.0 },
-            u_image_aspect: { value: 1.0 },
-            u_uv_mirror_x: { value: 0.0 },
-            u_uv_mirror_y: { value: 0.0 },            
-        };
-    }
-
     initFeedbackSystem() {
-        const rtOpts = { type: THREE.HalfFloatType, minFilter: THREE.LinearFilter, magFilter: THREE.LinearFilter };
+        this.feedbackTargetOptions = { type: THREE.HalfFloatType, minFilter: THREE.LinearFilter, magFilter: THREE.LinearFilter };
+        const rtOpts = this.feedbackTargetOptions;
+        const w = this.viewport.width * this.resolutionScale;
+        const h = this.viewport.height * this.resolutionScale;
         
         // 1. UV Feedback Targets
-        this.uvFeedbackTarget = new THREE.WebGLRenderTarget(window.innerWidth, window.innerHeight, rtOpts);
-        this.tempUvTarget = new THREE.WebGLRenderTarget(window.innerWidth, window.innerHeight, rtOpts);
+        this.uvFeedbackTarget = this.targets.acquire('uvFeedback', w, h, rtOpts);
+        this.tempUvTarget = this.targets.acquire('uvFeedbackTemp', w, h, rtOpts);
 
         // 2. Main Raymarch Feedback Targets (For 'Feed' tab)
-        this.feedbackTarget = new THREE.WebGLRenderTarget(window.innerWidth, window.innerHeight, rtOpts);
-        this.tempTarget = new THREE.WebGLRenderTarget(window.innerWidth, window.innerHeight, rtOpts);
+        // Allocated lazily by syncOptionalTargets() once feedback opacity goes above 0
+        this.feedbackTarget = null;
+        this.tempTarget = null;
 
         // UV Feedback Material
-        this.uvFeedbackMaterial = new THREE.RawShaderMaterial({
-            vertexShader: uvFeedbackVert,
-            fragmentShader: uvFeedbackFrag,
-            glslVersion: THREE.GLSL3,
-            uniforms: {
-                u_feedback_uv: { value: this.uvFeedbackTarget.texture },
-                u_time: this.uniforms.u_time,
-                u_resolution: this.uniforms.u_resolution,
-                // Link all main uniforms...
-                u_feedback_opacity: this.uniforms.u_uv_feedback_opacity,
-                u_feedback_distort: this.uniforms.u_uv_feedback_distort,
-                u_feedback_blur: this.uniforms.u_uv_feedback_blur,
-                u_feedback_noise_scale: this.uniforms.u_uv_feedback_noise_scale,
-                u_feedback_harmonics: this.uniforms.u_uv_feedback_harmonics,
-                u_feedback_lacunarity: this.uniforms.u_uv_feedback_lacunarity,      
-                u_feedback_gain: this.uniforms.u_uv_feedback_gain,          
-                u_feedback_amplitude: this.uniforms.u_uv_feedback_amplitude,
-                u_feedback_exponent: this.uniforms.u_uv_feedback_exponent,
-                u_feedback_noise_mix: this.uniforms.u_uv_feedback_noise_mix,
-                u_feedback_blend_mode: this.uniforms.u_uv_feedback_blend_mode,
-                u_feedback_seed: this.uniforms.u_uv_feedback_seed,
-                u_feedback_layers: this.uniforms.u_uv_feedback_layers,
-                u_lens_distort: this.uniforms.u_lens_distort,
-                u_polarize: this.uniforms.u_polarize,
-                u_uv_scale: this.uniforms.u_uv_scale,
-                u_uv_rotate: this.uniforms.u_uv_rotate,
-                u_uv_distort: this.uniforms.u_uv_distort,
-                u_uv_grid_size: this.uniforms.u_uv_grid_size,
-                u_warp_gain: this.uniforms.u_warp_gain,
-                u_warp_harmonics: this.uniforms.u_warp_harmonics,
-                u_warp_lacunarity: this.uniforms.u_warp_lacunarity,
-                u_warp_amplitude: this.uniforms.u_warp_amplitude,
-                u_warp_layers: this.uniforms.u_warp_layers,
-                u_uv_pixel_size: this.uniforms.u_uv_pixel_size,
-                u_pattern_type: this.uniforms.u_pattern_type,
-                u_bloat_strength: this.uniforms.u_bloat_strength,
-                u_uv_mirror_x: this.uniforms.u_uv_mirror_x,
-                u_uv_mirror_y: this.uniforms.u_uv_mirror_y
-            }
-        });
+        // The pass names its uniforms differently; this map feeds its FeedbackUniforms block
+        this.uvFeedbackUniforms = {
+            u_feedback_uv: { value: this.uvFeedbackTarget.texture },
+            u_time: this.uniforms.u_time,
+            u_resolution: this.uniforms.u_resolution,
+            // Link all main uniforms...
+            u_feedback_opacity: this.uniforms.u_uv_feedback_opacity,
+            u_feedback_distort: this.uniforms.u_uv_feedback_distort,
+            u_feedback_blur: this.uniforms.u_uv_feedback_blur,
+            u_feedback_noise_scale: this.uniforms.u_uv_feedback_noise_scale,
+            u_feedback_harmonics: this.uniforms.u_uv_feedback_harmonics,
+            u_feedback_lacunarity: this.uniforms.u_uv_feedback_lacunarity,      
+            u_feedback_gain: this.uniforms.u_uv_feedback_gain,          
+            u_feedback_amplitude: this.uniforms.u_uv_feedback_amplitude,
+            u_feedback_exponent: this.uniforms.u_uv_feedback_exponent,
+            u_feedback_noise_mix: this.uniforms.u_uv_feedback_noise_mix,
+            u_feedback_blend_mode: this.uniforms.u_uv_feedback_blend_mode,
+            u_feedback_seed: this.uniforms.u_uv_feedback_seed,
+            u_feedback_layers: this.uniforms.u_uv_feedback_layers,
+            u_lens_distort: this.uniforms.u_lens_distort,
+            u_polarize: this.uniforms.u_polarize,
+            u_uv_scale: this.uniforms.u_uv_scale,
+            u_uv_rotate: this.uniforms.u_uv_rotate,
+            u_uv_distort: this.uniforms.u_uv_distort,
+            u_uv_grid_size: this.uniforms.u_uv_grid_size,
+            u_warp_gain: this.uniforms.u_warp_gain,
+            u_warp_harmonics: this.uniforms.u_warp_harmonics,
+            u_warp_lacunarity: this.uniforms.u_warp_lacunarity,
+            u_warp_amplitude: this.uniforms.u_warp_amplitude,
+            u_warp_layers: this.uniforms.u_warp_layers,
+            u_uv_pixel_size: this.uniforms.u_uv_pixel_size,
+            u_pattern_type: this.uniforms.u_pattern_type,
+            u_bloat_strength: this.uniforms.u_bloat_strength,
+            u_uv_mirror_x: this.uniforms.u_uv_mirror_x,
+            u_uv_mirror_y: this.uniforms.u_uv_mirror_y,
+            u_noise_volume: this.uniforms.u_noise_volume
+        };
+        const feedbackBlocks = this.uniformBlocks.register(uvFeedbackFrag, this.uvFeedbackUniforms);
+        // One material per quality tier and noise source, all sharing these uniforms (see uvFeedbackMaterialFor)
+        this.uvFeedbackLooseUniforms = this.uniformBlocks.looseUniforms(this.uvFeedbackUniforms, feedbackBlocks);
+        this.uvFeedbackMaterials = new Map();
+        this.uvFeedbackMaterial = this.uvFeedbackMaterialFor(this.quality);
         
         this.uvFeedbackScene = new THREE.Scene();
-        this.uvFeedbackScene.add(new THREE.Mesh(new THREE.PlaneGeometry(2,2), this.uvFeedbackMaterial));
+        this.uvFeedbackMesh = new THREE.Mesh(new THREE.PlaneGeometry(2,2), this.uvFeedbackMaterial);
+        this.uniformBlocks.attach(this.uvFeedbackMesh, feedbackBlocks);
+        this.uvFeedbackScene.add(this.uvFeedbackMesh);
+        // Linked (and its block bindings set) by start(), before the first frame that draws it
         
         this.uniforms.u_uv_feedback.value = this.uvFeedbackTarget.texture;
-        this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture; // Link Raymarch feedback
     }
 
-    initPostProcessing() {
-        // Screen-Space Normals Shader
-        const ScreenSpaceNormalsShader = {
-            uniforms: {
-                'tDiffuse': { value: null },
-                'u_resolution': { value: new THREE.Vector2() },
-                'u_normal_strength': { value: 0.0 },
-                'u_normal_blend': { value: 0.6 },
-                'u_roughness': { value: 0.2 },
-                'u_F0': { value: 0.16 },
-                'u_diffuse_scale': { value: 0.2 },
-                'u_specular_scale': { value: 0.8 }
-            },
-            vertexShader: `
-                varying vec2 vUv;
-                void main() {
-                    vUv = uv;
-                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position, 1.0);
-                }
-            `,
-            fragmentShader: `
-                uniform sampler2D tDiffuse;
-                uniform vec2 u_resolution;
-                uniform float u_normal_strength;
-                uniform float u_normal_blend;
-                uniform float u_roughness;
-                uniform float u_F0;
-                uniform float u_diffuse_scale;
-                uniform float u_specular_scale;
-                varying vec2 vUv;
-
-                const float PI = 3.14159265;
-
-                float square(float x){return x*x;}
-                float saturate(float x){return clamp(x,0.0,1.0);}
-                float fresnel(float F0, float lDotH){ float f = pow(1.0 - lDotH, 5.0); return (1.0 - F0)*f + F0; }
-                float GGX(float a, float nDotH){ float a2 = square(a); return a2 / (PI * square(square(nDotH)*(a2-1.0) + 1.0)); }
-                float GGGX(float a, float nDotL, float nDotV){
-                    float a2 = square(a);
-                    float gl = nDotL + sqrt(a2 + (1.0 - a2) * square(nDotL));
-                    float gv = nDotV + sqrt(a2 + (1.0 - a2) * square(nDotV));
-                    return 1.0 / (gl * gv);
-                }
-                float specularBRDF(vec3 L, vec3 V, vec3 N, float r, float F0){
-                    vec3 H = normalize(L + V);
-                    float nDotH = saturate(dot(N,H));
-                    float nDotL = saturate(dot(N,L));
-                    float nDotV = saturate(dot(N,V));
-                    float lDotH = saturate(dot(L,H));
-                    float D = GGX(r, nDotH);
-                    float G = GGGX(r, nDotL, nDotV);
-                    float F = fresnel(F0, lDotH);
-                    return D * G * F;
-                }
-
-                float getHeight(vec2 uv){ return dot(texture2D(tDiffuse, uv).rgb, vec3(0.299,0.587,0.114)); }
-                vec2 computeGradient(vec2 uv){
-                    vec2 d = 1.0 / u_resolution;
-                    float tl = getHeight(uv + vec2(-d.x,  d.y));
-                    float t  = getHeight(uv + vec2( 0.0,  d.y));
-                    float tr = getHeight(uv + vec2( d.x,  d.y));
-                    float l  = getHeight(uv + vec2(-d.x,  0.0));
-                    float r  = getHeight(uv + vec2( d.x,  0.0));
-                    float bl = getHeight(uv + vec2(-d.x, -d.y));
-                    float b  = getHeight(uv + vec2( 0.0, -d.y));
-                    float br = getHeight(uv + vec2( d.x, -d.y));
-                    return vec2(
-                        1.0*tl - 1.0*tr + 2.0*l - 2.0*r + 1.0*bl - 1.0*br,
-                        -1.0*tl + 1.0*bl - 2.0*t + 2.0*b - 1.0*tr + 1.0*br
-                    );
-                }
-
-                void main(){
-                    vec3 col = texture2D(tDiffuse, vUv).rgb;
-                    vec2 g = computeGradient(vUv);
-                    vec3 N = normalize(vec3(g * u_normal_strength, 1.0));
-                    vec3 L = normalize(vec3(0.5, 0.5, 1.0));
-                    vec3 V = vec3(0.0, 0.0, 1.0);
-                    float diff = saturate(dot(L,N));
-                    diff = diff * u_diffuse_scale + (1.0 - u_diffuse_scale);
-                    float spec = specularBRDF(L, V, N, u_roughness, u_F0);
-                    vec3 lit = col * diff + spec * u_specular_scale;
-                    col = mix(col, lit, u_normal_blend);
-                    gl_FragColor = vec4(col, 1.0);
-                }
-            `
-        };
-
-        // Color Grading Shader
-        const ColorGradingShader = {
-            uniforms: {
-                'tDiffuse': { value: null },
-                'u_resolution': { value: new THREE.Vector2() },
-                'contrast': { value: 1.0 },
-                'saturation': { value: 1.0 },
-                'brightness': { value: 0.0 },
-                'gamma': { value: 1.0 },
-                'hueShift': { value: 0.0 },
-                'solarizeMix': { value: 0.0 },
-                'solarizeLightThresh': { value: 0.7 },
-                'solarizeLightSoft': { value: 0.3 },
-                'solarizeDarkThresh': { value: 0.3 },
-                'solarizeDarkSoft': { value: 0.3 },
-                'u_border_thickness': { value: 0.0 },
-                'u_border_color': { value: new THREE.Vector3(0.0, 1.0, 0.0) }
-            },
-            vertexShader: `
-                varying vec2 vUv;
-                void main(){
-                    vUv = uv;
-                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
-                }
-            `,
-            fragmentShader: `
-                uniform sampler2D tDiffuse;
-                uniform vec2 u_resolution;
-                uniform float contrast;
-                uniform float saturation;
-                uniform float brightness;
-                uniform float gamma;
-                uniform float hueShift;
-                uniform float solarizeMix;
-                uniform float solarizeLightThresh;
-                uniform float solarizeLightSoft;
-                uniform float solarizeDarkThresh;
-                uniform float solarizeDarkSoft; 
-                uniform float u_border_thickness;
-                uniform vec3 u_border_color;   
-                varying vec2 vUv;
-                
-                float thresholdSoft(float value, float thresh, float softness) {        
-                    float edgeLow  = thresh - softness * 0.5;
-                    float edgeHigh = thresh + softness * 0.5;
-                    return smoothstep(edgeLow, edgeHigh, value);
-                }
-                
-                vec3 rgb2hsv(vec3 c) {
-                    vec4 K = vec4(0.0, -1.0 / 3.0, 2.0 / 3.0, -1.0);
-                    vec4 p = mix(vec4(c.bg, K.wz), vec4(c.gb, K.xy), step(c.b, c.g));
-                    vec4 q = mix(vec4(p.xyw, c.r), vec4(c.r, p.yzx), step(p.x, c.r));
-                    float d = q.x - min(q.w, q.y);
-                    float e = 1.0e-10;
-                    return vec3(abs(q.z + (q.w - q.y) / (6.0 * d + e)), d / (q.x + e), q.x);
-                }
-                
-                vec3 hsv2rgb(vec3 c) {
-                    vec4 K = vec4(1.0, 2.0 / 3.0, 1.0 / 3.0, 3.0);
-                    vec3 p = abs(fract(c.xxx + K.xyz) * 6.0 - K.www);
-                    return c.z * mix(K.xxx, clamp(p - K.xxx, 0.0, 1.0), c.y);
-                }
-
-                void main(){
-                    vec3 color = texture2D(tDiffuse, vUv).rgb;
-
-                    // Base color grading
-                    color = (color - 0.5) * contrast + 0.5;
-                    color += brightness;
-                    float gray = dot(color, vec3(0.299, 0.587, 0.114));
-                    color = mix(vec3(gray), color, saturation);
-                    color = pow(max(color, vec3(0.0)), vec3(1.0 / gamma));
-                    
-                    // Hue shift
-                    if (abs(hueShift) > 0.001) {
-                        vec3 hsv = rgb2hsv(color);
-                        hsv.x = fract(hsv.x + hueShift / 360.0);
-                        color = hsv2rgb(hsv);
-                    }
-
-                    // Solarize
-                    vec3 inverted = 1.0 - color;
-                    float lightMask = thresholdSoft(gray, solarizeLightThresh, solarizeLightSoft);
-                    vec3 branchLight = mix(color, inverted, lightMask);
-                    float darkMask = 1.0 - thresholdSoft(gray, solarizeDarkThresh, solarizeDarkSoft);
-                    vec3 branchDark = mix(inverted, color, darkMask);
-                    vec3 solarized = max(branchLight, branchDark);
-                    color = mix(color, solarized, clamp(solarizeMix, 0.0, 1.0));
-
-                    // Border
-                    vec2 borderThickness = vec2(u_border_thickness);
-                    float aspect = u_resolution.x / u_resolution.y;
-                    if (aspect > 1.0) {
-                        borderThickness.x /= aspect;
-                    } else {
-                        borderThickness.y *= aspect;
-                    }
-                    vec2 bl = step(borderThickness, vUv);
-                    float pct = bl.x * bl.y;
-                    vec2 tr = step(borderThickness, 1.0 - vUv);
-                    pct *= tr.x * tr.y;
-                    pct = 1. - pct;
-                    color = mix(color, u_border_color, vec3(pct));
-
-                    gl_FragColor = vec4(color, 1.0);
-                }
-            `
-        };
+    uvFeedbackMaterialFor(tier, noiseVolume = this.noiseVolume) {
+        const key = `${tier}:${noiseVolume ? 1 : 0}`;
+        let material = this.uvFeedbackMaterials.get(key);
+        if (!material) {
+            const defines = ShaderAssembler.getQualityDefines(tier) + (noiseVolume ? '\n#define NOISE_VOLUME' : '');
+            material = new THREE.RawShaderMaterial({
+                vertexShader: uvFeedbackVert,
+                fragmentShader: `${defines}\n${uvFeedbackFrag}`,
+                glslVersion: THREE.GLSL3,
+                uniforms: this.uvFeedbackLooseUniforms
+            });
+            this.uvFeedbackMaterials.set(key, material);
+        }
+        return material;
+    }
 
-        // Edge Detection Shader
-        const EdgeDetectionShader = {
+    // Drawn straight to the canvas until start() has finished: the opening palette, slowly cycling.
+    // Small enough to link in the time of a frame, where the raymarcher can take seconds.
+    initBootFrame() {
+        this.bootScene = new THREE.Scene();
+        this.bootMaterial = new THREE.RawShaderMaterial({
+            vertexShader: uvFeedbackVert,
+            fragmentShader: bootFrag,
+            glslVersion: THREE.GLSL3,
             uniforms: {
-                'tDiffuse': { value: null },
-                'u_resolution': { value: new THREE.Vector2() },
-                'u_edge_strength': { value: 0.0 },
-                'u_edge_threshold': { value: 0.1 },
-                'u_edge_color': { value: new THREE.Vector3(1.0, 1.0, 1.0) },
-                'u_sharpen_strength': { value: 0.0 }
-            },
-            vertexShader: `
-                varying vec2 vUv;
-                void main(){
-                    vUv = uv;
-                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
-                }
-            `,
-            fragmentShader: `
-                uniform sampler2D tDiffuse;
-                uniform vec2 u_resolution;
-                uniform float u_edge_strength;
-                uniform float u_edge_threshold;
-                uniform vec3 u_edge_color;
-                uniform float u_sharpen_strength;
-                varying vec2 vUv;
-                
-                float edgeDetection(vec2 uv, vec2 stepSize) {
-                    mat3 Gx = mat3(-1, 0, 1, -2, 0, 2, -1, 0, 1);
-                    mat3 Gy = mat3(-1, -2, -1, 0, 0, 0, 1, 2, 1);
-
-                    vec3 gradientX = vec3(0.0);
-                    vec3 gradientY = vec3(0.0);
-
-                    for (int i = -1; i <= 1; i++) {
-                        for (int j = -1; j <= 1; j++) {
-                            vec2 offset = vec2(float(i), float(j)) * stepSize;
-                            vec3 s = texture2D(tDiffuse, uv + offset).rgb;
-                            
-                            gradientX += s * Gx[i+1][j+1];
-                            gradientY += s * Gy[i+1][j+1];
-                        }
-                    }
-
-                    float edge = length(vec2(length(gradientX), length(gradientY)));
-                    return edge;
-                }
-                
-                vec4 sharpen(vec2 uv, vec2 stepSize, float strength) {
-                    float kernel[9];
-                    kernel[0] = -1.0 * strength;
-                    kernel[1] = -1.0 * strength;
-                    kernel[2] = -1.0 * strength;
-                    kernel[3] = -1.0 * strength;
-                    kernel[4] = 8.0 * strength + 1.0;
-                    kernel[5] = -1.0 * strength;
-                    kernel[6] = -1.0 * strength;
-                    kernel[7] = -1.0 * strength;
-                    kernel[8] = -1.0 * strength;
-                    
-                    vec4 sum = vec4(0.0);
-                    int idx = 0;
-
-                    for (int i = -1; i <= 1; i++) {
-                        for (int j = -1; j <= 1; j++) {
-                            vec2 offset = vec2(float(i), float(j)) * stepSize;
-                            sum += texture2D(tDiffuse, uv + offset) * kernel[idx];
-                            idx++;
-                        }
-                    }
-                    return sum;
-                }
-                
-                void main(){
-                    vec3 color = texture2D(tDiffuse, vUv).rgb;
-                    vec2 stepSize = 1.0 / u_resolution;
-                    
-                    if (u_sharpen_strength > 0.0) {
-                        color = sharpen(vUv, stepSize, u_sharpen_strength).rgb;
-                    }
-                    
-                    if (u_edge_strength > 0.0) {
-                        float edges = edgeDetection(vUv, stepSize);
-                        edges = smoothstep(u_edge_threshold, u_edge_threshold + 0.1, edges);
-                        color = mix(color, u_edge_color * edges, u_edge_strength * edges);
-                    }
-                    
-                    gl_FragColor = vec4(color, 1.0);
-                }
-            `
-        };
-
-        // Initialize composer
-        this.composer = new EffectComposer(this.renderer);
-        const renderW = Math.floor(window.innerWidth * this.resolutionScale);
-        const renderH = Math.floor(window.innerHeight * this.resolutionScale);
-        this.composer.setSize(renderW, renderH);
-
-        // Add passes
-        this.renderPass = new RenderPass(this.scene, this.camera);
-        this.composer.addPass(this.renderPass);
-
-        this.normalsPass = new ShaderPass(ScreenSpaceNormalsShader);
-        this.normalsPass.uniforms.u_resolution.value.set(renderW, renderH);
-        this.composer.addPass(this.normalsPass);
-
-
-
+                u_boot_time: { value: 0 },
+                u_palette_a: this.uniforms.u_palette_a,
+                u_palette_b: this.uniforms.u_palette_b,
+                u_palette_c: this.uniforms.u_palette_c,
+                u_palette_d: this.uniforms.u_palette_d
+            }
+        });
+        this.bootScene.add(new THREE.Mesh(new THREE.PlaneGeometry(2, 2), this.bootMaterial));
+    }
 
-        // Post Effects Shader (Dithering + RGB Split)
-        const PostEffectsShader = {
-            uniforms: {
-                'tDiffuse': { value: null },
-                'u_resolution': { value: new THREE.Vector2() },
-                'u_dither_strength': { value: 0.0 },
-                'u_dither_scale': { value: 1.0 },
-                'u_rgb_split': { value: 0.0 }
-            },
-            vertexShader: `
-                varying vec2 vUv;
-                void main(){
-                    vUv = uv;
-                    gl_Position = projectionMatrix * modelViewMatrix * vec4(position,1.0);
-                }
-            `,
-            fragmentShader: `
-                uniform sampler2D tDiffuse;
-                uniform vec2 u_resolution;
-                uniform float u_dither_strength;
-                uniform float u_dither_scale;
-                uniform float u_rgb_split;
-                varying vec2 vUv;
-                
-                // Bayer matrix 8x8 for ordered dithering
-                float bayer8(vec2 pos) {
-                    int x = int(mod(pos.x, 8.0));
-                    int y = int(mod(pos.y, 8.0));
-                    int index = x + y * 8;
-                    float bayerMatrix[64];
-                    bayerMatrix[0] = 0.0/64.0; bayerMatrix[1] = 32.0/64.0; bayerMatrix[2] = 8.0/64.0; bayerMatrix[3] = 40.0/64.0;
-                    bayerMatrix[4] = 2.0/64.0; bayerMatrix[5] = 34.0/64.0; bayerMatrix[6] = 10.0/64.0; bayerMatrix[7] = 42.0/64.0;
-                    bayerMatrix[8] = 48.0/64.0; bayerMatrix[9] = 16.0/64.0; bayerMatrix[10] = 56.0/64.0; bayerMatrix[11] = 24.0/64.0;
-                    bayerMatrix[12] = 50.0/64.0; bayerMatrix[13] = 18.0/64.0; bayerMatrix[14] = 58.0/64.0; bayerMatrix[15] = 26.0/64.0;
-                    bayerMatrix[16] = 12.0/64.0; bayerMatrix[17] = 44.0/64.0; bayerMatrix[18] = 4.0/64.0; bayerMatrix[19] = 36.0/64.0;
-                    bayerMatrix[20] = 14.0/64.0; bayerMatrix[21] = 46.0/64.0; bayerMatrix[22] = 6.0/64.0; bayerMatrix[23] = 38.0/64.0;
-                    bayerMatrix[24] = 60.0/64.0; bayerMatrix[25] = 28.0/64.0; bayerMatrix[26] = 52.0/64.0; bayerMatrix[27] = 20.0/64.0;
-                    bayerMatrix[28] = 62.0/64.0; bayerMatrix[29] = 30.0/64.0; bayerMatrix[30] = 54.0/64.0; bayerMatrix[31] = 22.0/64.0;
-                    bayerMatrix[32] = 3.0/64.0; bayerMatrix[33] = 35.0/64.0; bayerMatrix[34] = 11.0/64.0; bayerMatrix[35] = 43.0/64.0;
-                    bayerMatrix[36] = 1.0/64.0; bayerMatrix[37] = 33.0/64.0; bayerMatrix[38] = 9.0/64.0; bayerMatrix[39] = 41.0/64.0;
-                    bayerMatrix[40] = 51.0/64.0; bayerMatrix[41] = 19.0/64.0; bayerMatrix[42] = 59.0/64.0; bayerMatrix[43] = 27.0/64.0;
-                    bayerMatrix[44] = 49.0/64.0; bayerMatrix[45] = 17.0/64.0; bayerMatrix[46] = 57.0/64.0; bayerMatrix[47] = 25.0/64.0;
-                    bayerMatrix[48] = 15.0/64.0; bayerMatrix[49] = 47.0/64.0; bayerMatrix[50] = 7.0/64.0; bayerMatrix[51] = 39.0/64.0;
-                    bayerMatrix[52] = 13.0/64.0; bayerMatrix[53] = 45.0/64.0; bayerMatrix[54] = 5.0/64.0; bayerMatrix[55] = 37.0/64.0;
-                    bayerMatrix[56] = 63.0/64.0; bayerMatrix[57] = 31.0/64.0; bayerMatrix[58] = 55.0/64.0; bayerMatrix[59] = 23.0/64.0;
-                    bayerMatrix[60] = 61.0/64.0; bayerMatrix[61] = 29.0/64.0; bayerMatrix[62] = 53.0/64.0; bayerMatrix[63] = 21.0/64.0;
-                    return bayerMatrix[index];
-                }
-                
-                vec3 dither(vec3 color, vec2 screenPos) {
-                    float threshold = bayer8(screenPos * u_dither_scale);
-                    return color + (threshold - 0.5) * u_dither_strength;
-                    // return mix(color, color * color * (threshold - 0.5) * u_dither_strength, u_dither_strength);
-                }
-                
-                vec3 rgbSplit(sampler2D tex, vec2 uv, float amount) {
-                    float r = texture2D(tex, uv + vec2(amount, 0.0)).r;
-                    float g = texture2D(tex, uv).g;
-                    float b = texture2D(tex, uv - vec2(amount, 0.0)).b;
-                    return vec3(r, g, b);
-                }
-                
-                void main(){
-                    vec2 screenPos = vUv * u_resolution;
-                    
-                    // Apply RGB split
-                    vec3 color = rgbSplit(tDiffuse, vUv, u_rgb_split);
-                    
-                    // Apply dithering
-                    if (u_dither_strength > 0.0) {
-                        color = dither(color, screenPos);
-                    }
-                    
-                    gl_FragColor = vec4(color, 1.0);
-                }
-            `
-        };
+    renderBootFrame() {
+        this.bootMaterial.uniforms.u_boot_time.value = performance.now() / 1000;
+        this.renderer.setRenderTarget(null);
+        this.renderer.render(this.bootScene, this.camera);
+    }
 
-        
-        this.postEffectsPass = new ShaderPass(PostEffectsShader);
-        this.postEffectsPass.uniforms.u_resolution.value.set(renderW, renderH);
-        this.composer.addPass(this.postEffectsPass);
-
-        this.colorGradingPass = new ShaderPass(ColorGradingShader);
-        this.colorGradingPass.uniforms.u_resolution.value.set(renderW, renderH);
-        this.composer.addPass(this.colorGradingPass);
-
-        this.edgePass = new ShaderPass(EdgeDetectionShader);
-        this.edgePass.uniforms.u_resolution.value.set(renderW, renderH);
-        this.composer.addPass(this.edgePass);
-
-        this.bloomPass = new UnrealBloomPass(new THREE.Vector2(renderW, renderH), 0.0, 0.4, 0.85);
-        this.composer.addPass(this.bloomPass);
-
-        // Store params for UI binding
-        this.bloomParams = { strength: 0.0, radius: 0.4, threshold: 0.85 };
-        this.normalsParams = { strength: 0.0, blend: 0.3, roughness: 0.3, F0: 0.04, diffuseScale: 0.8, specularScale: 0.2 };
-        this.edgeParams = { strength: 0.0, threshold: 0.1, colorR: 1.0, colorG: 1.0, colorB: 1.0, sharpenStrength: 0.0 };
-        this.postEffectsParams = { ditherStrength: 0.25, ditherScale: 1.0, rgbSplit: 0.0 };
-        this.colorParams = { 
-            contrast: 1.0, saturation: 1.0, brightness: 0.0, gamma: 1.0, hueShift: 0.0,
-            solarizeMix: 0.0, solarizeLightThresh: 0.5, solarizeLightSoft: 0.0, 
-            solarizeDarkThresh: 0.5, solarizeDarkSoft: 0.0, 
-            borderThickness: 0.0, borderColor: new THREE.Vector3(1.0, 1.0, 1.0) 
+    // Variant fields of the current uniforms; overrides (uniform name -> value) stand in for some of them
+    getVariantState(overrides = {}) {
+        const value = (name) => overrides[name] ?? this.uniforms[name].value;
+        return {
+            shapeType: Math.floor(value('u_shape_type')),
+            shapeMode: Math.floor(value('u_shape_mode')),
+            displacementAmp: value('u_displacement_amp'),
+            displacementType: Math.floor(value('u_displacement_type')),
+            sdfEffectType: Math.floor(value('u_sdf_effect_type')),
+            colorType: Math.floor(value('u_color_type')),
+            fogEnabled: value('u_fog_enabled'),
+            crunchType: Math.floor(value('u_crunch_type')),
+            quality: this.quality,
+            noiseVolume: this.noiseVolume
         };
     }
 
+    // Resolves once the variant is swapped in (or superseded). The current variant, or before the
+    // first one the placeholder frame, keeps drawing until the new program has linked.
     rebuildMaterial(force = false) {
-        const state = {
-            shapeType: Math.floor(this.uniforms.u_shape_type.value),
-            shapeMode: Math.floor(this.uniforms.u_shape_mode.value),
-            displacementAmp: this.uniforms.u_displacement_amp.value,
-            displacementType: Math.floor(this.uniforms.u_displacement_type.value),
-            sdfEffectType: Math.floor(this.uniforms.u_sdf_effect_type.value),
-            colorType: Math.floor(this.uniforms.u_color_type.value),
-            fogEnabled: this.uniforms.u_fog_enabled.value,
-            crunchType: Math.floor(this.uniforms.u_crunch_type.value)
-        };
+        const state = this.getVariantState();
 
-        const stateKey = JSON.stringify(state);
-        if (!force && this.lastShaderState === stateKey) return;
+        const stateKey = ShaderAssembler.getVariantKey(state);
+        if (!force && this.lastShaderState === stateKey) return Promise.resolve();
+        this.lastShaderState = stateKey;
 
-        const newFrag = ShaderAssembler.build(state);
-        
-        if (!this.material) {
-            this.material = new THREE.RawShaderMaterial({
-                uniforms: this.uniforms,
-                vertexShader: vertexShader,
-                fragmentShader: newFrag,
-                glslVersion: THREE.GLSL3
-            });
+        return this.shaderCache.request(state).then((entry) => {
+            if (this.lastShaderState !== stateKey) return; // superseded by a newer switch
+            this.variantState = state;
+            this.setMaterial(entry.material);
+            console.log("Built Shader:", state);
+            this.shaderCache.prewarmNeighbours(state);
+        }).catch(err => console.error('❌ Shader variant failed to compile:', err));
+    }
+
+    // Switches straight to a linked cache entry (setlists warm theirs ahead of time)
+    showVariant(entry) {
+        this.lastShaderState = entry.key;
+        this.variantState = entry.state;
+        this.setMaterial(entry.material);
+    }
+
+    setMaterial(material) {
+        this.material = material;
+        if (!this.mesh) {
             this.mesh = new THREE.Mesh(new THREE.PlaneGeometry(2,2), this.material);
+            this.uniformBlocks.attach(this.mesh, this.sceneBlocks);
             this.scene.add(this.mesh);
         } else {
-            this.material.fragmentShader = newFrag;
-            this.material.needsUpdate = true;
+            this.mesh.material = this.material;
         }
-        this.lastShaderState = stateKey;
-        console.log("Built Shader:", state);
     }
 
     onResize() {
+        // In a render worker the host owns the layout (window size, gallery mode) and answers
+        // with a new viewport or gallery-mode sizes
+        if (this.worker) {
+            this.onLayout?.();
+            return;
+        }
+        this.viewport = ShaderScene.windowViewport();
+
         // Check for gallery mode first
-        if (this.gallery.galleryMode.enabled) {
+        if (this.gallery?.galleryMode.enabled) {
             this.gallery.applyGalleryMode();
             return;
         }
+        this.resizeToViewport();
+    }
 
+    resizeToViewport() {
         // --- calculate scaled render size ---
         // Direct scaling - no artificial caps, allows supersampling when resolutionScale > 1.0
-        this.renderWidth = Math.floor(window.innerWidth * this.resolutionScale);
-        this.renderHeight = Math.floor(window.innerHeight * this.resolutionScale);
+        const scale = this.getRenderScale();
+        const { width, height, pixelRatio } = this.viewport;
 
-        // --- renderer / composer ---
-        this.renderer.setSize(window.innerWidth, window.innerHeight);
-        this.renderer.setPixelRatio(Math.min(window.devicePixelRatio, 2));
-        this.composer.setSize(this.renderWidth, this.renderHeight);
+        // --- renderer ---
+        this.setCanvasSize(width, height);
+        this.renderer.setPixelRatio(Math.min(pixelRatio, 2));
+        this.setRenderSize(width * scale, height * scale);
 
-        // --- base uniforms (used in raymarch + UV shaders) ---
-        if (this.uniforms?.u_resolution) {
-            this.uniforms.u_resolution.value.set(this.renderWidth, this.renderHeight);
+        // --- re-render immediately after resize to prevent black frame ---
+        this.redraw();
+    }
+
+    // Drawing-buffer size in CSS pixels. An OffscreenCanvas has no style to update; the host sizes
+    // the page's canvas element itself.
+    setCanvasSize(width, height) {
+        this.renderer.setSize(width, height, !this.worker);
+    }
+
+    // Draws the current frame again right away (after a resize or a preset, instead of a black or stale frame)
+    redraw() {
+        if (!this.isReady) {
+            this.renderBootFrame();
+            return;
         }
+        this.renderer.setRenderTarget(null);
+        this.postGraph.update();
+        this.composer.render();
+    }
+
+    // --- RENDER TARGETS ---
+    // Single entry point for render-size changes (window resize, gallery mode, screenshots, governor).
+    // Every target goes through the pool, so switching back to a previous size reuses its textures.
+    // resizeFeedback: false keeps the ping-pong targets (and their history) as they are, for one-off
+    // renders like screenshots; they're sampled by normalized uv so any size works.
+    setRenderSize(width, height, { resizeFeedback = true } = {}) {
+        const w = Math.max(1, Math.floor(width));
+        const h = Math.max(1, Math.floor(height));
+        this.renderWidth = w;
+        this.renderHeight = h;
+
+        // --- base uniforms (used in raymarch + UV shaders) ---
+        this.uniforms.u_resolution.value.set(w, h);
 
-        // --- normals / edge passes ---
-        if (this.normalsPass?.uniforms?.u_resolution) {
-            this.normalsPass.uniforms.u_resolution.value.set(this.renderWidth, this.renderHeight);
+        // --- post passes that sample neighbours ---
+        [this.normalsPass, this.edgePass, this.colorGradingPass].forEach(pass => {
+            pass?.uniforms?.u_resolution?.value.set(w, h);
+        });
+
+        if (resizeFeedback) this.resizeFeedbackTargets(w, h);
+        this.resizeComposer(w, h);
+    }
+
+    resizeFeedbackTargets(w, h) {
+        // --- UV feedback ping-pong targets ---
+        const rtOpts = this.feedbackTargetOptions;
+        this.uvFeedbackTarget = this.targets.resize(this.uvFeedbackTarget, 'uvFeedback', w, h, rtOpts);
+        this.tempUvTarget = this.targets.resize(this.tempUvTarget, 'uvFeedbackTemp', w, h, rtOpts);
+        this.uniforms.u_uv_feedback.value = this.uvFeedbackTarget.texture;
+
+        // --- feedback targets (raymarch feedback, only while allocated) ---
+        this.uniforms.u_history_valid.value = 0; // reprojection can't use a resized history
+        if (this.feedbackTarget) {
+            this.feedbackTarget = this.targets.resize(this.feedbackTarget, 'feedback', w, h, rtOpts);
+            this.tempTarget = this.targets.resize(this.tempTarget, 'feedbackTemp', w, h, rtOpts);
+            this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture;
         }
+    }
+
+    resizeComposer(w, h) {
+        const composer = this.composer;
+        if (!composer) return; // PostChain.attach sizes it
+        // EffectComposer has no public hook for swapping its buffers; mirror what setSize() does
+        const pr = composer._pixelRatio;
+        const cw = Math.floor(w * pr);
+        const ch = Math.floor(h * pr);
+        const opts = { type: THREE.HalfFloatType };
+
+        composer.renderTarget1 = this.targets.resize(composer.renderTarget1, 'composer.1', cw, ch, opts);
+        composer.renderTarget2 = this.targets.resize(composer.renderTarget2, 'composer.2', cw, ch, opts);
+        composer.writeBuffer = composer.renderTarget1;
+        composer.readBuffer = composer.renderTarget2;
+        composer._width = w;
+        composer._height = h;
+
+        composer.passes.forEach(pass => {
+            if (pass !== this.bloomPass) pass.setSize(cw, ch);
+        });
 
-        if (this.edgePass?.uniforms?.u_resolution) {
-            this.edgePass.uniforms.u_resolution.value.set(this.renderWidth, this.renderHeight);
+        this.bloomSize = null; // force syncOptionalTargets to re-size bloom
+        this.syncOptionalTargets();
+    }
+
+    // Allocates targets for optional stages only while they're in use
+    syncOptionalTargets() {
+        // Raymarch feedback ping-pong: needed while feedback is visible or as checkerboard history
+        const feedbackOn = this.uniforms.u_feedback_opacity.value > 0 || this.checkerboard;
+        if (feedbackOn && !this.feedbackTarget) {
+            const rtOpts = this.feedbackTargetOptions;
+            // Match the UV targets, which always carry the current ping-pong size
+            const { width, height } = this.uvFeedbackTarget;
+            this.feedbackTarget = this.targets.acquire('feedback', width, height, rtOpts);
+            this.tempTarget = this.targets.acquire('feedbackTemp', width, height, rtOpts);
+            this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture;
+            this.uniforms.u_history_valid.value = 0;
+        } else if (!feedbackOn && this.feedbackTarget) {
+            // Back to the pool; the '1' key briefly zeroes opacity, so they're reused on release
+            this.targets.release(this.feedbackTarget, 'feedback');
+            this.targets.release(this.tempTarget, 'feedbackTemp');
+            this.feedbackTarget = null;
+            this.tempTarget = null;
+            this.uniforms.u_feedback_texture.value = null;
         }
 
-        // --- bloom ---
-        if (this.bloomPass?.setSize) {
-            this.bloomPass.setSize(this.renderWidth, this.renderHeight);
+        // Bloom mips: shrink to 1x1 while strength is 0 (the frame graph culls the pass then)
+        if (this.bloomPass) {
+            const bloomOn = this.bloomPass.strength > 0;
+            const bw = bloomOn ? this.renderWidth : 1;
+            const bh = bloomOn ? this.renderHeight : 1;
+            if (!this.bloomSize || this.bloomSize.w !== bw || this.bloomSize.h !== bh) {
+                this.bloomPass.setSize(bw, bh);
+                this.bloomSize = { w: bw, h: bh };
+            }
         }
+    }
 
-        // --- feedback targets (raymarch feedback) ---
-        if (this.feedbackTarget) {
-            this.feedbackTarget.setSize(this.renderWidth, this.renderHeight);
+    // --- ACTIONS & HELPERS ---
+    // Operator resolution scale, reduced by the performance governor when over budget
+    getRenderScale() {
+        return this.resolutionScale * (this.governor?.renderScale ?? 1.0);
+    }
+
+    togglePause() { this.isPaused = !this.isPaused; }
+
+    toggleCheckerboard() {
+        this.checkerboard = !this.checkerboard;
+        this.uniforms.u_checkerboard.value = this.checkerboard ? 1 : 0;
+        this.uniforms.u_history_valid.value = 0; // history alpha isn't depth until a full frame is traced
+        console.log(`%c[CHECKERBOARD] %c${this.checkerboard ? 'ON 🟢' : 'OFF ⚪'}`, 'color:#00ffff; font-weight:bold;', 'color:white;');
+    }
+    
+    // Switches both programs to another tier's loop caps
+    async setQuality(tier) {
+        if (!ShaderAssembler.TIERS.includes(tier)) {
+            console.warn(`⚠️ Unknown quality tier '${tier}' (${ShaderAssembler.TIERS.join(', ')})`);
+            return;
         }
-        if (this.tempTarget) {
-            this.tempTarget.setSize(this.renderWidth, this.renderHeight);
+        this.quality = tier;
+        this.ui?.showQuality(tier);
+        if (await this.switchPrograms()) {
+            console.log(`%c[QUALITY] %c${tier.toUpperCase()}`, 'color:#00ffff; font-weight:bold;', 'color:white;');
         }
+    }
 
-        // --- UV feedback ping-pong targets ---
-        if (this.uvFeedbackTarget) {
-            this.uvFeedbackTarget.setSize(this.renderWidth, this.renderHeight);
+    // Both programs sample the baked noise volume of a seed instead of computing snoise(). Switching
+    // on waits for the seed's bake the first time; the procedural programs draw until then.
+    async setNoiseVolume(on, seed = this.noiseSeed) {
+        const request = ++this.noiseRequest;
+        if (on) {
+            let texture;
+            try {
+                texture = await (await this.load('noiseBaker')).bake(seed);
+            } catch (err) {
+                console.error('❌ Noise volume bake failed, keeping procedural noise:', err);
+                return;
+            }
+            if (request !== this.noiseRequest) return; // superseded while baking
+            this.uniforms.u_noise_volume.value = texture;
+            this.noiseSeed = seed;
         }
-        if (this.tempUvTarget) {
-            this.tempUvTarget.setSize(this.renderWidth, this.renderHeight);
+        this.noiseVolume = on;
+        if (await this.switchPrograms()) {
+            const size = this.noiseBaker?.size;
+            console.log(`%c[NOISE VOLUME] %c${on ? `ON 🟢 ${size}³, seed ${seed}` : 'OFF ⚪'}`, 'color:#00ffff; font-weight:bold;', 'color:white;');
         }
+    }
 
-        // --- UV feedback shader uniform ---
-        if (this.uvFeedbackMaterial?.uniforms?.u_resolution) {
-            this.uvFeedbackMaterial.uniforms.u_resolution.value.set(this.renderWidth, this.renderHeight);
+    toggleNoiseVolume() {
+        return this.setNoiseVolume(!this.noiseVolume);
+    }
+
+    // Rebuilds the raymarcher and links the matching UV feedback material for the current tier and
+    // noise source. The raymarcher goes through the variant cache like any rebuild; the current
+    // programs keep drawing until the new ones have linked. False if a newer switch superseded it.
+    async switchPrograms() {
+        const tier = this.quality;
+        const noiseVolume = this.noiseVolume;
+        this.rebuildMaterial();
+
+        const material = this.uvFeedbackMaterialFor(tier, noiseVolume);
+        const compileScene = new THREE.Scene();
+        compileScene.add(new THREE.Mesh(this.uvFeedbackMesh.geometry, material));
+        await Promise.all([
+            this.shaderCache.request(this.getVariantState()),
+            this.compileScene(compileScene, `uvFeedback ${tier}${noiseVolume ? ' noise' : ''}`)
+        ]);
+        this.uniformBlocks.bindPrograms(material);
+        if (this.quality !== tier || this.noiseVolume !== noiseVolume) return false;
+        this.uvFeedbackMaterial = material;
+        this.uvFeedbackMesh.material = material;
+        return true;
+    }
+
+    // Links a scene's programs, without blocking where KHR_parallel_shader_compile is available;
+    // with a label the link goes into the compile trace (ShaderCache.spans)
+    async compileScene(scene, label = null) {
+        const t0 = performance.now();
+        if (this.renderer.compileAsync) await this.renderer.compileAsync(scene, this.camera);
+        else this.renderer.compile(scene, this.camera);
+        if (label) this.shaderCache.traceSpan(`link ${label}`, t0, performance.now() - t0);
+    }
+
+    toggleBounds() {
+        this.bounds = !this.bounds;
+        console.log(`%c[BOUNDS] %c${this.bounds ? 'ON 🟢' : 'OFF ⚪'}`, 'color:#00ffff; font-weight:bold;', 'color:white;');
+    }
+
+    cycleConePrepass() {
+        const tiles = ShaderScene.CONE_PREPASS_TILES;
+        this.conePrepass = tiles[(tiles.indexOf(this.conePrepass) + 1) % tiles.length];
+        console.log(`%c[CONE PREPASS] %c${this.conePrepass ? `1/${this.conePrepass} 🟢` : 'OFF ⚪'}`, 'color:#00ffff; font-weight:bold;', 'color:white;');
+    }
+
+    // Average and peak map() evaluations per pixel (primary plus shadow rays) of the current
+    // variant under the current skipping settings, traced at 1/4 resolution. Toggle bounds and
+    // the cone prepass between calls to A/B them; frame time comes from the governor.
+    async measureSteps() {
+        const state = { ...this.variantState, pass: 'steps' };
+        const entry = await this.shaderCache.request(state);
+        const gl = this.renderer.getContext();
+        const w = Math.max(1, Math.ceil(this.renderWidth / 4));
+        const h = Math.max(1, Math.ceil(this.renderHeight / 4));
+        const target = this.targets.acquire('stepCount', w, h, {
+            type: THREE.FloatType, minFilter: THREE.NearestFilter, magFilter: THREE.NearestFilter, depthBuffer: false
+        });
+
+        // Every pixel traced: checkerboard pixels reusing history would report no steps
+        const checkerboard = this.uniforms.u_checkerboard.value;
+        this.uniforms.u_checkerboard.value = 0;
+        this.renderAuxiliary(entry.material, target);
+        this.uniforms.u_checkerboard.value = checkerboard;
+
+        this.readback ??= new AsyncReadback(gl);
+        this.renderer.setRenderTarget(target);
+        const pending = this.readback.read(0, 0, w, h, gl.FLOAT);
+        this.renderer.setRenderTarget(null);
+        this.targets.release(target, 'stepCount');
+        const pixels = await pending;
+
+        let sum = 0;
+        let max = 0;
+        for (let i = 0; i < pixels.length; i += 4) {
+            sum += pixels[i];
+            max = Math.max(max, pixels[i]);
         }
+        const { frameMs, gpuMs } = this.governor.getStats();
+        const result = {
+            key: this.lastShaderState,
+            bounds: this.bounds && ShaderAssembler.hasBounds(this.variantState),
+            conePrepass: this.uniforms.u_cone_texel.value.x > 0 ? this.conePrepass : 0,
+            averageSteps: sum / (w * h),
+            maxSteps: max,
+            frameMs,
+            gpuMs
+        };
+        console.log(`👣 Steps ${result.key}: avg ${result.averageSteps.toFixed(1)}, max ${max} (bounds ${result.bounds ? 'on' : 'off'}, cone prepass ${result.conePrepass ? `1/${result.conePrepass}` : 'off'}, ${frameMs?.toFixed(2) ?? '-'}ms/frame)`);
+        return result;
+    }
+
+    // Gallery mode delegation to GalleryManager
+    toggleGalleryMode() { this.load('gallery').then(gallery => gallery.toggleGalleryMode()); }
+
+    // Full-resolution still of the current frame over black, as a JPEG blob
+    async captureScreenshot() {
+        const originalWidth = this.renderWidth;
+        const originalHeight = this.renderHeight;
 
-        // --- color grading (optional, but helps normalize aspect) ---
-        if (this.colorGradingPass?.uniforms?.u_resolution) {
-            this.colorGradingPass.uniforms.u_resolution.value.set(this.renderWidth, this.renderHeight);
+        // Temporarily set to full resolution (pooled, so the restore below reuses the current targets)
+        this.setRenderSize(this.viewport.width, this.viewport.height, { resizeFeedback: false });
+
+        if (this.feedbackTarget) {
+            this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture;
+            this.renderer.setRenderTarget(this.tempTarget);
+            this.renderer.render(this.scene, this.camera);
         }
 
-        // --- re-render immediately after resize to prevent black frame ---
         this.renderer.setRenderTarget(null);
         this.composer.render();
-    }
 
-    // --- ACTIONS & HELPERS ---
-    togglePause() { this.isPaused = !this.isPaused; }
-    
-    // Gallery mode delegation to GalleryManager
-    toggleGalleryMode() { this.gallery.toggleGalleryMode(); }
+        // Copy onto black while the drawing buffer still holds the frame (works on and off the main thread)
+        const canvas = this.renderer.domElement;
+        const still = new OffscreenCanvas(canvas.width, canvas.height);
+        const ctx = still.getContext('2d');
+        ctx.fillStyle = '#000000';
+        ctx.fillRect(0, 0, still.width, still.height);
+        ctx.drawImage(canvas, 0, 0);
+
+        // Restore original resolution
+        this.setRenderSize(originalWidth, originalHeight, { resizeFeedback: false });
+        return still.convertToBlob({ type: 'image/jpeg', quality: 1.0 });
+    }
 
     debugInfo(deltaTime) {
-        const q = (id) => document.getElementById(id);
-        const fps = q('fps'), css = q('cssSize'), win = q('windowSize'), pr = q('pixelRatio');
-        const phys = q('physicalSize'), dt = q('deltaTime'), rend = q('renderDims');
-        const mem = q('gpuMemory'), progs = q('gpuPrograms');
-
-        if (fps) fps.textContent = this.fps;
-        if (css) css.textContent = `${window.screen.width}x${window.screen.height}`;
-        if (win) win.textContent = `${window.innerWidth}x${window.innerHeight}`;
-        if (pr) pr.textContent = window.devicePixelRatio.toFixed(1);
-        if (phys) phys.textContent = `${window.screen.width * window.devicePixelRatio}x${window.screen.height * window.devicePixelRatio}`;
-        if (dt) dt.textContent = `${(deltaTime * 1000).toFixed(1)}ms`;
-        if (rend) rend.textContent = `${this.renderWidth}x${this.renderHeight}`;
-        if (mem) mem.textContent = `${this.renderer.info.memory.geometries}g, ${this.renderer.info.memory.textures}t`;
-        if (progs) progs.textContent = this.renderer.info.programs?.length || 'unknown';
+        const memory = this.renderer.info.memory;
+        const g = this.governor.getStats();
+        const stats = {
+            fps: this.fps,
+            deltaTime,
+            renderWidth: this.renderWidth,
+            renderHeight: this.renderHeight,
+            geometries: memory.geometries,
+            textures: memory.textures,
+            targetBytes: this.targets.getStats().liveBytes,
+            programs: this.renderer.info.programs?.length,
+            gpu: { enabled: g.enabled, gpuMs: g.gpuMs, level: g.level },
+            governorScale: this.governor.renderScale ?? 1.0
+        };
+        // The info panel is on the main thread either way
+        if (this.worker) this.onStats?.(stats);
+        else this.ui.showStats(stats);
     }
 
     // --- MAIN LOOP ---
     animate() {
         requestAnimationFrame(() => this.animate());
+        if (this.offline) return; // the offline renderer drives frames itself
+
+        // Queued parameter changes land once per tick, paused or not
+        this.params.flush();
+        if (!this.isReady) {
+            this.renderBootFrame(); // start() is still linking
+            return;
+        }
         if (this.isPaused) return;
 
         const now = performance.now();
@@ -886,11 +716,28 @@ export class ShaderScene {
         if (now - this.lastTime >= 1000) {
             this.fps = this.frameCount;
             this.debugInfo(deltaTime);
+            this.targets.trim(now); // dispose pooled targets idle past their TTL
             this.frameCount = 0;
             this.lastTime = now;
         }
         this.frameCount++;
 
+        this.setlist?.step(); // before physics, which reads the spin/drift targets a fade moves
+        this.stepPhysics(deltaTime);
+
+        this.governor.beginFrame();
+        this.profiler?.beginFrame();
+        this.renderFrame();
+        this.exporter?.captureFrame(now); // while the canvas still holds this frame
+
+        // 9. Frame cost feedback (adjusts render scale / step budget for the next frames)
+        this.profiler?.endFrame(now);
+        this.governor.endFrame(deltaTime);
+    }
+
+    // Advances every time integrator by deltaTime seconds. Kept free of wall-clock reads so a fixed
+    // timestep (OfflineRenderer) reproduces the same motion frame for frame.
+    stepPhysics(deltaTime) {
         // Global Time
         this.time += deltaTime * this.speed * 5.0;
         this.uniforms.u_time.value = this.time;
@@ -946,149 +793,196 @@ export class ShaderScene {
         this.fogVel += (targetFogVel - this.fogVel) * 0.5;
         this.fogTime += this.fogVel * deltaTime * s;
         this.uniforms.u_turb_time.value = this.fogTime;
+    }
+
+    renderFrame() {
+        this.renderUvFeedback();
+
+        // 6a. Optional UV Debug Visualization
+        if (this.debugUvFeedback) {
+            // Render UV feedback directly to screen and skip everything else
+            this.renderer.render(this.uvFeedbackScene, this.camera);
+            return; // skip rest of pipeline
+        }
+
+        this.renderMain();
+    }
 
+    renderUvFeedback() {
         // 6. UV Feedback Pass
+        this.profiler?.begin('uvFeedback');
         this.uvFeedbackMaterial.uniforms.u_feedback_uv.value = this.uvFeedbackTarget.texture;
-        this.uvFeedbackMaterial.uniforms.u_warp_amplitude.value = this.uniforms.u_warp_amplitude.value;
-        this.uvFeedbackMaterial.uniforms.u_polarize.value = this.uniforms.u_polarize.value;
-        this.uvFeedbackMaterial.uniforms.u_lens_distort.value = this.uniforms.u_lens_distort.value;
-        this.uvFeedbackMaterial.uniforms.u_bloat_strength.value = this.uniforms.u_bloat_strength.value;
         this.renderer.setRenderTarget(this.tempUvTarget);
         this.renderer.render(this.uvFeedbackScene, this.camera);
         this.renderer.setRenderTarget(null);
+        this.profiler?.end();
         
         // Ping-pong UV
         const tmpUv = this.uvFeedbackTarget;
         this.uvFeedbackTarget = this.tempUvTarget;
         this.tempUvTarget = tmpUv;
         this.uniforms.u_uv_feedback.value = this.uvFeedbackTarget.texture;
+    }
 
-        // 6a. Optional UV Debug Visualization
-        if (this.debugUvFeedback) {
-            // Render UV feedback directly to screen and skip everything else
-            this.renderer.render(this.uvFeedbackScene, this.camera);
-            return; // skip rest of pipeline
-        }
-
+    renderMain() {
         // 7. Main Raymarch (to Feedback Buffer)
-        // Use the current feedback texture BEFORE rendering
-        this.renderer.setRenderTarget(this.tempTarget);
-        this.renderer.render(this.scene, this.camera);
-        this.renderer.setRenderTarget(null);
-        
-        // Ping-pong Main - swap AFTER rendering
-        const tmpMain = this.feedbackTarget;
-        this.feedbackTarget = this.tempTarget;
-        this.tempTarget = tmpMain;
-        
-        // Update the uniform to point to the newly rendered texture
-        this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture;
+        // Only needed while feedback or checkerboard is on; otherwise the composer's RenderPass is the only raymarch
+        const u = this.uniforms;
+        u.u_checkerboard.value = this.checkerboard ? 1 : 0;
+        u.u_bounds.value = this.bounds ? 1 : 0;
+        this.renderConePrepass();
+        this.syncOptionalTargets();
+        if (this.feedbackTarget) {
+            // Last frame's UV field is still in the temp target after the ping-pong above
+            u.u_prev_uv_feedback.value = this.tempUvTarget.texture;
+
+            // Use the current feedback texture BEFORE rendering
+            this.profiler?.begin('raymarch');
+            this.renderer.setRenderTarget(this.tempTarget);
+            this.renderer.render(this.scene, this.camera);
+            this.renderer.setRenderTarget(null);
+            this.profiler?.end();
+            
+            // Ping-pong Main - swap AFTER rendering
+            const tmpMain = this.feedbackTarget;
+            this.feedbackTarget = this.tempTarget;
+            this.tempTarget = tmpMain;
+            
+            // Update the uniform to point to the newly rendered texture
+            this.uniforms.u_feedback_texture.value = this.feedbackTarget.texture;
+
+            // Next frame traces the other half, reprojecting against this camera
+            u.u_frame_parity.value ^= 1;
+            u.u_history_valid.value = this.checkerboard ? 1 : 0;
+            u.u_prev_camera.value.set(u.u_camera_theta.value, u.u_camera_phi.value, u.u_camera_distance.value);
+        }
         
         // 8. Composer Render (Bloom, etc)
+        this.renderPass.enabled = !this.checkerboard;
+        this.historyPass.enabled = this.checkerboard;
+        if (this.checkerboard) this.historyPass.uniforms.tHistory.value = this.feedbackTarget.texture;
+        this.setlist?.renderOutgoing();
+        this.postGraph.update();
+        this.profiler?.instrument(this.composer.passes);
         this.composer.render();
     }
 
-    setupImageDragDrop() {
-        const canvas = this.canvas;
-        
-        // Setup file input and prompt click handler
-        const fileInput = document.getElementById('imageFileInput');
-        const imagePrompt = document.getElementById('imageUploadPrompt');
-        
-        if (imagePrompt && fileInput) {
-            imagePrompt.addEventListener('click', () => {
-                fileInput.click();
-            });
+    // Low-resolution cone march of the current variant into u_cone_depth; the raymarch passes start
+    // their rays from it. Until the prepass program has linked they march from the camera.
+    renderConePrepass() {
+        const u = this.uniforms;
+        const tile = this.conePrepass;
+        if (!tile || !this.variantState || !ShaderAssembler.supportsConePrepass(this.variantState)) {
+            u.u_cone_texel.value.set(0, 0);
+            u.u_cone_depth.value = null;
+            this.targets.release(this.coneTarget, 'conePrepass');
+            this.coneTarget = null;
+            return;
         }
-        
-        if (fileInput) {
-            fileInput.addEventListener('change', (e) => {
-                const file = e.target.files[0];
-                if (file && file.type.startsWith('image/')) {
-                    this.loadImageFile(file);
-                }
-                // Reset input so same file can be selected again
-                fileInput.value = '';
-            });
+
+        const state = { ...this.variantState, pass: 'cone' };
+        const key = ShaderAssembler.getVariantKey(state);
+        if (this.coneKey !== key || (this.coneEntry && !this.shaderCache.entries.has(key))) {
+            this.coneKey = key;
+            this.coneEntry = null;
+            this.shaderCache.request(state).then((entry) => {
+                if (this.coneKey === key) this.coneEntry = entry;
+            }).catch(err => console.error('❌ Cone prepass variant failed to compile:', err));
         }
-        
-        // Prevent default drag behaviors
-        ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
-            canvas.addEventListener(eventName, (e) => {
-                e.preventDefault();
-                e.stopPropagation();
-            });
-        });
-        
-        // Visual feedback on drag
-        canvas.addEventListener('dragenter', () => {
-            canvas.style.opacity = '0.5';
+        if (!this.coneEntry) {
+            u.u_cone_texel.value.set(0, 0);
+            return;
+        }
+
+        const w = Math.max(1, Math.ceil(this.renderWidth / tile));
+        const h = Math.max(1, Math.ceil(this.renderHeight / tile));
+        this.coneTarget = this.targets.resize(this.coneTarget, 'conePrepass', w, h, {
+            type: THREE.HalfFloatType, minFilter: THREE.NearestFilter, magFilter: THREE.NearestFilter, depthBuffer: false
         });
-        
-        canvas.addEventListener('dragleave', () => {
-            canvas.style.opacity = '1.0';
+        u.u_cone_texel.value.set(1 / w, 1 / h);
+
+        this.profiler?.begin('conePrepass');
+        this.renderAuxiliary(this.coneEntry.material, this.coneTarget);
+        this.profiler?.end();
+        u.u_cone_depth.value = this.coneTarget.texture;
+    }
+
+    // Draws one of the current variant's auxiliary programs (cone prepass, step counter) into a target
+    renderAuxiliary(material, target) {
+        if (!this.auxScene) {
+            this.auxScene = new THREE.Scene();
+            this.auxMesh = new THREE.Mesh(new THREE.PlaneGeometry(2, 2), material);
+            this.uniformBlocks.attach(this.auxMesh, this.sceneBlocks);
+            this.auxScene.add(this.auxMesh);
+        }
+        this.auxMesh.material = material;
+        this.renderer.setRenderTarget(target);
+        this.renderer.render(this.auxScene, this.camera);
+        this.renderer.setRenderTarget(null);
+    }
+
+    // Integrator state behind the time-driven uniforms (see stepPhysics)
+    getPhysicsState() {
+        return structuredClone({
+            time: this.time,
+            rotAngle: this.rotAngle, rotAngularVel: this.rotAngularVel,
+            fractalRotAngle: this.fractalRotAngle, fractalRotAngularVel: this.fractalRotAngularVel,
+            driftOffset: this.driftOffset, driftVel: this.driftVel,
+            halvingPhase: this.halvingPhase, halvingVel: this.halvingVel,
+            fogTime: this.fogTime, fogVel: this.fogVel
         });
-        
-        canvas.addEventListener('drop', (e) => {
-            canvas.style.opacity = '1.0';
-            
-            const files = e.dataTransfer.files;
-            if (files.length > 0) {
-                const file = files[0];
-                
-                // Check if it's an image
-                if (file.type.startsWith('image/')) {
-                    this.loadImageFile(file);
-                } else {
-                    console.warn('⚠️ Please drop an image file');
-                }
-            }
+    }
+
+    setPhysicsState(state) {
+        Object.assign(this, structuredClone(state));
+    }
+
+    // Clears every frame-to-frame history buffer, so a render doesn't depend on what ran before it
+    resetHistory() {
+        [this.uvFeedbackTarget, this.tempUvTarget, this.feedbackTarget, this.tempTarget].forEach(target => {
+            if (!target) return;
+            this.renderer.setRenderTarget(target);
+            this.renderer.clear();
         });
+        this.renderer.setRenderTarget(null);
+        this.uniforms.u_history_valid.value = 0;
+        this.uniforms.u_frame_parity.value = 0;
     }
-    
+
     loadImageFile(file) {
         const reader = new FileReader();
         
         reader.onload = (event) => {
             const img = new Image();
             img.onload = () => {
-                // Create a THREE.js texture from the image
-                const texture = new THREE.Texture(img);
-                texture.needsUpdate = true;
-                texture.minFilter = THREE.LinearFilter;
-                texture.magFilter = THREE.LinearFilter;
-                texture.wrapS = THREE.ClampToEdgeWrapping;
-                texture.wrapT = THREE.ClampToEdgeWrapping;
-                
-                // Calculate and store image aspect ratio
-                const imageAspect = img.width / img.height;
-                
-                // Update the uniforms
-                this.uniforms.u_image_texture.value = texture;
-                this.uniforms.u_image_aspect.value = imageAspect;
-                this.uniforms.u_image_opacity.value = 1.0; // make image visible
-                
-                // Switch to image mode (mode 5)
-                this.uniforms.u_shape_mode.value = 5;
-                this.rebuildMaterial();
+                this.setImage(img);
                 
-                // Update UI buttons
-                const shapeBtns = document.querySelectorAll('.shape-tab');
-                shapeBtns.forEach(b => b.classList.remove('active'));
-                const imageBtn = document.getElementById('shapeImage');
-                if (imageBtn) imageBtn.classList.add('active');
+                // Switch to image mode (mode 5); the scheduler rebuilds and syncs it like any mode change
+                this.params.set('u_shape_mode', 5, { source: 'image' });
+                this.ui.showImageMode();
                 
-                // Show image controls and hide prompt
-                const imageControls = document.querySelector('.image-controls');
-                if (imageControls) imageControls.style.display = 'flex';
-                const imagePrompt = document.getElementById('imageUploadPrompt');
-                if (imagePrompt) imagePrompt.style.display = 'none';
-                
-                console.log(`✅ Image loaded: ${img.width}x${img.height}, aspect: ${imageAspect.toFixed(2)}`);
+                console.log(`✅ Image loaded: ${img.width}x${img.height}, aspect: ${this.uniforms.u_image_aspect.value.toFixed(2)}`);
             };
             img.src = event.target.result;
         };
         
         reader.readAsDataURL(file);
     }
+
+    // Puts a decoded image on the image uniforms: an <img>, or in a render worker an ImageBitmap
+    // the host decoded already flipped (WebGL ignores UNPACK_FLIP_Y for bitmaps)
+    setImage(image) {
+        const texture = new THREE.Texture(image);
+        texture.flipY = typeof ImageBitmap === 'undefined' || !(image instanceof ImageBitmap);
+        texture.needsUpdate = true;
+        texture.minFilter = THREE.LinearFilter;
+        texture.magFilter = THREE.LinearFilter;
+        texture.wrapS = THREE.ClampToEdgeWrapping;
+        texture.wrapT = THREE.ClampToEdgeWrapping;
+
+        this.uniforms.u_image_texture.value?.dispose();
+        this.uniforms.u_image_texture.value = texture;
+        this.uniforms.u_image_aspect.value = image.width / image.height;
+        this.uniforms.u_image_opacity.value = 1.0; // make image visible
+    }
 }
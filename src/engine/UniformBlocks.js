@@ -0,0 +1,183 @@
+import { GlslSymbols } from './GlslSymbols.js';
+
+// std140 uniform blocks behind the scene uniforms.
+// The GLSL declarations (COMMON_UNIFORMS, uvfeedback.glsl) are the source of truth: each block is
+// parsed back out of the shader source, laid out per std140 into a typed array, filled from the
+// scene's { value } objects right before a draw and uploaded with one bufferSubData if any word
+// changed. three.js only sees the uniforms left outside the blocks (samplers), so it no longer
+// walks ~90 gl.uniform* setters per program per draw.
+
+// Member size and alignment in 4-byte words
+const STD140 = {
+    float: [1, 1], int: [1, 1], bool: [1, 1],
+    vec2: [2, 2], ivec2: [2, 2],
+    vec3: [3, 4], ivec3: [3, 4],
+    vec4: [4, 4], ivec4: [4, 4]
+};
+const INTEGER = /^(int|ivec|bool)/;
+const PRECISION = /^(highp|mediump|lowp)$/;
+const BLOCK = /(?:layout\s*\(\s*std140\s*\)\s*)?uniform\s+([A-Za-z_]\w*)\s*\{([^}]*)\}\s*;/g;
+const AXES = ['x', 'y', 'z', 'w'];
+
+export class UniformBlock {
+    constructor(name, members, source) {
+        this.name = name;
+        this.source = source; // uniform name -> { value }, read on every pack so entries can be swapped
+        this.binding = -1;
+        this.buffer = null;
+        this.dirty = true;
+
+        let offset = 0;
+        this.members = members.map(({ type, name }) => {
+            const [size, align] = STD140[type];
+            offset = Math.ceil(offset / align) * align;
+            const member = { type, name, offset, size, integer: INTEGER.test(type) };
+            offset += size;
+            return member;
+        });
+
+        // Blocks are sized in whole vec4s
+        this.f32 = new Float32Array(Math.ceil(offset / 4) * 4);
+        this.i32 = new Int32Array(this.f32.buffer);
+    }
+
+    // Copies the current values in; returns true if anything changed since the last upload
+    pack() {
+        const { f32, i32 } = this;
+        let dirty = this.dirty;
+
+        for (const m of this.members) {
+            const value = this.source[m.name]?.value;
+            if (value === undefined || value === null) continue;
+
+            for (let c = 0; c < m.size; c++) {
+                const v = m.size === 1 ? value : (value[AXES[c]] ?? value[c]);
+                const o = m.offset + c;
+                if (m.integer) {
+                    const n = Number(v) | 0; // truncates like gl.uniform1i did
+                    if (i32[o] !== n) {
+                        i32[o] = n;
+                        dirty = true;
+                    }
+                } else {
+                    const f = Math.fround(v); // compare at storage precision, or 0.1 would always differ
+                    if (f32[o] !== f) {
+                        f32[o] = f;
+                        dirty = true;
+                    }
+                }
+            }
+        }
+
+        this.dirty = dirty;
+        return dirty;
+    }
+}
+
+export class UniformBlocks {
+    constructor(renderer) {
+        this.renderer = renderer;
+        this.gl = renderer.getContext();
+
+        // --- STATE ---
+        this.blocks = new Map();    // block name -> UniformBlock
+        this.bound = new WeakSet(); // three.js programs whose block indices are already bound
+        // Hand out binding points from the top, clear of the ones three.js gives UniformsGroups
+        this.nextBinding = this.gl.getParameter(this.gl.MAX_UNIFORM_BUFFER_BINDINGS) - 1;
+        this.stats = { uploads: 0, bytes: 0, skipped: 0 };
+    }
+
+    // Block declarations in a shader source: [{ name, members: [{ type, name }] }]
+    static parse(source) {
+        const blocks = [];
+        const text = GlslSymbols.stripComments(source);
+        for (const [, name, body] of text.matchAll(BLOCK)) {
+            const members = body.split(';').map(s => s.trim()).filter(Boolean).map(decl => {
+                const [type, member] = decl.split(/\s+/).filter(t => !PRECISION.test(t));
+                if (!STD140[type]) throw new Error(`Uniform block ${name}: unsupported member type '${type}'`);
+                return { type, name: member };
+            });
+            blocks.push({ name, members });
+        }
+        return blocks;
+    }
+
+    // Creates the GL buffer for every block declared in a shader source, filled from `uniforms`.
+    // Blocks are shared by name, so registering the same chunk twice returns the same blocks.
+    register(source, uniforms) {
+        const gl = this.gl;
+        return UniformBlocks.parse(source).map(({ name, members }) => {
+            if (this.blocks.has(name)) return this.blocks.get(name);
+
+            const block = new UniformBlock(name, members, uniforms);
+            const missing = block.members.filter(m => !(m.name in uniforms)).map(m => m.name);
+            if (missing.length) console.warn(`⚠️ Uniform block ${name} has no values for: ${missing.join(', ')}`);
+
+            block.binding = this.nextBinding--;
+            block.buffer = gl.createBuffer();
+            gl.bindBuffer(gl.UNIFORM_BUFFER, block.buffer);
+            gl.bufferData(gl.UNIFORM_BUFFER, block.f32.byteLength, gl.DYNAMIC_DRAW);
+            gl.bindBuffer(gl.UNIFORM_BUFFER, null);
+            gl.bindBufferBase(gl.UNIFORM_BUFFER, block.binding, block.buffer);
+
+            this.blocks.set(name, block);
+            return block;
+        });
+    }
+
+    // The uniforms three.js still has to set itself: samplers and anything outside the given blocks.
+    // Shares the { value } objects, so writes through either side land in the same place.
+    looseUniforms(uniforms, blocks) {
+        const packed = new Set(blocks.flatMap(b => b.members.map(m => m.name)));
+        return Object.fromEntries(Object.entries(uniforms).filter(([name]) => !packed.has(name)));
+    }
+
+    // Packs and uploads a mesh's blocks right before it draws, whichever pass or exporter renders it
+    attach(mesh, blocks) {
+        mesh.onBeforeRender = (renderer, scene, camera, geometry, material) => {
+            this.bindPrograms(material);
+            blocks.forEach(block => this.upload(block));
+        };
+    }
+
+    upload(block) {
+        if (!block.pack()) {
+            this.stats.skipped++;
+            return;
+        }
+        const gl = this.gl;
+        gl.bindBuffer(gl.UNIFORM_BUFFER, block.buffer);
+        gl.bufferSubData(gl.UNIFORM_BUFFER, 0, block.f32);
+        gl.bindBuffer(gl.UNIFORM_BUFFER, null);
+        block.dirty = false;
+        this.stats.uploads++;
+        this.stats.bytes += block.f32.byteLength;
+    }
+
+    // GLSL ES 3.00 has no layout(binding = N), so every program is pointed at the binding points
+    // once. Only call this for materials that are linked or about to draw: the index queries wait
+    // for the link to finish.
+    bindPrograms(material) {
+        const programs = this.renderer.properties.get(material).programs;
+        if (!programs) return;
+
+        const gl = this.gl;
+        programs.forEach(program => {
+            if (this.bound.has(program)) return;
+            this.bound.add(program);
+            this.blocks.forEach(block => {
+                const index = gl.getUniformBlockIndex(program.program, block.name);
+                if (index !== gl.INVALID_INDEX) gl.uniformBlockBinding(program.program, index, block.binding);
+            });
+        });
+    }
+
+    getStats() {
+        return {
+            ...this.stats,
+            blocks: [...this.blocks.values()].map(b => ({
+                name: b.name, binding: b.binding, bytes: b.f32.byteLength, members: b.members.length
+            }))
+        };
+    }
+}
@@ -1,115 +1,191 @@
 
+// --- 0. QUALITY TIERS ---
+// Loop caps and method switches baked into the raymarcher (ShaderAssembler.getDefines) and the UV
+// feedback pass as constants, so drivers can unroll and size registers for them. Step and octave
+// uniforms still pick the count at runtime, up to these caps; 'high' keeps the pre-tier caps.
+export const QUALITY_TIERS = {
+    low: `
+#define MAX_MARCH_STEPS 64
+#define MAX_SHADOW_STEPS 16
+#define MAX_NOISE_OCTAVES 2
+#define MAX_TURB_OCTAVES 5
+#define MAX_FEEDBACK_LAYERS 2
+#define MAX_WARP_LAYERS 2
+#define MAX_FRACTAL_ITERATIONS 6
+#define NORMAL_TAPS 4`,
+    med: `
+#define MAX_MARCH_STEPS 128
+#define MAX_SHADOW_STEPS 32
+#define MAX_NOISE_OCTAVES 4
+#define MAX_TURB_OCTAVES 10
+#define MAX_FEEDBACK_LAYERS 3
+#define MAX_WARP_LAYERS 3
+#define MAX_FRACTAL_ITERATIONS 8
+#define NORMAL_TAPS 4`,
+    high: `
+#define MAX_MARCH_STEPS 256
+#define MAX_SHADOW_STEPS 50
+#define MAX_NOISE_OCTAVES 8
+#define MAX_TURB_OCTAVES 20
+#define MAX_FEEDBACK_LAYERS 5
+#define MAX_WARP_LAYERS 5
+#define MAX_FRACTAL_ITERATIONS 12
+#define NORMAL_TAPS 6`,
+    ultra: `
+#define MAX_MARCH_STEPS 256
+#define MAX_SHADOW_STEPS 96
+#define MAX_NOISE_OCTAVES 8
+#define MAX_TURB_OCTAVES 20
+#define MAX_FEEDBACK_LAYERS 5
+#define MAX_WARP_LAYERS 5
+#define MAX_FRACTAL_ITERATIONS 16
+#define NORMAL_TAPS 6`
+};
+
 // --- 1. UNIFORMS ---
 export const COMMON_UNIFORMS = `
     precision highp float;
-    uniform float u_time;
-    uniform vec2 u_resolution;
-    uniform float u_box_size;
-    uniform float u_distance_scale;
-    uniform int u_lod_quality;
-    
-    // Camera
-    uniform float u_camera_theta;
-    uniform float u_camera_phi;
-    uniform float u_camera_distance;
-    uniform vec2 u_mouse;
-
-    // Domain
-    uniform float u_twist;
-    uniform float u_crunch;
-    uniform int u_crunch_type;
-    uniform float u_spin;
-    uniform float u_rot_time_sin;
-    uniform float u_rot_time_cos;
-
-    // Mirror
-    uniform float u_mirror_x;
-    uniform float u_mirror_y;
-    uniform float u_mirror_z;
-
-    // Displacement & SDF FX
-    uniform float u_displacement_freq;
-    uniform float u_displacement_amp;
-    uniform int u_displacement_type;
-    uniform float u_sdf_effect_mix;
-    uniform int u_sdf_effect_type;
-
-    // Colors & Palette
-    uniform vec3 u_palette_a;
-    uniform vec3 u_palette_b;
-    uniform vec3 u_palette_c;
-    uniform vec3 u_palette_d;
-    uniform float u_color_intensity;
-    uniform float u_background_brightness;
-    uniform int u_color_type;
-
-    // Lighting
-    uniform float u_surface_normals_enabled;
-    uniform float u_diffuse_strength;
-    uniform float u_specular_strength;
-    uniform float u_specular_power;
-    uniform float u_ambient_strength;
-    uniform float u_shadow_strength;
-    uniform float u_light_pos_x;
-    uniform float u_light_pos_y;
-    uniform float u_light_pos_z;
-
-    // Fog & Turb
-    uniform float u_fog_enabled;
-    uniform float u_fog_scale;
-    uniform float u_turb_num;
-    uniform float u_turb_amp;
-    uniform float u_turb_speed;
-    uniform float u_turb_freq;
-    uniform float u_turb_exp;
-    uniform float u_turb_time;
-
-    // Fractal
-    uniform int u_shape_mode; 
-    uniform float u_fractal_rot_time_sin;
-    uniform float u_fractal_rot_time_cos;
-    uniform float u_fractal_drift_offset_x;
-    uniform float u_fractal_drift_offset_y;
-    uniform float u_fractal_drift_offset_z;
-    uniform float u_fractal_halving_x_base;
-    uniform float u_fractal_halving_y_base;
-    uniform float u_fractal_halving_z_base;
-    uniform float u_fractal_halving_freq_x;
-    uniform float u_fractal_halving_freq_y;
-    uniform float u_fractal_halving_freq_z;
-    uniform float u_fractal_halving_phase_x;
-    uniform float u_fractal_halving_phase_y;
-    uniform float u_fractal_halving_phase_z;
+
+    // Scalar/vector uniforms live in std140 blocks grouped by how often they change.
+    // UniformBlocks.js derives the buffer layout from these declarations, so reordering
+    // or adding a member here is all it takes.
+
+    // Per frame: physics integrators, camera, governor, checkerboard, offline tiling and cone prepass
+    layout(std140) uniform FrameUniforms {
+        vec4 u_tile; // offline tiling: xy = tile origin, zw = tile size, in pixels of the full frame (zw = 0: untiled)
+        vec3 u_prev_camera; // theta, phi, distance
+        float u_time;
+        vec2 u_resolution;
+        vec2 u_cone_texel; // cone prepass texel size in vUv units (0: no prepass depth this frame)
+        float u_lod_scale; // performance governor multiplier on u_lod_quality
+        float u_camera_theta;
+        float u_camera_phi;
+        float u_camera_distance;
+        float u_rot_time_sin;
+        float u_rot_time_cos;
+        float u_fractal_rot_time_sin;
+        float u_fractal_rot_time_cos;
+        float u_fractal_drift_offset_x;
+        float u_fractal_drift_offset_y;
+        float u_fractal_drift_offset_z;
+        float u_fractal_halving_phase_x;
+        float u_fractal_halving_phase_y;
+        float u_fractal_halving_phase_z;
+        float u_turb_time;
+        int u_frame_parity;
+        int u_history_valid;
+    };
+
+    // Per edit: sliders, presets, MIDI and sync
+    layout(std140) uniform ParamUniforms {
+        // Colors & Palette (each vec3 shares its vec4 slot with a scalar)
+        vec3 u_palette_a;
+        float u_color_intensity;
+        vec3 u_palette_b;
+        float u_background_brightness;
+        vec3 u_palette_c;
+        float u_box_size;
+        vec3 u_palette_d;
+        float u_distance_scale;
+
+        int u_lod_quality;
+        int u_checkerboard;
+        int u_bounds; // start and stop rays at the shape's bounding sphere
+
+        // Domain
+        float u_twist;
+        float u_crunch;
+        float u_spin;
+
+        // Mirror
+        float u_mirror_x;
+        float u_mirror_y;
+        float u_mirror_z;
+
+        // Displacement & SDF FX
+        float u_displacement_freq;
+        float u_displacement_amp;
+        float u_sdf_effect_mix;
+
+        // Lighting
+        float u_surface_normals_enabled;
+        float u_diffuse_strength;
+        float u_specular_strength;
+        float u_specular_power;
+        float u_ambient_strength;
+        float u_shadow_strength;
+        float u_light_pos_x;
+        float u_light_pos_y;
+        float u_light_pos_z;
+
+        // Fog & Turb
+        float u_fog_enabled;
+        float u_fog_scale;
+        float u_turb_num;
+        float u_turb_amp;
+        float u_turb_speed;
+        float u_turb_freq;
+        float u_turb_exp;
+
+        // Fractal
+        float u_fractal_halving_x_base;
+        float u_fractal_halving_y_base;
+        float u_fractal_halving_z_base;
+        float u_fractal_halving_freq_x;
+        float u_fractal_halving_freq_y;
+        float u_fractal_halving_freq_z;
+
+        // Feedback
+        float u_feedback_opacity;
+        float u_feedback_distort;
+        float u_feedback_blur;
+        float u_feedback_noise_mix;
+        float u_feedback_noise_scale;
+        int u_feedback_layers;
+        int u_feedback_harmonics;
+        float u_feedback_lacunarity;
+        float u_feedback_gain;
+        float u_feedback_exponent;
+        float u_feedback_amplitude;
+        int u_feedback_blend_mode;
+        float u_feedback_seed;
+        float u_pixel_size;
+
+        // Image texture overlay
+        float u_image_opacity;
+        float u_image_aspect;
+
+        // UV Mirroring
+        float u_uv_mirror_x;
+        float u_uv_mirror_y;
+    };
+
+    // Per variant: the selectors in the rebuild key (also baked in as #defines)
+    layout(std140) uniform VariantUniforms {
+        int u_shape_mode;
+        int u_crunch_type;
+        int u_displacement_type;
+        int u_sdf_effect_type;
+        int u_color_type;
+    };
+
+    // Checkerboard reconstruction
+    uniform sampler2D u_prev_uv_feedback;
+
+    // Cone prepass: conservative ray start distance per low-res texel
+    uniform sampler2D u_cone_depth;
 
     // UV Feedback Input
     uniform sampler2D u_uv_feedback;
 
-
     // Feedback
     uniform sampler2D u_feedback_texture;
-    uniform float u_feedback_opacity;
-    uniform float u_feedback_distort;
-    uniform float u_feedback_blur;
-    uniform float u_feedback_noise_mix;
-    uniform float u_feedback_noise_scale;
-    uniform int u_feedback_layers;
-    uniform int u_feedback_harmonics;
-    uniform float u_feedback_lacunarity;
-    uniform float u_feedback_gain;
-    uniform float u_feedback_exponent;
-    uniform float u_feedback_amplitude;
-    uniform int u_feedback_blend_mode;
-    uniform float u_feedback_seed;
-    uniform float u_pixel_size;
-    
+
     // Image texture overlay
     uniform sampler2D u_image_texture;
-    uniform float u_image_opacity;
-    uniform float u_image_aspect;
-    
-    // UV Mirroring
-    uniform float u_uv_mirror_x;
-    uniform float u_uv_mirror_y;
+
+    // Baked noise (NOISE_SOURCE.volume)
+    uniform highp sampler3D u_noise_volume;
 `;
 
 // --- 2. STRUCTS ---
@@ -123,11 +199,15 @@ export const STRUCTS = `
 `;
 
 // --- 3. MATH UTILS ---
-export const MATH_UTILS = `
+// Shared with the UV feedback pass (#include <MATH_COMMON> in uvfeedback.glsl)
+export const MATH_COMMON = `
     #define PI 3.14159265359
     #define TWO_PI 6.283185
-    mat2 rot(float s, float c) { return mat2(c, -s, s, c); }
     mat2 rot2D(float a){ float s = sin(a), c = cos(a); return mat2(c,-s,s,c); }
+`;
+
+export const MATH_UTILS = `
+    mat2 rot(float s, float c) { return mat2(c, -s, s, c); }
     mat2 rotTimeM() { return mat2(u_rot_time_cos, -u_rot_time_sin, u_rot_time_sin, u_rot_time_cos); }
     
     float smin(float a, float b, float k){ 
@@ -181,89 +261,106 @@ export const MATH_UTILS = `
 `;
 
 // --- 4. NOISE ---
-export const NOISE_LIB = `
-    vec4 permute3(vec4 x){return mod(((x*34.0)+1.0)*x, 289.0);}
-
-    vec4 taylorInvSqrt3(vec4 r){return 1.79284291400159 - 0.85373472095314 * r;}
-
-    float snoise(vec3 v){ 
-        const vec2  C = vec2(1.0/6.0, 1.0/3.0) ;
-        const vec4  D = vec4(0.0, 0.5, 1.0, 2.0);
-
-        // First corner
-        vec3 i  = floor(v + dot(v, C.yyy) );
-        vec3 x0 =   v - i + dot(i, C.xxx) ;
-
-        // Other corners
-        vec3 g = step(x0.yzx, x0.xyz);
-        vec3 l = 1.0 - g;
-        vec3 i1 = min( g.xyz, l.zxy );
-        vec3 i2 = max( g.xyz, l.zxy );
-
-        //  x0 = x0 - 0. + 0.0 * C 
-        vec3 x1 = x0 - i1 + 1.0 * C.xxx;
-        vec3 x2 = x0 - i2 + 2.0 * C.xxx;
-        vec3 x3 = x0 - 1. + 3.0 * C.xxx;
-
-        // Permutations
-        i = mod(i, 289.0 ); 
-        vec4 p = permute3( permute3( permute3( 
-                    i.z + vec4(0.0, i1.z, i2.z, 1.0 ))
-                + i.y + vec4(0.0, i1.y, i2.y, 1.0 )) 
-                + i.x + vec4(0.0, i1.x, i2.x, 1.0 ));
-
-        // Gradients
-        // ( N*N points uniformly over a square, mapped onto an octahedron.)
-        float n_ = 1.0/7.0; // N=7
-        vec3  ns = n_ * D.wyz - D.xzx;
-
-        vec4 j = p - 49.0 * floor(p * ns.z *ns.z);  //  mod(p,N*N)
-
-        vec4 x_ = floor(j * ns.z);
-        vec4 y_ = floor(j - 7.0 * x_ );    // mod(j,N)
-
-        vec4 x = x_ *ns.x + ns.yyyy;
-        vec4 y = y_ *ns.x + ns.yyyy;
-        vec4 h = 1.0 - abs(x) - abs(y);
-
-        vec4 b0 = vec4( x.xy, y.xy );
-        vec4 b1 = vec4( x.zw, y.zw );
-
-        vec4 s0 = floor(b0)*2.0 + 1.0;
-        vec4 s1 = floor(b1)*2.0 + 1.0;
-        vec4 sh = -step(h, vec4(0.0));
-
-        vec4 a0 = b0.xzyw + s0.xzyw*sh.xxyy ;
-        vec4 a1 = b1.xzyw + s1.xzyw*sh.zzww ;
-
-        vec3 p0 = vec3(a0.xy,h.x);
-        vec3 p1 = vec3(a0.zw,h.y);
-        vec3 p2 = vec3(a1.xy,h.z);
-        vec3 p3 = vec3(a1.zw,h.w);
-
-        //Normalise gradients
-        vec4 norm = taylorInvSqrt3(vec4(dot(p0,p0), dot(p1,p1), dot(p2, p2), dot(p3,p3)));
-        p0 *= norm.x;
-        p1 *= norm.y;
-        p2 *= norm.z;
-        p3 *= norm.w;
-
-        // Mix final noise value
-        vec4 m = max(0.6 - vec4(dot(x0,x0), dot(x1,x1), dot(x2,x2), dot(x3,x3)), 0.0);
-        m = m * m;
-        return 42.0 * dot( m*m, vec4( dot(p0,x0), dot(p1,x1), 
-                                    dot(p2,x2), dot(p3,x3) ) );
-    }
+// Source of snoise() for fbmNoiseFeedback and the ground heightfield: computed per call, or
+// fetched from the tileable volume NoiseBaker bakes (?noiseVolume=1, see ShaderScene.setNoiseVolume).
+// uvfeedback.glsl includes the same sources (#include <NOISE_SOURCE.procedural>).
+export const NOISE_SOURCE = {
+    procedural: `
+        vec4 permute3(vec4 x){return mod(((x*34.0)+1.0)*x, 289.0);}
+
+        vec4 taylorInvSqrt3(vec4 r){return 1.79284291400159 - 0.85373472095314 * r;}
+
+        float snoise(vec3 v){ 
+            const vec2  C = vec2(1.0/6.0, 1.0/3.0) ;
+            const vec4  D = vec4(0.0, 0.5, 1.0, 2.0);
+
+            // First corner
+            vec3 i  = floor(v + dot(v, C.yyy) );
+            vec3 x0 =   v - i + dot(i, C.xxx) ;
+
+            // Other corners
+            vec3 g = step(x0.yzx, x0.xyz);
+            vec3 l = 1.0 - g;
+            vec3 i1 = min( g.xyz, l.zxy );
+            vec3 i2 = max( g.xyz, l.zxy );
+
+            //  x0 = x0 - 0. + 0.0 * C 
+            vec3 x1 = x0 - i1 + 1.0 * C.xxx;
+            vec3 x2 = x0 - i2 + 2.0 * C.xxx;
+            vec3 x3 = x0 - 1. + 3.0 * C.xxx;
+
+            // Permutations
+            i = mod(i, 289.0 ); 
+            vec4 p = permute3( permute3( permute3( 
+                        i.z + vec4(0.0, i1.z, i2.z, 1.0 ))
+                    + i.y + vec4(0.0, i1.y, i2.y, 1.0 )) 
+                    + i.x + vec4(0.0, i1.x, i2.x, 1.0 ));
+
+            // Gradients
+            // ( N*N points uniformly over a square, mapped onto an octahedron.)
+            float n_ = 1.0/7.0; // N=7
+            vec3  ns = n_ * D.wyz - D.xzx;
+
+            vec4 j = p - 49.0 * floor(p * ns.z *ns.z);  //  mod(p,N*N)
+
+            vec4 x_ = floor(j * ns.z);
+            vec4 y_ = floor(j - 7.0 * x_ );    // mod(j,N)
+
+            vec4 x = x_ *ns.x + ns.yyyy;
+            vec4 y = y_ *ns.x + ns.yyyy;
+            vec4 h = 1.0 - abs(x) - abs(y);
+
+            vec4 b0 = vec4( x.xy, y.xy );
+            vec4 b1 = vec4( x.zw, y.zw );
+
+            vec4 s0 = floor(b0)*2.0 + 1.0;
+            vec4 s1 = floor(b1)*2.0 + 1.0;
+            vec4 sh = -step(h, vec4(0.0));
+
+            vec4 a0 = b0.xzyw + s0.xzyw*sh.xxyy ;
+            vec4 a1 = b1.xzyw + s1.xzyw*sh.zzww ;
+
+            vec3 p0 = vec3(a0.xy,h.x);
+            vec3 p1 = vec3(a0.zw,h.y);
+            vec3 p2 = vec3(a1.xy,h.z);
+            vec3 p3 = vec3(a1.zw,h.w);
+
+            //Normalise gradients
+            vec4 norm = taylorInvSqrt3(vec4(dot(p0,p0), dot(p1,p1), dot(p2, p2), dot(p3,p3)));
+            p0 *= norm.x;
+            p1 *= norm.y;
+            p2 *= norm.z;
+            p3 *= norm.w;
+
+            // Mix final noise value
+            vec4 m = max(0.6 - vec4(dot(x0,x0), dot(x1,x1), dot(x2,x2), dot(x3,x3)), 0.0);
+            m = m * m;
+            return 42.0 * dot( m*m, vec4( dot(p0,x0), dot(p1,x1), 
+                                        dot(p2,x2), dot(p3,x3) ) );
+        }
+    `,
 
+    // r: gradient noise, g/b: Manhattan Worley F1/F2 (the UV feedback pass uses those)
+    volume: `
+        const float NOISE_VOLUME_PERIOD = 8.0; // lattice cells per texture repeat (NoiseBaker.PERIOD)
+
+        float snoise(vec3 v) {
+            return texture(u_noise_volume, v / NOISE_VOLUME_PERIOD).r;
+        }
+    `
+};
+
+export const NOISE_LIB = `
     float fbmNoiseFeedback(vec3 st, float gain, int harmonics, float lacunarity, float amp) {
         float G = gain * 1.; // gain
         float freq = 1.;
         float a = 1.;
         float t = 0.0;
 
-        int maxIterations = int(clamp(float(harmonics), 1.0, 5.0));
+        int maxIterations = int(clamp(float(harmonics), 1.0, min(5.0, float(MAX_NOISE_OCTAVES))));
 
-        for (int i=0; i < maxIterations; i++) {
+        for (int i=0; i < MAX_NOISE_OCTAVES; i++) {
+            if (i >= maxIterations) break;
             t += a * snoise(freq*st);
             freq *= lacunarity; // lacunarity
             a *= (G);
@@ -271,7 +368,10 @@ export const NOISE_LIB = `
 
         return t * amp; // amp
     }
+`;
 
+// 5x5 gaussian over a feedback texture, shared with the UV feedback pass (#include <BLUR_FX>)
+export const BLUR_FX = `
     vec4 blur(sampler2D tex, vec2 uv, float blur_amount){
         vec2 texelSize = 1.0 / u_resolution;
         vec4 result = vec4(0.0);
@@ -646,7 +746,9 @@ export const FOG_FX = `
         mat2 rot = mat2(0.6, -0.8, 0.8, 0.6);
         
         // Loop through turbulence octaves
-        for(float i = 0.0; i < u_turb_num; i++) {
+        for(int n = 0; n < MAX_TURB_OCTAVES; n++) {
+            float i = float(n);
+            if (i >= u_turb_num) break;
             // Scroll along the rotated y coordinate
             vec2 rotatedPos = pos.zy * rot;
             float phase = freq * rotatedPos.y + u_turb_time + i;
@@ -765,7 +867,7 @@ export const SDF_LIB = {
         float dr = 1.0;
         float r = 0.0;
         float power = 8.0;
-        for (int i = 0; i < 12; i++) {
+        for (int i = 0; i < MAX_FRACTAL_ITERATIONS; i++) {
             r = length(z);
             if (r > 2.0) break;
             float theta = acos(z.z / r);
@@ -780,10 +882,60 @@ export const SDF_LIB = {
         return 0.5 * log(r) * r / dr;
     }
     float sdShape(vec3 p, float s) {
-        return (u_shape_mode == 2) ? mandelbulb(p / s) * s : mandelbulb(p * mix(.9,.7, (s * 2.)));
+        return (SHAPE_MODE == 2) ? mandelbulb(p / s) * s : mandelbulb(p * mix(.9,.7, (s * 2.)));
     }`
 };
 
+// Radius of a sphere around the origin that contains sdShape(p, s) <= 0, as a GLSL expression in
+// s = abs(u_box_size). Shapes without an entry (infinite cylinders and bars) are never bounded.
+export const SDF_BOUNDS = {
+    box: `1.7321 * s`,
+    octahedron: `s`,
+    boxMinusSphere: `1.7321 * s`,
+    carvedBox: `1.7321 * s`,
+    doubleCross: `5.02 * s`,
+    sphereGrid: `2.71 * s`,
+    cone: `s`,
+    flower: `0.83 * s + 0.05`,
+    sphere: `1.25 * s`,
+    doubleCone: `2.0 * s + 0.01`,
+    mandelbulb: `(mix(0.9, 0.7, s * 2.0) > 0.05 ? 2.0 / mix(0.9, 0.7, s * 2.0) : -1.0)`
+};
+
+// Shape-mode scaling of that radius (see SHAPE_MODE_FX): single shrinks p by 0.65, repeat also
+// offsets by up to one cell diagonal (0.25 * sqrt(3))
+export const SHAPE_MODE_BOUNDS = {
+    single: `r = r / 0.65;`,
+    repeat: `r = (r + 0.4331) / 0.65;`
+};
+
+// Empty-space skipping: rays start where they enter the bounding sphere and stop where they leave
+// it. Domain effects that keep length(p) (mirror, rotation, twist) are fine; crunch and SDF warps
+// move the surface arbitrarily, so they fall back to the full march.
+export const BOUNDS_FX = `
+float boundRadius() {
+    if (abs(u_crunch) > 0.001 || u_sdf_effect_mix > 0.01) return -1.0;
+    float s = abs(u_box_size);
+    float r = /*@SHAPE_BOUND@*/;
+    if (r < 0.0) return -1.0;
+    /*@MODE_BOUND@*/
+    r += abs(u_displacement_amp) * max(1.0, u_distance_scale);
+    // map() runs on p * u_distance_scale
+    return r * 1.02 / u_distance_scale + 0.01;
+}
+
+// Interval of the ray inside the bound: (tFar, 0) on a miss, (0, tFar) when there is no bound
+vec2 boundSpan(vec3 ro, vec3 rd, float tFar) {
+    float r = boundRadius();
+    if (r < 0.0) return vec2(0.0, tFar);
+    float b = dot(ro, rd);
+    float h = b * b - dot(ro, ro) + r * r;
+    if (h < 0.0) return vec2(tFar, 0.0);
+    h = sqrt(h);
+    return vec2(max(-b - h, 0.0), min(-b + h, tFar));
+}
+`;
+
 // --- 7. LIGHTING & COLORING PIPELINE ---
 // Color Mode Library
 export const COLOR_LIB = {
@@ -1017,6 +1169,7 @@ export const GLOBAL_VARS = `
     float g_rayDistance;
     float g_rayTotal;
     float g_globalShape;
+    float g_steps = 0.0; // map() evaluations, for the step-count variant
 `;
 
 export const LIGHTING_FX = `
@@ -1041,8 +1194,10 @@ export const LIGHTING_FX = `
 
     float softShadows(vec3 ro, vec3 rd, float mint, float maxt, float k ) {
         int i = 0; float resultingShadowColor = 1.0; float t = mint;
-        for(int i = 0; i < 50 && t < maxt; i++) {
+        /*@SHADOW_BOUND@*/
+        for(int i = 0; i < MAX_SHADOW_STEPS && t < maxt; i++) {
             float h = map(ro + rd*t, i, t);
+            /*@COUNT_STEP@*/
             if( h < 0.001 ) return 0.0;
             resultingShadowColor = min(resultingShadowColor, k*h/t );
             t += h;
@@ -1056,11 +1211,21 @@ export const LIGHTING_FX = `
 
         vec3 p = g_worldPos;
         float eps = max(0.0005, 0.0005 / u_distance_scale) * (1.0 + 0.2 * t);
-        vec3 N = normalize(vec3(
-            map(p + vec3(eps, 0.0, 0.0), 0, t) - map(p - vec3(eps, 0.0, 0.0), 0, t),
-            map(p + vec3(0.0, eps, 0.0), 0, t) - map(p - vec3(0.0, eps, 0.0), 0, t),
-            map(p + vec3(0.0, 0.0, eps), 0, t) - map(p - vec3(0.0, 0.0, eps), 0, t)
-        ));
+        vec3 N;
+        if (NORMAL_TAPS == 4) {
+            // Tetrahedron: four map() taps instead of six
+            vec2 k = vec2(1.0, -1.0);
+            N = normalize(
+                k.xyy * map(p + k.xyy * eps, 0, t) + k.yyx * map(p + k.yyx * eps, 0, t) +
+                k.yxy * map(p + k.yxy * eps, 0, t) + k.xxx * map(p + k.xxx * eps, 0, t)
+            );
+        } else {
+            N = normalize(vec3(
+                map(p + vec3(eps, 0.0, 0.0), 0, t) - map(p - vec3(eps, 0.0, 0.0), 0, t),
+                map(p + vec3(0.0, eps, 0.0), 0, t) - map(p - vec3(0.0, eps, 0.0), 0, t),
+                map(p + vec3(0.0, 0.0, eps), 0, t) - map(p - vec3(0.0, 0.0, eps), 0, t)
+            ));
+        }
 
         vec3 L = normalize(light.position - g_worldPos);
         vec3 V = normalize(-g_rayDirection); 
@@ -1094,7 +1259,8 @@ export const FEEDBACK_FX = `
         float fbscale = 1./u_feedback_noise_scale;    
 
         // recursive layering controlled by u_feedback_layers
-        for(int i = 0; i < u_feedback_layers; i++) {
+        for(int i = 0; i < MAX_FEEDBACK_LAYERS; i++) {
+            if (i >= u_feedback_layers) break;
             float layerSeed = u_feedback_seed + float(i) * 10.0;
             noiseValue.x += fbmNoiseFeedback(vec3(uv * fbscale + vec2(layerSeed, 0.0), u_time * 0.01), u_feedback_gain, u_feedback_harmonics, u_feedback_lacunarity, u_feedback_amplitude);
             noiseValue.y += fbmNoiseFeedback(vec3(uv * fbscale + vec2(layerSeed + 36.0, -27.0), u_time * 0.01), u_feedback_gain, u_feedback_harmonics, u_feedback_lacunarity, u_feedback_amplitude);
@@ -1167,7 +1333,8 @@ float groundHeight(vec2 xz){
     float A = u_feedback_amplitude * 2.0; // Increase amplitude multiplier    
     float fbscale = 1./u_feedback_noise_scale;             
     float h = 0.0;
-    for(int i = 0; i < u_feedback_layers; i++) {
+    for(int i = 0; i < MAX_FEEDBACK_LAYERS; i++) {
+        if (i >= u_feedback_layers) break;
         h += sin(xz.x * f) * cos(xz.y * f) * A;
         // h += fbm2(xz * f * 0.35) * (A * 0.6);                
         float layerSeed = u_feedback_seed + float(i) * 10.0;
@@ -1182,4 +1349,282 @@ float sdGround(vec3 p){
     float h = groundHeight(p.xz);
     h -= 1.5;
     return p.y - (h + -0.5);    // Ground offset
-}`;
\ No newline at end of file
+}`;
+
+// --- 10. MAP & MAIN LOOP ---
+// Templates specialized by ShaderAssembler (and update_project.py's variant sweep):
+// each /*@NAME@*/ marker is replaced with a line from below, or removed, for the active variant.
+export const SHAPE_MODE_FX = {
+    single: `d = sdShape(p * .65, u_box_size) / 0.65;`,
+    repeat: `d = opLimitedRepetition(p * 0.65, 0.25, vec3(1.), i) / 0.65;`,
+    fractal: `d = sdShape(p, u_box_size);`,
+    ground: `d = sdGround(p);`,
+    image: `d = 0.0;`
+};
+
+export const VARIANT_HOOKS = {
+    fractalWorld: `p = fractalWorld(p);`,
+    displace: `d = opDisplace(d, p, 0.0);`,
+    fogColor: `col.value = setFogColor(p, t, col);`,
+    imageMode: `if (u_image_opacity > 0.0) fragColor = applyImageMode(fragColor, fragCoord);`,
+    rayBound: `if (u_bounds == 1) { vec2 span = boundSpan(cam.ro, cam.rd, tFar); t = span.x; tEnd = span.y; }`,
+    raySeed: `if (u_cone_texel.x > 0.0) t = max(t, texture(u_cone_depth, vUv).r);`,
+    shadowBound: `if (u_bounds == 1) { vec2 span = boundSpan(ro, rd, maxt); t = max(t, span.x); maxt = span.y; }`,
+    countStep: `g_steps += 1.0;`,
+    stepOutput: `FragColor = vec4(g_steps, 0.0, 0.0, 1.0);`
+};
+
+export const MAP_FX = {
+    surface: `
+float map(vec3 p, int i, float t) {
+    // 1. Domain Warping
+    p = worldEffects(p, t);
+    p = u_sdf_effect_mix > 0.01 ? sceneWarp(p) : p;
+    /*@FRACTAL_WORLD@*/
+
+    p.xy *= rotTimeM();
+
+    // 2. Shape SDF
+    float d;
+    /*@SHAPE@*/
+
+    // 3. Displacement
+    /*@DISPLACE@*/
+
+    return d;
+}`,
+    fog: `
+float map(vec3 p, int i, float t) {
+    // Fog mode: the volume replaces the shape entirely
+    p = worldEffects(p, t);
+    p = u_sdf_effect_mix > 0.01 ? sceneWarp(p) : p;
+    return fog(p, t);
+}`
+};
+
+export const CAMERA_FX = `
+out vec4 FragColor;
+in vec2 vUv;
+
+// params = (theta, phi, distance); the checkerboard reprojection also reads last frame's camera
+Camera ReadCameraAt(vec3 params, in vec2 uv) {
+    Camera cam;
+    cam.theta = params.x;
+    cam.phi = clamp(params.y, 0.01, 3.04159);
+    cam.distance = params.z;
+    cam.ro = vec3(
+        cam.distance * sin(cam.phi) * sin(-cam.theta),
+        cam.distance * cos(cam.phi),
+        cam.distance * sin(cam.phi) * cos(-cam.theta)
+    );
+    cam.target = vec3(0.0);
+    cam.forward = normalize(cam.target - cam.ro);
+    cam.right = normalize(cross(cam.forward, vec3(0.0, 1.0, 0.0)));
+    cam.up = cross(cam.right, cam.forward);
+    cam.rd = normalize(uv.x * 1. * cam.right + uv.y * 1. * cam.up + 1.5 * cam.forward);
+    return cam;
+}
+
+Camera ReadCamera(in vec2 uv) {
+    return ReadCameraAt(vec3(u_camera_theta, u_camera_phi, u_camera_distance), uv);
+}
+`;
+
+// --- 11. CHECKERBOARD RECONSTRUCTION ---
+// Half the pixels are traced each frame (alternating parity); the rest reuse last frame's output
+// (the raymarch feedback buffer) when its depth, stored in alpha, reprojects to the same world
+// point under the new camera.
+export const CHECKERBOARD_FX = `
+bool reuseHistory(vec2 fragCoord, out vec4 color) {
+    color = vec4(0.0);
+    ivec2 px = ivec2(fragCoord);
+    if (u_history_valid == 0 || ((px.x + px.y + u_frame_parity) & 1) == 0) return false; // traced this frame
+
+    // Guess this pixel's depth from last frame and push the current ray out to it
+    vec2 uv = fragCoord / u_resolution;
+    vec2 camUv = texture(u_uv_feedback, uv).rg;
+    float tGuess = texelFetch(u_feedback_texture, px, 0).a;
+    Camera cam = ReadCamera(camUv);
+    vec3 worldPos = cam.ro + cam.rd * tGuess;
+
+    // Project into last frame's camera (inverse of ReadCamera's ray construction)
+    Camera prev = ReadCameraAt(u_prev_camera, vec2(0.0));
+    vec3 local = worldPos - prev.ro;
+    float z = dot(local, prev.forward);
+    if (z <= 0.0) return false;
+    vec2 prevCamUv = vec2(dot(local, prev.right), dot(local, prev.up)) * 1.5 / z;
+
+    // Camera uv runs 2/height per pixel, locally, through the UV feedback field
+    vec2 prevFrag = fragCoord + (prevCamUv - camUv) * u_resolution.y * 0.5;
+    if (any(lessThan(prevFrag, vec2(0.0))) || any(greaterThanEqual(prevFrag, u_resolution))) return false;
+    ivec2 prevPx = ivec2(prevFrag);
+
+    // Reject disocclusions and moved surfaces: the history texel must describe the same point
+    vec4 hist = texelFetch(u_feedback_texture, prevPx, 0);
+    vec2 prevRayUv = texelFetch(u_prev_uv_feedback, prevPx, 0).rg;
+    Camera prevRay = ReadCameraAt(u_prev_camera, prevRayUv);
+    vec3 histPos = prevRay.ro + prevRay.rd * hist.a;
+    if (distance(histPos, worldPos) > 0.02 * tGuess + 0.01) return false;
+
+    color = vec4(hist.rgb, tGuess);
+    return true;
+}
+`;
+
+export const MAIN_FX = `
+Light ReadLight() {
+    Light light;
+    light.position = vec3(u_light_pos_x * 2.0 - 1.0, u_light_pos_y * 2.0 - 1.0, u_light_pos_z * 2.0 - 1.0) * 10.0;
+    light.color = vec3(1.0);
+    light.intensity = 1.0;
+    return light;
+}
+
+void UpdateColor(float t, float d, int i, vec3 p, inout Color col) {
+    col.value = setBackgroundColorInLoop(t, d, i, p, col);
+    /*@FOG_COLOR@*/
+}
+
+void SetGlobalVars(Camera cam, float t) {
+    g_worldPos = cam.ro + cam.rd * t;
+    g_rayTotal = t;
+    g_rayDirection = cam.rd;                
+}                        
+
+void mainImage(out vec4 fragColor, in vec2 fragCoord) {
+    vec2 uv = fragCoord / u_resolution.xy;
+    vec2 feedbackUv = texture(u_uv_feedback, uv).rg;
+
+    Camera cam = ReadCamera(feedbackUv);
+    Light light = ReadLight();
+    Color col; 
+    col.value = vec3(0.0);
+    col.intensity = 1.0;
+    col.fogDensity = vec3(0.0);
+
+    // Set ray direction globally before raymarch for color calculations
+    g_rayDirection = cam.rd;
+
+    float eps = max(0.001, 0.001 / u_distance_scale);
+    float tFar = 100.0 / u_distance_scale;
+    float t = 0.0;
+    float tEnd = tFar;
+    vec3 p = vec3(0.0);
+    int maxSteps = max(1, int(float(u_lod_quality) * u_lod_scale));
+
+    // Empty-space skipping: bounding sphere, then the cone prepass's start distance
+    /*@RAY_BOUND@*/
+    /*@RAY_SEED@*/
+
+    for (int i = 0; i < MAX_MARCH_STEPS; ++i) {
+        if (i >= maxSteps || t > tEnd) break;
+        p = cam.ro + cam.rd * t;
+        float d = map(p, i, t);                    
+        /*@COUNT_STEP@*/
+        g_rayDistance = d;
+        t += d;
+
+        // Volumetric Accumulation
+        UpdateColor(t, d, i, p, col);
+
+        if (d < eps || t > tEnd) break;
+    }
+
+    // Leaving the bound is a miss: report it past the far plane, as an unbounded march would
+    if (t > tEnd) t = max(t, tFar * 1.001);
+
+    SetGlobalVars(cam, t);
+
+    // Surface Lighting
+    CalculateNormals(t, p, light, col);
+
+    col.value = Tonemap_tanh(col.value);
+    fragColor = vec4(col.value, 1.0);
+}
+
+void main(){
+    vec2 fragCoord = u_tile.z > 0.0 ? u_tile.xy + vUv * u_tile.zw : vUv * u_resolution;
+    vec4 fragColor;
+
+    // Checkerboard mode: skip the march where last frame's result still holds
+    if (u_checkerboard == 1 && reuseHistory(fragCoord, fragColor)) {
+        FragColor = fragColor;
+        return;
+    }
+
+    // float pixelSize = u_pixel_size * 10. + 1.; // Adjust for larger/smaller pixels
+    // vec2 fragCoord = floor(vUv * u_resolution / pixelSize) * pixelSize;
+    // vec4 fragColor;
+    mainImage(fragColor, fragCoord);    
+
+    // Image mode (SHAPE_MODE == 5)
+    /*@IMAGE_MODE@*/
+
+    fragColor = (u_feedback_opacity > 0.0) ? calculateFeedback(fragColor, fragCoord) : fragColor;    
+
+    // Triangle wave (mirrored/zig-zag modulo): 0→1→0 instead of 0→1→0 (harsh jump)
+    // fragColor = abs(fract(fragColor / .125) * 4.0 - 2.0);
+
+    // fragColor = vec4(floor(fragColor.rgb * 5.0 + 0.5) / 5.0, 1.0);
+
+    // float pixelSize = 8.0; // Adjust for larger/smaller pixels
+    // vec2 pixelatedUV = floor(fragCoord / pixelSize) * pixelSize / u_resolution;
+    // fragColor = texture(u_feedback_texture, pixelatedUV);
+
+    // Checkerboard mode keeps ray depth in alpha for next frame's reprojection
+    if (u_checkerboard == 1) fragColor.a = g_rayTotal;
+
+    FragColor = fragColor; // WebGL2 output
+
+    // Step-count variant (ShaderScene.measureSteps)
+    /*@STEP_OUTPUT@*/
+}
+`;
+
+// --- 12. CONE PREPASS ---
+// Replaces main() in the 'cone' variant, drawn at 1/4 or 1/8 resolution. Each texel marches a cone
+// wide enough to hold every full-resolution ray it covers, and stores how far that cone got before
+// it could have touched the surface; the main pass starts its rays there (u_cone_depth).
+export const CONE_PREPASS_FX = `
+// vUv of this pass -> uv of the full frame (offline tiles render their own prepass)
+vec2 frameUv(vec2 v) {
+    vec2 fragCoord = u_tile.z > 0.0 ? u_tile.xy + v * u_tile.zw : v * u_resolution;
+    return fragCoord / u_resolution;
+}
+
+void main() {
+    Camera cam = ReadCamera(texture(u_uv_feedback, frameUv(vUv)).rg);
+
+    // Widest angle to the texel's corner rays, through the same UV feedback field the main pass reads
+    float cosMin = 1.0;
+    for (int c = 0; c < 4; c++) {
+        vec2 corner = vUv + (vec2(c & 1, c >> 1) - 0.5) * u_cone_texel;
+        Camera edge = ReadCamera(texture(u_uv_feedback, frameUv(corner)).rg);
+        cosMin = min(cosMin, dot(cam.rd, edge.rd));
+    }
+    float spread = 1.1 * sqrt(max(1.0 - cosMin * cosMin, 0.0)) / max(cosMin, 0.001) + 1e-4;
+
+    // No bounding-sphere start here: the center ray's span says nothing about its neighbours'
+    float eps = max(0.001, 0.001 / u_distance_scale);
+    float tFar = 100.0 / u_distance_scale;
+    float t = 0.0;
+
+    for (int i = 0; i < 64; ++i) {
+        if (t > tFar) break;
+        float d = map(cam.ro + cam.rd * t, i, t);
+        float r = t * spread;
+        if (d <= r + eps) break;
+        // Largest step that keeps the whole cone inside the free sphere
+        t += (d - r) / (1.0 + spread);
+    }
+
+    // A little short of it: the full-resolution rays finish the march from here
+    FragColor = vec4(min(t, tFar) * 0.99, 0.0, 0.0, 1.0);
+}
+`;
+
+// --- SYMBOL TABLE ---
+// GlslSymbols.parse() of the library chunks, precomputed by vite-plugin-glsl.js when it minifies
+// this module for a build (GlslPreprocess.encodeSymbols). Null in dev, where chunks are parsed on
+// first use.
+export const CHUNK_SYMBOLS = null;
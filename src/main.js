@@ -1,5 +1,6 @@
 
 import { ShaderScene } from './engine/ShaderScene.js';
+import { RenderHost } from './engine/RenderHost.js';
 
 const loadingScreen = document.getElementById('loadingScreen');
 const canvas = document.getElementById('canvas');
@@ -7,15 +8,18 @@ const canvas = document.getElementById('canvas');
 async function boot() {
     try {
         console.log("🚀 Booting Shader Engine...");
-        const scene = new ShaderScene();
-        setTimeout(() => {
-            console.log("✨ Engine Ready");
-            if(loadingScreen) {
-                loadingScreen.style.opacity = '0';
-                setTimeout(() => loadingScreen.remove(), 500);
-            }
-            if(canvas) canvas.style.display = 'block';
-        }, 100);
+        // ?worker=1 renders on an OffscreenCanvas in a worker; this thread keeps the DOM, MIDI and sync
+        const useWorker = new URLSearchParams(window.location.search).get('worker') === '1';
+        if (useWorker && !RenderHost.supported) console.warn('⚠️ OffscreenCanvas unavailable, rendering on the main thread');
+        const scene = useWorker && RenderHost.supported ? new RenderHost() : new ShaderScene();
+        // The placeholder frame is up (in a worker, about to be); the shader variant follows
+        if(loadingScreen) {
+            loadingScreen.style.opacity = '0';
+            setTimeout(() => loadingScreen.remove(), 500);
+        }
+        if(canvas) canvas.style.display = 'block';
+        await scene.ready;
+        console.log("✨ Engine Ready");
     } catch (e) {
         console.error("❌ Boot failed:", e);
     }
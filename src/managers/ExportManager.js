@@ -1,9 +1,14 @@
+import { VideoRecorder } from './VideoRecorder.js';
+import { SceneUniforms } from '../engine/SceneUniforms.js';
+
 
 export class ExportManager {
     constructor(scene) {
         this.scene = scene;
         this.isRecording = false;
-        this.mediaRecorder = null;
+        this.isStarting = false;
+        this.recorder = null;        // WebCodecs VideoRecorder
+        this.mediaRecorder = null;   // fallback when WebCodecs is missing
         this.recordedChunks = [];
         this.bindButtons();
     }
@@ -13,52 +18,20 @@ export class ExportManager {
         const recBtn = document.getElementById('toggleRecording');
         const saveBtn = document.getElementById('exportPreset');
         const importInput = document.getElementById('importPreset');
+        const setlistInput = document.getElementById('importSetlist');
         
         if(shotBtn) shotBtn.onclick = () => this.takeScreenshot();
         if(recBtn) recBtn.onclick = () => this.toggleRecording();
         if(saveBtn) saveBtn.onclick = () => this.exportPreset();
         if(importInput) importInput.addEventListener('change', (e) => this.importPreset(e));
+        if(setlistInput) setlistInput.addEventListener('change', (e) => this.importSetlist(e));
     }
 
-    takeScreenshot() {
-        const s = this.scene;
-        const originalWidth = s.renderWidth;
-        const originalHeight = s.renderHeight;
-
-        // Temporarily set to full resolution
-        s.renderWidth = window.innerWidth;
-        s.renderHeight = window.innerHeight;
-        s.composer.setSize(s.renderWidth, s.renderHeight);
-        s.uniforms.u_resolution.value.set(s.renderWidth, s.renderHeight);
-
-        s.uniforms.u_feedback_texture.value = s.feedbackTarget.texture;
-
-        s.renderer.setRenderTarget(s.tempTarget);
-        s.renderer.render(s.scene, s.camera);
-
-        s.renderer.setRenderTarget(null);
-        s.composer.render();
-
-        // Create temp canvas with black background
-        const canvas = s.renderer.domElement;
-        const tempCanvas = document.createElement('canvas');
-        const tempCtx = tempCanvas.getContext('2d');
-        tempCanvas.width = canvas.width;
-        tempCanvas.height = canvas.height;
-        tempCtx.fillStyle = '#000000';
-        tempCtx.fillRect(0, 0, tempCanvas.width, tempCanvas.height);
-        tempCtx.drawImage(canvas, 0, 0);
-
-        tempCanvas.toBlob((blob) => {
-            const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
-            this.download(blob, `raymarch_${timestamp}.jpg`);
-        }, 'image/jpeg', 1.0);
-
-        // Restore original resolution
-        s.renderWidth = originalWidth;
-        s.renderHeight = originalHeight;
-        s.composer.setSize(s.renderWidth, s.renderHeight);
-        s.uniforms.u_resolution.value.set(s.renderWidth, s.renderHeight);
+    // Rendered by the scene, which may be in the render worker
+    async takeScreenshot() {
+        const blob = await this.scene.captureScreenshot();
+        const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
+        this.download(blob, `raymarch_${timestamp}.jpg`);
     }
 
     toggleRecording() {
@@ -69,56 +42,86 @@ export class ExportManager {
         }
     }
 
-    startRecording() {
-        if (this.isRecording) return;
+    async startRecording() {
+        if (this.isRecording || this.isStarting) return;
+
+        // A render worker records its own canvas (RenderHost hands back a stand-in for its recorder)
+        const remote = typeof this.scene.createRecorder === 'function';
+        if (remote || VideoRecorder.supported) {
+            this.isStarting = true;
+            const options = { onError: () => this.stopRecording() };
+            this.recorder = remote ? this.scene.createRecorder(options) : new VideoRecorder(this.scene, options);
+            try {
+                await this.recorder.start();
+            } catch (err) {
+                console.warn(`🎥 WebCodecs recorder unavailable (${err.message}), falling back to MediaRecorder`);
+                this.recorder = null;
+            } finally {
+                this.isStarting = false;
+            }
+        }
+        if (!this.recorder && !this.startMediaRecorder()) return;
+
+        this.isRecording = true;
+        
+        // Update button appearance
+        const button = document.getElementById('toggleRecording');
+        if (button) {
+            button.textContent = '⏹ Stop';
+            button.style.background = 'rgba(255, 69, 58, 0.4)';
+        }
         
-        const canvas = this.scene.renderer.domElement;
+        console.log('Recording started...');
+    }
+
+    // Fallback for browsers without WebCodecs: encodes on the main thread and buffers in memory
+    startMediaRecorder() {
+        const mimeType = [
+            'video/mp4;codecs=avc1',
+            'video/webm;codecs=vp9',
+            'video/webm;codecs=vp8',
+            'video/webm'
+        ].find(type => MediaRecorder.isTypeSupported(type));
+        if (!mimeType) {
+            console.error('🎥 No supported recording format in this browser');
+            return false;
+        }
+
+        const canvas = this.scene.canvas;
         const stream = canvas.captureStream(60); // 60 FPS
         
         this.recordedChunks = [];
-        
-        // MP4 (H.264) - Better compatibility, smaller file size
         this.mediaRecorder = new MediaRecorder(stream, {
-            mimeType: 'video/mp4;codecs=avc1',
+            mimeType,
             videoBitsPerSecond: 50000000 // 50 Mbps for good quality
         });
         
-        // WebM (VP9) - Better quality, larger file size
-        // this.mediaRecorder = new MediaRecorder(stream, {
-        //     mimeType: 'video/webm;codecs=vp9',
-        //     videoBitsPerSecond: 50000000 // 50 Mbps for good quality
-        // });
-        
         this.mediaRecorder.ondataavailable = (event) => {
             if (event.data.size > 0) {
                 this.recordedChunks.push(event.data);
             }
         };
         
+        const ext = mimeType.startsWith('video/mp4') ? 'mp4' : 'webm';
         this.mediaRecorder.onstop = () => {
-            const blob = new Blob(this.recordedChunks, { type: 'video/mp4' }); // Use 'video/webm' for WebM
+            const blob = new Blob(this.recordedChunks, { type: mimeType.split(';')[0] });
+            this.recordedChunks = [];
             const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
-            this.download(blob, `raymarch_recording_${timestamp}.mp4`); // Use .webm extension for WebM
+            this.download(blob, `raymarch_recording_${timestamp}.${ext}`);
             console.log('Recording saved!');
         };
         
         this.mediaRecorder.start();
-        this.isRecording = true;
-        
-        // Update button appearance
-        const button = document.getElementById('toggleRecording');
-        if (button) {
-            button.textContent = '⏹ Stop';
-            button.style.background = 'rgba(255, 69, 58, 0.4)';
-        }
-        
-        console.log('Recording started...');
+        return true;
     }
 
-    stopRecording() {
-        if (!this.isRecording || !this.mediaRecorder) return;
-        
-        this.mediaRecorder.stop();
+    // Called by the render loop after each drawn frame
+    captureFrame(now) {
+        this.recorder?.capture(now);
+    }
+
+    async stopRecording() {
+        if (!this.isRecording) return;
         this.isRecording = false;
         
         // Update button appearance
@@ -127,8 +130,23 @@ export class ExportManager {
             button.textContent = '● Record';
             button.style.background = 'rgba(255, 69, 58, 0.2)';
         }
-        
-        console.log('Recording stopped.');
+
+        if (this.mediaRecorder) {
+            this.mediaRecorder.stop();
+            this.mediaRecorder = null;
+            console.log('Recording stopped.');
+            return;
+        }
+
+        const recorder = this.recorder;
+        this.recorder = null;
+        try {
+            const file = await recorder.stop();
+            if (file) this.download(file, file.name);
+            console.log('Recording saved!');
+        } catch (err) {
+            console.error(`🎥 Recording failed: ${err.message}`);
+        }
     }
 
     exportPreset() {
@@ -138,6 +156,14 @@ export class ExportManager {
         this.download(blob, `${preset.name}.json`);
     }
 
+    async exportProfile() {
+        const trace = await (await this.scene.load('profiler')).exportTrace();
+        const blob = new Blob([JSON.stringify(trace)], { type: 'application/json' });
+        const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
+        this.download(blob, `raymarch_profile_${timestamp}.json`);
+        console.log(`⏱️ Exported ${trace.traceEvents.length} trace events`);
+    }
+
     buildPreset() {
         const s = this.scene;
         return {
@@ -327,10 +353,27 @@ export class ExportManager {
         reader.readAsText(file);
     }
 
+    // Several preset files (played in name order) or one { name, presets: [...] } file
+    async importSetlist(event) {
+        const files = [...event.target.files].sort((a, b) => a.name.localeCompare(b.name));
+        if (files.length === 0) return;
+
+        try {
+            const parsed = await Promise.all(files.map(async file => JSON.parse(await file.text())));
+            const presets = parsed.flatMap(p => Array.isArray(p.presets) ? p.presets : [p]);
+            const report = await (await this.scene.load('setlist')).load(presets);
+            if (report) console.log(`🎬 Setlist ready: [ / ] to step through ${report.presets} presets`);
+        } catch (err) {
+            console.error('Error importing setlist:', err);
+            alert('Error importing setlist. Please check the file format.');
+        }
+    }
+
     applyPreset(preset) {
         const s = this.scene;
         
         if (!preset.uniforms) return;
+        s.setlist?.cancelFade(); // a running fade would keep writing over this preset
         
         const U = preset.uniforms;
         
@@ -358,38 +401,7 @@ export class ExportManager {
         };
         
         // Apply all uniforms
-        const uniformKeys = [
-            'u_twist', 'u_crunch', 'u_crunch_type', 'u_spin', 'u_box_size', 'u_distance_scale',
-            'u_displacement_type', 'u_displacement_amp', 'u_displacement_freq',
-            'u_camera_theta', 'u_camera_phi', 'u_camera_distance',
-            'u_shape_type', 'u_shape_mode', 'u_color_intensity', 'u_lod_quality',
-            'u_mirror_x', 'u_mirror_y', 'u_mirror_z',
-            'u_sdf_effect_type', 'u_sdf_effect_mix',
-            'u_feedback_opacity', 'u_feedback_blur', 'u_feedback_distort', 'u_feedback_noise_scale',
-            'u_feedback_harmonics', 'u_feedback_lacunarity', 'u_feedback_gain', 'u_feedback_amplitude', 'u_feedback_exponent',
-            'u_feedback_noise_mix', 'u_feedback_blend_mode', 'u_feedback_seed', 'u_feedback_layers',
-            'u_pixel_size', 'u_color_type',
-            'u_surface_normals_enabled', 'u_diffuse_strength', 'u_specular_strength',
-            'u_specular_power', 'u_ambient_strength', 'u_shadow_strength', 'u_background_brightness',
-            'u_fog_enabled', 'u_fog_scale', 'u_turb_num', 'u_turb_amp',
-            'u_turb_speed', 'u_turb_freq', 'u_turb_exp',
-            'u_uv_scale', 'u_uv_rotate', 'u_uv_distort', 'u_uv_grid_size',
-            'u_warp_gain', 'u_warp_harmonics', 'u_warp_lacunarity', 'u_warp_amplitude', 'u_warp_layers',
-            'u_lens_distort', 'u_polarize',
-            'u_light_pos_x', 'u_light_pos_y', 'u_light_pos_z',
-            'u_fractal_rotation_speed',
-            'u_fractal_drift_x', 'u_fractal_drift_y', 'u_fractal_drift_z',
-            'u_fractal_halving_x_base', 'u_fractal_halving_y_base', 'u_fractal_halving_z_base',
-            'u_fractal_halving_freq_x', 'u_fractal_halving_freq_y', 'u_fractal_halving_freq_z',
-            'u_fractal_halving_time_x', 'u_fractal_halving_time_y', 'u_fractal_halving_time_z',
-            'u_bloat_strength', 'u_pattern_type',
-            'u_uv_feedback_opacity', 'u_uv_pixel_size', 'u_uv_feedback_blur', 'u_uv_feedback_distort',
-            'u_uv_feedback_noise_scale', 'u_uv_feedback_harmonics', 'u_uv_feedback_lacunarity', 'u_uv_feedback_gain',
-            'u_uv_feedback_amplitude', 'u_uv_feedback_exponent', 'u_uv_feedback_noise_mix', 'u_uv_feedback_blend_mode',
-            'u_uv_feedback_layers', 'u_uv_feedback_seed'
-        ];
-        
-        uniformKeys.forEach(setUniform);
+        SceneUniforms.PRESET_UNIFORMS.forEach(setUniform);
         
         // Palette colors
         if (U.u_palette_a) s.uniforms.u_palette_a.value.set(U.u_palette_a.x, U.u_palette_a.y, U.u_palette_a.z);
@@ -539,8 +551,7 @@ export class ExportManager {
         s.rebuildMaterial();
         
         // Force render
-        s.renderer.setRenderTarget(null);
-        s.composer.render();
+        s.redraw();
         
         console.log('Preset imported successfully');
     }
@@ -164,63 +164,18 @@ export class GalleryManager {
         this.scene.canvas.style.transform = 'translate(-50%, -50%)';
 
         // Update render dimensions
-        const maxWidth = 1920 * this.scene.resolutionScale;
-        const maxHeight = 1080 * this.scene.resolutionScale;
+        const maxWidth = 1920 * this.scene.getRenderScale();
+        const maxHeight = 1080 * this.scene.getRenderScale();
         const scaleX = Math.min(1, maxWidth / targetWidth);
         const scaleY = Math.min(1, maxHeight / targetHeight);
         const renderScale = Math.min(scaleX, scaleY);
 
-        this.scene.renderWidth = Math.floor(targetWidth * renderScale);
-        this.scene.renderHeight = Math.floor(targetHeight * renderScale);
-
-        // Update renderer and composer
-        this.scene.renderer.setSize(targetWidth, targetHeight);
-        this.scene.composer.setSize(this.scene.renderWidth, this.scene.renderHeight);
-
-        // Update uniforms
-        if (this.scene.uniforms?.u_resolution) {
-            this.scene.uniforms.u_resolution.value.set(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        // Update post-processing passes
-        if (this.scene.normalsPass?.uniforms?.u_resolution) {
-            this.scene.normalsPass.uniforms.u_resolution.value.set(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        if (this.scene.edgePass?.uniforms?.u_resolution) {
-            this.scene.edgePass.uniforms.u_resolution.value.set(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        if (this.scene.colorGradingPass?.uniforms?.u_resolution) {
-            this.scene.colorGradingPass.uniforms.u_resolution.value.set(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        if (this.scene.bloomPass?.setSize) {
-            this.scene.bloomPass.setSize(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        // Update feedback targets
-        if (this.scene.feedbackTarget) {
-            this.scene.feedbackTarget.setSize(this.scene.renderWidth, this.scene.renderHeight);
-        }
-        if (this.scene.tempTarget) {
-            this.scene.tempTarget.setSize(this.scene.renderWidth, this.scene.renderHeight);
-        }
-        if (this.scene.uvFeedbackTarget) {
-            this.scene.uvFeedbackTarget.setSize(this.scene.renderWidth, this.scene.renderHeight);
-        }
-        if (this.scene.tempUvTarget) {
-            this.scene.tempUvTarget.setSize(this.scene.renderWidth, this.scene.renderHeight);
-        }
-
-        // Update UV feedback material
-        if (this.scene.uvFeedbackMaterial?.uniforms?.u_resolution) {
-            this.scene.uvFeedbackMaterial.uniforms.u_resolution.value.set(this.scene.renderWidth, this.scene.renderHeight);
-        }
+        // Update renderer, then every render target through the scene's pool
+        this.scene.setCanvasSize(targetWidth, targetHeight);
+        this.scene.setRenderSize(targetWidth * renderScale, targetHeight * renderScale);
 
         // Force immediate render
-        this.scene.renderer.setRenderTarget(null);
-        this.scene.composer.render();
+        this.scene.redraw();
     }
 
     toggleGalleryMode() {
@@ -0,0 +1,261 @@
+import { GpuTimer } from '../engine/GpuTimer.js';
+
+// Per-pass GPU timing: sequential timer queries around each stage of the frame and each composer
+// pass, kept in per-label ring buffers for percentiles, shown in an optional HUD and exportable as
+// Chrome trace-event JSON (chrome://tracing, Perfetto). Shader assembly / link times go on a
+// separate CPU track of the same trace, from ShaderCache's span log (kept from startup on, since
+// this module only loads once profiling is asked for).
+export class GpuProfiler {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        const params = new URLSearchParams(scene.search);
+        this.enabled = options.enabled ?? params.get('profile') === '1';
+        this.historySize = options.historySize ?? 240;        // frames kept per label for percentiles
+        this.maxTraceEvents = options.maxTraceEvents ?? 20000; // GPU events kept for export
+        this.hudIntervalMs = options.hudIntervalMs ?? 250;
+
+        // --- STATE ---
+        this.timer = new GpuTimer(scene.renderer.getContext(), { maxPending: 96 });
+        this.frame = 0;
+        this.current = null;
+        this.frames = new Map();  // frame -> { cpuStart, expected, results, closed, skipped }
+        this.rings = new Map();   // label -> { values, count, index }
+        this.frameTotals = [];    // finished frame GPU totals, drained by the governor
+        this.traceEvents = [];
+        this.traceOrigin = 0; // page time, so compile spans from before this loaded line up
+        this.hud = null;
+        this.lastHudUpdate = 0;
+
+        if (this.enabled) this.showHud(true);
+        if (this.enabled && !this.timer.supported) {
+            console.warn('⏱️ Profiler: EXT_disjoint_timer_query_webgl2 unavailable, GPU timings disabled');
+        }
+    }
+
+    // --- FRAME SCOPES ---
+    beginFrame() {
+        if (!this.enabled) return;
+        this.frame++;
+        this.current = { frame: this.frame, cpuStart: performance.now(), expected: 0, results: [], closed: false, skipped: false };
+        this.frames.set(this.frame, this.current);
+    }
+
+    begin(label) {
+        if (!this.enabled || !this.current) return;
+        if (this.timer.begin({ frame: this.current.frame, label })) {
+            this.current.expected++;
+        } else {
+            this.current.skipped = true; // GPU behind or a scope left open; the frame won't be complete
+        }
+    }
+
+    end() {
+        if (this.enabled) this.timer.end();
+    }
+
+    endFrame(now = performance.now()) {
+        if (!this.enabled || !this.current) return;
+        this.current.closed = true;
+        this.current = null;
+        this.collect();
+
+        if (now - this.lastHudUpdate >= this.hudIntervalMs) {
+            this.lastHudUpdate = now;
+            this.updateHud();
+        }
+    }
+
+    // Wraps composer passes once so each pass's draws are timed under its label
+    instrument(passes) {
+        if (!this.enabled) return;
+        passes.forEach(pass => {
+            if (pass.profilerWrapped) return;
+            const render = pass.render;
+            const label = pass.label ?? pass.constructor.name;
+            pass.render = (...args) => {
+                this.begin(label);
+                render.apply(pass, args);
+                this.end();
+            };
+            pass.profilerWrapped = true;
+        });
+    }
+
+    collect() {
+        const results = this.timer.pollTagged();
+        if (this.timer.disjoint) {
+            // Everything in flight was dropped; keep only the frame still being recorded
+            this.frames.forEach((rec, f) => { if (rec.closed) this.frames.delete(f); });
+            return;
+        }
+
+        results.forEach(({ ms, tag }) => {
+            const rec = this.frames.get(tag.frame);
+            if (!rec) return;
+            rec.results.push({ label: tag.label, ms });
+            if (rec.closed && rec.results.length === rec.expected) this.finishFrame(tag.frame, rec);
+        });
+
+        // Frames with no queries at all (e.g. skipped by a full queue) never resolve
+        this.frames.forEach((rec, f) => {
+            if (rec.closed && rec.expected === 0) this.frames.delete(f);
+        });
+    }
+
+    finishFrame(frame, rec) {
+        this.frames.delete(frame);
+        if (rec.skipped) return; // partial frames would skew both the totals and the trace
+
+        // Labels repeated in a frame (e.g. two RenderPasses) are summed per frame
+        const perLabel = new Map();
+        let cursor = rec.cpuStart;
+        let total = 0;
+        rec.results.forEach(({ label, ms }) => {
+            perLabel.set(label, (perLabel.get(label) ?? 0) + ms);
+            total += ms;
+
+            // GPU work has no absolute timestamps here; lay scopes end to end from the frame's CPU start
+            this.traceEvents.push({
+                name: label, cat: 'gpu', ph: 'X', pid: 1, tid: 1,
+                ts: (cursor - this.traceOrigin) * 1000, dur: ms * 1000, args: { frame }
+            });
+            cursor += ms;
+        });
+
+        perLabel.forEach((ms, label) => this.record(label, ms));
+        this.record('frame', total);
+        this.frameTotals.push(total);
+
+        if (this.frameTotals.length > 64) this.frameTotals.splice(0, this.frameTotals.length - 64);
+        if (this.traceEvents.length > this.maxTraceEvents) {
+            this.traceEvents.splice(0, this.traceEvents.length - this.maxTraceEvents);
+        }
+    }
+
+    takeFrameTotals() {
+        const totals = this.frameTotals;
+        this.frameTotals = [];
+        return totals;
+    }
+
+    // --- CPU SPANS (shader assembly, program link) ---
+    // ShaderCache.spans as trace events
+    compileEvents() {
+        return this.scene.shaderCache.spans.map(({ name, start, dur, args }) => ({
+            name, cat: 'compile', ph: 'X', pid: 1, tid: 2,
+            ts: (start - this.traceOrigin) * 1000, dur: dur * 1000, args
+        }));
+    }
+
+    // --- STATISTICS ---
+    record(label, ms) {
+        let ring = this.rings.get(label);
+        if (!ring) {
+            ring = { values: new Float64Array(this.historySize), count: 0, index: 0 };
+            this.rings.set(label, ring);
+        }
+        ring.values[ring.index] = ms;
+        ring.index = (ring.index + 1) % this.historySize;
+        ring.count = Math.min(ring.count + 1, this.historySize);
+    }
+
+    percentiles(label) {
+        const ring = this.rings.get(label);
+        if (!ring || ring.count === 0) return null;
+        const sorted = ring.values.slice(0, ring.count).sort();
+        const at = (p) => sorted[Math.min(ring.count - 1, Math.floor(p * ring.count))];
+        const last = ring.values[(ring.index - 1 + this.historySize) % this.historySize];
+        return {
+            n: ring.count,
+            last,
+            avg: sorted.reduce((a, b) => a + b, 0) / ring.count,
+            p50: at(0.5),
+            p95: at(0.95),
+            p99: at(0.99)
+        };
+    }
+
+    getStats() {
+        const passes = {};
+        this.rings.forEach((_, label) => { passes[label] = this.percentiles(label); });
+        return { enabled: this.enabled, supported: this.timer.supported, frames: this.frame, passes };
+    }
+
+    // --- TRACE EXPORT ---
+    exportTrace() {
+        const s = this.scene;
+        const gl = s.renderer.getContext();
+        const debugInfo = gl.getExtension('WEBGL_debug_renderer_info');
+
+        const meta = (tid, name) => ({ name: 'thread_name', ph: 'M', pid: 1, tid, args: { name } });
+        return {
+            traceEvents: [
+                { name: 'process_name', ph: 'M', pid: 1, args: { name: 'gfx-engine' } },
+                meta(1, 'GPU passes'),
+                meta(2, 'Shader compile'),
+                ...this.compileEvents(),
+                ...this.traceEvents
+            ],
+            displayTimeUnit: 'ms',
+            otherData: {
+                variantKey: s.lastShaderState,
+                resolution: `${s.renderWidth}x${s.renderHeight}`,
+                pixelRatio: s.renderer.getPixelRatio(),
+                renderScale: s.getRenderScale(),
+                postChain: s.postGraph?.planKey ?? null,
+                governor: s.governor?.getStats() ?? null,
+                gpu: debugInfo ? gl.getParameter(debugInfo.UNMASKED_RENDERER_WEBGL) : null,
+                userAgent: navigator.userAgent,
+                summary: this.getStats().passes
+            }
+        };
+    }
+
+    // --- HUD ---
+    showHud(visible) {
+        if (typeof document === 'undefined') return; // render worker: timings still go to the trace export
+        if (visible && !this.hud) {
+            this.hud = document.createElement('pre');
+            this.hud.id = 'profilerHud';
+            Object.assign(this.hud.style, {
+                position: 'fixed', top: '8px', left: '8px', margin: '0', padding: '6px 8px',
+                font: '11px monospace', color: '#4A9EFF', background: 'rgba(0, 0, 0, 0.6)',
+                borderRadius: '4px', pointerEvents: 'none', zIndex: '1000', whiteSpace: 'pre'
+            });
+            document.body.appendChild(this.hud);
+        }
+        if (this.hud) this.hud.style.display = visible ? 'block' : 'none';
+    }
+
+    updateHud() {
+        if (!this.hud) return;
+        if (!this.timer.supported) {
+            this.hud.textContent = 'GPU timer queries unavailable';
+            return;
+        }
+
+        const pad = (v, n) => String(v).padStart(n);
+        const fmt = (v) => pad(v.toFixed(2), 6);
+        const lines = [`${'GPU ms'.padEnd(28)}${pad('last', 6)} ${pad('p50', 6)} ${pad('p95', 6)} ${pad('p99', 6)}`];
+        this.rings.forEach((_, label) => {
+            const p = this.percentiles(label);
+            lines.push(`${label.slice(0, 27).padEnd(28)}${fmt(p.last)} ${fmt(p.p50)} ${fmt(p.p95)} ${fmt(p.p99)}`);
+        });
+        lines.push(`${this.scene.renderWidth}x${this.scene.renderHeight} · ${this.scene.lastShaderState}`);
+        this.hud.textContent = lines.join('\n');
+    }
+
+    toggle() {
+        this.enabled = !this.enabled;
+        if (!this.enabled) {
+            // Drop in-flight queries so nothing is left open against the governor's timer
+            this.timer.dispose();
+            this.frames.clear();
+            this.current = null;
+        }
+        this.showHud(this.enabled);
+        console.log(`⏱️ Profiler ${this.enabled ? 'ON 🟢' : 'OFF ⚪'}`);
+    }
+}
@@ -1,17 +1,18 @@
 import { SceneActions } from '../engine/SceneActions.js';
+import { LazyManagers } from './LazyManagers.js';
 
 export class InputManager {
-    constructor(scene, ui, exporter) {
+    // Export and gallery load on first use (scene.load, see LazyManagers)
+    constructor(scene, ui) {
         this.scene = scene;
         this.ui = ui;
-        this.exporter = exporter;
         this.lastX = 0;
         this.lastY = 0;
         this.isDragging = false;
         
         this.initKeyboard();
         this.initMouse();
-        this.initMIDI();
+        LazyManagers.idle(() => this.initMIDI()); // off the startup path
     }
 
     initKeyboard() {
@@ -19,10 +20,12 @@ export class InputManager {
             // console.log(`Key pressed: ${e.key}`)
             // e.preventDefault(); 
             if (e.key === 's') { 
-                this.exporter.takeScreenshot();
-                this.exporter.exportPreset();
+                this.scene.load('exporter').then((exporter) => {
+                    exporter.takeScreenshot();
+                    exporter.exportPreset();
+                });
             } else if (e.key === 'd') {         
-                this.exporter.toggleRecording(); 
+                this.scene.load('exporter').then(exporter => exporter.toggleRecording());
             } else if (e.key === '1' && !e.ctrlKey) {         
                 this.startFeedbackReset(); 
             } else if (e.key === '2' && !e.ctrlKey) {        
@@ -70,7 +73,29 @@ export class InputManager {
             } else if (e.key === '.') {
                 SceneActions.toggleFullscreen();
             } else if (e.key === 'g') {        
-                this.exporter.saveToServer();
+                this.scene.load('exporter').then(exporter => exporter.saveToServer());
+            } else if (e.key === 'G' && e.shiftKey) {
+                this.scene.governor.toggle();
+            } else if (e.key === 'P' && e.shiftKey) {
+                this.scene.load('profiler').then(profiler => profiler.toggle());
+            } else if (e.key === 'T' && e.shiftKey) {
+                this.scene.load('exporter').then(exporter => exporter.exportProfile());
+            } else if (e.key === ']') {
+                this.scene.setlist?.next();
+            } else if (e.key === '[') {
+                this.scene.setlist?.prev();
+            } else if (e.key === 'k') {
+                this.scene.toggleCheckerboard();
+            } else if (e.key === 'B' && e.shiftKey) {
+                this.scene.toggleBounds();
+            } else if (e.key === 'M' && e.shiftKey) {
+                this.scene.cycleConePrepass();
+            } else if (e.key === 'N' && e.shiftKey) {
+                this.scene.measureSteps();
+            } else if (e.key === 'V' && e.shiftKey) {
+                this.scene.toggleNoiseVolume();
+            } else if (e.key === 'Q' && e.shiftKey) {
+                SceneActions.cycleQuality(this.scene);
             } else if (e.key === 'p') { // full pause        
                 this.scene.togglePause();       
             } else if (e.key === 'o') {
@@ -184,7 +209,7 @@ export class InputManager {
 
     toggleGalleryMode() {
         // Delegate to GalleryManager
-        this.scene.gallery.toggleGalleryMode();
+        this.scene.toggleGalleryMode();
     }
 
     initMouse() {
@@ -200,13 +225,13 @@ export class InputManager {
             const dx = e.clientX - this.lastX;
             const dy = e.clientY - this.lastY;
             
-            // Camera Logic
-            this.scene.uniforms.u_camera_theta.value += dx * 0.01;
-            this.scene.uniforms.u_camera_phi.value -= dy * 0.01; // Inverted Y as requested
+            // Camera Logic (relative to any move still queued this frame)
+            const params = this.scene.params;
+            params.set('u_camera_theta', params.get('u_camera_theta') + dx * 0.01, { source: 'mouse' });
+            const phi = params.get('u_camera_phi') - dy * 0.01; // Inverted Y as requested
             
             // Clamp Phi
-            const phi = this.scene.uniforms.u_camera_phi.value;
-            this.scene.uniforms.u_camera_phi.value = Math.max(0.01, Math.min(3.14, phi));
+            params.set('u_camera_phi', Math.max(0.01, Math.min(3.14, phi)), { source: 'mouse' });
             
             this.lastX = e.clientX;
             this.lastY = e.clientY;
@@ -224,10 +249,14 @@ export class InputManager {
         });
     }
 
+    // Knobs only queue their values (ParameterScheduler), so a CC sweep costs one uniform write,
+    // one slider refresh and at most one rebuild check per frame
     handleMIDI(msg) {
         const [status, note, value] = msg.data;
         const type = status & 0xf0;
         const normalized = value / 127.0;
+        const params = this.scene.params;
+        const midi = { source: 'midi' };
 
         // Detect note-on and ignore note-off
         if (type === 0x90 && value > 0) {
@@ -251,12 +280,11 @@ export class InputManager {
                     break;
                 case 40: // pad 5 - random shape
                     const shapeIndex = Math.floor(Math.random() * 9);
-                    this.scene.uniforms.u_shape_type.value = shapeIndex;
-                    this.scene.rebuildMaterial();
+                    params.set('u_shape_type', shapeIndex, midi);
                     break;
                 case 41: // pad 6 - toggle mirror X
-                    this.scene.uniforms.u_mirror_x.value = this.scene.uniforms.u_mirror_x.value === 1.0 ? 0.0 : 1.0;
-                    this.scene.uniforms.u_mirror_y.value = this.scene.uniforms.u_mirror_y.value === 1.0 ? 0.0 : 1.0;
+                    params.set('u_mirror_x', params.get('u_mirror_x') === 1.0 ? 0.0 : 1.0, midi);
+                    params.set('u_mirror_y', params.get('u_mirror_y') === 1.0 ? 0.0 : 1.0, midi);
                     break;
                 case 42: // pad 7 - cycle color type
                     // this.scene.uniforms.u_color_type.value = (this.scene.uniforms.u_color_type.value + 1) % 13;
@@ -264,52 +292,44 @@ export class InputManager {
                     SceneActions.toggleColorMode(this.scene);
                     break;
                 case 43: // pad 8 - cycle crunch type
-                    const crunchIndex = (this.scene.uniforms.u_crunch_type.value + 1) % 12;
-                    this.scene.uniforms.u_crunch_type.value = crunchIndex;
-                    this.scene.rebuildMaterial();
+                    const crunchIndex = (params.get('u_crunch_type') + 1) % 12;
+                    params.set('u_crunch_type', crunchIndex, midi);
                     break;
                 default:
                     console.log(`No action assigned for MIDI note ${note}`);
             }
+            this.ui.updateDisplay(); // pads run SceneActions, which write uniforms directly
         }
 
         // Handle knobs (Control Change)
         if (type === 0xb0) {
             switch (note) {
+                // The UV feedback pass reads these through scene.uvFeedbackUniforms, same objects
                 case 70:
-                    this.scene.uniforms.u_uv_feedback_opacity.value = normalized;
-                    if (this.scene.uvFeedbackMaterial) {
-                        this.scene.uvFeedbackMaterial.uniforms.u_opacity.value = normalized;
-                    }
+                    params.set('u_uv_feedback_opacity', normalized, midi);
                     break;
                 case 71:
-                    this.scene.uniforms.u_uv_feedback_distort.value = normalized * 0.5;
-                    if (this.scene.uvFeedbackMaterial) {
-                        this.scene.uvFeedbackMaterial.uniforms.u_distort.value = normalized * 0.5;
-                    }
+                    params.set('u_uv_feedback_distort', normalized * 0.5, midi);
                     break;
                 case 72:
-                    this.scene.uniforms.u_warp_amplitude.value = normalized;
+                    params.set('u_warp_amplitude', normalized, midi);
                     break;
                 case 73:
-                    this.scene.uniforms.u_fractal_halving_z_base.value = normalized > 0 ? normalized * 10.0 : 0.01;
+                    params.set('u_fractal_halving_z_base', normalized > 0 ? normalized * 10.0 : 0.01, midi);
                     break;
                 case 74:
-                    this.scene.uniforms.u_twist.value = (normalized - 0.5) * 2.0;
+                    params.set('u_twist', (normalized - 0.5) * 2.0, midi);
                     break;
                 case 75:
-                    this.scene.uniforms.u_crunch.value = normalized;
+                    params.set('u_crunch', normalized, midi);
                     break;
                 case 76:
-                    this.scene.uniforms.u_box_size.value = normalized * 0.5;
+                    params.set('u_box_size', normalized * 0.5, midi);
                     break;
                 case 77:
-                    this.scene.speed = normalized * 2.0;
+                    params.call('speed', () => { this.scene.speed = normalized * 2.0; }, midi);
                     break;
             }
-            console.log(`MIDI CC ${note}: ${normalized.toFixed(2)}`);
         }
-
-        this.ui.updateDisplay();
     }
 }
@@ -0,0 +1,66 @@
+// Managers the first frame doesn't need. Each one's module is imported, and the manager
+// constructed on its owner (the scene, or RenderHost in render-worker mode), the first time
+// something asks for it, so none of them is in the entry chunk or on the startup path.
+// A name the owner already has (RenderHost's proxies to the worker's managers) resolves to that.
+export class LazyManagers {
+    static MODULES = {
+        exporter: () => import('./ExportManager.js').then(m => m.ExportManager),
+        gallery: () => import('./GalleryManager.js').then(m => m.GalleryManager),
+        touch: () => import('./TouchManager.js').then(m => m.TouchManager),
+        sync: () => import('./SyncManager.js').then(m => m.SyncManager),
+        // Opt-in tools, loaded by whatever uses them: a setlist import, the profiler key or
+        // ?profile=1, ?bench=, ?render=offline, the noise volume
+        setlist: () => import('./SetlistManager.js').then(m => m.SetlistManager),
+        profiler: () => import('./GpuProfiler.js').then(m => m.GpuProfiler),
+        qualityBench: () => import('./QualityBenchmark.js').then(m => m.QualityBenchmark),
+        offlineRenderer: () => import('./OfflineRenderer.js').then(m => m.OfflineRenderer),
+        noiseBaker: () => import('../engine/NoiseBaker.js').then(m => m.NoiseBaker)
+    };
+
+    // Constructor argument of the managers that aren't built from their owner
+    static ARGS = { noiseBaker: owner => owner.noiseOptions };
+
+    // Constructed after these (presets carry the gallery settings)
+    static REQUIRES = { exporter: ['gallery'] };
+
+    constructor(owner) {
+        this.owner = owner;
+        this.loads = new Map(); // name -> Promise<manager>
+    }
+
+    // Resolves to owner[name], importing and constructing it the first time
+    load(name) {
+        let load = this.loads.get(name);
+        if (!load && this.owner[name]) return Promise.resolve(this.owner[name]);
+        if (!load) {
+            const requires = LazyManagers.REQUIRES[name] ?? [];
+            const args = LazyManagers.ARGS[name] ?? (owner => owner);
+            load = Promise.all([LazyManagers.MODULES[name](), ...requires.map(r => this.load(r))])
+                .then(([Manager]) => (this.owner[name] = new Manager(args(this.owner))));
+            load.catch((err) => {
+                console.error(`❌ Failed to load the ${name} manager:`, err);
+                this.loads.delete(name); // the next use tries again
+            });
+            this.loads.set(name, load);
+        }
+        return load;
+    }
+
+    // Once the page is interactive: sync right away for ?room= (a display joins its room as soon as
+    // it can), then at idle time export and gallery (their panel controls bind on construction)
+    // and touch on touch screens
+    loadDeferred() {
+        if (new URLSearchParams(this.owner.search).has('room')) {
+            this.load('sync').then(sync => sync.connectFromURL(), () => {});
+        }
+        LazyManagers.idle(() => {
+            this.load('exporter').catch(() => {});
+            if (navigator.maxTouchPoints > 0) this.load('touch').catch(() => {});
+        });
+    }
+
+    static idle(callback) {
+        if (typeof requestIdleCallback !== 'undefined') requestIdleCallback(callback, { timeout: 2000 });
+        else setTimeout(callback, 200);
+    }
+}
@@ -0,0 +1,346 @@
+import * as THREE from 'three';
+import { ShaderPass } from 'three/examples/jsm/postprocessing/ShaderPass.js';
+import { CopyShader } from 'three/examples/jsm/shaders/CopyShader.js';
+import { AsyncReadback } from '../engine/AsyncReadback.js';
+import { ExrEncoder } from '../engine/ExrEncoder.js';
+
+// Writes frames to server/frameserver.js, which stores them on disk
+export class FrameServerSink {
+    constructor(url) {
+        this.url = url.replace(/\/$/, '');
+    }
+
+    async write(name, blob) {
+        const res = await fetch(`${this.url}/frames/${encodeURIComponent(name)}`, { method: 'PUT', body: blob });
+        if (!res.ok) throw new Error(`Frame server rejected ${name}: ${res.status}`);
+    }
+
+    async close(summary) {
+        await fetch(`${this.url}/done`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(summary)
+        });
+    }
+}
+
+// Browser fallback: one download per frame (fine for short sequences)
+export class DownloadSink {
+    constructor(scene) {
+        this.scene = scene;
+    }
+
+    async write(name, blob) {
+        const exporter = await this.scene.load('exporter');
+        exporter.download(blob, name);
+    }
+}
+
+// Fixed-timestep frame-sequence renderer. Physics advance by exactly 1/fps per frame, independent of
+// requestAnimationFrame, and each frame is rendered at any resolution (tiled above the GL size limits),
+// read back through PBOs without stalling, then encoded and handed to a sink while later frames render.
+export class OfflineRenderer {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        this.maxInflight = options.maxInflight ?? 3; // frames rendered ahead of encoding/upload
+        this.margin = options.margin ?? 32;          // tile guard band for neighbour-sampling post passes
+
+        const gl = scene.renderer.getContext();
+        this.gl = gl;
+        this.maxSize = Math.min(
+            gl.getParameter(gl.MAX_TEXTURE_SIZE),
+            gl.getParameter(gl.MAX_RENDERBUFFER_SIZE),
+            ...gl.getParameter(gl.MAX_VIEWPORT_DIMS)
+        );
+
+        // --- STATE ---
+        this.readback = new AsyncReadback(gl);
+        this.copyPass = new ShaderPass(CopyShader);
+        this.outputTarget = null;
+        this.running = false;
+        this.cancelled = false;
+        this.status = { state: 'idle', frame: 0, frames: 0, error: null };
+    }
+
+    // options: width, height, fps, frames, preroll (frames rendered before the first output, to settle
+    // feedback), format ('png' | 'exr'), state (scene.getPhysicsState() to start from), tileSize (forces
+    // tiling, e.g. to keep each draw under the GPU watchdog on software GL), sink, prefix, onProgress
+    async render(options = {}) {
+        if (this.running) throw new Error('Offline render already running');
+        const {
+            width = 3840, height = 2160, fps = 60, frames = 600, preroll = 0, format = 'png',
+            state = null, sink = new DownloadSink(this.scene), prefix = 'frame', onProgress = null
+        } = options;
+
+        const tileSize = Math.min(options.tileSize ?? 4096, this.maxSize);
+        const tiled = options.tileSize !== undefined || width > this.maxSize || height > this.maxSize;
+        if (tiled) this.checkTileable(tileSize);
+
+        const s = this.scene;
+        this.running = true;
+        this.cancelled = false;
+        Object.assign(this.status, { state: 'rendering', frame: 0, frames, error: null });
+        const saved = this.enter();
+        const t0 = performance.now();
+
+        try {
+            if (state) s.setPhysicsState(state);
+            const layout = tiled ? this.layoutTiles(width, height, tileSize) : this.layoutSingle(width, height);
+            s.resetHistory();
+
+            const dt = 1 / fps;
+            for (let i = 0; i < preroll; i++) {
+                this.renderFrame(layout, null);
+                s.stepPhysics(dt);
+            }
+
+            console.log(`🎞️ Offline render: ${frames} frames at ${width}x${height}, ${fps}fps, ${format}${tiled ? `, ${layout.tiles.length} tiles` : ''}`);
+            const inflight = [];
+            for (let f = 0; f < frames && !this.cancelled; f++) {
+                const name = `${prefix}_${String(f).padStart(5, '0')}.${format}`;
+                inflight.push(this.renderFrame(layout, format)
+                    .then(pixels => this.encode(pixels, width, height, format))
+                    .then(blob => sink.write(name, blob)));
+                if (inflight.length >= this.maxInflight) await inflight.shift();
+
+                s.stepPhysics(dt);
+                this.status.frame = f + 1;
+                onProgress?.(this.status);
+                if ((f + 1) % 30 === 0) {
+                    const fpsOut = (f + 1) / ((performance.now() - t0) / 1000);
+                    console.log(`🎞️ ${f + 1}/${frames} (${fpsOut.toFixed(2)} fps)`);
+                }
+            }
+            await Promise.all(inflight);
+
+            const seconds = (performance.now() - t0) / 1000;
+            this.status.state = this.cancelled ? 'cancelled' : 'done';
+            await sink.close?.({ frames: this.status.frame, width, height, fps, format, seconds });
+            console.log(`🎞️ Offline render ${this.status.state}: ${this.status.frame} frames in ${seconds.toFixed(1)}s`);
+        } catch (err) {
+            Object.assign(this.status, { state: 'error', error: err.message });
+            try { await sink.close?.({ error: err.message }); } catch { /* already failing */ }
+            throw err;
+        } finally {
+            this.leave(saved);
+            this.running = false;
+        }
+    }
+
+    cancel() {
+        this.cancelled = true;
+    }
+
+    // --- SCENE STATE ---
+    enter() {
+        const s = this.scene;
+        const composer = s.composer;
+        const saved = {
+            checkerboard: s.checkerboard,
+            debugUvFeedback: s.debugUvFeedback,
+            lodScale: s.uniforms.u_lod_scale.value,
+            pixelRatio: composer._pixelRatio,
+            renderToScreen: composer.renderToScreen,
+            physics: s.getPhysicsState()
+        };
+
+        s.offline = true;              // stops the rAF loop from drawing
+        s.checkerboard = false;        // realtime approximations off: every pixel traced, full step budget
+        s.debugUvFeedback = false;
+        s.uniforms.u_lod_scale.value = 1.0;
+        composer._pixelRatio = 1;      // output size is exactly what was asked for
+        composer.renderToScreen = false;
+        return saved;
+    }
+
+    leave(saved) {
+        const s = this.scene;
+        const composer = s.composer;
+
+        s.checkerboard = saved.checkerboard;
+        s.debugUvFeedback = saved.debugUvFeedback;
+        s.uniforms.u_lod_scale.value = saved.lodScale;
+        s.uniforms.u_tile.value.set(0, 0, 0, 0);
+        s.uvFeedbackUniforms.u_resolution = s.uniforms.u_resolution;
+        composer._pixelRatio = saved.pixelRatio;
+        composer.renderToScreen = saved.renderToScreen;
+        s.setPhysicsState(saved.physics);
+
+        if (this.outputTarget) {
+            s.targets.release(this.outputTarget, 'offline.output');
+            this.outputTarget = null;
+        }
+
+        s.offline = false;
+        s.lastFrameTime = performance.now(); // no giant deltaTime for the first live frame
+        s.onResize();
+    }
+
+    // --- LAYOUT ---
+    layoutSingle(width, height) {
+        this.scene.setRenderSize(width, height);
+        this.acquireOutput(width, height);
+        return { tiled: false, pad: 0, size: 0, tiles: [{ x: 0, y: 0, w: width, h: height }] };
+    }
+
+    // Frames above the GL limits are raymarched tile by tile. Every tile is rendered padded by a
+    // guard band (so blur/edge/normal taps near its border see real neighbours) at one fixed size,
+    // and only its centre is read back. The UV feedback field can't be that large either; it's kept
+    // at the largest size that fits and sampled by normalized coordinates as usual.
+    layoutTiles(width, height, tileSize) {
+        const s = this.scene;
+        const m = this.margin;
+        const size = tileSize;          // padded tile, what the composer renders
+        const inner = size - 2 * m;     // part of each tile that is kept
+
+        const fit = Math.min(1, this.maxSize / width, this.maxSize / height);
+        const fieldW = Math.floor(width * fit);
+        const fieldH = Math.floor(height * fit);
+        s.setRenderSize(fieldW, fieldH);
+        s.uvFeedbackUniforms.u_resolution = { value: new THREE.Vector2(fieldW, fieldH) };
+        s.uniforms.u_resolution.value.set(width, height); // raymarch camera/aspect use the full frame
+
+        // Composer + post passes work on one padded tile
+        s.renderWidth = size;
+        s.renderHeight = size;
+        [s.normalsPass, s.edgePass, s.colorGradingPass].forEach(pass => pass.uniforms.u_resolution.value.set(size, size));
+        s.resizeComposer(size, size);
+        this.acquireOutput(size, size);
+
+        const tiles = [];
+        for (let y = 0; y < height; y += inner) {
+            for (let x = 0; x < width; x += inner) {
+                tiles.push({ x, y, w: Math.min(inner, width - x), h: Math.min(inner, height - y) });
+            }
+        }
+        return { tiled: true, pad: m, size, tiles };
+    }
+
+    checkTileable(tileSize) {
+        const s = this.scene;
+        // Each tile keeps size - 2 * margin pixels; with nothing kept the tile loops never advance
+        if (!Number.isFinite(tileSize) || tileSize <= 2 * this.margin) {
+            throw new Error(`Tile size ${tileSize} leaves no pixels inside the ${this.margin}px guard band; use a tile size above ${2 * this.margin}`);
+        }
+        if (s.uniforms.u_feedback_opacity.value > 0) {
+            throw new Error('Raymarch feedback needs a full-frame history buffer and cannot be tiled; render below the GL size limit or set feedback opacity to 0');
+        }
+        if (s.colorGradingPass.uniforms.u_border_thickness.value > 0) {
+            throw new Error('The color grading border would be drawn around every tile; set border thickness to 0 for tiled renders');
+        }
+        if (s.bloomPass.strength > 0) {
+            console.warn('⚠️ Bloom is evaluated per tile (with a guard band); faint seams are possible');
+        }
+    }
+
+    acquireOutput(width, height) {
+        const s = this.scene;
+        if (this.outputTarget) s.targets.release(this.outputTarget, 'offline.output');
+        this.outputTarget = s.targets.acquire('offline.output', width, height, { depthBuffer: false });
+    }
+
+    // --- FRAME ---
+    // format null: render only (preroll). Otherwise resolves to the frame's RGBA pixels, bottom-up.
+    renderFrame(layout, format) {
+        const s = this.scene;
+        s.renderUvFeedback(); // once per frame: the field covers the whole frame
+
+        const reads = layout.tiles.map(tile => {
+            if (layout.tiled) {
+                s.uniforms.u_tile.value.set(tile.x - layout.pad, tile.y - layout.pad, layout.size, layout.size);
+            }
+            s.renderMain();
+            return format ? this.readTile(tile, layout.pad, format) : null;
+        });
+        s.renderer.setRenderTarget(null);
+        if (!format) return null;
+
+        if (!layout.tiled) return reads[0];
+        return Promise.all(reads).then(parts => {
+            const { width, height } = this.frameSize(layout);
+            const frame = new parts[0].constructor(width * height * 4);
+            layout.tiles.forEach((tile, i) => {
+                const rowLength = tile.w * 4;
+                for (let r = 0; r < tile.h; r++) {
+                    frame.set(parts[i].subarray(r * rowLength, (r + 1) * rowLength), ((tile.y + r) * width + tile.x) * 4);
+                }
+            });
+            return frame;
+        });
+    }
+
+    frameSize(layout) {
+        const last = layout.tiles[layout.tiles.length - 1];
+        return { width: last.x + last.w, height: last.y + last.h };
+    }
+
+    readTile(tile, pad, format) {
+        const s = this.scene;
+        const gl = this.gl;
+        const source = s.composer.readBuffer; // the composer leaves its final output here
+
+        if (format === 'exr') {
+            // Straight from the HalfFloat chain: linear and unclamped
+            s.renderer.setRenderTarget(source);
+            return this.readback.read(pad, pad, tile.w, tile.h, gl.FLOAT);
+        }
+
+        // 8-bit output: the GPU converts while copying, as it does when presenting to the canvas
+        this.copyPass.render(s.renderer, this.outputTarget, source);
+        s.renderer.setRenderTarget(this.outputTarget);
+        return this.readback.read(pad, pad, tile.w, tile.h, gl.UNSIGNED_BYTE);
+    }
+
+    async encode(pixels, width, height, format) {
+        if (format === 'exr') {
+            return new Blob([ExrEncoder.encode(pixels, width, height)], { type: 'image/x-exr' });
+        }
+
+        // GL rows are bottom-up, PNG rows top-down
+        const flipped = new Uint8ClampedArray(pixels.length);
+        const rowLength = width * 4;
+        for (let y = 0; y < height; y++) {
+            flipped.set(pixels.subarray(y * rowLength, (y + 1) * rowLength), (height - 1 - y) * rowLength);
+        }
+        const canvas = new OffscreenCanvas(width, height);
+        canvas.getContext('2d').putImageData(new ImageData(flipped, width, height), 0, 0);
+        return canvas.convertToBlob({ type: 'image/png' });
+    }
+
+    // --- HEADLESS ENTRY ---
+    // ?render=offline&width=3840&height=2160&fps=60&frames=600&format=png&frameServer=http://localhost:8090
+    // Used by server/render.js; progress is exposed on window.offlineRenderStatus.
+    async startFromURL() {
+        const params = new URLSearchParams(window.location.search);
+        if (params.get('render') !== 'offline') return;
+        window.offlineRenderStatus = this.status;
+
+        const num = (key, fallback) => params.has(key) ? Number(params.get(key)) : fallback;
+        const server = params.get('frameServer');
+        const sink = server ? new FrameServerSink(server) : new DownloadSink(this.scene);
+
+        try {
+            // The frame server can hand over a preset so the page URL stays short
+            if (server) {
+                const res = await fetch(`${server.replace(/\/$/, '')}/preset`);
+                if (res.ok) (await this.scene.load('exporter')).applyPreset(await res.json());
+            }
+
+            await this.render({
+                width: num('width', 3840),
+                height: num('height', 2160),
+                fps: num('fps', 60),
+                frames: num('frames', 600),
+                preroll: num('preroll', 0),
+                tileSize: params.has('tile') ? num('tile') : undefined,
+                format: params.get('format') || 'png',
+                sink
+            });
+        } catch (err) {
+            console.error('❌ Offline render failed:', err);
+            Object.assign(this.status, { state: 'error', error: err.message });
+        }
+    }
+}
@@ -0,0 +1,135 @@
+// Uniforms that feed the variant key, so a change may need a shader rebuild
+export const REBUILD_UNIFORMS = new Set(['u_shape_type', 'u_shape_mode', 'u_displacement_type', 'u_displacement_amp', 'u_sdf_effect_type', 'u_color_type', 'u_crunch_type']);
+
+// Frame-coalesced parameter writes. UI sliders, MIDI, touch/mouse and sync all queue changes here
+// instead of writing uniforms directly; flush() applies them once per animate() tick (last write
+// per uniform wins), sends them to the sync room, refreshes only the sliders whose uniforms changed
+// in one rAF-batched DOM pass, and debounces variant rebuilds so a knob sweep through shape types
+// compiles the first and the last one, not every step.
+export class ParameterScheduler {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        const params = new URLSearchParams(scene.search);
+        this.rebuildSettleMs = options.rebuildSettleMs ?? (parseFloat(params.get('rebuildSettle')) || 150);
+
+        // --- STATE ---
+        this.pending = new Map();   // uniform name (or name.component) -> { name, value, component, source, rebuild }
+        this.calls = new Map();     // key -> { fn, source }: non-uniform writes (speed, bloom, post pass uniforms)
+        this.dirtyUI = new Set();   // uniform names whose bound sliders need refreshing
+        this.fullRefresh = false;
+        this.uiFrame = 0;
+        this.rebuildRequested = false;
+        this.rebuildHoldUntil = 0;
+
+        // --- COUNTERS ---
+        this.received = 0;          // events queued since the last flush
+        this.frame = { received: 0, applied: 0, rebuilds: 0 };
+        this.totals = { received: 0, applied: 0, rebuilds: 0, uiPasses: 0 };
+    }
+
+    // --- INPUT ---
+    // Queue a uniform write. component picks one axis of a vector uniform; value may also be a
+    // whole vector ({x, y, z} or an array). Rebuild-key uniforms schedule a rebuild unless told otherwise.
+    set(name, value, { component = null, source = 'ui', rebuild = REBUILD_UNIFORMS.has(name) } = {}) {
+        this.received++;
+        const key = component === null ? name : `${name}.${component}`;
+        this.pending.set(key, { name, value, component, source, rebuild });
+    }
+
+    // Value a relative input (drag, pinch) should build on: the queued one if there is one
+    get(name, component = null) {
+        const key = component === null ? name : `${name}.${component}`;
+        if (this.pending.has(key)) return this.pending.get(key).value;
+        const value = this.scene.uniforms[name]?.value;
+        return component === null ? value : value?.getComponent(component);
+    }
+
+    // Queue a write that isn't a scene uniform; only the latest one per key runs
+    call(key, fn, { source = 'ui' } = {}) {
+        this.received++;
+        this.calls.set(key, { fn, source });
+    }
+
+    requestRebuild() {
+        this.rebuildRequested = true;
+    }
+
+    // Refresh every bound slider on the next DOM pass (after presets, resets, randomizers)
+    refreshDisplay() {
+        this.fullRefresh = true;
+        this.scheduleDisplay();
+    }
+
+    // --- FRAME ---
+    flush(now = performance.now()) {
+        const uniforms = this.scene.uniforms;
+        const sync = this.scene.sync?.isConnected ? this.scene.sync : null;
+        let applied = 0;
+
+        this.pending.forEach(({ name, value, component, source, rebuild }) => {
+            const uniform = uniforms[name];
+            if (!uniform) return;
+            const previous = uniform.value;
+
+            if (component !== null) {
+                uniform.value.setComponent(component, value);
+            } else if (previous?.isVector2 || previous?.isVector3 || previous?.isVector4) {
+                if (Array.isArray(value) || ArrayBuffer.isView(value)) previous.fromArray(value);
+                else previous.set(value.x, value.y, value.z, value.w);
+            } else {
+                uniform.value = value;
+            }
+            applied++;
+
+            if (rebuild && previous !== uniform.value) this.rebuildRequested = true;
+            // Remote changes aren't echoed back; the control a local change came from already shows it
+            if (source !== 'sync' && sync) sync.sendUniformUpdate(name, uniform.value);
+            if (source !== 'ui') this.dirtyUI.add(name);
+        });
+        this.pending.clear();
+
+        this.calls.forEach(({ fn, source }, key) => {
+            fn();
+            if (source !== 'ui') this.dirtyUI.add(key);
+        });
+        applied += this.calls.size;
+        this.calls.clear();
+
+        // Leading edge runs right away, anything requested during the settle window runs once after it
+        let rebuilds = 0;
+        if (this.rebuildRequested && now >= this.rebuildHoldUntil) {
+            this.rebuildRequested = false;
+            this.rebuildHoldUntil = now + this.rebuildSettleMs;
+            this.scene.rebuildMaterial();
+            rebuilds = 1;
+        }
+
+        if (!this.scene.ui) this.dirtyUI.clear(); // render worker: the sliders are on the main thread
+        else if (this.dirtyUI.size) this.scheduleDisplay();
+
+        this.frame = { received: this.received, applied, rebuilds };
+        this.totals.received += this.received;
+        this.totals.applied += applied;
+        this.totals.rebuilds += rebuilds;
+        this.received = 0;
+    }
+
+    // --- DISPLAY ---
+    scheduleDisplay() {
+        if (this.uiFrame) return;
+        this.uiFrame = requestAnimationFrame(() => {
+            this.uiFrame = 0;
+            const names = this.fullRefresh ? null : this.dirtyUI;
+            this.scene.ui?.syncDisplay(names);
+            this.dirtyUI = new Set();
+            this.fullRefresh = false;
+            this.totals.uiPasses++;
+        });
+    }
+
+    getStats() {
+        return { frame: { ...this.frame }, totals: { ...this.totals }, pending: this.pending.size + this.calls.size };
+    }
+}
@@ -0,0 +1,161 @@
+import { GpuTimer } from '../engine/GpuTimer.js';
+
+// Closed-loop quality governor: measures frame cost and walks a ladder of (render scale, step budget)
+// levels to hold a frame budget. The operator's resolutionScale / u_lod_quality stay the ceiling;
+// the governor only ever scales them down.
+export class PerformanceGovernor {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        const params = new URLSearchParams(scene.search);
+        this.enabled = options.enabled ?? params.get('governor') !== 'off';
+        this.budgetMs = options.budgetMs ?? (parseFloat(params.get('budget')) || 16.6);
+        this.downThreshold = options.downThreshold ?? 1.1;  // step down above budget * 1.1
+        this.upThreshold = options.upThreshold ?? 0.75;     // step up below budget * 0.75 (GPU timing only)
+        this.sampleWindow = options.sampleWindow ?? 30;     // frames averaged per decision
+        this.cooldownMs = options.cooldownMs ?? 1000;       // after a step-only change
+        this.resizeCooldownMs = options.resizeCooldownMs ?? 3000; // after a change that reallocates targets
+        this.upDelayMs = options.upDelayMs ?? 4000;         // sustained headroom needed before stepping up
+
+        // Cheap step-budget cuts come first; render scale (which resizes targets) only below that.
+        // Scales are quantized so a resize can only land on a handful of sizes.
+        this.levels = options.levels ?? [
+            { scale: 1.0, lod: 1.0 },
+            { scale: 1.0, lod: 0.85 },
+            { scale: 1.0, lod: 0.7 },
+            { scale: 0.9, lod: 0.7 },
+            { scale: 0.8, lod: 0.7 },
+            { scale: 0.8, lod: 0.55 },
+            { scale: 0.7, lod: 0.55 },
+            { scale: 0.6, lod: 0.5 },
+            { scale: 0.5, lod: 0.5 }
+        ];
+
+        // --- STATE ---
+        this.level = 0;
+        this.samples = [];
+        this.lastChange = 0;
+        this.lastChangeResized = false;
+        this.headroomSince = null;
+        this.failedUpgrades = 0; // backs off upgrades that immediately had to be undone
+        this.lastUpgradeAt = -Infinity;
+        this.gpuMs = null;
+        this.frameMs = null;
+
+        this.timer = new GpuTimer(scene.renderer.getContext());
+        console.log(`🎚️ Governor ${this.enabled ? 'on' : 'off'}: ${this.budgetMs}ms budget, ${this.timer.supported ? 'GPU timer queries' : 'frame-time fallback'}`);
+    }
+
+    get renderScale() {
+        return this.enabled ? this.levels[this.level].scale : 1.0;
+    }
+
+    get lodScale() {
+        return this.enabled ? this.levels[this.level].lod : 1.0;
+    }
+
+    beginFrame() {
+        // Timer queries can't nest: while the profiler times individual passes, use its frame totals
+        if (this.enabled && !this.scene.profiler?.enabled) this.timer.begin();
+    }
+
+    endFrame(deltaTime) {
+        if (!this.enabled) return;
+        this.timer.end();
+
+        const now = performance.now();
+        this.frameMs = deltaTime * 1000;
+
+        if (this.timer.supported) {
+            const profiler = this.scene.profiler;
+            const gpuTimes = this.timer.poll();
+            if (profiler?.enabled) gpuTimes.push(...profiler.takeFrameTotals());
+            gpuTimes.forEach(ms => {
+                this.gpuMs = ms;
+                this.samples.push(ms);
+            });
+        } else if (deltaTime > 0 && deltaTime < 0.25) {
+            // rAF is vsync-locked, so frame time can only show overload, never headroom
+            this.samples.push(this.frameMs);
+        }
+
+        if (this.samples.length > this.sampleWindow) {
+            this.samples.splice(0, this.samples.length - this.sampleWindow);
+        }
+        if (this.samples.length < this.sampleWindow) return;
+
+        const cooldown = this.lastChangeResized ? this.resizeCooldownMs : this.cooldownMs;
+        if (now - this.lastChange < cooldown) return;
+
+        const avg = this.samples.reduce((a, b) => a + b, 0) / this.samples.length;
+
+        if (avg > this.budgetMs * this.downThreshold) {
+            this.headroomSince = null;
+            if (now - this.lastUpgradeAt < this.resizeCooldownMs * 2) this.failedUpgrades++;
+            this.setLevel(this.level + 1, now);
+            return;
+        }
+
+        // Without GPU timing, "at budget" is the best headroom signal available
+        const headroom = this.timer.supported
+            ? avg < this.budgetMs * this.upThreshold
+            : avg < this.budgetMs * 1.05;
+
+        if (!headroom || this.level === 0) {
+            this.headroomSince = null;
+            return;
+        }
+
+        this.headroomSince ??= now;
+        const upDelay = this.upDelayMs * Math.pow(2, Math.min(this.failedUpgrades, 4));
+        if (now - this.headroomSince >= upDelay) {
+            this.headroomSince = null;
+            this.lastUpgradeAt = now;
+            this.setLevel(this.level - 1, now);
+        }
+    }
+
+    setLevel(level, now = performance.now()) {
+        level = Math.max(0, Math.min(this.levels.length - 1, level));
+        if (level === this.level) return;
+
+        const prev = this.levels[this.level];
+        const next = this.levels[level];
+        this.level = level;
+        this.lastChange = now;
+        this.lastChangeResized = prev.scale !== next.scale;
+        this.samples = []; // measurements from the old level no longer apply
+
+        this.scene.uniforms.u_lod_scale.value = next.lod;
+        if (this.lastChangeResized) this.scene.onResize();
+
+        console.log(`🎚️ Governor level ${level}: scale ${next.scale}, steps ×${next.lod}`);
+    }
+
+    toggle() {
+        this.enabled = !this.enabled;
+        this.samples = [];
+        this.headroomSince = null;
+        this.failedUpgrades = 0;
+
+        // Hand full quality back to the operator's settings when switched off
+        const resized = this.levels[this.level].scale !== 1.0;
+        this.level = 0;
+        this.scene.uniforms.u_lod_scale.value = 1.0;
+        if (resized) this.scene.onResize();
+
+        console.log(`🎚️ Governor ${this.enabled ? 'ON 🟢' : 'OFF ⚪'}`);
+    }
+
+    getStats() {
+        return {
+            enabled: this.enabled,
+            level: this.level,
+            renderScale: this.renderScale,
+            lodScale: this.lodScale,
+            gpuMs: this.gpuMs,
+            frameMs: this.frameMs
+        };
+    }
+}
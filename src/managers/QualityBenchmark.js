@@ -0,0 +1,217 @@
+import { GpuTimer } from '../engine/GpuTimer.js';
+import { ShaderAssembler } from '../engine/ShaderAssembler.js';
+
+// Frame cost of every quality tier on every shape, so each install can pick the tier its GPU holds
+// at frame rate, and optionally of the baked noise volume against procedural noise, with how far
+// the image moves. Takes over the loop like OfflineRenderer, with the governor off (it would scale
+// the very cost being measured), and draws a fixed frame: physics don't advance. Frames are timed
+// with GPU timer queries, or where those are missing with the CPU time of a draw followed by a
+// 1x1 readPixels (which waits for the GPU). Start from the console with scene.qualityBench.run(),
+// or with ?bench=quality / ?bench=noise, which leave the report in window.qualityBenchResults.
+export class QualityBenchmark {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        this.warmupFrames = options.warmupFrames ?? 10; // untimed, after each switch (driver warm-up, feedback settling)
+        this.frames = options.frames ?? 60;            // timed frames per (tier, shape)
+        this.shapes = options.shapes ?? Array.from({ length: 13 }, (_, i) => i);
+
+        // --- STATE ---
+        this.timer = new GpuTimer(scene.renderer.getContext(), { maxPending: 8 });
+        this.running = false;
+        this.results = [];
+        this.status = { state: 'idle', done: 0, total: 0, error: null };
+    }
+
+    // Resolves to [{ tier, noise, shape, key, median, p95, n, gpu }] in ms, one row per (tier, noise
+    // source, shape). noise: [false, true] benchmarks both sources; each volume row then also has
+    // diff, its frame's mean absolute difference from the procedural one (0-255), and psnr in dB.
+    async run({ tiers = ShaderAssembler.TIERS, shapes = this.shapes, frames = this.frames, noise = [this.scene.noiseVolume] } = {}) {
+        if (this.running) throw new Error('Quality benchmark already running');
+        const s = this.scene;
+        const compare = noise.includes(false) && noise.includes(true);
+        if (compare) noise = [false, true]; // references first
+        this.running = true;
+        this.results = [];
+        Object.assign(this.status, { state: 'running', done: 0, total: tiers.length * noise.length * shapes.length, error: null });
+        const saved = this.enter();
+        console.log(`📊 Quality benchmark: ${tiers.join('/')}${compare ? ' × procedural/volume noise' : ''} × ${shapes.length} shapes, ${frames} frames each at ${s.renderWidth}x${s.renderHeight} (${this.timer.supported ? 'GPU timer queries' : 'CPU time + readPixels'})`);
+
+        try {
+            const references = new Map(); // `${tier}:${shape}` -> procedural frame
+            for (const tier of tiers) {
+                await s.setQuality(tier);
+                for (const noiseVolume of noise) {
+                    await s.setNoiseVolume(noiseVolume);
+                    for (const shape of shapes) {
+                        s.uniforms.u_shape_type.value = shape;
+                        const state = s.getVariantState();
+                        s.showVariant(await s.shaderCache.request(state));
+
+                        s.resetHistory(); // both noise sources start from the same feedback state
+                        for (let i = 0; i < this.warmupFrames; i++) s.renderFrame();
+                        const times = this.timer.supported ? await this.timeGpu(frames) : this.timeCpu(frames);
+                        const row = {
+                            tier,
+                            noise: noiseVolume ? 'volume' : 'procedural',
+                            shape: ShaderAssembler.getShapeKey(shape),
+                            key: ShaderAssembler.getVariantKey(state),
+                            ...QualityBenchmark.summarize(times),
+                            gpu: this.timer.supported
+                        };
+                        if (compare) {
+                            const pixels = this.capture();
+                            if (!noiseVolume) references.set(`${tier}:${shape}`, pixels);
+                            else Object.assign(row, QualityBenchmark.difference(references.get(`${tier}:${shape}`), pixels));
+                        }
+                        this.results.push(row);
+                        this.status.done++;
+                        await QualityBenchmark.nextFrame(); // let the page breathe between shapes
+                    }
+                }
+            }
+            this.status.state = 'done';
+            this.report();
+            return this.results;
+        } catch (err) {
+            Object.assign(this.status, { state: 'error', error: err.message });
+            throw err;
+        } finally {
+            await this.leave(saved);
+            this.running = false;
+        }
+    }
+
+    // --- SCENE STATE ---
+    enter() {
+        const s = this.scene;
+        const saved = {
+            quality: s.quality,
+            noiseVolume: s.noiseVolume,
+            shapeType: s.uniforms.u_shape_type.value,
+            governor: s.governor.enabled,
+            profiler: s.profiler?.enabled ?? false,
+            physics: s.getPhysicsState()
+        };
+        s.offline = true;             // the rAF loop stops drawing
+        s.governor.enabled = false;   // full render scale and step budget
+        if (s.profiler) s.profiler.enabled = false; // its timer queries would overlap ours (one may be open at a time)
+        s.onResize();
+        return saved;
+    }
+
+    async leave(saved) {
+        const s = this.scene;
+        s.uniforms.u_shape_type.value = saved.shapeType;
+        await s.setQuality(saved.quality);
+        await s.setNoiseVolume(saved.noiseVolume);
+        s.setPhysicsState(saved.physics);
+        s.governor.enabled = saved.governor;
+        if (s.profiler) s.profiler.enabled = saved.profiler;
+        s.offline = false;
+        s.lastFrameTime = performance.now(); // no giant deltaTime for the first live frame
+        s.onResize();
+    }
+
+    // --- TIMING ---
+    // Queries resolve a few frames late, so frames are drawn one per animation frame and collected
+    // as they come back; a disjoint event drops the ones in flight, which are drawn again
+    async timeGpu(frames) {
+        const times = [];
+        let drawn = 0;
+        for (let guard = 0; times.length < frames && guard < frames * 20; guard++) {
+            if (drawn < frames && this.timer.begin()) {
+                this.scene.renderFrame();
+                this.timer.end();
+                drawn++;
+            }
+            await QualityBenchmark.nextFrame();
+            times.push(...this.timer.poll());
+            if (this.timer.disjoint) drawn = times.length;
+        }
+        return times;
+    }
+
+    timeCpu(frames) {
+        const gl = this.scene.renderer.getContext();
+        const pixel = new Uint8Array(4);
+        const times = [];
+        for (let i = 0; i < frames; i++) {
+            const t0 = performance.now();
+            this.scene.renderFrame();
+            gl.readPixels(0, 0, 1, 1, gl.RGBA, gl.UNSIGNED_BYTE, pixel);
+            times.push(performance.now() - t0);
+        }
+        return times;
+    }
+
+    // One more frame, read back whole (RGBA8)
+    capture() {
+        const gl = this.scene.renderer.getContext();
+        this.scene.renderFrame();
+        const pixels = new Uint8Array(gl.drawingBufferWidth * gl.drawingBufferHeight * 4);
+        gl.readPixels(0, 0, gl.drawingBufferWidth, gl.drawingBufferHeight, gl.RGBA, gl.UNSIGNED_BYTE, pixels);
+        return pixels;
+    }
+
+    // Over RGB: mean absolute difference and PSNR
+    static difference(a, b) {
+        let sum = 0;
+        let sq = 0;
+        for (let i = 0; i < a.length; i++) {
+            if ((i & 3) === 3) continue;
+            const d = a[i] - b[i];
+            sum += Math.abs(d);
+            sq += d * d;
+        }
+        const n = a.length * 0.75;
+        const mse = sq / n;
+        return { diff: sum / n, psnr: mse > 0 ? 10 * Math.log10(255 * 255 / mse) : Infinity };
+    }
+
+    static summarize(times) {
+        const sorted = Float64Array.from(times).sort();
+        const at = (p) => sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+        return { median: at(0.5), p95: at(0.95), n: sorted.length };
+    }
+
+    static nextFrame() {
+        return new Promise(resolve => (typeof requestAnimationFrame !== 'undefined' ? requestAnimationFrame(() => resolve()) : setTimeout(resolve, 16)));
+    }
+
+    // --- REPORT ---
+    report() {
+        console.table(this.results.map(r => ({
+            tier: r.tier, noise: r.noise, shape: r.shape, median: +r.median.toFixed(2), p95: +r.p95.toFixed(2), n: r.n,
+            ...(r.diff !== undefined ? { diff: +r.diff.toFixed(2), psnr: +r.psnr.toFixed(1) } : {})
+        })));
+
+        // Slowest shape per tier: the tier an install can hold is the one whose worst case fits its budget
+        const budget = this.scene.governor.budgetMs;
+        [...new Set(this.results.map(r => `${r.tier}:${r.noise}`))].forEach(group => {
+            const [tier, noise] = group.split(':');
+            const rows = this.results.filter(r => r.tier === tier && r.noise === noise);
+            const worst = rows.reduce((a, b) => (b.p95 > a.p95 ? b : a));
+            const quality = rows[0].diff !== undefined ? `, avg PSNR ${(rows.reduce((n, r) => n + Math.min(r.psnr, 99), 0) / rows.length).toFixed(1)}dB vs procedural` : '';
+            console.log(`📊 ${tier.padEnd(5)} ${noise.padEnd(10)} worst p95 ${worst.p95.toFixed(2)}ms (${worst.shape}) ${worst.p95 <= budget ? '🟢' : '🔴'} ${budget}ms budget${quality}`);
+        });
+    }
+
+    // ?bench=quality (every tier) | ?bench=noise (current tier, procedural vs volume), [&benchFrames=N]
+    async startFromURL() {
+        const params = new URLSearchParams(this.scene.search);
+        const bench = params.get('bench');
+        if (bench !== 'quality' && bench !== 'noise') return;
+        globalThis.qualityBenchStatus = this.status;
+
+        const frames = parseInt(params.get('benchFrames'), 10) || this.frames;
+        try {
+            globalThis.qualityBenchResults = await this.run(bench === 'noise'
+                ? { tiers: [this.scene.quality], noise: [false, true], frames }
+                : { frames });
+        } catch (err) {
+            console.error('❌ Quality benchmark failed:', err);
+        }
+    }
+}
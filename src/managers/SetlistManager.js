@@ -0,0 +1,409 @@
+import * as THREE from 'three';
+import { REBUILD_UNIFORMS } from './ParameterScheduler.js';
+import { ShaderAssembler } from '../engine/ShaderAssembler.js';
+import { SceneUniforms } from '../engine/SceneUniforms.js';
+
+const AXES = ['x', 'y', 'z', 'w'];
+
+// How a slot moves during a fade
+const LERP = 0;     // linear in the fade
+const AT_HALF = 1;  // integer uniforms (loop counts, blend modes) switch once, halfway through
+const AT_START = 2; // variant uniforms: the incoming program is compiled for the new values
+
+// Post-pass parameters a preset carries: [preset section, key, pass, uniform (null: pass field), component]
+const POST_SLOTS = [
+    ['bloom', 'strength', 'bloomPass', null],
+    ['bloom', 'radius', 'bloomPass', null],
+    ['bloom', 'threshold', 'bloomPass', null],
+    ['normals', 'strength', 'normalsPass', 'u_normal_strength'],
+    ['normals', 'blend', 'normalsPass', 'u_normal_blend'],
+    ['normals', 'roughness', 'normalsPass', 'u_roughness'],
+    ['normals', 'F0', 'normalsPass', 'u_F0'],
+    ['normals', 'diffuseScale', 'normalsPass', 'u_diffuse_scale'],
+    ['normals', 'specularScale', 'normalsPass', 'u_specular_scale'],
+    ['colorGrading', 'contrast', 'colorGradingPass', 'contrast'],
+    ['colorGrading', 'saturation', 'colorGradingPass', 'saturation'],
+    ['colorGrading', 'brightness', 'colorGradingPass', 'brightness'],
+    ['colorGrading', 'gamma', 'colorGradingPass', 'gamma'],
+    ['colorGrading', 'hueShift', 'colorGradingPass', 'hueShift'],
+    ['colorGrading', 'solarizeMix', 'colorGradingPass', 'solarizeMix'],
+    ['colorGrading', 'solarizeLightThresh', 'colorGradingPass', 'solarizeLightThresh'],
+    ['colorGrading', 'solarizeLightSoft', 'colorGradingPass', 'solarizeLightSoft'],
+    ['colorGrading', 'solarizeDarkThresh', 'colorGradingPass', 'solarizeDarkThresh'],
+    ['colorGrading', 'solarizeDarkSoft', 'colorGradingPass', 'solarizeDarkSoft'],
+    ['colorGrading', 'borderThickness', 'colorGradingPass', 'u_border_thickness'],
+    ['colorGrading', 'borderColor', 'colorGradingPass', 'u_border_color', 'x'],
+    ['colorGrading', 'borderColor', 'colorGradingPass', 'u_border_color', 'y'],
+    ['colorGrading', 'borderColor', 'colorGradingPass', 'u_border_color', 'z'],
+    ['edge', 'strength', 'edgePass', 'u_edge_strength'],
+    ['edge', 'threshold', 'edgePass', 'u_edge_threshold'],
+    ['edge', 'sharpenStrength', 'edgePass', 'u_sharpen_strength'],
+    ['edge', 'colorR', 'edgePass', 'u_edge_color', 'x'],
+    ['edge', 'colorG', 'edgePass', 'u_edge_color', 'y'],
+    ['edge', 'colorB', 'edgePass', 'u_edge_color', 'z'],
+    ['postEffects', 'ditherStrength', 'postEffectsPass', 'u_dither_strength'],
+    ['postEffects', 'ditherScale', 'postEffectsPass', 'u_dither_scale'],
+    ['postEffects', 'rgbSplit', 'postEffectsPass', 'u_rgb_split']
+];
+
+// The scene's UI binding objects for each preset section (what applyPreset fills in)
+const POST_PARAMS = {
+    bloom: 'bloomParams', normals: 'normalsParams', colorGrading: 'colorParams',
+    edge: 'edgeParams', postEffects: 'postEffectsParams'
+};
+
+// An ordered list of presets for a live show. Loading one compiles every preset's shader variant and
+// the post chains it will plan ahead of time, so a switch never waits on a link. Switching crossfades
+// over fadeFrames: the outgoing variant keeps drawing into a pooled target, the post graph's
+// 'crossfade' stage blends it under the incoming one, and every preset value the two share moves
+// from one to the other. Values are flattened once into slots ({ object, key } pairs over the
+// uniforms, pass uniforms and bloom fields), so a fade frame is a loop over two Float64Arrays.
+// Motion integrators keep running through a fade; presets' stored phases are not applied, since
+// jumping them is exactly the cut a crossfade is meant to avoid.
+export class SetlistManager {
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        const params = new URLSearchParams(scene.search);
+        this.fadeFrames = options.fadeFrames ?? (parseInt(params.get('fadeFrames'), 10) || 90);
+
+        // --- STATE ---
+        this.slots = null;       // [{ object, key, source, uniform, params }], built on first load
+        this.modes = null;       // Uint8Array of LERP / AT_HALF / AT_START per slot
+        this.entries = [];       // per preset: { name, preset, state, key, indices, values }
+        this.index = -1;
+        this.fade = null;        // { material, frame, from, to } while crossfading
+        this.target = null;      // pooled target the outgoing variant draws into
+        this.report = null;
+    }
+
+    get isFading() {
+        return this.fade !== null;
+    }
+
+    // --- LOADING ---
+    // presets: preset objects as saved by ExportManager, in show order. Resolves with the warm-up report.
+    async load(presets) {
+        this.cancelFade();
+        if (!this.slots) this.buildSlots();
+        this.entries = presets.filter(p => p?.uniforms).map((preset, i) => this.compilePreset(preset, i));
+        this.index = -1;
+        if (this.entries.length === 0) {
+            console.warn('⚠️ Setlist has no usable presets');
+            return null;
+        }
+        return this.warm();
+    }
+
+    unload() {
+        this.cancelFade();
+        this.entries = [];
+        this.index = -1;
+        this.report = null;
+        this.scene.shaderCache.pin([]);
+        if (this.target) {
+            this.scene.targets.release(this.target, 'crossfade');
+            this.target = null;
+        }
+    }
+
+    // Every value a preset can carry, in a fixed order
+    buildSlots() {
+        const s = this.scene;
+        const integers = new Set();
+        s.uniformBlocks.blocks.forEach(block => block.members.forEach(m => {
+            if (m.integer) integers.add(block.source[m.name]);
+        }));
+
+        const slots = [];
+        const modes = [];
+        const add = (object, key, mode, source, { uniform = null, params = null } = {}) => {
+            slots.push({ object, key, source, uniform, params });
+            modes.push(mode);
+        };
+
+        add(s, 'speed', LERP, ['speed']);
+
+        const names = [
+            ...SceneUniforms.PRESET_UNIFORMS,
+            'u_palette_a', 'u_palette_b', 'u_palette_c', 'u_palette_d',
+            'u_uv_mirror_x', 'u_uv_mirror_y'
+        ];
+        names.forEach(name => {
+            const uniform = s.uniforms[name];
+            if (!uniform) return;
+            const mode = REBUILD_UNIFORMS.has(name) ? AT_START : (integers.has(uniform) ? AT_HALF : LERP);
+            const value = uniform.value;
+            if (typeof value === 'number' || typeof value === 'boolean') {
+                add(uniform, 'value', mode, [name], { uniform: name });
+            } else if (value?.isVector2 || value?.isVector3 || value?.isVector4) {
+                AXES.filter(axis => axis in value).forEach(axis => add(value, axis, mode, [name, axis], { uniform: name }));
+            }
+        });
+
+        POST_SLOTS.forEach(([section, key, passName, uniform, component]) => {
+            const pass = s[passName];
+            // The border color is one Vector3 in colorParams, the edge color three scalars in edgeParams
+            const params = uniform === 'u_border_color' ? [s.colorParams.borderColor, component] : [s[POST_PARAMS[section]], key];
+            if (component) {
+                add(pass.uniforms[uniform].value, component, LERP, [section, key, component], { params });
+            } else if (uniform) {
+                add(pass.uniforms[uniform], 'value', LERP, [section, key], { params });
+            } else {
+                add(pass, key, LERP, [section, key], { params });
+            }
+        });
+
+        this.slots = slots;
+        this.modes = Uint8Array.from(modes);
+    }
+
+    // A preset as the slots it sets and their values; unset slots keep whatever is live at switch time
+    compilePreset(preset, i) {
+        const indices = [];
+        const values = [];
+        this.slots.forEach((slot, index) => {
+            const value = SetlistManager.presetValue(preset, slot.source);
+            if (value === undefined || value === null || !Number.isFinite(Number(value))) return;
+            indices.push(index);
+            values.push(Number(value));
+        });
+
+        const overrides = {};
+        REBUILD_UNIFORMS.forEach(name => {
+            if (preset.uniforms[name] !== undefined) overrides[name] = preset.uniforms[name];
+        });
+        if (preset.uniforms.u_fog_enabled !== undefined) overrides.u_fog_enabled = preset.uniforms.u_fog_enabled;
+
+        const state = this.scene.getVariantState(overrides);
+        return {
+            name: preset.name ?? `preset ${i + 1}`,
+            preset,
+            state,
+            key: ShaderAssembler.getVariantKey(state),
+            indices: Uint16Array.from(indices),
+            values: Float64Array.from(values)
+        };
+    }
+
+    // Looks up a slot's source path in a preset: ['speed'], [uniform, axis?] or [section, key, axis?]
+    static presetValue(preset, source) {
+        const U = preset.uniforms;
+        if (source[0] === 'speed') return U.speed;
+        if (source[0] in POST_PARAMS) {
+            const [section, key, axis] = source;
+            let value = preset[section]?.[key];
+            if (axis && typeof value === 'string') value = SetlistManager.hexComponents(value);
+            return axis ? value?.[axis] : value;
+        }
+        const [name, axis] = source;
+        return axis ? U[name]?.[axis] : U[name];
+    }
+
+    // '#rrggbb' as 0-1 components, as applyPreset reads border colors
+    static hexComponents(hex) {
+        const n = parseInt(hex.replace('#', ''), 16);
+        if (!Number.isFinite(n)) return null;
+        return { x: ((n >> 16) & 255) / 255, y: ((n >> 8) & 255) / 255, z: (n & 255) / 255 };
+    }
+
+    // --- WARM-UP ---
+    // Links each distinct variant and every post chain the presets plan (with and without the
+    // crossfade stage), and leases the crossfade target, so the whole show is resident before it starts
+    async warm() {
+        const s = this.scene;
+        const cache = s.shaderCache;
+        const t0 = performance.now();
+
+        const states = [...new Map(this.entries.map(e => [e.key, e.state])).values()];
+        cache.pin(states);
+        const variants = await Promise.all(states.map(state => cache.request(state)));
+        const compileMs = performance.now() - t0;
+
+        // Post programs: apply each preset's post values, plan, compile, then put the live values back
+        const t1 = performance.now();
+        const live = this.read();
+        let postPrograms = 0;
+        this.entries.forEach(entry => {
+            this.write(this.apply(entry, live.slice()));
+            [0.5, 1.0].forEach(mix => {
+                s.crossfadePass.uniforms.u_mix.value = mix;
+                postPrograms += s.postGraph.prewarm(s.renderer, s.camera);
+            });
+        });
+        s.crossfadePass.uniforms.u_mix.value = 1.0;
+        this.write(live);
+        const postMs = performance.now() - t1;
+
+        this.target = this.resizeTarget();
+
+        const shaderBytes = variants.reduce((n, v) => n + v.bytes, 0);
+        const targetBytes = this.target.width * this.target.height * 8; // HalfFloat RGBA
+        this.report = {
+            presets: this.entries.length,
+            variants: variants.length,
+            warmMs: performance.now() - t0,
+            compileMs,
+            postMs,
+            postPrograms,
+            shaderBytes,
+            targetBytes,
+            totalBytes: shaderBytes + targetBytes,
+            perVariant: variants.map(v => ({ key: v.key, compileMs: v.compileMs, bytes: v.bytes }))
+        };
+
+        const r = this.report;
+        console.log(`🎬 Setlist warmed: ${r.presets} presets, ${r.variants} variants + ${r.postPrograms} post programs in ${r.warmMs.toFixed(0)}ms (variants ${r.compileMs.toFixed(0)}ms, post ${r.postMs.toFixed(0)}ms) — ${(r.shaderBytes / 1048576).toFixed(1)}MB shaders est. + ${(r.targetBytes / 1048576).toFixed(1)}MB crossfade target`);
+        return r;
+    }
+
+    // Same size and format as the composer's buffers, which the raymarch pass renders into
+    resizeTarget() {
+        const { width, height } = this.scene.composer.renderTarget1;
+        return this.scene.targets.resize(this.target, 'crossfade', width, height, { type: THREE.HalfFloatType });
+    }
+
+    // --- SWITCHING ---
+    next() {
+        if (this.entries.length) this.go((this.index + 1) % this.entries.length);
+    }
+
+    prev() {
+        if (this.entries.length) this.go((this.index - 1 + this.entries.length) % this.entries.length);
+    }
+
+    // Starts a crossfade into entry i (a fade already running jumps to its end first)
+    go(i) {
+        const entry = this.entries[i];
+        if (!entry) return;
+        const s = this.scene;
+        if (this.fade) this.finish();
+
+        const cached = s.shaderCache.entries.get(entry.key);
+        if (!cached?.ready) {
+            // Evicted or still linking: switch the usual way rather than wait here
+            console.warn(`⚠️ Setlist variant ${entry.key} isn't warm, rebuilding`);
+            const from = this.read();
+            const to = this.apply(entry, from.slice());
+            this.write(to);
+            this.index = i;
+            s.rebuildMaterial();
+            this.settle(from, to);
+            return;
+        }
+
+        const from = this.read();
+        const to = this.apply(entry, from.slice());
+        this.fade = { material: s.material, frame: 0, from, to };
+        this.index = i;
+
+        // The incoming program is built for the new variant values, so they change now
+        for (let k = 0; k < to.length; k++) {
+            if (this.modes[k] === AT_START) this.writeSlot(k, to[k]);
+        }
+        s.showVariant(cached);
+        console.log(`🎬 Setlist ${i + 1}/${this.entries.length}: ${entry.name} (${this.fadeFrames} frame crossfade)`);
+    }
+
+    apply(entry, values) {
+        const { indices, values: preset } = entry;
+        for (let k = 0; k < indices.length; k++) values[indices[k]] = preset[k];
+        return values;
+    }
+
+    // --- FRAME ---
+    // Before physics and drawing: moves every slot along the fade
+    step() {
+        const fade = this.fade;
+        if (!fade) return;
+
+        fade.frame++;
+        const t = Math.min(1, fade.frame / this.fadeFrames);
+        const { from, to } = fade;
+        const modes = this.modes;
+        for (let k = 0; k < from.length; k++) {
+            if (from[k] === to[k] || modes[k] === AT_START) continue;
+            const v = modes[k] === LERP ? from[k] + (to[k] - from[k]) * t : (t >= 0.5 ? to[k] : from[k]);
+            this.writeSlot(k, v);
+        }
+        this.scene.crossfadePass.uniforms.u_mix.value = t;
+        if (t >= 1) this.finish();
+    }
+
+    // Inside renderMain, before the composer: draws the outgoing variant for the crossfade stage
+    renderOutgoing() {
+        const fade = this.fade;
+        if (!fade) return;
+        const s = this.scene;
+
+        this.target = this.resizeTarget();
+        const checkerboard = s.uniforms.u_checkerboard.value;
+        const coneTexel = s.uniforms.u_cone_texel.value.x;
+        s.uniforms.u_checkerboard.value = 0; // the outgoing frame has no history of its own to fill gaps from
+        s.uniforms.u_cone_texel.value.x = 0; // and the cone prepass traced the incoming variant's map()
+
+        s.profiler?.begin('crossfade.outgoing');
+        s.mesh.material = fade.material;
+        s.renderer.setRenderTarget(this.target);
+        s.renderer.render(s.scene, s.camera);
+        s.renderer.setRenderTarget(null);
+        s.mesh.material = s.material;
+        s.profiler?.end();
+
+        s.uniforms.u_checkerboard.value = checkerboard;
+        s.uniforms.u_cone_texel.value.x = coneTexel;
+        s.crossfadePass.uniforms.tFrom.value = this.target.texture;
+    }
+
+    finish() {
+        const { from, to } = this.fade;
+        for (let k = 0; k < to.length; k++) {
+            if (from[k] !== to[k]) this.writeSlot(k, to[k]);
+        }
+        this.cancelFade();
+        this.settle(from, to);
+    }
+
+    cancelFade() {
+        if (!this.fade) return;
+        this.fade = null;
+        this.scene.crossfadePass.uniforms.u_mix.value = 1.0;
+        this.scene.crossfadePass.uniforms.tFrom.value = null;
+    }
+
+    // After a switch lands: UI binding objects, sliders and the sync room catch up once
+    settle(from, to) {
+        const s = this.scene;
+        const changed = new Set();
+        this.slots.forEach(({ object, key, uniform, params }, k) => {
+            if (params) params[0][params[1]] = object[key];
+            if (uniform && from[k] !== to[k]) changed.add(uniform);
+        });
+        s.params.refreshDisplay();
+        if (s.sync?.isConnected) changed.forEach(name => s.sync.sendUniformUpdate(name, s.uniforms[name].value));
+    }
+
+    // --- SLOTS ---
+    read() {
+        return Float64Array.from(this.slots, ({ object, key }) => Number(object[key]));
+    }
+
+    write(values) {
+        for (let k = 0; k < values.length; k++) this.writeSlot(k, values[k]);
+    }
+
+    writeSlot(k, value) {
+        const { object, key } = this.slots[k];
+        object[key] = value;
+    }
+
+    getStats() {
+        return {
+            loaded: this.entries.length,
+            index: this.index,
+            fading: this.fade ? this.fade.frame / this.fadeFrames : null,
+            report: this.report
+        };
+    }
+}
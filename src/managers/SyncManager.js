@@ -1,3 +1,6 @@
+import * as THREE from 'three';
+import { SyncProtocol } from './SyncProtocol.js';
+
 export class SyncManager {
     constructor(scene) {
         this.scene = scene;
@@ -8,26 +11,70 @@ export class SyncManager {
         this.pendingUpdates = {};
         this.throttleMs = 50; // Throttle updates to 20fps
         this.lastSendTime = 0;
+
+        // Binary delta stream (SyncProtocol); ?sync=json keeps everything on the JSON messages
+        this.binary = new URLSearchParams(scene.search).get('sync') !== 'json';
+        this.binaryFlushMs = 8;   // batch window, well under a frame at MIDI CC rates
+        this.table = null;
+        this.dirty = new Set();   // uniform names changed since the last binary frame
+        this.binaryTimeout = null;
+        this.lastSeq = 0;         // last relay sequence number applied
+        this.snapshotPending = false;
+
+        // Name of this display, so a controller can set a quality tier on one screen only
+        this.displayName = new URLSearchParams(scene.search).get('display');
     }
     
+    // ?room=x&mode=display|controller|both&server=ws://...&display=name
+    connectFromURL() {
+        const params = new URLSearchParams(this.scene.search);
+        const room = params.get('room');
+        const mode = params.get('mode') || 'both';
+        const server = params.get('server') || 'ws://localhost:8080';
+        
+        if (room) {
+            this.connect(server, room, mode);
+            
+            // Hide controls if display-only mode
+            if (mode === 'display') {
+                const panel = document.getElementById('controlPanel');
+                if (panel) panel.style.display = 'none';
+            }
+        }
+    }
+
     connect(serverUrl, roomId, mode = 'both') {
         this.roomId = roomId;
         this.mode = mode;
         
         const wsUrl = `${serverUrl}?room=${roomId}&mode=${mode}`;
         this.ws = new WebSocket(wsUrl);
+        this.ws.binaryType = 'arraybuffer';
+        this.table ??= SyncProtocol.buildTable(this.scene.uniforms);
         
         this.ws.onopen = () => {
             this.isConnected = true;
-            console.log(`✅ Connected to sync server as ${mode}`);
+            this.lastSeq = 0; // the relay may have restarted
+            this.snapshotPending = false;
+            console.log(`✅ Connected to sync server as ${mode}${this.binary ? ' (binary)' : ''}`);
+
+            // Negotiate the binary stream: frames only flow between peers with the same table
+            this.ws.send(JSON.stringify({ type: 'hello', binary: this.binary, schema: this.table.hash }));
+            if (mode !== 'display') {
+                this.ws.send(JSON.stringify({ type: 'schema', hash: this.table.hash, entries: this.table.entries }));
+            }
             
             // If joining as display, request current state
             if (mode === 'display') {
-                this.ws.send(JSON.stringify({ type: 'request_state' }));
+                this.requestSnapshot();
             }
         };
         
         this.ws.onmessage = (event) => {
+            if (typeof event.data !== 'string') {
+                this.handleBinary(event.data);
+                return;
+            }
             const message = JSON.parse(event.data);
             this.handleMessage(message);
         };
@@ -53,6 +100,8 @@ export class SyncManager {
                 message.data.forEach(update => this.applyUniformUpdate(update));
                 break;
             case 'full_state':
+                if (message.seq !== undefined) this.lastSeq = message.seq;
+                this.snapshotPending = false;
                 this.applyFullState(message.data);
                 break;
             case 'request_state':
@@ -64,55 +113,48 @@ export class SyncManager {
         }
     }
     
-    applyUniformUpdate({ name, value }) {
-        const uniform = this.scene.uniforms[name];
-        if (!uniform) return;
-        
-        if (uniform.value instanceof THREE.Vector2) {
-            uniform.value.set(value.x, value.y);
-        } else if (uniform.value instanceof THREE.Vector3) {
-            uniform.value.set(value.x, value.y, value.z);
-        } else {
-            uniform.value = value;
-        }
-        
-        // Update UI slider if it exists
-        this.updateUIForUniform(name, value);
-        
-        // Trigger shader rebuild if needed
-        if (['u_shape_type', 'u_shape_mode', 'u_displacement_type', 'u_sdf_effect_type', 'u_color_type', 'u_crunch_type'].includes(name)) {
-            this.scene.rebuildMaterial();
+    handleBinary(buffer) {
+        const header = SyncProtocol.readHeader(buffer);
+        if (!header || header.kind !== SyncProtocol.KIND_DELTA) return;
+
+        // Older than the snapshot we already applied (a relay catch-up frame may repeat the last seq)
+        const coalesced = header.flags & SyncProtocol.FLAG_COALESCED;
+        if (coalesced ? header.seq < this.lastSeq : header.seq <= this.lastSeq) return;
+        // Missed frames: what they changed isn't in this one, so resync after applying it
+        if (!coalesced && this.lastSeq > 0 && header.seq !== this.lastSeq + 1) this.requestSnapshot();
+        this.lastSeq = header.seq;
+
+        const ok = SyncProtocol.forEachUpdate(this.table, buffer, (name, size, values, o) => {
+            this.applyUniformComponents(name, size, values, o);
+        });
+        if (!ok) {
+            // Table mismatch (peers on different builds): fall back to JSON for this connection
+            console.warn('⚠️ Sync: binary schema mismatch, falling back to JSON');
+            this.binary = false;
+            this.ws.send(JSON.stringify({ type: 'hello', binary: false, schema: this.table.hash }));
+            this.requestSnapshot();
         }
     }
-    
-    updateUIForUniform(name, value) {
-        // Map uniform names to slider IDs
-        const uniformToSlider = {
-            'u_speed': 'speed',
-            'u_box_size': 'boxSize',
-            'u_distance_scale': 'distanceScale',
-            'u_twist': 'twist',
-            'u_spin': 'spin',
-            'u_crunch': 'crunch',
-            'u_shape_type': 'shapeType',
-            'u_color_intensity': 'colorIntensity',
-            'u_displacement_amp': 'displacementAmp',
-            'u_displacement_freq': 'displacementFreq',
-            // Add more mappings as needed
-        };
-        
-        const sliderId = uniformToSlider[name];
-        if (sliderId) {
-            const slider = document.getElementById(sliderId);
-            const valueEl = document.getElementById(sliderId + 'Value');
-            if (slider) {
-                slider.value = typeof value === 'object' ? value.x : value;
-            }
-            if (valueEl) {
-                const displayValue = typeof value === 'object' ? value.x : value;
-                valueEl.textContent = typeof displayValue === 'number' ? displayValue.toFixed(2) : displayValue;
-            }
-        }
+
+    requestSnapshot() {
+        if (this.snapshotPending) return;
+        this.snapshotPending = true;
+        this.ws.send(JSON.stringify({ type: 'request_state' }));
+        setTimeout(() => { this.snapshotPending = false; }, 1000); // don't wait forever on a lost reply
+    }
+
+    // Remote changes go through the parameter scheduler like local input: applied on the next
+    // frame, sliders refreshed in its DOM pass, rebuilds debounced, never echoed back to the room.
+
+    // Binary path: straight from the frame's floats
+    applyUniformComponents(name, size, values, o) {
+        if (!this.scene.uniforms[name]) return;
+        this.scene.params.set(name, size === 1 ? values[o] : values.slice(o, o + size), { source: 'sync' });
+    }
+
+    applyUniformUpdate({ name, value }) {
+        if (!this.scene.uniforms[name]) return;
+        this.scene.params.set(name, value, { source: 'sync' });
     }
     
     applyFullState(state) {
@@ -144,12 +186,24 @@ export class SyncManager {
                     this.scene.ui.randomizePalette();
                 }
                 break;
+            case 'quality':
+                // Per-display tiers: a weak projector machine can run 'low' next to an 'ultra' screen
+                if (data.display == null || data.display === this.displayName) {
+                    this.scene.setQuality(data.tier);
+                }
+                break;
         }
     }
     
     // Send methods - called from UI interactions
     sendUniformUpdate(name, value) {
         if (!this.isConnected || this.mode === 'display') return;
+
+        if (this.binary && this.table.index.has(name)) {
+            this.dirty.add(name);
+            this.scheduleBinarySend();
+            return;
+        }
         
         // Throttle updates
         const now = Date.now();
@@ -188,6 +242,19 @@ export class SyncManager {
         }, this.throttleMs);
     }
     
+    // One frame per batch window with the latest value of every touched uniform
+    scheduleBinarySend() {
+        if (this.binaryTimeout) return;
+
+        this.binaryTimeout = setTimeout(() => {
+            this.binaryTimeout = null;
+            if (!this.isConnected || this.dirty.size === 0) return;
+            const updates = [...this.dirty].map(name => [name, this.scene.uniforms[name].value]);
+            this.dirty.clear();
+            this.ws.send(SyncProtocol.encode(this.table, updates));
+        }, this.binaryFlushMs);
+    }
+
     sendAction(action, data = {}) {
         if (!this.isConnected || this.mode === 'display') return;
         
@@ -198,6 +265,11 @@ export class SyncManager {
         }));
     }
     
+    // display: a ?display= name, or null for every display in the room
+    sendQuality(tier, display = null) {
+        this.sendAction('quality', { tier, display });
+    }
+
     sendFullState() {
         if (!this.isConnected) return;
         
@@ -209,6 +281,8 @@ export class SyncManager {
         
         // Serialize all uniforms
         Object.entries(this.scene.uniforms).forEach(([name, uniform]) => {
+            if (SyncProtocol.LOCAL_UNIFORMS.has(name)) return; // resolution, governor, checkerboard...
+            if (SyncProtocol.sizeOf(uniform.value) === 0) return; // textures stay local
             state.uniforms[name] = this.serializeValue(uniform.value);
         });
         
@@ -0,0 +1,173 @@
+// Binary uniform stream shared by SyncManager and the relay (server/server.js). Dependency-free so
+// Node can import it as is.
+//
+// Both ends derive a slot table from SceneUniforms.create (insertion order, textures and
+// display-local uniforms left out) and exchange only its hash; a frame is then
+//
+//   u8 kind | u8 flags | u16 slot count | u32 table hash | u32 seq | u32 mask[ceil(slots / 32)] | f32 values...
+//
+// little-endian, where the mask marks the changed slots and the values are their components in
+// slot order. Sequence numbers are stamped by the relay per room, so displays can drop stale frames
+// (older than their last snapshot) and ask for a snapshot when they see a gap.
+export class SyncProtocol {
+    static KIND_DELTA = 1;
+    static FLAG_COALESCED = 1; // relay-built catch-up frame: covers everything up to seq, not a gap
+    static HEADER_BYTES = 12;
+
+    // Per-display state that must never be pushed to other screens
+    static LOCAL_UNIFORMS = new Set([
+        'u_resolution', 'u_tile', 'u_lod_scale',
+        'u_checkerboard', 'u_frame_parity', 'u_history_valid', 'u_prev_camera',
+        'u_bounds', 'u_cone_texel'
+    ]);
+
+    // Components of a uniform value (number, THREE vector/color or its JSON form); 0 = not syncable
+    static sizeOf(value) {
+        if (typeof value === 'number' || typeof value === 'boolean') return 1;
+        if (!value || typeof value !== 'object' || value.isTexture) return 0;
+        if ('w' in value) return 4;
+        if ('z' in value || 'r' in value) return 3;
+        if ('y' in value) return 2;
+        return 0;
+    }
+
+    // --- TABLE ---
+    static buildTable(uniforms) {
+        const entries = [];
+        Object.entries(uniforms).forEach(([name, uniform]) => {
+            if (SyncProtocol.LOCAL_UNIFORMS.has(name)) return;
+            const size = SyncProtocol.sizeOf(uniform.value);
+            if (size > 0) entries.push([name, size]);
+        });
+        return SyncProtocol.tableFrom(entries);
+    }
+
+    // entries: [[name, size], ...] as sent in the `schema` message
+    static tableFrom(entries) {
+        const index = new Map();
+        entries.forEach(([name], slot) => index.set(name, slot));
+        return {
+            entries,
+            index,
+            maskWords: Math.ceil(entries.length / 32),
+            hash: SyncProtocol.hash(entries)
+        };
+    }
+
+    // FNV-1a over "name:size,"
+    static hash(entries) {
+        let h = 0x811c9dc5;
+        const text = entries.map(([name, size]) => `${name}:${size},`).join('');
+        for (let i = 0; i < text.length; i++) {
+            h ^= text.charCodeAt(i);
+            h = Math.imul(h, 0x01000193);
+        }
+        return h >>> 0;
+    }
+
+    // --- ENCODE ---
+    // updates: iterable of [name, value]; names missing from the table are skipped (send them as JSON)
+    static encode(table, updates, { seq = 0, flags = 0 } = {}) {
+        const slots = [];
+        for (const [name, value] of updates) {
+            const slot = table.index.get(name);
+            if (slot !== undefined) slots.push([slot, value]);
+        }
+        slots.sort((a, b) => a[0] - b[0]);
+
+        const valuesStart = SyncProtocol.HEADER_BYTES + table.maskWords * 4;
+        const valueCount = slots.reduce((n, [slot]) => n + table.entries[slot][1], 0);
+        const buffer = new ArrayBuffer(valuesStart + valueCount * 4);
+        const view = new DataView(buffer);
+        view.setUint8(0, SyncProtocol.KIND_DELTA);
+        view.setUint8(1, flags);
+        view.setUint16(2, table.entries.length, true);
+        view.setUint32(4, table.hash, true);
+        view.setUint32(8, seq, true);
+
+        let o = valuesStart;
+        slots.forEach(([slot, value]) => {
+            const word = SyncProtocol.HEADER_BYTES + (slot >> 5) * 4;
+            view.setUint32(word, view.getUint32(word, true) | (1 << (slot & 31)), true);
+            SyncProtocol.components(value, table.entries[slot][1]).forEach(c => {
+                view.setFloat32(o, c, true);
+                o += 4;
+            });
+        });
+        return buffer;
+    }
+
+    static components(value, size) {
+        if (size === 1) return [Number(value)];
+        if ('r' in value && !('x' in value)) return [value.r, value.g, value.b];
+        return [value.x, value.y, value.z, value.w].slice(0, size);
+    }
+
+    // --- DECODE ---
+    static readHeader(data) {
+        const view = SyncProtocol.view(data);
+        if (view.byteLength < SyncProtocol.HEADER_BYTES) return null;
+        return {
+            kind: view.getUint8(0),
+            flags: view.getUint8(1),
+            slots: view.getUint16(2, true),
+            hash: view.getUint32(4, true),
+            seq: view.getUint32(8, true)
+        };
+    }
+
+    // The relay rewrites the sequence number in place before fanning a frame out
+    static stampSeq(data, seq) {
+        SyncProtocol.view(data).setUint32(8, seq, true);
+    }
+
+    // Calls visit(name, size, values, offset) for every changed slot, reading straight out of the
+    // frame (no per-update objects). Returns false if the frame doesn't match the table.
+    static forEachUpdate(table, data, visit) {
+        const view = SyncProtocol.view(data);
+        if (view.getUint32(4, true) !== table.hash || view.getUint16(2, true) !== table.entries.length) return false;
+
+        const valuesStart = SyncProtocol.HEADER_BYTES + table.maskWords * 4;
+        const start = view.byteOffset + valuesStart;
+        const count = (view.byteLength - valuesStart) / 4;
+        // Node hands out Buffers at arbitrary offsets; Float32Array needs 4-byte alignment
+        const values = start % 4 === 0
+            ? new Float32Array(view.buffer, start, count)
+            : new Float32Array(view.buffer.slice(start, start + count * 4));
+
+        let o = 0;
+        for (let w = 0; w < table.maskWords; w++) {
+            let bits = view.getUint32(SyncProtocol.HEADER_BYTES + w * 4, true);
+            while (bits) {
+                const slot = w * 32 + 31 - Math.clz32(bits & -bits);
+                bits &= bits - 1;
+                const [name, size] = table.entries[slot];
+                visit(name, size, values, o);
+                o += size;
+            }
+        }
+        return true;
+    }
+
+    // Updates in the JSON protocol's value shape ({ x, y, z } for vectors)
+    static decode(table, data) {
+        const updates = [];
+        const ok = SyncProtocol.forEachUpdate(table, data, (name, size, values, o) => {
+            updates.push({ name, value: SyncProtocol.toJSONValue(values, o, size) });
+        });
+        return ok ? updates : null;
+    }
+
+    static toJSONValue(values, o, size) {
+        if (size === 1) return values[o];
+        const v = { x: values[o], y: values[o + 1] };
+        if (size > 2) v.z = values[o + 2];
+        if (size > 3) v.w = values[o + 3];
+        return v;
+    }
+
+    static view(data) {
+        if (data instanceof ArrayBuffer) return new DataView(data);
+        return new DataView(data.buffer, data.byteOffset, data.byteLength); // Node Buffer / typed array
+    }
+}
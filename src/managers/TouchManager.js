@@ -63,9 +63,10 @@ export class TouchManager {
             
             // Apply camera rotation with touch sensitivity
             const touchSensitivity = 1.5; // Adjust this value to make rotation faster/slower
-            this.scene.uniforms.u_camera_theta.value += dx * touchSensitivity;
-            this.scene.uniforms.u_camera_phi.value += dy * touchSensitivity;
-            this.scene.uniforms.u_camera_phi.value = Math.max(0.1, Math.min(Math.PI - 0.1, this.scene.uniforms.u_camera_phi.value));
+            const params = this.scene.params; // queued, applied once per frame
+            params.set('u_camera_theta', params.get('u_camera_theta') + dx * touchSensitivity, { source: 'touch' });
+            const phi = params.get('u_camera_phi') + dy * touchSensitivity;
+            params.set('u_camera_phi', Math.max(0.1, Math.min(Math.PI - 0.1, phi)), { source: 'touch' });
             
             // Update for incremental movement
             this.lastMouse.copy(this.mouse);
@@ -113,11 +114,11 @@ export class TouchManager {
         
         if (this.pinchStartDistance === null) {
             this.pinchStartDistance = distance;
-            this.pinchStartCameraDistance = this.scene.uniforms.u_camera_distance.value;
+            this.pinchStartCameraDistance = this.scene.params.get('u_camera_distance');
         } else {
             const scale = this.pinchStartDistance / distance;
             const newDistance = this.pinchStartCameraDistance * scale;
-            this.scene.uniforms.u_camera_distance.value = Math.max(0.5, Math.min(10.0, newDistance));
+            this.scene.params.set('u_camera_distance', Math.max(0.5, Math.min(10.0, newDistance)), { source: 'touch' });
         }
     }
 }
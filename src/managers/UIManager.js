@@ -8,6 +8,7 @@ export class UIManager {
         this.initControls();
         this.initButtons();
         this.initPalettePresets();
+        this.initImageDrop();
     }
 
     initTabs() {
@@ -227,8 +228,7 @@ export class UIManager {
                 shapeBtns.forEach(b => b.classList.remove('active'));
                 btn.classList.add('active');
                 const mode = parseInt(btn.dataset.shape);
-                this.scene.uniforms.u_shape_mode.value = mode;
-                this.scene.rebuildMaterial();
+                this.scene.params.set('u_shape_mode', mode);
                 
                 // Show/hide image controls and prompt based on mode
                 if (mode === 5) {
@@ -251,8 +251,7 @@ export class UIManager {
             btn.addEventListener('click', () => {
                 uvFeedbackBlentBtns.forEach(b => b.classList.remove('active'));
                 btn.classList.add('active');
-                this.scene.uniforms.u_uv_feedback_blend_mode.value = parseInt(btn.dataset.uvBlend);
-                this.scene.rebuildMaterial();
+                this.scene.params.set('u_uv_feedback_blend_mode', parseInt(btn.dataset.uvBlend));
             });
         });
 
@@ -262,7 +261,7 @@ export class UIManager {
             btn.addEventListener('click', () => {
                 feedbackBlendBtns.forEach(b => b.classList.remove('active'));
                 btn.classList.add('active');
-                this.scene.uniforms.u_feedback_blend_mode.value = parseInt(btn.dataset.blend);
+                this.scene.params.set('u_feedback_blend_mode', parseInt(btn.dataset.blend));
             });
         });
 
@@ -279,9 +278,9 @@ export class UIManager {
                     const value = newState ? 1.0 : 0.0;
                     
                     // Update all mirror uniforms
-                    this.scene.uniforms.u_mirror_x.value = value;
-                    this.scene.uniforms.u_mirror_y.value = value;
-                    this.scene.uniforms.u_mirror_z.value = value;
+                    this.scene.params.set('u_mirror_x', value);
+                    this.scene.params.set('u_mirror_y', value);
+                    this.scene.params.set('u_mirror_z', value);
                     
                     // Update all tab states
                     mirrorBtns.forEach(t => {
@@ -298,9 +297,9 @@ export class UIManager {
                     const value = newState ? 1.0 : 0.0;
                     
                     // Update specific mirror uniform
-                    if (mirrorType === 'x') this.scene.uniforms.u_mirror_x.value = value;
-                    else if (mirrorType === 'y') this.scene.uniforms.u_mirror_y.value = value;
-                    else if (mirrorType === 'z') this.scene.uniforms.u_mirror_z.value = value;
+                    if (mirrorType === 'x') this.scene.params.set('u_mirror_x', value);
+                    else if (mirrorType === 'y') this.scene.params.set('u_mirror_y', value);
+                    else if (mirrorType === 'z') this.scene.params.set('u_mirror_z', value);
                     
                     // Update tab state
                     btn.classList.toggle('active', newState);
@@ -336,8 +335,8 @@ export class UIManager {
                     const value = newState ? 1.0 : 0.0;
                     
                     // Update all UV mirror uniforms
-                    this.scene.uniforms.u_uv_mirror_x.value = value;
-                    this.scene.uniforms.u_uv_mirror_y.value = value;
+                    this.scene.params.set('u_uv_mirror_x', value);
+                    this.scene.params.set('u_uv_mirror_y', value);
                     
                     // Update all tab states
                     uvMirrorBtns.forEach(t => {
@@ -354,8 +353,8 @@ export class UIManager {
                     const value = newState ? 1.0 : 0.0;
                     
                     // Update specific UV mirror uniform
-                    if (mirrorType === 'x') this.scene.uniforms.u_uv_mirror_x.value = value;
-                    else if (mirrorType === 'y') this.scene.uniforms.u_uv_mirror_y.value = value;
+                    if (mirrorType === 'x') this.scene.params.set('u_uv_mirror_x', value);
+                    else if (mirrorType === 'y') this.scene.params.set('u_uv_mirror_y', value);
                     
                     // Update tab state
                     btn.classList.toggle('active', newState);
@@ -402,12 +401,21 @@ export class UIManager {
                 btn.addEventListener('click', () => {
                     fogBtns.forEach(b => b.classList.remove('active'));
                     btn.classList.add('active');
-                    this.scene.uniforms.u_fog_enabled.value = parseInt(btn.dataset.fog);
-                    this.scene.rebuildMaterial();
+                    this.scene.params.set('u_fog_enabled', parseInt(btn.dataset.fog));
                 });
             });
         }
 
+        // --- Quality Tier Buttons ---
+        // Click: this screen only; Shift+click: every display in the sync room as well
+        document.querySelectorAll('.mirror-tab[data-quality]').forEach(btn => {
+            btn.addEventListener('click', (e) => {
+                this.scene.setQuality(btn.dataset.quality);
+                if (e.shiftKey) this.scene.sync?.sendQuality(btn.dataset.quality);
+            });
+        });
+        this.showQuality(this.scene.quality);
+
         // --- Border Color Picker ---
         const borderColorPicker = document.getElementById('borderColorPicker');
         const borderColorHex = document.getElementById('borderColorHex');
@@ -516,43 +524,38 @@ export class UIManager {
             el.value = this.scene.speed;
         }
 
+        // Input events only queue the change; the scheduler applies it (and syncs it) once per frame
         const update = () => {
             const val = parseFloat(el.value);
             if (uniform && this.scene.uniforms[uniform]) {
-                if (component !== null) {
-                    const uniformValue = this.scene.uniforms[uniform].value;
-                    if (uniformValue.isVector2 || uniformValue.isVector3) {
-                        if (component === 0) uniformValue.x = val;
-                        else if (component === 1) uniformValue.y = val;
-                        else if (component === 2) uniformValue.z = val;
-                    }
-                } else {
-                    this.scene.uniforms[uniform].value = val;
-                }
-
-                // Send sync update for remote control
-                // if (this.scene.sync?.isConnected) {
-                //     this.scene.sync.sendUniformUpdate(uniform, this.scene.uniforms[uniform].value);
-                // }
+                this.scene.params.set(uniform, val, requiresRecompile ? { component, rebuild: true } : { component });
             }
             if (customCallback) {
-                customCallback(val);
-                // For custom callbacks (like speed, bloom), send the value with the id as key
-                // if (this.scene.sync?.isConnected) {
-                //     this.scene.sync.sendUniformUpdate(id, val);
-                // }
+                this.scene.params.call(id, () => {
+                    customCallback(val);
+                    // For custom callbacks (like speed, bloom), send the value with the id as key
+                    if (this.scene.sync?.isConnected) {
+                        this.scene.sync.sendUniformUpdate(id, val);
+                    }
+                });
             }
             if (disp) disp.innerText = val.toFixed(2);
-            if (requiresRecompile) this.scene.rebuildMaterial();
         };
 
         el.addEventListener('input', update);
         this.bindings.push({ el, disp, uniform, component });
     }
 
+    // Syncs UI sliders to current Internal State (useful after Randomize/Reset), batched into the
+    // scheduler's next DOM pass however often it's called
     updateDisplay() {
-        // Syncs UI sliders to current Internal State (useful after Randomize/Reset)
+        this.scene.params.refreshDisplay();
+    }
+
+    // names: uniform names (or 'speed') whose controls changed; null refreshes everything
+    syncDisplay(names = null) {
         this.bindings.forEach(b => {
+            if (names && !names.has(b.uniform)) return;
             if(b.uniform && this.scene.uniforms[b.uniform]) {
                 const uniformValue = this.scene.uniforms[b.uniform].value;
                 let val;
@@ -580,7 +583,7 @@ export class UIManager {
         
         const speedEl = document.getElementById('speed');
         const speedValueEl = document.getElementById('speedValue');
-        if(speedEl) {
+        if(speedEl && (!names || names.has('speed'))) {
             speedEl.value = this.scene.speed;
             if(speedValueEl) speedValueEl.innerText = this.scene.speed.toFixed(2);
         }
@@ -659,4 +662,112 @@ export class UIManager {
             });
         });
     }
+
+    // --- IMAGE ---
+    initImageDrop() {
+        const canvas = this.scene.canvas;
+        
+        // Setup file input and prompt click handler
+        const fileInput = document.getElementById('imageFileInput');
+        const imagePrompt = document.getElementById('imageUploadPrompt');
+        
+        if (imagePrompt && fileInput) {
+            imagePrompt.addEventListener('click', () => {
+                fileInput.click();
+            });
+        }
+        
+        if (fileInput) {
+            fileInput.addEventListener('change', (e) => {
+                const file = e.target.files[0];
+                if (file && file.type.startsWith('image/')) {
+                    this.scene.loadImageFile(file);
+                }
+                // Reset input so same file can be selected again
+                fileInput.value = '';
+            });
+        }
+        
+        // Prevent default drag behaviors
+        ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
+            canvas.addEventListener(eventName, (e) => {
+                e.preventDefault();
+                e.stopPropagation();
+            });
+        });
+        
+        // Visual feedback on drag
+        canvas.addEventListener('dragenter', () => {
+            canvas.style.opacity = '0.5';
+        });
+        
+        canvas.addEventListener('dragleave', () => {
+            canvas.style.opacity = '1.0';
+        });
+        
+        canvas.addEventListener('drop', (e) => {
+            canvas.style.opacity = '1.0';
+            
+            const files = e.dataTransfer.files;
+            if (files.length > 0) {
+                const file = files[0];
+                
+                // Check if it's an image
+                if (file.type.startsWith('image/')) {
+                    this.scene.loadImageFile(file);
+                } else {
+                    console.warn('⚠️ Please drop an image file');
+                }
+            }
+        });
+    }
+
+    // After an image has loaded: select the image shape tab and show its controls
+    showImageMode() {
+        const shapeBtns = document.querySelectorAll('.shape-tab');
+        shapeBtns.forEach(b => b.classList.remove('active'));
+        const imageBtn = document.getElementById('shapeImage');
+        if (imageBtn) imageBtn.classList.add('active');
+        
+        // Show image controls and hide prompt
+        const imageControls = document.querySelector('.image-controls');
+        if (imageControls) imageControls.style.display = 'flex';
+        const imagePrompt = document.getElementById('imageUploadPrompt');
+        if (imagePrompt) imagePrompt.style.display = 'none';
+    }
+
+    showQuality(tier) {
+        document.querySelectorAll('.mirror-tab[data-quality]').forEach(b => b.classList.toggle('active', b.dataset.quality === tier));
+    }
+
+    // --- INFO PANEL ---
+    // stats: ShaderScene.debugInfo's once-a-second render stats (posted over from a render worker)
+    showStats(stats) {
+        const q = (id) => document.getElementById(id);
+        const fps = q('fps'), css = q('cssSize'), win = q('windowSize'), pr = q('pixelRatio');
+        const phys = q('physicalSize'), dt = q('deltaTime'), rend = q('renderDims');
+        const mem = q('gpuMemory'), progs = q('gpuPrograms'), gpu = q('gpuTime'), events = q('paramEvents');
+
+        if (fps) fps.textContent = stats.fps;
+        if (css) css.textContent = `${window.screen.width}x${window.screen.height}`;
+        if (win) win.textContent = `${window.innerWidth}x${window.innerHeight}`;
+        if (pr) pr.textContent = window.devicePixelRatio.toFixed(1);
+        if (phys) phys.textContent = `${window.screen.width * window.devicePixelRatio}x${window.screen.height * window.devicePixelRatio}`;
+        if (dt) dt.textContent = `${(stats.deltaTime * 1000).toFixed(1)}ms`;
+        if (rend) rend.textContent = `${stats.renderWidth}x${stats.renderHeight}`;
+        if (mem) mem.textContent = `${stats.geometries}g, ${stats.textures}t, ${(stats.targetBytes / 1048576).toFixed(0)}MB RT`;
+        if (progs) progs.textContent = stats.programs || 'unknown';
+        if (gpu) {
+            const g = stats.gpu;
+            const ms = g.gpuMs !== null ? `${g.gpuMs.toFixed(1)}ms` : 'n/a';
+            gpu.textContent = g.enabled ? `${ms} (L${g.level})` : ms;
+        }
+        if (events) {
+            // Input events received vs. changes applied over the last second
+            const t = this.scene.params.getStats().totals;
+            const last = this.lastParamTotals ?? t;
+            events.textContent = `${t.received - last.received} in / ${t.applied - last.applied} applied`;
+            this.lastParamTotals = t;
+        }
+    }
 }
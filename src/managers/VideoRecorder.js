@@ -0,0 +1,175 @@
+// Canvas recorder on WebCodecs. The render loop only wraps the freshly drawn canvas in a VideoFrame
+// and transfers it to a worker (src/workers/RecorderWorker.js), which encodes and muxes straight
+// into a sink: a file in the origin-private file system, or the frame server's upload endpoint.
+// When the encoder or the sink falls behind, frames are dropped at capture instead of queueing,
+// so memory stays bounded and rendering never waits on encoding. Timestamps are the real capture
+// times, so a dropped frame holds its predecessor on screen longer instead of shortening the video.
+export class VideoRecorder {
+    static get supported() {
+        return typeof VideoEncoder !== 'undefined' && typeof VideoFrame !== 'undefined' && typeof Worker !== 'undefined';
+    }
+
+    constructor(scene, options = {}) {
+        this.scene = scene;
+
+        // --- CONFIG ---
+        const params = new URLSearchParams(scene.search);
+        this.codec = options.codec ?? params.get('recCodec') ?? 'avc1.640034';       // H.264 High 5.2 (fits 4K)
+        this.bitrate = options.bitrate ?? (parseFloat(params.get('recBitrate')) || 50) * 1e6; // Mbps in the URL
+        this.fps = options.fps ?? (parseInt(params.get('recFps')) || 60);           // capture rate cap
+        this.keyframeInterval = options.keyframeInterval ?? (parseInt(params.get('recKeyframes')) || 120); // frames
+        this.uploadUrl = options.uploadUrl ?? params.get('recUpload');              // e.g. http://localhost:8090
+        this.maxBacklog = options.maxBacklog ?? 4;                                  // frames in flight before dropping
+        this.maxPendingBytes = options.maxPendingBytes ?? 32 * 1024 * 1024;         // unsent sink bytes before dropping
+
+        // --- STATE ---
+        this.worker = null;
+        this.recording = false;
+        this.name = null;
+        this.container = null;
+        this.startTime = 0;
+        this.lastCapture = 0;
+        this.seq = 0;
+        this.ackedSeq = 0;
+        this.queue = 0;
+        this.pendingBytes = 0;
+        this.captured = 0;
+        this.dropped = 0;
+        this.stopped = null;
+        this.error = null;
+        this.onError = options.onError ?? null;
+    }
+
+    async start() {
+        const canvas = this.scene.renderer.domElement;
+        const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
+        const sink = this.uploadUrl ? { kind: 'upload', url: this.uploadUrl } : { kind: 'opfs' };
+
+        // H.264 / most hardware encoders need even dimensions
+        const config = {
+            codec: this.codec,
+            width: canvas.width & ~1,
+            height: canvas.height & ~1,
+            bitrate: this.bitrate,
+            fps: this.fps
+        };
+
+        if (sink.kind === 'opfs') await VideoRecorder.clearStale();
+
+        this.worker = new Worker(new URL('../workers/RecorderWorker.js', import.meta.url), { type: 'module' });
+        const started = new Promise((resolve, reject) => {
+            this.worker.onmessage = (e) => {
+                const msg = e.data;
+                if (msg.type === 'started') resolve(msg);
+                else if (msg.type === 'error') reject(new Error(msg.message));
+            };
+        });
+        // The worker appends the extension once it has settled on a codec (and so a container)
+        const base = `raymarch_recording_${timestamp}`;
+        this.worker.postMessage({ type: 'start', config, sink: { ...sink, name: base } });
+
+        let info;
+        try {
+            info = await started;
+        } catch (err) {
+            this.worker.terminate();
+            this.worker = null;
+            throw err;
+        }
+        this.container = info.container;
+        this.name = `${base}.${info.container}`;
+        this.sink = sink;
+        this.worker.onmessage = (e) => this.onMessage(e.data);
+
+        this.seq = this.ackedSeq = this.queue = this.pendingBytes = 0;
+        this.captured = this.dropped = 0;
+        this.error = null;
+        this.startTime = performance.now();
+        this.lastCapture = -Infinity;
+        this.recording = true;
+        console.log(`🎥 Recording ${config.width}x${config.height} ${info.codec} @ ${(this.bitrate / 1e6).toFixed(0)} Mbps → ${sink.kind === 'upload' ? this.uploadUrl : 'OPFS'}`);
+        return info;
+    }
+
+    // Called by the render loop right after the frame is drawn, while the canvas still holds it
+    capture(now = performance.now()) {
+        if (!this.recording) return;
+        if (now - this.lastCapture < 1000 / this.fps - 1) return; // 1 ms slack for rAF jitter
+
+        const backlog = (this.seq - this.ackedSeq) + this.queue;
+        if (backlog >= this.maxBacklog || this.pendingBytes >= this.maxPendingBytes) {
+            this.dropped++;
+            return;
+        }
+
+        const frame = new VideoFrame(this.scene.renderer.domElement, {
+            timestamp: Math.round((now - this.startTime) * 1000), // µs
+            duration: Math.round(1e6 / this.fps)
+        });
+        this.seq++;
+        this.captured++;
+        this.lastCapture = now;
+        const keyFrame = (this.captured - 1) % this.keyframeInterval === 0;
+        this.worker.postMessage({ type: 'frame', frame, seq: this.seq, keyFrame }, [frame]);
+    }
+
+    onMessage(msg) {
+        if (msg.type === 'status') {
+            this.ackedSeq = msg.seq;
+            this.queue = msg.queue;
+            this.pendingBytes = msg.pendingBytes;
+        } else if (msg.type === 'stopped') {
+            this.stopped?.(msg);
+        } else if (msg.type === 'error') {
+            console.error(`🎥 Recorder error: ${msg.message}`);
+            this.recording = false;
+            this.error = msg.message;
+            this.stopped?.({ error: msg.message });
+            this.onError?.(new Error(msg.message));
+        }
+    }
+
+    // Flushes the encoder and closes the sink. For OPFS recordings the result is returned as a
+    // disk-backed File (reading it doesn't pull the video into memory).
+    async stop() {
+        if (!this.worker) return null;
+        this.recording = false;
+        const result = await new Promise(resolve => {
+            this.stopped = resolve;
+            this.worker.postMessage({ type: 'stop' });
+        });
+        this.worker.terminate();
+        this.worker = null;
+        this.stopped = null;
+        if (result.error || this.error) throw new Error(result.error ?? this.error);
+
+        const summary = `${this.captured} frames, ${this.dropped} dropped, ${(result.bytes / 1048576).toFixed(1)}MB`;
+        if (this.sink.kind === 'upload') {
+            console.log(`🎥 Recording uploaded: ${this.name} (${summary})`);
+            return null;
+        }
+        console.log(`🎥 Recording finished: ${this.name} (${summary})`);
+        const root = await navigator.storage.getDirectory();
+        return (await root.getFileHandle(this.name)).getFile();
+    }
+
+    getStats() {
+        return {
+            recording: this.recording,
+            captured: this.captured,
+            dropped: this.dropped,
+            backlog: (this.seq - this.ackedSeq) + this.queue,
+            pendingBytes: this.pendingBytes
+        };
+    }
+
+    // Previous recordings stay in OPFS until the next one starts, long enough for the download to finish
+    static async clearStale() {
+        const root = await navigator.storage.getDirectory();
+        const stale = [];
+        for await (const name of root.keys()) {
+            if (name.startsWith('raymarch_recording_')) stale.push(name);
+        }
+        await Promise.all(stale.map(name => root.removeEntry(name).catch(() => {})));
+    }
+}
@@ -0,0 +1,21 @@
+// #version 300 es
+// Placeholder frame while the raymarcher links (ShaderScene.renderBootFrame): the scene's opening
+// palette, drifting slowly, dimmed towards the edges
+precision highp float;
+
+uniform float u_boot_time;
+uniform vec3 u_palette_a;
+uniform vec3 u_palette_b;
+uniform vec3 u_palette_c;
+uniform vec3 u_palette_d;
+
+in vec2 vUv;
+out vec4 fragColor;
+
+void main() {
+    float r = length(vUv - 0.5);
+    float t = r * 0.8 + u_boot_time * 0.05;
+    vec3 color = u_palette_a + u_palette_b * cos(6.28318 * (u_palette_c * t + u_palette_d));
+    float vignette = 1.0 - smoothstep(0.1, 0.75, r);
+    fragColor = vec4(clamp(color, 0.0, 1.0) * vignette * 0.35, 1.0);
+}
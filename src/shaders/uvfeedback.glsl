@@ -1,123 +1,65 @@
 // #version 300 es
+// Loop caps (MAX_*) come from the quality tier, prepended by ShaderScene (chunks.js QUALITY_TIERS),
+// as does NOISE_VOLUME when the baked noise volume stands in for snoise() and the Worley search
 precision highp float;
 
 out vec4 FragColor;
 in vec2 vUv;
 
-uniform vec2  u_resolution;
-uniform float u_time;
+// std140 block packed by UniformBlocks.js from ShaderScene.uvFeedbackUniforms (layout is read
+// back from this declaration). Separate from the raymarcher's FrameUniforms because the offline
+// renderer gives this pass its own u_resolution.
+layout(std140) uniform FeedbackUniforms {
+  vec3  u_uv_grid_size;
+  float u_time;
+  vec2  u_resolution;
+  vec2  u_uv_distort;
+
+  float u_feedback_opacity;
+  float u_feedback_distort;
+  float u_feedback_blur;
+  float u_feedback_noise_scale;
+  float u_feedback_lacunarity;
+  float u_feedback_amplitude;
+  float u_feedback_harmonics;
+  float u_feedback_gain;
+  float u_feedback_exponent;
+  float u_feedback_noise_mix;
+  int   u_feedback_blend_mode;   // 0=mix, 1=lighten, 2=darken
+  float u_feedback_seed;         // noise seed scrub
+  int   u_feedback_layers;       // recursive fbm layers
+  float u_lens_distort;
+  float u_polarize;
+  float u_uv_scale;
+  float u_uv_rotate;
+
+  // warp params (same as raymarcher)
+  float u_warp_gain;
+  int   u_warp_harmonics;
+  float u_warp_lacunarity;
+  float u_warp_amplitude;
+  int   u_warp_layers;
+  float u_uv_pixel_size;
+
+  int   u_pattern_type; // 0=off, 1=grid, 2=distance, 3=cell
+  float u_bloat_strength;
+  float u_uv_mirror_x;
+  float u_uv_mirror_y;
+};
 
 // feedback texture (previous frame)
 uniform sampler2D u_feedback_uv;
-uniform float u_feedback_opacity;
-uniform float u_feedback_distort;
-uniform float u_feedback_blur;
-uniform float u_feedback_noise_scale;
-uniform float u_feedback_lacunarity;
-uniform float u_feedback_amplitude;
-uniform float u_feedback_harmonics;
-uniform float u_feedback_gain;
-uniform float u_feedback_exponent;
-uniform float u_feedback_noise_mix;
-uniform int   u_feedback_blend_mode;   // 0=mix, 1=lighten, 2=darken
-uniform float u_feedback_seed;         // noise seed scrub
-uniform int   u_feedback_layers;       // recursive fbm layers
-uniform float u_lens_distort;
-uniform float u_polarize;
-uniform float u_uv_scale;
-uniform float u_uv_rotate;
-uniform vec2  u_uv_distort;
-uniform vec3  u_uv_grid_size;
-
-// warp params (same as raymarcher)
-uniform float u_warp_gain;
-uniform int   u_warp_harmonics;
-uniform float u_warp_lacunarity;
-uniform float u_warp_amplitude;
-uniform int u_warp_layers;
-uniform float u_uv_pixel_size;
-
-uniform int u_pattern_type; // 0=off, 1=grid, 2=distance, 3=cell
-uniform float u_bloat_strength;
-uniform float u_uv_mirror_x;
-uniform float u_uv_mirror_y;
-
-#define TWO_PI 6.283185
-#define PI 3.14159265359
-
-// fbm + simplex helpers
-vec4 permute3(vec4 x){return mod(((x*34.0)+1.0)*x, 289.0);}
-
-vec4 taylorInvSqrt3(vec4 r){return 1.79284291400159 - 0.85373472095314 * r;}
-
-float snoise(vec3 v){ 
-  const vec2  C = vec2(1.0/6.0, 1.0/3.0) ;
-  const vec4  D = vec4(0.0, 0.5, 1.0, 2.0);
-
-// First corner
-  vec3 i  = floor(v + dot(v, C.yyy) );
-  vec3 x0 =   v - i + dot(i, C.xxx) ;
-
-// Other corners
-  vec3 g = step(x0.yzx, x0.xyz);
-  vec3 l = 1.0 - g;
-  vec3 i1 = min( g.xyz, l.zxy );
-  vec3 i2 = max( g.xyz, l.zxy );
-
-  //  x0 = x0 - 0. + 0.0 * C 
-  vec3 x1 = x0 - i1 + 1.0 * C.xxx;
-  vec3 x2 = x0 - i2 + 2.0 * C.xxx;
-  vec3 x3 = x0 - 1. + 3.0 * C.xxx;
-
-// Permutations
-  i = mod(i, 289.0 ); 
-  vec4 p = permute3( permute3( permute3( 
-             i.z + vec4(0.0, i1.z, i2.z, 1.0 ))
-           + i.y + vec4(0.0, i1.y, i2.y, 1.0 )) 
-           + i.x + vec4(0.0, i1.x, i2.x, 1.0 ));
-
-// Gradients
-// ( N*N points uniformly over a square, mapped onto an octahedron.)
-  float n_ = 1.0/7.0; // N=7
-  vec3  ns = n_ * D.wyz - D.xzx;
-
-  vec4 j = p - 49.0 * floor(p * ns.z *ns.z);  //  mod(p,N*N)
-
-  vec4 x_ = floor(j * ns.z);
-  vec4 y_ = floor(j - 7.0 * x_ );    // mod(j,N)
-
-  vec4 x = x_ *ns.x + ns.yyyy;
-  vec4 y = y_ *ns.x + ns.yyyy;
-  vec4 h = 1.0 - abs(x) - abs(y);
-
-  vec4 b0 = vec4( x.xy, y.xy );
-  vec4 b1 = vec4( x.zw, y.zw );
-
-  vec4 s0 = floor(b0)*2.0 + 1.0;
-  vec4 s1 = floor(b1)*2.0 + 1.0;
-  vec4 sh = -step(h, vec4(0.0));
-
-  vec4 a0 = b0.xzyw + s0.xzyw*sh.xxyy ;
-  vec4 a1 = b1.xzyw + s1.xzyw*sh.zzww ;
-
-  vec3 p0 = vec3(a0.xy,h.x);
-  vec3 p1 = vec3(a0.zw,h.y);
-  vec3 p2 = vec3(a1.xy,h.z);
-  vec3 p3 = vec3(a1.zw,h.w);
-
-//Normalise gradients
-  vec4 norm = taylorInvSqrt3(vec4(dot(p0,p0), dot(p1,p1), dot(p2, p2), dot(p3,p3)));
-  p0 *= norm.x;
-  p1 *= norm.y;
-  p2 *= norm.z;
-  p3 *= norm.w;
-
-// Mix final noise value
-  vec4 m = max(0.6 - vec4(dot(x0,x0), dot(x1,x1), dot(x2,x2), dot(x3,x3)), 0.0);
-  m = m * m;
-  return 42.0 * dot( m*m, vec4( dot(p0,x0), dot(p1,x1), 
-                                dot(p2,x2), dot(p3,x3) ) );
-}
+
+#include <MATH_COMMON>
+
+// fbm + simplex helpers (chunks.js, shared with the raymarcher)
+#ifdef NOISE_VOLUME
+// Baked by NoiseBaker: r = gradient noise, g/b = Manhattan Worley F1/F2 (ShaderScene.setNoiseVolume)
+uniform highp sampler3D u_noise_volume;
+#include <NOISE_SOURCE.volume>
+#else
+#include <NOISE_SOURCE.procedural>
+#endif
 
 // fbm variant for warp
 float fbmNoise(vec3 st) {
@@ -126,7 +68,8 @@ float fbmNoise(vec3 st) {
     float a = 1.;
     float t = 0.0;    
 
-    for (int i=0; i < u_warp_harmonics; i++) {
+    for (int i=0; i < MAX_NOISE_OCTAVES; i++) {
+        if (i >= u_warp_harmonics) break;
         t += a * snoise(freq*st);
         freq *= u_warp_lacunarity; 
         a *= (G);
@@ -135,38 +78,24 @@ float fbmNoise(vec3 st) {
     return t * u_warp_amplitude; 
 }
 
-#define rotate(angle) mat2(cos(angle), -sin(angle), sin(angle), cos(angle))
-
 // iterative domain warp (from your raymarch shader)
 void warp(inout vec2 uv) {
     vec2 dxdy = vec2(0.0);
   float dx = 0.0;
   float dy = 0.0;
-  for (int i = 0; i < u_warp_layers; i++) {
+  for (int i = 0; i < MAX_WARP_LAYERS; i++) {
+    if (i >= u_warp_layers) break;
     dxdy.x += fbmNoise(vec3(uv, u_time * 0.01));
     dxdy.y += fbmNoise(vec3(uv + vec2(-40.0, 15.0), u_time * 0.01));
     // dx = floor(dx * 8.0) / 8.0;
     // // dy = floor(dy * 8.0) / 8.0;
-    // dxdy *= rotate(PI/6.0);
+    // dxdy *= rot2D(PI/6.0);
     uv.x += dxdy.x;
     uv.y += dxdy.y;
   }
 }
 
-vec4 blur(sampler2D tex, vec2 uv, float blur_amount){
-    vec2 texelSize = 1.0 / u_resolution;
-    vec4 result = vec4(0.0);
-    float totalWeight = 0.0;
-    for (int x = -2; x <= 2; x++) {
-        for (int y = -2; y <= 2; y++) {
-            vec2 offset = vec2(float(x), float(y)) * texelSize * blur_amount;
-            float weight = exp(-0.5 * (float(x*x + y*y)) / 2.0);
-            result += texture(tex, uv + offset) * weight;   // <-- texture()
-            totalWeight += weight;
-        }
-    }
-    return result / totalWeight;
-}
+#include <BLUR_FX>
 
 float fbmNoiseFeedback(vec3 st, float gain, float harmonics, float lacunarity, float amp) {
     float G = gain * 1.; // gain
@@ -174,9 +103,10 @@ float fbmNoiseFeedback(vec3 st, float gain, float harmonics, float lacunarity, f
     float a = 1.;
     float t = 0.0;
 
-    int maxIterations = int(clamp(ceil(harmonics), 1.0, 5.0));
+    int maxIterations = int(clamp(ceil(harmonics), 1.0, min(5.0, float(MAX_NOISE_OCTAVES))));
 
-    for (int i=0; i < maxIterations; i++) {
+    for (int i=0; i < MAX_NOISE_OCTAVES; i++) {
+        if (i >= maxIterations) break;
         t += a * snoise(freq*st);
         freq *= lacunarity; // lacunarity
         a *= (G);
@@ -194,7 +124,8 @@ vec2 calculateFeedback(vec2 currentUV){
     float fbScale = 1. / u_feedback_noise_scale;
     vec2 noiseValue = vec2(0.0);
     float expo = u_feedback_exponent;
-    for(int i = 0; i < u_feedback_layers; i++) {
+    for(int i = 0; i < MAX_FEEDBACK_LAYERS; i++) {
+        if (i >= u_feedback_layers) break;
         float layerSeed = u_feedback_seed + float(i) * 10.0;
         noiseValue.x += fbmNoiseFeedback(vec3(uv * fbScale + vec2(layerSeed, 0.0),
                                u_time * 0.01),
@@ -292,6 +223,9 @@ vec3 rand3DWorley(vec3 n) {
 }
 
 vec2 getWorleyDataManhattanF2(vec3 p) {
+#ifdef NOISE_VOLUME
+    return texture(u_noise_volume, p / NOISE_VOLUME_PERIOD).gb;
+#else
     vec3 cell = floor(p);
     vec3 f_st = fract(p);
     
@@ -319,6 +253,7 @@ vec2 getWorleyDataManhattanF2(vec3 p) {
         }
     }
     return vec2(min_dist_f1, min_dist_f2);
+#endif
 }
 
 void worleyOverlay(inout vec2 uv) {
@@ -445,7 +380,7 @@ void mainImage(out vec4 fragColor, in vec2 fragCoord) {
     if (u_uv_mirror_x > 0.5) uv.x = abs(uv.x);
     if (u_uv_mirror_y > 0.5) uv.y = abs(uv.y);
     
-    uv.xy *= rotate(u_uv_rotate * TWO_PI);
+    uv.xy *= rot2D(u_uv_rotate * TWO_PI);
     // uv = abs(uv);
     precamWarp(uv);
     warp(uv); 
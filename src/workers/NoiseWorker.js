@@ -0,0 +1,16 @@
+import { NoiseBaker } from '../engine/NoiseBaker.js';
+
+// Bakes NoiseBaker volumes off the thread that renders (a 128³ volume is seconds of gradient
+// evaluations and Worley searches). In render-worker mode this runs nested under RenderWorker.js.
+//
+// Messages in:  { id, seed, size }
+// Messages out: { id, data } (RGBA half floats, transferred) | { id, error }
+self.onmessage = (e) => {
+    const { id, seed, size } = e.data;
+    try {
+        const data = NoiseBaker.bakeVolume(seed, size);
+        self.postMessage({ id, data }, [data.buffer]);
+    } catch (err) {
+        self.postMessage({ id, error: err.message });
+    }
+};
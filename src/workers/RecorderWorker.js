@@ -0,0 +1,231 @@
+import { Muxer as Mp4Muxer, StreamTarget as Mp4StreamTarget } from 'mp4-muxer';
+import { Muxer as WebmMuxer, StreamTarget as WebmStreamTarget } from 'webm-muxer';
+
+// Encoding side of the VideoRecorder (src/managers/VideoRecorder.js). Receives VideoFrames from the
+// main thread, encodes them with WebCodecs and muxes incrementally into a sink, so the finished
+// file never sits in memory: only the encoder queue and one muxer chunk are resident.
+//
+//   main -> worker   { type: 'start', config, sink }   { type: 'frame', frame, seq, keyFrame }   { type: 'stop' }
+//   worker -> main   { type: 'started', codec, container }   { type: 'status', ... }   { type: 'stopped', ... }   { type: 'error', message }
+
+const CODEC_FALLBACKS = ['avc1.640034', 'vp09.00.51.08', 'av01.0.12M.08', 'vp8'];
+const CHUNK_SIZE = 4 * 1024 * 1024; // muxer output is flushed to the sink in chunks of this size
+
+let encoder = null;
+let muxer = null;
+let sink = null;
+let config = null;
+let lastSeq = 0;
+let frames = 0;
+let resized = 0;
+let scaler = null;
+let failed = false;
+
+self.onmessage = async (e) => {
+    const msg = e.data;
+    try {
+        if (msg.type === 'start') await start(msg.config, msg.sink);
+        else if (msg.type === 'frame') encode(msg);
+        else if (msg.type === 'stop') await stop();
+    } catch (err) {
+        fail(err);
+    }
+};
+
+// --- SETUP ---
+async function start(requested, sinkConfig) {
+    const resolved = await resolveConfig(requested);
+    if (!resolved) throw new Error(`No supported encoder config for ${requested.codec} at ${requested.width}x${requested.height}`);
+    config = { ...requested, codec: resolved.codec };
+    const container = config.codec === 'vp8' ? 'webm' : 'mp4';
+
+    const name = `${sinkConfig.name}.${container}`;
+    sink = sinkConfig.kind === 'upload' ? new UploadSink({ ...sinkConfig, name }) : new OpfsSink({ ...sinkConfig, name });
+    await sink.open();
+
+    const onData = (data, position) => sink.write(data, position);
+    muxer = container === 'webm'
+        ? new WebmMuxer({
+            target: new WebmStreamTarget({ onData, chunked: true, chunkSize: CHUNK_SIZE }),
+            video: { codec: webmCodec(config.codec), width: config.width, height: config.height, frameRate: config.fps },
+            streaming: true,
+            firstTimestampBehavior: 'offset'
+        })
+        : new Mp4Muxer({
+            target: new Mp4StreamTarget({ onData, chunked: true, chunkSize: CHUNK_SIZE }),
+            video: { codec: mp4Codec(config.codec), width: config.width, height: config.height, frameRate: config.fps },
+            fastStart: 'fragmented', // append-only: a cut-off recording is still playable up to the last fragment
+            firstTimestampBehavior: 'offset'
+        });
+
+    encoder = new VideoEncoder({
+        output: (chunk, meta) => muxer.addVideoChunk(chunk, meta),
+        error: fail
+    });
+    encoder.configure(resolved);
+    encoder.addEventListener('dequeue', report);
+
+    self.postMessage({ type: 'started', codec: config.codec, container });
+}
+
+// Tries the requested codec first, then the fallbacks, keeping the requested size / bitrate
+async function resolveConfig(requested) {
+    const candidates = [requested.codec, ...CODEC_FALLBACKS.filter(c => c !== requested.codec)];
+    for (const codec of candidates) {
+        const candidate = {
+            codec,
+            width: requested.width,
+            height: requested.height,
+            bitrate: requested.bitrate,
+            framerate: requested.fps,
+            latencyMode: 'quality',
+            ...(codec.startsWith('avc1') ? { avc: { format: 'avc' } } : {})
+        };
+        try {
+            const { supported } = await VideoEncoder.isConfigSupported(candidate);
+            if (supported) return candidate;
+        } catch {
+            // malformed codec string: try the next one
+        }
+    }
+    return null;
+}
+
+function mp4Codec(codec) {
+    if (codec.startsWith('avc1')) return 'avc';
+    if (codec.startsWith('hvc1') || codec.startsWith('hev1')) return 'hevc';
+    if (codec.startsWith('vp09')) return 'vp9';
+    if (codec.startsWith('av01')) return 'av1';
+    throw new Error(`Codec ${codec} can't go in an MP4`);
+}
+
+function webmCodec(codec) {
+    return { vp8: 'V_VP8' }[codec] ?? (codec.startsWith('vp09') ? 'V_VP9' : 'V_AV1');
+}
+
+// --- ENCODING ---
+function encode({ frame, seq, keyFrame }) {
+    lastSeq = seq;
+    if (!encoder || failed || encoder.state !== 'configured') {
+        frame.close();
+        return;
+    }
+
+    // The canvas can be resized mid-recording; the stream can't, so such frames are scaled to fit
+    let input = frame;
+    if (frame.displayWidth !== config.width || frame.displayHeight !== config.height) {
+        input = scale(frame);
+        frame.close();
+        resized++;
+    }
+
+    encoder.encode(input, { keyFrame });
+    input.close();
+    frames++;
+    report();
+}
+
+function scale(frame) {
+    if (!scaler) scaler = new OffscreenCanvas(config.width, config.height).getContext('2d');
+    scaler.drawImage(frame, 0, 0, config.width, config.height);
+    return new VideoFrame(scaler.canvas, { timestamp: frame.timestamp, duration: frame.duration ?? undefined });
+}
+
+function report() {
+    self.postMessage({
+        type: 'status',
+        seq: lastSeq,
+        queue: encoder ? encoder.encodeQueueSize : 0,
+        pendingBytes: sink ? sink.pendingBytes : 0,
+        frames
+    });
+}
+
+async function stop() {
+    if (!failed) {
+        if (encoder?.state === 'configured') await encoder.flush();
+        muxer?.finalize();
+        await sink?.close();
+    }
+    if (encoder && encoder.state !== 'closed') encoder.close();
+    self.postMessage({ type: 'stopped', frames, resized, bytes: sink?.bytes ?? 0 });
+    encoder = muxer = sink = null;
+}
+
+function fail(err) {
+    if (failed) return;
+    failed = true;
+    self.postMessage({ type: 'error', message: err?.message ?? String(err) });
+    sink?.abort?.();
+}
+
+// --- SINKS ---
+// Origin-private file system: synchronous access handles (worker-only) write straight to disk.
+class OpfsSink {
+    constructor({ name }) {
+        this.name = name;
+        this.bytes = 0;
+        this.pendingBytes = 0;
+    }
+
+    async open() {
+        const root = await navigator.storage.getDirectory();
+        const handle = await root.getFileHandle(this.name, { create: true });
+        this.access = await handle.createSyncAccessHandle();
+        this.access.truncate(0);
+    }
+
+    write(data, position) {
+        this.access.write(data, { at: position });
+        this.bytes = Math.max(this.bytes, position + data.byteLength);
+    }
+
+    async close() {
+        this.access.flush();
+        this.access.close();
+    }
+
+    abort() {
+        try { this.access?.close(); } catch { /* already closed */ }
+    }
+}
+
+// Local upload endpoint (server/frameserver.js): chunks are PUT in order with their file offset.
+// Uploads run one at a time; pendingBytes is what the main thread throttles capture on.
+class UploadSink {
+    constructor({ url, name }) {
+        this.url = `${url.replace(/\/$/, '')}/recordings/${encodeURIComponent(name)}`;
+        this.bytes = 0;
+        this.pendingBytes = 0;
+        this.chain = Promise.resolve();
+        this.error = null;
+    }
+
+    async open() {
+        const res = await fetch(`${this.url}?offset=0&truncate=1`, { method: 'PUT', body: new Uint8Array(0) });
+        if (!res.ok) throw new Error(`Upload endpoint refused the recording (${res.status})`);
+    }
+
+    write(data, position) {
+        // Copied: the chunk must outlive this call and the muxer may reuse its buffer
+        const body = data.slice();
+        this.pendingBytes += body.byteLength;
+        this.chain = this.chain.then(async () => {
+            if (this.error) return;
+            const res = await fetch(`${this.url}?offset=${position}`, { method: 'PUT', body });
+            if (!res.ok) throw new Error(`Upload failed at offset ${position} (${res.status})`);
+            this.bytes = Math.max(this.bytes, position + body.byteLength);
+        }).catch(err => {
+            this.error = err;
+            fail(err);
+        }).finally(() => {
+            this.pendingBytes -= body.byteLength;
+            report();
+        });
+    }
+
+    async close() {
+        await this.chain;
+        if (this.error) throw this.error;
+    }
+}
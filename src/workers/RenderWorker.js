@@ -0,0 +1,112 @@
+import { ShaderScene } from '../engine/ShaderScene.js';
+import { RenderState } from '../engine/RenderState.js';
+import { SyncProtocol } from '../managers/SyncProtocol.js';
+import { VideoRecorder } from '../managers/VideoRecorder.js';
+import { LazyManagers } from '../managers/LazyManagers.js';
+
+// Render side of render-worker mode (see src/engine/RenderHost.js): ShaderScene draws into the
+// transferred OffscreenCanvas on this thread's requestAnimationFrame, so DOM, MIDI and WebSocket
+// work on the page never delays a frame.
+//
+// Messages in:  init { canvas, search, viewport, timeOrigin } | uniforms { frame }
+//               | assign { path, value } | call { id, path, args } | resize { viewport } | image { bitmap }
+// Messages out: ready { state, startup } | stats { stats, live } | result { id, value | error }
+//               | layout | recordingError
+
+// Methods the host may call, by the first element of the path
+const CALLABLE = new Set(['setCanvasSize', 'setRenderSize', 'redraw', 'captureScreenshot', 'toggleCheckerboard', 'toggleBounds', 'cycleConePrepass', 'measureSteps', 'setQuality', 'toggleNoiseVolume', 'qualityBench', 'profiler', 'governor', 'exporter', 'setlist']);
+
+let scene = null;
+let table = null;
+
+// ExportManager's part of the render loop, plus the recording calls RenderHost's RemoteRecorder makes
+class WorkerExporter {
+    constructor(scene) {
+        this.scene = scene;
+        this.recorder = null;
+    }
+
+    captureFrame(now) {
+        this.recorder?.capture(now);
+    }
+
+    async startRecording() {
+        if (!VideoRecorder.supported) throw new Error('WebCodecs unavailable in workers here');
+        this.recorder = new VideoRecorder(this.scene, { onError: () => self.postMessage({ type: 'recordingError' }) });
+        try {
+            return await this.recorder.start();
+        } catch (err) {
+            this.recorder = null;
+            throw err;
+        }
+    }
+
+    async stopRecording() {
+        const recorder = this.recorder;
+        this.recorder = null;
+        return recorder ? recorder.stop() : null;
+    }
+}
+
+// The scene draws its placeholder frame right away; the snapshot waits for its post chain
+async function init({ canvas, search, viewport, timeOrigin }) {
+    scene = new ShaderScene({
+        worker: true,
+        canvas,
+        search,
+        viewport,
+        timeOrigin,
+        onStats: (stats) => self.postMessage({ type: 'stats', stats, live: RenderState.snapshot(scene, RenderState.LIVE) }),
+        onLayout: () => self.postMessage({ type: 'layout' })
+    });
+    scene.exporter = new WorkerExporter(scene);
+    table = SyncProtocol.buildTable(scene.uniforms);
+    await scene.ready;
+    self.postMessage({ type: 'ready', state: RenderState.snapshot(scene), startup: scene.startup });
+}
+
+// Queued like any other input, so rebuilds are debounced here and writes land once per frame
+function applyUniforms(frame) {
+    const ok = SyncProtocol.forEachUpdate(table, frame, (name, size, values, o) => {
+        scene.params.set(name, size === 1 ? values[o] : values.slice(o, o + size), { source: 'host' });
+    });
+    if (!ok) console.warn('⚠️ Render worker: uniform table mismatch with the page, update dropped');
+}
+
+async function call({ id, path, args }) {
+    try {
+        if (!CALLABLE.has(path[0])) throw new Error(`Not callable from the page: ${path.join('.')}`);
+        // The page's proxies reach managers this side may not have imported yet
+        if (path.length > 1 && path[0] in LazyManagers.MODULES) await scene.load(path[0]);
+        const owner = path.slice(0, -1).reduce((o, k) => o?.[k], scene);
+        const value = await owner[path[path.length - 1]](...args);
+        self.postMessage({ type: 'result', id, value });
+    } catch (err) {
+        self.postMessage({ type: 'result', id, error: err.message });
+    }
+}
+
+self.onmessage = (e) => {
+    const msg = e.data;
+    switch (msg.type) {
+        case 'init':
+            init(msg).catch(err => console.error('❌ Render worker startup failed:', err));
+            break;
+        case 'uniforms':
+            applyUniforms(msg.frame);
+            break;
+        case 'assign':
+            RenderState.assign(scene, msg.path, msg.value);
+            break;
+        case 'call':
+            call(msg);
+            break;
+        case 'resize':
+            scene.viewport = msg.viewport;
+            scene.resizeToViewport();
+            break;
+        case 'image':
+            scene.setImage(msg.bitmap);
+            break;
+    }
+};
@@ -1,11 +1,11 @@
+import argparse
+import difflib
+import hashlib
+import json
 import os
-
-# Validation: Ensure we are in the project root
-if not os.path.exists("src") or not os.path.exists("package.json"):
-    print("❌ Error: Please run this script in the root of your project (next to 'src' and 'package.json').")
-    exit()
-
-print("🚀 Updating project files in place...")
+import shutil
+import sys
+import tempfile
 
 files = {}
 
@@ -737,14 +737,150 @@ export class UIManager {
 """
 
 # --- WRITE FILES IN PLACE ---
-for filepath, content in files.items():
-    if not os.path.exists(filepath):
-        print(f"⚠️ Warning: Creating new file {filepath} (did not exist before)")
-    
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"✅ Updated: {filepath}")
-
-print("-" * 30)
-print("Project logic fully restored.")
-print("Restart your dev server to see changes.")
\ No newline at end of file
+MANIFEST_PATH = ".update_project_manifest.json"
+
+
+def sha256(data):
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def current_hash(filepath, manifest):
+    """Hash of the file on disk, or None if missing. Trusts the manifest while size + mtime match."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+
+    entry = manifest.get(filepath)
+    if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return entry["sha256"]
+
+    with open(filepath, encoding="utf-8") as f:
+        return sha256(f.read())
+
+
+def atomic_write(filepath, content):
+    """Write to a temp file next to the target, then rename over it so readers never see a partial module."""
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def show_diff(filepath, content):
+    old = ""
+    if os.path.exists(filepath):
+        with open(filepath, encoding="utf-8") as f:
+            old = f.read()
+    sys.stdout.writelines(difflib.unified_diff(
+        old.splitlines(keepends=True), content.splitlines(keepends=True),
+        fromfile=f"a/{filepath}", tofile=f"b/{filepath}"))
+
+
+def restore(dry_run=False, check=False):
+    print("🚀 Updating project files in place..." if not (dry_run or check) else "🔍 Comparing project files...")
+
+    manifest = load_manifest()
+    changed = []
+
+    for filepath, content in files.items():
+        wanted = sha256(content)
+        if current_hash(filepath, manifest) == wanted:
+            print(f"⏭️ Unchanged: {filepath}")
+            continue
+
+        changed.append(filepath)
+        if check:
+            print(f"❌ Drift: {filepath}")
+            continue
+        if dry_run:
+            show_diff(filepath, content)
+            continue
+
+        if not os.path.exists(filepath):
+            print(f"⚠️ Warning: Creating new file {filepath} (did not exist before)")
+        atomic_write(filepath, content)
+        st = os.stat(filepath)
+        manifest[filepath] = {"sha256": wanted, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        print(f"✅ Updated: {filepath}")
+
+    print("-" * 30)
+    if check:
+        print(f"{len(changed)} file(s) out of date." if changed else "Everything up to date.")
+        return 1 if changed else 0
+    if dry_run:
+        print(f"{len(changed)} file(s) would change.")
+        return 0
+
+    if changed:
+        atomic_write(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+        print("Project logic fully restored.")
+        print("Restart your dev server to see changes.")
+    else:
+        print("Nothing to write, dev server left untouched.")
+    return 0
+
+
+def variants(argv):
+    # Imported lazily so the restore path keeps working with a bare Python install
+    import shader_variants
+
+    parser = argparse.ArgumentParser(
+        prog="update_project.py variants",
+        description="Enumerate, dedupe and validate every ShaderAssembler variant.")
+    shader_variants.add_arguments(parser)
+    return shader_variants.run(parser.parse_args(argv))
+
+
+def profile(argv):
+    # Needs NumPy, which the restore path and the variant sweep don't
+    import raymarch_profile
+
+    parser = argparse.ArgumentParser(
+        prog="update_project.py profile",
+        description="March exported presets on the CPU and report per-pixel step counts.")
+    raymarch_profile.add_arguments(parser)
+    return raymarch_profile.run(parser.parse_args(argv))
+
+
+def main(argv):
+    # Validation: Ensure we are in the project root
+    if not os.path.exists("src") or not os.path.exists("package.json"):
+        print("❌ Error: Please run this script in the root of your project (next to 'src' and 'package.json').")
+        return 1
+
+    if argv and argv[0] == "variants":
+        return variants(argv[1:])
+    if argv and argv[0] == "profile":
+        return profile(argv[1:])
+
+    parser = argparse.ArgumentParser(description="Restore the project files embedded in this script.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="print a unified diff instead of writing")
+    mode.add_argument("--check", action="store_true", help="exit non-zero if any file differs")
+    args = parser.parse_args(argv)
+    return restore(dry_run=args.dry_run, check=args.check)
+
+
+# Guarded so the variant sweep's worker processes can import this module safely
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+import fs from 'node:fs';
+import path from 'node:path';
+import { fileURLToPath, pathToFileURL } from 'node:url';
+import { normalizePath } from 'vite';
+import { GlslPreprocess } from './src/engine/GlslPreprocess.js';
+import { GlslSymbols } from './src/engine/GlslSymbols.js';
+
+// GLSL preprocessing for the shader sources:
+//   .glsl?raw   #include <CHUNK> lines resolve to chunks.js exports (dev and build); in a build the
+//               result is also pruned to what main() reaches and minified
+//   chunks.js   in a build, replaced by a module of minified strings plus CHUNK_SYMBOLS, the
+//               library's GlslSymbols tables, so the assembler joins and scans less per variant
+//               and drivers tokenize less per compile
+// Dev keeps the sources as written, so compile errors point at readable lines.
+const CHUNKS = normalizePath(path.resolve(path.dirname(fileURLToPath(import.meta.url)), 'src/engine/chunks.js'));
+
+// Spliced into templates at their /*@NAME@*/ markers (or prepended as defines), never parsed alone
+const FRAGMENTS = new Set(['QUALITY_TIERS', 'VARIANT_HOOKS', 'SHAPE_MODE_FX', 'SDF_BOUNDS', 'SHAPE_MODE_BOUNDS']);
+
+async function loadChunks() {
+    // Query busts Node's module cache when chunks.js changes under the dev server
+    return import(`${pathToFileURL(CHUNKS).href}?t=${fs.statSync(CHUNKS).mtimeMs}`);
+}
+
+// chunks.js as JSON-literal exports; strings shared by identity with the CHUNK_SYMBOLS entries
+function emitChunks(chunks) {
+    const literals = new Map(); // minified source -> const name
+    const literal = (source) => {
+        const text = GlslPreprocess.minify(source);
+        if (!literals.has(text)) literals.set(text, `c${literals.size}`);
+        return literals.get(text);
+    };
+
+    const exports = [];
+    const library = [];
+    Object.entries(chunks).forEach(([name, value]) => {
+        if (name === 'CHUNK_SYMBOLS') return;
+        if (typeof value === 'string') {
+            exports.push(`export const ${name} = ${literal(value)};`);
+            if (!FRAGMENTS.has(name)) library.push(value);
+        } else {
+            const entries = Object.entries(value).map(([key, v]) => `${JSON.stringify(key)}: ${literal(v)}`);
+            exports.push(`export const ${name} = { ${entries.join(', ')} };`);
+            if (!FRAGMENTS.has(name)) library.push(...Object.values(value));
+        }
+    });
+
+    // Templates are parsed after their hooks are filled, so only hook-free chunks get a table; all
+    // of them count towards the declared names refs are narrowed to
+    const minified = library.map(source => GlslPreprocess.minify(source));
+    const names = new Set(minified.flatMap(source => GlslSymbols.parse(source.replace(/\/\*@\w+@\*\//g, '')).map(d => d.name)));
+    const tables = GlslPreprocess.encodeSymbols(minified.filter(source => !source.includes('/*@')), names);
+    const symbols = tables.map(([source, decls]) => `[${literals.get(source)}, ${JSON.stringify(decls)}]`);
+
+    return [
+        ...[...literals].map(([text, id]) => `const ${id} = ${JSON.stringify(text)};`),
+        ...exports,
+        `export const CHUNK_SYMBOLS = [\n${symbols.join(',\n')}\n];`
+    ].join('\n');
+}
+
+export default function glsl() {
+    let build = false;
+    return {
+        name: 'glsl-chunks',
+        enforce: 'pre', // ahead of Vite's own ?raw loader
+
+        configResolved(config) {
+            build = config.command === 'build';
+        },
+
+        async load(id) {
+            const [file, query] = id.split('?');
+            if (!file.endsWith('.glsl') || query !== 'raw') return null;
+            this.addWatchFile(CHUNKS);
+            let source = GlslPreprocess.resolveIncludes(fs.readFileSync(file, 'utf8'), await loadChunks(), path.basename(file));
+            if (build) source = GlslPreprocess.minify(GlslPreprocess.prune(source));
+            return `export default ${JSON.stringify(source)};`;
+        },
+
+        async transform(code, id) {
+            if (!build || id.split('?')[0] !== CHUNKS) return null;
+            return { code: emitChunks(await loadChunks()), map: null };
+        }
+    };
+}
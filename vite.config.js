@@ -1,8 +1,14 @@
 import { defineConfig } from 'vite'
+import glsl from './vite-plugin-glsl.js'
 
 export default defineConfig({
-  // No plugins needed for raw shader imports!
-  plugins: [], 
+  // Shader sources: #include of shared chunks, minified chunk library + symbol tables in builds
+  plugins: [glsl()],
+  // Render and recorder workers are module workers that import the engine
+  worker: {
+    format: 'es',
+    plugins: () => [glsl()]
+  },
   server: {
     host: true,
     port: 3000